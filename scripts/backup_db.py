@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Snapshot, list, or restore the cards database (CARDS_DB_PATH).
+
+Snapshots use SQLite's online backup API, so they're safe to take while the bot and
+webapp are running. Restoring first snapshots the current database (label "pre-restore"),
+then applies any migrations the restored snapshot predates. A restore only rebuilds the
+in-memory state of the process that runs it, so restart the bot and webapp afterwards
+so neither keeps serving members, cards or fights read before the restore.
+
+Run from the repo root:
+    uv run scripts/backup_db.py snapshot [--label manual]
+    uv run scripts/backup_db.py list [--label scheduled]
+    uv run scripts/backup_db.py restore PATH
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from superpal.cards import backup
+from superpal.cards.db import close_pool
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        if args.command == "snapshot":
+            print((await backup.snapshot(args.label)).summary())
+        elif args.command == "list":
+            for snap in backup.list_snapshots(args.label):
+                print(f"{snap.created_at:%Y-%m-%d %H:%M:%S}  {snap.size_bytes:>12,}  {snap.path}")
+        elif args.command == "restore":
+            before = await backup.restore(Path(args.path))
+            print(f"Restored {args.path}; previous contents saved as {before.path}")
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    snap_parser = sub.add_parser("snapshot", help="take a snapshot now")
+    snap_parser.add_argument("--label", default="manual")
+    list_parser = sub.add_parser("list", help="list snapshots, oldest first")
+    list_parser.add_argument("--label")
+    restore_parser = sub.add_parser("restore", help="restore a snapshot over the live database")
+    restore_parser.add_argument("path")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Compare per-call connection overhead: connect-per-call vs the pooled connections.
+
+Seeds a throwaway database, then times the same page-load read and draw-style write
+both ways, serially and with concurrent callers. Writes are also timed through
+transaction(), which folds concurrent writes into shared commits.
+
+Run from the repo root:
+    uv run scripts/bench_db_pool.py [--calls 2000] [--concurrency 16]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["CARDS_DB_PATH"] = str(Path(_tmp.name) / "bench.db")
+
+import aiosqlite  # noqa: E402
+
+from superpal.cards import db as db_mod  # noqa: E402
+
+_READ_SQL = "SELECT COALESCE(SUM(draws_used), 0) FROM draw_log WHERE user_id = ?"
+_WRITE_SQL = (
+    "INSERT INTO draw_log (user_id, week_start, draws_used) VALUES (?, '2026-01-05', 1) "
+    "ON CONFLICT(user_id, week_start) DO UPDATE SET draws_used = draws_used + 1"
+)
+
+
+async def _read_connect(i: int) -> None:
+    async with aiosqlite.connect(db_mod.DB_PATH) as db:
+        async with db.execute(_READ_SQL, (str(i % 50),)) as cur:
+            await cur.fetchone()
+
+
+async def _read_pooled(i: int) -> None:
+    async with db_mod.reader() as db:
+        async with db.execute(_READ_SQL, (str(i % 50),)) as cur:
+            await cur.fetchone()
+
+
+async def _write_connect(i: int) -> None:
+    async with aiosqlite.connect(db_mod.DB_PATH) as db:
+        await db.execute(_WRITE_SQL, (str(i % 50),))
+        await db.commit()
+
+
+async def _write_pooled(i: int) -> None:
+    async with db_mod.writer() as db:
+        await db.execute(_WRITE_SQL, (str(i % 50),))
+        await db.commit()
+
+
+async def _write_grouped(i: int) -> None:
+    async with db_mod.transaction() as db:
+        await db.execute(_WRITE_SQL, (str(i % 50),))
+
+
+async def _time(fn: Callable[[int], Awaitable[None]], calls: int, concurrency: int) -> float:
+    """Return mean microseconds per call with `concurrency` callers in flight."""
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with sem:
+            await fn(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    await db_mod.init_db()
+    cases = [
+        ("read", _read_connect, _read_pooled),
+        ("write", _write_connect, _write_pooled),
+        ("txn", _write_connect, _write_grouped),
+    ]
+    print(f"{'op':<6} {'callers':>7} {'connect µs':>11} {'pooled µs':>10} {'speedup':>8}")
+    for concurrency in (1, args.concurrency):
+        for name, before, after in cases:
+            old = await _time(before, args.calls, concurrency)
+            new = await _time(after, args.calls, concurrency)
+            print(f"{name:<6} {concurrency:>7} {old:>11.0f} {new:>10.0f} {old / new:>7.1f}x")
+    pool = db_mod.get_pool()
+    print(f"transaction(): {pool.units_committed} units in {pool.commits} commits")
+    await db_mod.close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
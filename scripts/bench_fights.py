@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Time battle actions with 1, 10 and 50 fights in progress at once.
+
+Seeds a throwaway database with a pair of players per fight, each fielding one legendary
+card, then plays every fight concurrently: both players attack in turn, rolling glancing
+blows so no fight ends early. Actions on one fight queue on that fight's lock; actions
+on different fights only share the writer, so per-action latency should grow far more
+slowly than the number of battles.
+
+Run from the repo root:
+    uv run scripts/bench_fights.py [--actions 16]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["CARDS_DB_PATH"] = str(Path(_tmp.name) / "bench.db")
+
+from superpal.cards import db as db_mod  # noqa: E402
+from superpal.cards import fight_service as fs  # noqa: E402
+from superpal.cards import service as svc  # noqa: E402
+
+FIGHTS = (1, 10, 50)
+
+
+async def _seed(fights: int, start: int) -> list[int]:
+    """`fights` active quick fights between fresh pairs of players; returns their ids."""
+    players = [f"p{start + i}" for i in range(fights * 2)]
+    await svc.sync_members(
+        [{"discord_id": pid, "display_name": pid, "avatar_url": None} for pid in players]
+    )
+    ids = []
+    for challenger, opponent in zip(players[::2], players[1::2], strict=True):
+        await svc.award_card(challenger, opponent, "legendary", 1)
+        await svc.award_card(opponent, challenger, "legendary", 1)
+        fight = await fs.create_fight(challenger, opponent, "quick")
+        await fs.accept_fight(fight.id)
+        for pid, card in ((challenger, opponent), (opponent, challenger)):
+            slot = {"card_member_id": card, "rarity": "legendary", "slot": 1}
+            await fs.set_fight_cards(fight.id, pid, [slot])
+            await fs.mark_player_ready(fight.id, pid)
+        ids.append(fight.id)
+    return ids
+
+
+async def _play(fight_id: int, actions: int, latencies: list[float]) -> None:
+    state = await fs.get_fight_state(fight_id)
+    for _ in range(actions):
+        t0 = time.perf_counter()
+        ok, err, state = await fs.process_action(
+            fight_id, state["current_turn_player_id"], "attack", {"attack_key": "vibe_check"}
+        )
+        latencies.append(time.perf_counter() - t0)
+        assert ok, err
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actions", type=int, default=16, help="actions per fight")
+    args = parser.parse_args()
+
+    await db_mod.init_db()
+    # Always a glancing Vibe Check: 17 damage a hit against 170 hp, so fights outlast the run.
+    with patch.object(fs, "roll_d20", return_value=1):
+        await _run(args.actions)
+    await db_mod.close_pool()
+
+
+async def _run(actions: int) -> None:
+    print(
+        f"{'fights':>6} {'actions/s':>10} {'p50 µs':>8} {'p95 µs':>8} {'max µs':>8} {'commits':>8}"
+    )
+    seeded = 0
+    for fights in FIGHTS:
+        ids = await _seed(fights, seeded)
+        seeded += fights * 2
+        latencies: list[float] = []
+        commits = db_mod.get_pool().commits
+        t0 = time.perf_counter()
+        await asyncio.gather(*(_play(fight_id, actions, latencies) for fight_id in ids))
+        elapsed = time.perf_counter() - t0
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95 = cuts[49] * 1e6, cuts[94] * 1e6
+        print(
+            f"{fights:>6} {len(latencies) / elapsed:>10.0f} {p50:>8.0f} {p95:>8.0f} "
+            f"{max(latencies) * 1e6:>8.0f} {db_mod.get_pool().commits - commits:>8}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
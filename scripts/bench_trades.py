@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Time trade creation and settlement for 1-, 10- and 50-card trades.
+
+Seeds a throwaway database with two traders holding one copy each of many different
+cards, then repeatedly lists, offers on and accepts trades of each size. Settlement
+validates and moves cards with a fixed number of statements, so accept_offer (the part
+that holds the write lock) should cost about the same at every size.
+
+Run from the repo root:
+    uv run scripts/bench_trades.py [--rounds 50]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["CARDS_DB_PATH"] = str(Path(_tmp.name) / "bench.db")
+
+from superpal.cards import db as db_mod  # noqa: E402
+from superpal.cards import query_stats  # noqa: E402
+from superpal.cards import service as svc  # noqa: E402
+from superpal.cards.models import CardRef  # noqa: E402
+
+SIZES = (1, 10, 50)
+RARITIES = ("common", "uncommon", "rare", "legendary")
+
+
+async def _seed(cards: int, rounds: int) -> list[CardRef]:
+    """Two traders, `cards` subjects, and enough copies of each for every round."""
+    now = datetime.now(timezone.utc).isoformat()
+    refs = [CardRef(f"card{i}", RARITIES[i % len(RARITIES)]) for i in range(cards)]
+    async with db_mod.transaction() as db:
+        await db.executemany(
+            "INSERT INTO members (discord_id, display_name, synced_at) VALUES (?, ?, ?)",
+            [(mid, mid, now) for mid in ("alice", "bob", *(r.member_id for r in refs))],
+        )
+        await db.executemany(
+            "INSERT INTO user_cards "
+            "(owner_id, card_member_id, rarity, quantity, first_acquired_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (owner, r.member_id, r.rarity, rounds * len(SIZES), now)
+                for owner in ("alice", "bob")
+                for r in refs
+            ],
+        )
+    return refs
+
+
+async def _trade(refs: list[CardRef], size: int) -> tuple[float, float, float, int]:
+    """One listing, offer and accept of `size` cards a side.
+
+    Returns seconds for each step, and how many statements the accept ran.
+    """
+    t0 = time.perf_counter()
+    listing = await svc.create_listing("alice", refs[:size], None)
+    t1 = time.perf_counter()
+    assert not isinstance(listing, str), listing
+    offer = await svc.create_offer(listing.id, "bob", refs[-size:])
+    t2 = time.perf_counter()
+    assert not isinstance(offer, str), offer
+    query_stats.reset()
+    t3 = time.perf_counter()
+    ok, err = await svc.accept_offer(offer.id, "alice")
+    t4 = time.perf_counter()
+    assert ok, err
+    statements = sum(s.count for s in query_stats.get_stats() if not s.sql.startswith("BEGIN"))
+    return t1 - t0, t2 - t1, t4 - t3, statements
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    await db_mod.init_db()
+    refs = await _seed(max(SIZES), args.rounds)
+    print(f"{'cards':>5} {'list µs':>9} {'offer µs':>9} {'accept µs':>10} {'accept stmts':>13}")
+    for size in SIZES:
+        totals = [0.0, 0.0, 0.0]
+        for _ in range(args.rounds):
+            *seconds, statements = await _trade(refs, size)
+            totals = [t + s for t, s in zip(totals, seconds, strict=True)]
+        list_us, offer_us, accept_us = (t / args.rounds * 1e6 for t in totals)
+        print(f"{size:>5} {list_us:>9.0f} {offer_us:>9.0f} {accept_us:>10.0f} {statements:>13}")
+    await db_mod.close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
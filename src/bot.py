@@ -14,7 +14,7 @@ from discord.ext import commands
 
 import superpal.env as superpal_env
 import superpal.notify as notify
-from superpal.cards.db import init_db
+from superpal.cards.db import close_pool, init_db
 from superpal.cards.service import sync_members
 from superpal.cogs import EXTENSIONS
 
@@ -103,10 +103,13 @@ async def _main() -> None:
     server = uvicorn.Server(config)
     assert superpal_env.TOKEN is not None, "SUPERPAL_TOKEN is required to start the bot"
     async with bot:
-        await asyncio.gather(
-            bot.start(superpal_env.TOKEN),
-            server.serve(),
-        )
+        try:
+            await asyncio.gather(
+                bot.start(superpal_env.TOKEN),
+                server.serve(),
+            )
+        finally:
+            await close_pool()
 
 
 if __name__ == "__main__":
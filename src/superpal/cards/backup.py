@@ -0,0 +1,159 @@
+"""Online snapshots of the cards database, taken while the bot and webapp keep running.
+
+A snapshot is made with SQLite's online backup API, BACKUP_STEP_PAGES pages per step, on
+a dedicated connection that holds one read transaction for the whole copy. Under WAL that
+read transaction pins a consistent view of the database without blocking writers, and it
+keeps concurrent commits from restarting the copy. The copy is written to a .partial
+file, checked with PRAGMA quick_check, and renamed into BACKUP_DIR only once it's sound.
+
+Scheduled snapshots are taken by the maintenance cog and rotated (rotate() keeps the
+newest BACKUP_KEEP of each label). On-demand ones come from /admin-backup or
+scripts/backup_db.py, which also lists and restores snapshots.
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import aiosqlite
+
+from superpal.cards import fight_service, service
+from superpal.cards.db import DB_PATH, init_db, writer
+
+BACKUP_DIR = Path(os.getenv("CARDS_BACKUP_DIR", str(Path(DB_PATH).parent / "backups")))
+# Snapshots kept per label by rotate(); the cog snapshots every 6h, so 28 is a week.
+BACKUP_KEEP: int = int(os.getenv("CARDS_BACKUP_KEEP", "28"))
+# Pages copied per backup step; the source is only locked for the duration of a step.
+BACKUP_STEP_PAGES = 256
+# Back-off (seconds) when a step finds the database busy.
+BACKUP_BUSY_SLEEP = 0.05
+
+_STEM = Path(DB_PATH).stem
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    path: Path
+    label: str
+    created_at: datetime
+    size_bytes: int
+    pages: int = 0
+    duration_s: float = 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Snapshot {self.path.name}: {self.size_bytes / 1_048_576:.2f} MiB, "
+            f"{self.pages} pages in {self.duration_s:.2f}s"
+        )
+
+
+def _snapshot_path(label: str, now: datetime) -> Path:
+    return BACKUP_DIR / f"{_STEM}-{now:%Y%m%dT%H%M%S%fZ}-{label}.db"
+
+
+def _parse(path: Path) -> Snapshot | None:
+    """Snapshot metadata from a file name written by _snapshot_path, or None."""
+    parts = path.stem.removeprefix(f"{_STEM}-").split("-", 1)
+    if len(parts) != 2:
+        return None
+    try:
+        created_at = datetime.strptime(parts[0], "%Y%m%dT%H%M%S%fZ").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return Snapshot(path, parts[1], created_at, path.stat().st_size)
+
+
+async def snapshot(label: str = "manual") -> Snapshot:
+    """Copy the live database into BACKUP_DIR. Returns where it went, its size and timing."""
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    path = _snapshot_path(label, now)
+    partial = path.with_suffix(".partial")
+    BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+    pages = 0
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        nonlocal pages
+        pages = total
+
+    try:
+        # Not a pooled reader: the copy can take a while and shouldn't occupy a reader slot.
+        async with aiosqlite.connect(DB_PATH) as src, aiosqlite.connect(partial) as dst:
+            await src.execute("BEGIN")
+            await src.execute("SELECT 1 FROM sqlite_master LIMIT 1")  # start the read
+            await src.backup(
+                dst, pages=BACKUP_STEP_PAGES, progress=progress, sleep=BACKUP_BUSY_SLEEP
+            )
+            await src.rollback()
+            async with dst.execute("PRAGMA quick_check") as cur:
+                row = await cur.fetchone()
+            assert row is not None
+            check = row[0]
+            # Standalone copies shouldn't need a -wal file next to them.
+            await dst.execute("PRAGMA journal_mode=DELETE")
+        if check != "ok":
+            raise sqlite3.DatabaseError(f"snapshot failed quick_check: {check}")
+        partial.replace(path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return Snapshot(path, label, now, path.stat().st_size, pages, time.perf_counter() - started)
+
+
+def list_snapshots(label: str | None = None) -> list[Snapshot]:
+    """Snapshots in BACKUP_DIR, oldest first, optionally only those with `label`."""
+    if not BACKUP_DIR.is_dir():
+        return []
+    found = (_parse(p) for p in BACKUP_DIR.glob(f"{_STEM}-*.db"))
+    return sorted(
+        (s for s in found if s is not None and (label is None or s.label == label)),
+        key=lambda s: s.created_at,
+    )
+
+
+def rotate(label: str, keep: int = BACKUP_KEEP) -> list[Path]:
+    """Delete all but the newest `keep` snapshots with `label`. Returns what was deleted."""
+    snapshots = list_snapshots(label)
+    doomed = [s.path for s in snapshots[: max(len(snapshots) - keep, 0)]]
+    for path in doomed:
+        path.unlink(missing_ok=True)
+    return doomed
+
+
+async def restore(path: Path) -> Snapshot:
+    """Replace the live database's contents with the snapshot at `path`.
+
+    Takes a "pre-restore" snapshot first, so a restore can itself be undone. The copy
+    runs on the pool's writer, so no write lands half-way through it; afterwards any
+    migrations the snapshot predates are applied, and this process's in-memory state
+    (member directory, autocomplete index, draw pool, live fights and their deadlines)
+    is dropped and rebuilt from the restored tables. Other processes using the database
+    keep theirs until they restart. Returns the pre-restore snapshot.
+    """
+    if not path.is_file():
+        raise FileNotFoundError(path)
+    async with aiosqlite.connect(f"file:{path}?mode=ro", uri=True) as src:
+        async with src.execute("PRAGMA quick_check") as cur:
+            row = await cur.fetchone()
+    assert row is not None
+    check = row[0]
+    if check != "ok":
+        raise sqlite3.DatabaseError(f"{path.name} failed quick_check: {check}")
+    before = await snapshot("pre-restore")
+    async with aiosqlite.connect(f"file:{path}?mode=ro", uri=True) as src, writer() as db:
+        await src.backup(db)
+    await init_db()
+    service.drop_caches()
+    await fight_service.reload_fights()
+    return before
+
+
+async def snapshot_and_rotate(label: str = "scheduled", keep: int = BACKUP_KEEP) -> Snapshot:
+    """snapshot() then rotate() — what the maintenance cog runs on its schedule."""
+    snap = await snapshot(label)
+    await asyncio.to_thread(rotate, label, keep)
+    return snap
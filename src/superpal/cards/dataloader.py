@@ -0,0 +1,66 @@
+"""Batch per-item lookups into one query, DataLoader-style.
+
+Code that renders a list tends to look up something per row: a display name per
+pending challenge, per offered card. A DataLoader collects every key requested during
+one turn of the event loop and resolves them with a single call to its batch function,
+such as one `IN (...)` query or one MemberDirectory.get_many, caching the results for
+the loader's lifetime. Create one per request or notification and let it go with it;
+keys are only batched if their loads are awaited together (asyncio.gather, or
+load_many).
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Iterable, Mapping
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BatchFn = Callable[[list[K]], Awaitable[Mapping[K, V]]]
+
+
+class DataLoader(Generic[K, V]):
+    """Coalesces load() calls made in the same event-loop turn into one batch call."""
+
+    def __init__(self, batch: BatchFn[K, V]):
+        self._batch = batch
+        self._results: dict[K, asyncio.Future[V | None]] = {}
+        self._queued: list[K] = []
+        self._running: set[asyncio.Task[None]] = set()
+        self.batches = 0
+
+    def load(self, key: K) -> asyncio.Future[V | None]:
+        """The value for key, or None if the batch function doesn't return one."""
+        fut = self._results.get(key)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = self._results[key] = loop.create_future()
+            self._queued.append(key)
+            if len(self._queued) == 1:
+                loop.call_soon(self._dispatch)
+        return fut
+
+    async def load_many(self, keys: Iterable[K]) -> list[V | None]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def _dispatch(self) -> None:
+        keys, self._queued = self._queued, []
+        self.batches += 1
+        task = asyncio.ensure_future(self._resolve(keys))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _resolve(self, keys: list[K]) -> None:
+        try:
+            found = await self._batch(keys)
+        except Exception as exc:
+            for key in keys:
+                # Failures aren't cached: a later load() of the key tries again.
+                fut = self._results.pop(key)
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for key in keys:
+            fut = self._results[key]
+            if not fut.done():
+                fut.set_result(found.get(key))
@@ -1,8 +1,25 @@
+import asyncio
+import logging
 import os
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, suppress
+from contextvars import Context, ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
 
 import aiosqlite
 
+from superpal.cards import query_stats
+
+log = logging.getLogger(__name__)
+
 DB_PATH: str = os.getenv("CARDS_DB_PATH", "cards.db")
+# Concurrent SELECTs allowed at once. WAL lets every reader proceed alongside the writer,
+# so this only bounds open file handles and worker threads, not correctness.
+READER_POOL_SIZE: int = int(os.getenv("CARDS_DB_READERS", "4"))
+# Most write units the writer folds into one COMMIT before it syncs and starts a new batch.
+GROUP_COMMIT_MAX: int = int(os.getenv("CARDS_DB_GROUP_COMMIT_MAX", "64"))
 
 _SCHEMA = """
 CREATE TABLE IF NOT EXISTS members (
@@ -148,87 +165,7 @@ CREATE TABLE IF NOT EXISTS trade_offer_items (
     card_member_id TEXT NOT NULL REFERENCES members(discord_id),
     rarity         TEXT NOT NULL CHECK(rarity IN ('common','uncommon','rare','legendary'))
 );
-"""
-
-
-async def init_db() -> None:
-    """Create all tables if they don't already exist."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        # WAL lets reads and writes proceed concurrently instead of serializing
-        # on one exclusive lock per write — without it, concurrent card draws
-        # and admin bulk-awards contend for the same lock and can time out.
-        await db.execute("PRAGMA journal_mode=WAL")
-        await db.executescript(_SCHEMA)
-        await db.commit()
-        # The DM-based pending_trades flow was replaced by the marketplace
-        # (trade_listings/trade_offers); drop the orphaned table.
-        await db.execute("DROP TABLE IF EXISTS pending_trades")
-        await db.commit()
-        # fight_sessions was folded into the unified sessions table.
-        await db.execute("DROP TABLE IF EXISTS fight_sessions")
-        await db.commit()
-        try:
-            await db.execute(
-                "ALTER TABLE members ADD COLUMN forced_rarity TEXT "
-                "CHECK(forced_rarity IN ('common','uncommon','rare','legendary'))"
-            )
-            await db.commit()
-        except aiosqlite.OperationalError:
-            pass  # column already exists
-        try:
-            await db.execute(
-                "ALTER TABLE members ADD COLUMN is_synthetic BOOLEAN NOT NULL DEFAULT 0"
-            )
-            await db.commit()
-        except aiosqlite.OperationalError:
-            pass  # column already exists
-        try:
-            await db.execute("ALTER TABLE user_cards ADD COLUMN drawn_by_name TEXT")
-            await db.commit()
-        except aiosqlite.OperationalError:
-            pass  # column already exists
-        try:
-            await db.execute("ALTER TABLE members ADD COLUMN bio TEXT")
-            await db.commit()
-        except aiosqlite.OperationalError:
-            pass  # column already exists
-        try:
-            await db.execute("ALTER TABLE members ADD COLUMN stats TEXT")
-            await db.commit()
-        except aiosqlite.OperationalError:
-            pass  # column already exists
-        try:
-            await db.execute("ALTER TABLE members ADD COLUMN pringle_balance INTEGER DEFAULT 0")
-            await db.commit()
-        except aiosqlite.OperationalError:
-            pass  # column already exists
-        try:
-            await db.execute("ALTER TABLE members ADD COLUMN bank_debt INTEGER DEFAULT 0")
-            await db.commit()
-        except aiosqlite.OperationalError:
-            pass  # column already exists
-        try:
-            await db.execute("ALTER TABLE fight_tokens ADD COLUMN session_token TEXT")
-            await db.commit()
-        except aiosqlite.OperationalError:
-            pass  # column already exists
-        try:
-            await db.execute("ALTER TABLE members ADD COLUMN palycoin_balance INTEGER DEFAULT 0")
-            await db.commit()
-        except aiosqlite.OperationalError:
-            pass  # column already exists
-        try:
-            await db.execute("ALTER TABLE members ADD COLUMN boin_balance INTEGER DEFAULT 0")
-            await db.commit()
-        except aiosqlite.OperationalError:
-            pass  # column already exists
-        try:
-            await db.execute("ALTER TABLE fights ADD COLUMN turn_started_at TIMESTAMP")
-            await db.commit()
-        except aiosqlite.OperationalError:
-            pass  # column already exists
-        await db.execute(
-            """CREATE TABLE IF NOT EXISTS markets (
+CREATE TABLE IF NOT EXISTS markets (
     id            INTEGER PRIMARY KEY AUTOINCREMENT,
     title         TEXT NOT NULL,
     description   TEXT,
@@ -241,11 +178,9 @@ async def init_db() -> None:
     created_at    DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     resolved_at   DATETIME,
     resolved_by   TEXT
-)"""
-        )
-        await db.commit()
-        await db.execute(
-            """CREATE TABLE IF NOT EXISTS market_bets (
+);
+
+CREATE TABLE IF NOT EXISTS market_bets (
     id          INTEGER PRIMARY KEY AUTOINCREMENT,
     market_id   INTEGER NOT NULL REFERENCES markets(id),
     player_id   TEXT NOT NULL,
@@ -253,17 +188,681 @@ async def init_db() -> None:
     amount      INTEGER NOT NULL,
     placed_at   DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     UNIQUE(market_id, player_id)
-)"""
-        )
-        await db.commit()
-        await db.execute(
-            """CREATE TABLE IF NOT EXISTS market_probability_history (
+);
+
+CREATE TABLE IF NOT EXISTS market_probability_history (
     id          INTEGER PRIMARY KEY AUTOINCREMENT,
     market_id   INTEGER NOT NULL REFERENCES markets(id),
     yes_pct     REAL NOT NULL,
     yes_pool    INTEGER NOT NULL,
     no_pool     INTEGER NOT NULL,
     recorded_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
-)"""
+);
+"""
+
+
+class _WriteUnit:
+    """One queued transaction() block, and the three hand-offs between it and the writer."""
+
+    __slots__ = ("committed", "done", "turn")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        # writer -> caller: your turn; here is the connection, inside a savepoint
+        self.turn: asyncio.Future[aiosqlite.Connection] = loop.create_future()
+        # caller -> writer: block finished; the exception it raised, or None
+        self.done: asyncio.Future[BaseException | None] = loop.create_future()
+        # writer -> caller: the batch containing this unit committed (or why it didn't)
+        self.committed: asyncio.Future[None] = loop.create_future()
+
+
+# The connection of the transaction() block the current task is inside, if any.
+_active_transaction: ContextVar[aiosqlite.Connection | None] = ContextVar(
+    "_active_transaction", default=None
+)
+# The connection of the snapshot() block the current task is inside, if any.
+_active_snapshot: ContextVar[aiosqlite.Connection | None] = ContextVar(
+    "_active_snapshot", default=None
+)
+
+
+class ConnectionPool:
+    """Long-lived connections to one SQLite file, shared by every service module.
+
+    Opening a connection costs a worker thread and a file handle, so services borrow
+    instead: up to `readers` read-only connections serve SELECTs concurrently, and a
+    single writer connection takes every write. Writers queue on an asyncio lock rather
+    than racing each other for SQLite's file lock. Connections open lazily on first use.
+
+    Service writes go through transaction(), which queues the block for a writer task
+    instead of taking the lock directly. Blocks that arrive together run back to back
+    inside one SQLite transaction, each under its own savepoint, and share one COMMIT.
+    """
+
+    def __init__(self, path: str, readers: int = READER_POOL_SIZE) -> None:
+        self.path = path
+        self._reader_slots = asyncio.Semaphore(readers)
+        self._idle_readers: list[aiosqlite.Connection] = []
+        self._writer: aiosqlite.Connection | None = None
+        self._writer_lock = asyncio.Lock()
+        self._write_queue: asyncio.Queue[_WriteUnit] | None = None
+        self._write_task: asyncio.Task[None] | None = None
+        self._closed = False
+        # Group-commit counters: units_committed / commits is the mean batch size.
+        self.commits = 0
+        self.units_committed = 0
+
+    async def _open(self, *, query_only: bool) -> aiosqlite.Connection:
+        conn = await query_stats.connect(self.path)
+        if query_only:
+            # A borrowed reader that tries to write fails loudly instead of taking the
+            # file lock behind the writer's back.
+            await conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    async def _reset(self, conn: aiosqlite.Connection) -> None:
+        """Return a borrowed connection to a clean state for the next borrower.
+
+        A service may bail out mid-transaction (e.g. after `BEGIN EXCLUSIVE` finds no
+        card to draw); closing a one-shot connection used to roll that back implicitly.
+        """
+        if conn.in_transaction:
+            await conn.rollback()
+        conn.row_factory = None
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection, or share the one of an enclosing snapshot().
+
+        A shared connection may be serving other tasks' readers at the same time, so
+        don't change its state: set a row_factory on the cursor, not the connection.
+        """
+        shared = _active_snapshot.get()
+        if shared is not None:
+            yield shared
+            return
+        async with self._reader_slots:
+            conn = (
+                self._idle_readers.pop()
+                if self._idle_readers
+                else await self._open(query_only=True)
+            )
+            try:
+                yield conn
+            finally:
+                await self._reset(conn)
+                if self._closed:
+                    await conn.close()
+                else:
+                    self._idle_readers.append(conn)
+
+    @asynccontextmanager
+    async def snapshot(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Serve every reader() inside the block from one connection and one read transaction.
+
+        Everything read in the block sees the database as of its start, however many
+        services it calls. Writes still go through transaction() and are not visible to
+        the snapshot until it ends. A snapshot() inside another one shares it.
+        """
+        if _active_snapshot.get() is not None:
+            async with self.reader() as db:
+                yield db
+            return
+        async with self.reader() as db:
+            await db.execute("BEGIN")
+            async with db.execute("SELECT 1 FROM sqlite_master LIMIT 1") as cur:
+                await cur.fetchone()  # a deferred BEGIN only takes its snapshot on first read
+            token = _active_snapshot.set(db)
+            try:
+                yield db
+            finally:
+                _active_snapshot.reset(token)
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow the writer connection. Held exclusively until the block exits."""
+        async with self._writer_lock:
+            if self._writer is None:
+                self._writer = await self._open(query_only=False)
+            conn = self._writer
+            try:
+                yield conn
+            finally:
+                await self._reset(conn)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Run the block as one atomic write unit on the writer connection.
+
+        The block must not BEGIN, COMMIT or ROLLBACK itself. If it raises, only its own
+        changes are rolled back and the exception propagates; otherwise the block exits
+        once its changes are committed. A transaction() opened inside another one joins
+        it under a nested savepoint.
+        """
+        outer = _active_transaction.get()
+        if outer is not None:
+            await outer.execute("SAVEPOINT nested")
+            try:
+                yield outer
+            except BaseException:
+                await outer.execute("ROLLBACK TO nested")
+                raise
+            finally:
+                await outer.execute("RELEASE nested")
+            return
+
+        unit = _WriteUnit(asyncio.get_running_loop())
+        self._submit(unit)
+        try:
+            db = await unit.turn
+        except asyncio.CancelledError:
+            if unit.turn.done() and not unit.turn.cancelled():
+                # Cancelled just as our turn came up; hand the writer straight back.
+                unit.done.set_result(None)
+            raise
+        token = _active_transaction.set(db)
+        try:
+            yield db
+        except BaseException as exc:
+            unit.done.set_result(exc)
+            raise
+        finally:
+            _active_transaction.reset(token)
+            if not unit.done.done():
+                unit.done.set_result(None)
+        await unit.committed
+
+    def _submit(self, unit: _WriteUnit) -> None:
+        loop = asyncio.get_running_loop()
+        if (
+            self._write_task is None
+            or self._write_task.done()
+            or self._write_task.get_loop() is not loop
+        ):
+            self._write_queue = asyncio.Queue()
+            # A fresh context: the writer outlives whichever caller happened to start it,
+            # and shouldn't inherit that caller's snapshot or query count.
+            self._write_task = loop.create_task(
+                self._run_writes(self._write_queue), context=Context()
+            )
+        assert self._write_queue is not None
+        self._write_queue.put_nowait(unit)
+
+    async def _run_writes(self, queue: asyncio.Queue[_WriteUnit]) -> None:
+        """Writer task: drain the queue, one transaction per burst of queued units."""
+        while True:
+            unit = await queue.get()
+            batch: list[_WriteUnit] = []
+            try:
+                async with self.writer() as db:
+                    await db.execute("BEGIN IMMEDIATE")
+                    while True:
+                        if await self._run_unit(db, unit, isolate=bool(batch)):
+                            batch.append(unit)
+                        if queue.empty() or len(batch) >= GROUP_COMMIT_MAX:
+                            break
+                        unit = queue.get_nowait()
+                    await db.commit()
+            except Exception as exc:
+                log.exception("Write batch of %d unit(s) failed to commit", len(batch))
+                for waiting in [*batch, unit]:
+                    for fut in (waiting.turn, waiting.committed):
+                        if not fut.done():
+                            fut.set_exception(exc)
+                continue
+            if batch:
+                self.commits += 1
+                self.units_committed += len(batch)
+            for committed in batch:
+                if not committed.committed.done():
+                    committed.committed.set_result(None)
+
+    async def _run_unit(self, db: aiosqlite.Connection, unit: _WriteUnit, *, isolate: bool) -> bool:
+        """Hand the connection to one unit and wait for its block to finish.
+
+        `isolate` wraps the unit in a savepoint so a failure spares the units already in
+        the batch; the first unit of a batch has nothing to spare and skips it.
+
+        Returns True if the unit's changes are kept, False if it was rolled back or its
+        caller gave up waiting before its turn came.
+        """
+        if unit.turn.done():
+            return False  # cancelled while queued
+        db.row_factory = None
+        if isolate:
+            await db.execute("SAVEPOINT unit")
+        unit.turn.set_result(db)
+        exc = await unit.done
+        if isolate:
+            if exc is not None:
+                await db.execute("ROLLBACK TO unit")
+            await db.execute("RELEASE unit")
+        elif exc is not None:
+            await db.rollback()
+            await db.execute("BEGIN IMMEDIATE")
+        return exc is None
+
+    async def close(self) -> None:
+        """Close every idle connection. Borrowed readers close when they are returned."""
+        self._closed = True
+        if self._write_task is not None:
+            self._write_task.cancel()
+            with suppress(asyncio.CancelledError, RuntimeError):
+                await self._write_task
+            self._write_task = None
+        idle, self._idle_readers = self._idle_readers, []
+        for conn in idle:
+            await conn.close()
+        async with self._writer_lock:
+            if self._writer is not None:
+                await self._writer.close()
+                self._writer = None
+
+
+_pool: ConnectionPool | None = None
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool for DB_PATH, creating it on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+
+def reader() -> AbstractAsyncContextManager[aiosqlite.Connection]:
+    """Borrow a pooled read-only connection: `async with reader() as db: ...`."""
+    return get_pool().reader()
+
+
+def snapshot() -> AbstractAsyncContextManager[aiosqlite.Connection]:
+    """Read from one consistent snapshot: `async with snapshot() as db: ...`."""
+    return get_pool().snapshot()
+
+
+def writer() -> AbstractAsyncContextManager[aiosqlite.Connection]:
+    """Borrow the pooled writer connection: `async with writer() as db: ...`."""
+    return get_pool().writer()
+
+
+def transaction() -> AbstractAsyncContextManager[aiosqlite.Connection]:
+    """Queue an atomic write unit: `async with transaction() as db: ...`."""
+    return get_pool().transaction()
+
+
+async def close_pool() -> None:
+    """Close the pool's connections. The next borrow opens a fresh pool.
+
+    aiosqlite's worker threads are not daemons, so an open pool keeps the interpreter
+    from exiting — call this on shutdown.
+    """
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.close()
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[aiosqlite.Connection], Awaitable[None]]
+    # False for steps SQLite refuses inside a transaction (VACUUM, some PRAGMAs). Those
+    # run in autocommit mode and must be safe to re-run if the version insert is lost.
+    transactional: bool = True
+
+
+# Ordered by version. Append new migrations at the end; never edit or renumber one that
+# has shipped — deployed databases have already recorded it in schema_version.
+MIGRATIONS: list[Migration] = []
+
+
+def migration(
+    version: int, name: str, *, transactional: bool = True
+) -> Callable[
+    [Callable[[aiosqlite.Connection], Awaitable[None]]],
+    Callable[[aiosqlite.Connection], Awaitable[None]],
+]:
+    """Register the decorated coroutine as schema migration `version`."""
+
+    def register(
+        fn: Callable[[aiosqlite.Connection], Awaitable[None]],
+    ) -> Callable[[aiosqlite.Connection], Awaitable[None]]:
+        expected = len(MIGRATIONS) + 1
+        if version != expected:
+            raise ValueError(f"migration {name!r} is version {version}, expected {expected}")
+        MIGRATIONS.append(Migration(version, name, fn, transactional))
+        return fn
+
+    return register
+
+
+async def _add_column(db: aiosqlite.Connection, table: str, column: str, decl: str) -> None:
+    async with db.execute(f"PRAGMA table_info({table})") as cur:
+        existing = {row[1] for row in await cur.fetchall()}
+    if column not in existing:
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+@migration(1, "baseline")
+async def _baseline(db: aiosqlite.Connection) -> None:
+    """Everything init_db used to (re)apply on every start, made idempotent.
+
+    Databases created before schema_version existed already have most of this, so each
+    step checks before it changes anything.
+    """
+    for statement in _SCHEMA.split(";"):
+        if statement.strip():
+            await db.execute(statement)
+    # The DM-based pending_trades flow was replaced by the marketplace
+    # (trade_listings/trade_offers); drop the orphaned table.
+    await db.execute("DROP TABLE IF EXISTS pending_trades")
+    # fight_sessions was folded into the unified sessions table.
+    await db.execute("DROP TABLE IF EXISTS fight_sessions")
+    await _add_column(
+        db,
+        "members",
+        "forced_rarity",
+        "TEXT CHECK(forced_rarity IN ('common','uncommon','rare','legendary'))",
+    )
+    await _add_column(db, "members", "is_synthetic", "BOOLEAN NOT NULL DEFAULT 0")
+    await _add_column(db, "user_cards", "drawn_by_name", "TEXT")
+    await _add_column(db, "members", "bio", "TEXT")
+    await _add_column(db, "members", "stats", "TEXT")
+    await _add_column(db, "members", "pringle_balance", "INTEGER DEFAULT 0")
+    await _add_column(db, "members", "bank_debt", "INTEGER DEFAULT 0")
+    await _add_column(db, "fight_tokens", "session_token", "TEXT")
+    await _add_column(db, "members", "palycoin_balance", "INTEGER DEFAULT 0")
+    await _add_column(db, "members", "boin_balance", "INTEGER DEFAULT 0")
+    await _add_column(db, "fights", "turn_started_at", "TIMESTAMP")
+
+
+async def _schema_version(db: aiosqlite.Connection) -> int:
+    try:
+        async with db.execute("SELECT MAX(version) FROM schema_version") as cur:
+            row = await cur.fetchone()
+    except aiosqlite.OperationalError:
+        return 0  # fresh database, or one that predates schema_version
+    return (row[0] if row else None) or 0
+
+
+async def init_db() -> dict[str, float]:
+    """Apply any pending migrations. Returns {migration name: seconds} for those applied.
+
+    Called on every webapp start and every bot on_ready (including reconnects), so the
+    common case — schema already current — is a single version lookup.
+    """
+    async with writer() as db:
+        current = await _schema_version(db)
+        pending = [m for m in MIGRATIONS if m.version > current]
+        if not pending:
+            return {}
+        # WAL lets reads and writes proceed concurrently instead of serializing
+        # on one exclusive lock per write — without it, concurrent card draws
+        # and admin bulk-awards contend for the same lock and can time out.
+        # The mode is persistent, and can't change inside a transaction, so set it here.
+        await db.execute("PRAGMA journal_mode=WAL")
+        await db.execute(
+            "CREATE TABLE IF NOT EXISTS schema_version ("
+            "version INTEGER PRIMARY KEY, name TEXT NOT NULL, "
+            "applied_at TIMESTAMP NOT NULL, duration_ms REAL NOT NULL)"
         )
         await db.commit()
+        durations: dict[str, float] = {}
+        for m in pending:
+            started = time.perf_counter()
+            if m.transactional:
+                await db.execute("BEGIN EXCLUSIVE")
+            try:
+                await m.apply(db)
+                elapsed = time.perf_counter() - started
+                await db.execute(
+                    "INSERT INTO schema_version (version, name, applied_at, duration_ms) "
+                    "VALUES (?, ?, ?, ?)",
+                    (m.version, m.name, datetime.now(timezone.utc).isoformat(), elapsed * 1000),
+                )
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                log.exception("Schema migration %d (%s) failed", m.version, m.name)
+                raise
+            durations[m.name] = elapsed
+            log.info(
+                "Applied schema migration %d (%s) in %.1f ms", m.version, m.name, elapsed * 1000
+            )
+        log.info(
+            "Schema at version %d after %d migration(s) in %.1f ms",
+            pending[-1].version,
+            len(pending),
+            sum(durations.values()) * 1000,
+        )
+        return durations
+
+
+# Secondary indexes for the hot-path queries. tests/cards/test_query_plans.py runs those
+# queries against a seeded database and fails if any of them falls back to a SCAN —
+# extend both together.
+_HOT_PATH_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_fights_status_turn ON fights(status, turn_started_at);
+CREATE INDEX IF NOT EXISTS idx_fights_challenger ON fights(challenger_id, status);
+CREATE INDEX IF NOT EXISTS idx_fights_opponent ON fights(opponent_id, status);
+CREATE INDEX IF NOT EXISTS idx_fight_log_fight ON fight_log(fight_id);
+CREATE INDEX IF NOT EXISTS idx_draw_log_week ON draw_log(week_start);
+CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at);
+CREATE INDEX IF NOT EXISTS idx_trade_listings_status ON trade_listings(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_trade_listings_owner ON trade_listings(owner_id, status);
+CREATE INDEX IF NOT EXISTS idx_trade_offers_listing ON trade_offers(listing_id, status);
+CREATE INDEX IF NOT EXISTS idx_trade_offers_proposer ON trade_offers(proposer_id, status);
+CREATE INDEX IF NOT EXISTS idx_trade_listing_items_listing ON trade_listing_items(listing_id);
+CREATE INDEX IF NOT EXISTS idx_trade_offer_items_offer ON trade_offer_items(offer_id);
+CREATE INDEX IF NOT EXISTS idx_market_bets_placed ON market_bets(placed_at);
+CREATE INDEX IF NOT EXISTS idx_market_bets_player ON market_bets(player_id);
+CREATE INDEX IF NOT EXISTS idx_market_history_market
+    ON market_probability_history(market_id, recorded_at);
+CREATE INDEX IF NOT EXISTS idx_markets_status ON markets(status, created_at);
+"""
+
+
+@migration(2, "hot_path_indexes")
+async def _hot_path_indexes(db: aiosqlite.Connection) -> None:
+    for statement in _HOT_PATH_INDEXES.split(";"):
+        if statement.strip():
+            await db.execute(statement)
+
+
+# Indexes the retention jobs (superpal.cards.retention) use to find expired rows a chunk
+# at a time without scanning the table for every chunk.
+_RETENTION_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_fight_log_created ON fight_log(created_at);
+CREATE INDEX IF NOT EXISTS idx_fight_tokens_expires ON fight_tokens(expires_at);
+CREATE INDEX IF NOT EXISTS idx_magic_links_created ON magic_links(created_at);
+CREATE INDEX IF NOT EXISTS idx_trade_offers_status_created ON trade_offers(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_market_history_recorded
+    ON market_probability_history(recorded_at);
+"""
+
+
+@migration(3, "retention_indexes")
+async def _retention_indexes(db: aiosqlite.Connection) -> None:
+    for statement in _RETENTION_INDEXES.split(";"):
+        if statement.strip():
+            await db.execute(statement)
+
+
+@migration(4, "incremental_auto_vacuum", transactional=False)
+async def _incremental_auto_vacuum(db: aiosqlite.Connection) -> None:
+    """Let retention hand freed pages back to the filesystem with PRAGMA incremental_vacuum.
+
+    Switching an existing database out of auto_vacuum=NONE only takes effect after a full
+    VACUUM, which rewrites the file once. Every later reclaim is incremental.
+    """
+    await db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    await db.execute("VACUUM")
+
+
+@migration(5, "draw_pool_state")
+async def _draw_pool_state(db: aiosqlite.Connection) -> None:
+    """A token that changes whenever the drawable member pool might have.
+
+    superpal.cards.draw_pool caches the pool in memory and re-reads it only when this token
+    differs from the one it was built at. Triggers keep the token honest for every writer —
+    the bot, the webapp, and scripts alike. The token is random rather than a counter so a
+    database restored from a snapshot can't land back on a value a process has cached.
+    """
+    await db.execute(
+        "CREATE TABLE IF NOT EXISTS draw_pool_state ("
+        "id INTEGER PRIMARY KEY CHECK (id = 1), token INTEGER NOT NULL)"
+    )
+    await db.execute("INSERT OR IGNORE INTO draw_pool_state (id, token) VALUES (1, random())")
+    bump = "BEGIN UPDATE draw_pool_state SET token = random() WHERE id = 1; END"
+    await db.execute(
+        f"CREATE TRIGGER IF NOT EXISTS trg_members_pool_insert AFTER INSERT ON members {bump}"
+    )
+    await db.execute(
+        f"CREATE TRIGGER IF NOT EXISTS trg_members_pool_delete AFTER DELETE ON members {bump}"
+    )
+    await db.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_members_pool_update "
+        "AFTER UPDATE OF is_excluded, forced_rarity ON members "
+        "WHEN OLD.is_excluded IS NOT NEW.is_excluded "
+        f"OR OLD.forced_rarity IS NOT NEW.forced_rarity {bump}"
+    )
+
+
+# Per-owner collection totals behind the card leaderboards. Rebuilds (the migration and
+# service.rebuild_collection_stats) recompute it from user_cards; triggers keep it current.
+COLLECTION_STATS_REBUILD_SQL = """
+INSERT INTO collection_stats (owner_id, total_cards, legendary_cards, unique_subjects)
+SELECT owner_id,
+    SUM(quantity),
+    SUM(CASE WHEN rarity = 'legendary' THEN quantity ELSE 0 END),
+    COUNT(DISTINCT CASE WHEN quantity > 0 THEN card_member_id END)
+FROM user_cards
+GROUP BY owner_id
+"""
+
+
+def _collection_stats_delta(row: str, sign: str) -> str:
+    """Trigger statements adding (sign '+') or removing ('-') one user_cards row's share.
+
+    Triggers fire AFTER the change, so "does the owner hold this subject at another
+    rarity" is asked of the table as it is now, excluding the row itself. The counter row
+    is created with NOT EXISTS rather than INSERT OR IGNORE: an outer upsert's conflict
+    handling overrides a trigger's OR IGNORE.
+    """
+    return (
+        f"INSERT INTO collection_stats (owner_id) SELECT {row}.owner_id WHERE NOT EXISTS ("
+        f"SELECT 1 FROM collection_stats WHERE owner_id = {row}.owner_id); "
+        f"UPDATE collection_stats SET "
+        f"total_cards = total_cards {sign} {row}.quantity, "
+        f"legendary_cards = legendary_cards {sign} "
+        f"(CASE WHEN {row}.rarity = 'legendary' THEN {row}.quantity ELSE 0 END), "
+        f"unique_subjects = unique_subjects {sign} ({row}.quantity > 0 AND NOT EXISTS ("
+        f"SELECT 1 FROM user_cards WHERE owner_id = {row}.owner_id "
+        f"AND card_member_id = {row}.card_member_id AND id <> {row}.id AND quantity > 0)) "
+        f"WHERE owner_id = {row}.owner_id;"
+    )
+
+
+@migration(6, "collection_stats")
+async def _collection_stats(db: aiosqlite.Connection) -> None:
+    """Leaderboard counters kept in step with user_cards by triggers.
+
+    Every writer of user_cards — draws, gifts, trade-ins, upgrades, awards and trades, from
+    the bot, the webapp or a script — updates the counters in its own transaction, so
+    get_leaderboard reads a top-10 off an index instead of aggregating every card.
+    """
+    await db.execute(
+        "CREATE TABLE IF NOT EXISTS collection_stats ("
+        "owner_id TEXT PRIMARY KEY, "
+        "total_cards INTEGER NOT NULL DEFAULT 0, "
+        "legendary_cards INTEGER NOT NULL DEFAULT 0, "
+        "unique_subjects INTEGER NOT NULL DEFAULT 0)"
+    )
+    for column in ("total_cards", "legendary_cards", "unique_subjects"):
+        await db.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_collection_stats_{column} "
+            f"ON collection_stats({column})"
+        )
+    await db.execute("DELETE FROM collection_stats")
+    await db.execute(COLLECTION_STATS_REBUILD_SQL)
+    await db.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_user_cards_stats_insert AFTER INSERT ON user_cards "
+        f"BEGIN {_collection_stats_delta('NEW', '+')} END"
+    )
+    await db.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_user_cards_stats_delete AFTER DELETE ON user_cards "
+        f"BEGIN {_collection_stats_delta('OLD', '-')} END"
+    )
+    await db.execute(
+        "CREATE TRIGGER IF NOT EXISTS trg_user_cards_stats_update "
+        "AFTER UPDATE OF owner_id, card_member_id, rarity, quantity ON user_cards "
+        f"BEGIN {_collection_stats_delta('OLD', '-')} {_collection_stats_delta('NEW', '+')} END"
+    )
+
+
+# Per-player fight results behind the fight leaderboards, recounted from fights and
+# fight_log. fight_service keeps it current as fights finish; this is the from-scratch
+# version the migration and fight_service.backfill_fight_stats run. A loser escaped if
+# they have a successful 'run' in the fight (rows from before action_detail existed count),
+# and forfeited if the fight was settled by a 'forfeit' claim.
+FIGHT_STATS_BACKFILL_SQL = """
+WITH results AS (
+    SELECT id, winner_id,
+        CASE WHEN winner_id = challenger_id THEN opponent_id ELSE challenger_id END AS loser_id
+    FROM fights
+    WHERE status = 'completed' AND winner_id IS NOT NULL
+),
+per_player AS (
+    SELECT winner_id AS player_id, 1 AS won, 0 AS lost, 0 AS escaped, 0 AS forfeited
+    FROM results
+    UNION ALL
+    SELECT loser_id, 0, 1,
+        EXISTS (
+            SELECT 1 FROM fight_log fl
+            WHERE fl.fight_id = r.id AND fl.actor_id = r.loser_id AND fl.action_type = 'run'
+              AND COALESCE(json_extract(fl.action_detail, '$.escaped'), 1)
+        ),
+        EXISTS (
+            SELECT 1 FROM fight_log fl WHERE fl.fight_id = r.id AND fl.action_type = 'forfeit'
+        )
+    FROM results r
+)
+INSERT INTO fight_stats (player_id, wins, losses, fights_played, escapes, forfeits)
+SELECT player_id, SUM(won), SUM(lost), COUNT(*), SUM(escaped), SUM(forfeited)
+FROM per_player
+GROUP BY player_id
+"""
+
+
+@migration(7, "fight_stats")
+async def _fight_stats(db: aiosqlite.Connection) -> None:
+    """Wins, losses, fights played, escapes and forfeits per player.
+
+    get_fight_leaderboard used to aggregate fights joined on challenger OR opponent, which
+    no index serves, and count escapes from fight_log. It now reads this table instead.
+    """
+    await db.execute(
+        "CREATE TABLE IF NOT EXISTS fight_stats ("
+        "player_id TEXT PRIMARY KEY, "
+        "wins INTEGER NOT NULL DEFAULT 0, "
+        "losses INTEGER NOT NULL DEFAULT 0, "
+        "fights_played INTEGER NOT NULL DEFAULT 0, "
+        "escapes INTEGER NOT NULL DEFAULT 0, "
+        "forfeits INTEGER NOT NULL DEFAULT 0)"
+    )
+    for column in ("wins", "fights_played", "escapes"):
+        await db.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_fight_stats_{column} ON fight_stats({column})"
+        )
+    await db.execute("DELETE FROM fight_stats")
+    await db.execute(FIGHT_STATS_BACKFILL_SQL)
+
+
+@migration(8, "fight_revision")
+async def _fight_revision(db: aiosqlite.Connection) -> None:
+    """A counter the fight engine bumps with every action it saves.
+
+    Each save is conditional on the revision it read, so two webapp processes acting on
+    the same fight from their own in-memory copies can't overwrite each other's turn.
+    """
+    await _add_column(db, "fights", "revision", "INTEGER NOT NULL DEFAULT 0")
@@ -0,0 +1,101 @@
+"""An in-memory deadline heap that wakes exactly when the earliest deadline is due.
+
+Each key has at most one deadline. Moving a deadline earlier pushes a new heap entry and
+wakes the runner; moving it later only records the new time, and the entry already
+queued re-queues itself at that time when it comes up, so frequently postponed deadlines
+cost nothing until they are reached. Entries for cancelled or superseded deadlines are
+skipped as they surface.
+
+A due key is removed and handed to the callback in a task of its own, so a slow callback
+never delays the next deadline. The callback may schedule the key again.
+
+Only the process that runs the scheduler should hold deadlines, so schedule() does
+nothing until enable() is called; elsewhere it would fill a heap nobody drains.
+"""
+
+import asyncio
+import heapq
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+from superpal.env import log
+
+K = TypeVar("K", bound=Hashable)
+
+
+class DeadlineScheduler(Generic[K]):
+    def __init__(self, on_due: Callable[[K], Awaitable[object]]) -> None:
+        self._on_due = on_due
+        self._heap: list[tuple[float, K]] = []
+        # Each key's current deadline, as a time.time() timestamp.
+        self._due: dict[K, float] = {}
+        self._wake = asyncio.Event()
+        self._firing: set[asyncio.Task] = set()
+        self.enabled = False
+
+    def enable(self) -> None:
+        """Start accepting deadlines, in the process that will run() this scheduler."""
+        self.enabled = True
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def due_at(self, key: K) -> float | None:
+        return self._due.get(key)
+
+    def schedule(self, key: K, due: float) -> None:
+        """Set key's deadline to due, replacing any it had."""
+        if not self.enabled:
+            return
+        queued = self._due.get(key)
+        self._due[key] = due
+        if queued is not None and queued <= due:
+            return  # its entry at `queued` re-queues itself at `due`
+        if not self._heap or due < self._heap[0][0]:
+            self._wake.set()
+        heapq.heappush(self._heap, (due, key))
+
+    def cancel(self, key: K) -> None:
+        self._due.pop(key, None)
+
+    def clear(self) -> None:
+        """Cancel every deadline."""
+        self._due.clear()
+        self._heap.clear()
+
+    def pop_due(self, now: float) -> list[K]:
+        """Remove and return every key whose deadline is at or before now."""
+        fired: list[K] = []
+        while self._heap and self._heap[0][0] <= now:
+            at, key = heapq.heappop(self._heap)
+            due = self._due.get(key)
+            if due is None or due < at:
+                continue  # cancelled, fired, or brought forward by an earlier entry
+            if due > at:
+                heapq.heappush(self._heap, (due, key))
+                continue
+            del self._due[key]
+            fired.append(key)
+        return fired
+
+    async def run(self) -> None:
+        """Fire deadlines as they come due, until cancelled."""
+        self.enable()
+        while True:
+            self._wake.clear()
+            for key in self.pop_due(time.time()):
+                task = asyncio.create_task(self._fire(key))
+                self._firing.add(task)
+                task.add_done_callback(self._firing.discard)
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, key: K) -> None:
+        try:
+            await self._on_due(key)
+        except Exception:
+            log.exception("Deadline callback failed for %r", key)
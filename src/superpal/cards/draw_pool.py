@@ -0,0 +1,82 @@
+"""In-memory index of drawable members, and O(1) samplers over it.
+
+A member is drawable at a rarity if they aren't excluded and either have no forced rarity
+or are forced to that one. EligiblePool keeps that list per rarity so a draw picks its
+card subject without querying members. It re-reads the table only when the
+draw_pool_state token (bumped by triggers on members — see db migration 5) no longer
+matches the one it was built at, i.e. after sync_members adds someone, or an exclusion
+toggle, set_forced_rarity or add_member changes who's eligible, from this process or another.
+"""
+
+import random
+from collections.abc import Mapping
+
+from superpal.cards.db import reader
+from superpal.cards.models import RARITY_ORDER
+
+
+class AliasSampler:
+    """Weighted sampling in O(1) per draw (Vose's alias method)."""
+
+    __slots__ = ("_alias", "_outcomes", "_prob")
+
+    def __init__(self, weights: Mapping[str, float]):
+        self._outcomes: list[str] = list(weights)
+        n = len(self._outcomes)
+        total = sum(weights.values())
+        scaled = [weights[o] * n / total for o in self._outcomes]
+        self._prob = [1.0] * n
+        self._alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, g = small.pop(), large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = g
+            scaled[g] -= 1.0 - scaled[s]
+            (small if scaled[g] < 1.0 else large).append(g)
+
+    def sample(self) -> str:
+        i = random.randrange(len(self._outcomes))
+        return self._outcomes[i if random.random() < self._prob[i] else self._alias[i]]
+
+
+class EligiblePool:
+    """Drawable member ids per rarity, rebuilt when the members table changes."""
+
+    def __init__(self) -> None:
+        self._token: int | None = None
+        self._by_rarity: dict[str, tuple[str, ...]] = {}
+
+    def invalidate(self) -> None:
+        self._token = None
+
+    async def refresh(self) -> None:
+        """Rebuild from members if the pool has changed since the last build."""
+        async with reader() as db:
+            async with db.execute("SELECT token FROM draw_pool_state WHERE id = 1") as cur:
+                row = await cur.fetchone()
+            token = row[0] if row else None
+            if token is not None and token == self._token:
+                return
+            # Token first, then members: a change landing in between leaves the stored
+            # token stale, so the next refresh rebuilds again rather than missing it.
+            async with db.execute(
+                "SELECT discord_id, forced_rarity FROM members WHERE is_excluded = 0"
+            ) as cur:
+                rows = await cur.fetchall()
+        self._by_rarity = {
+            rarity: tuple(mid for mid, forced in rows if forced is None or forced == rarity)
+            for rarity in RARITY_ORDER
+        }
+        self._token = token
+
+    def choose(self, rarity: str) -> str | None:
+        """Like pick(), from the pool as of the last refresh()."""
+        members = self._by_rarity.get(rarity)
+        return random.choice(members) if members else None
+
+    async def pick(self, rarity: str) -> str | None:
+        """A uniformly random drawable member id at `rarity`, or None if there are none."""
+        await self.refresh()
+        return self.choose(rarity)
@@ -1,6 +1,8 @@
+from collections import Counter
+
 import discord
 
-from superpal.cards.models import RARITY_COLORS, RARITY_LABELS
+from superpal.cards.models import RARITY_COLORS, RARITY_LABELS, RARITY_ORDER
 
 
 def build_card_embed(
@@ -30,3 +32,62 @@ def build_card_embed(
         embed.add_field(name="Stats", value=value, inline=False)
 
     return embed
+
+
+def build_draw_summary_embed(
+    *,
+    drawn_by: str,
+    draws: list[tuple[str, str, int]],
+) -> discord.Embed:
+    """Build one embed summarizing a multi-draw: draws are (display_name, rarity, card_number).
+
+    Duplicates are collapsed into one line with a count; rarest cards are listed first,
+    and the embed takes the color of the rarest.
+    """
+    ranked = sorted(
+        Counter(draws).items(), key=lambda kv: (-RARITY_ORDER.index(kv[0][1]), kv[0][0])
+    )
+    best = ranked[0][0][1] if ranked else "common"
+    lines = [
+        f"**{RARITY_LABELS[rarity]}** · {name} · #{number}" + (f" ×{n}" if n > 1 else "")
+        for (name, rarity, number), n in ranked
+    ]
+    embed = discord.Embed(
+        title=f"{drawn_by} drew {len(draws)} card{'s' if len(draws) != 1 else ''}",
+        description="\n".join(lines),
+        color=discord.Color(RARITY_COLORS[best]),
+    )
+    embed.set_footer(text="Bringus Card Game")
+    return embed
+
+
+# Lines listed in an exchange summary before the rest are folded into "…and N more".
+EXCHANGE_EMBED_MAX_LINES = 15
+
+
+def build_exchange_embed(
+    *,
+    title: str,
+    summary: str,
+    received: list[tuple[str, str, int]],
+) -> discord.Embed:
+    """Build one embed summarizing a bulk upgrade or trade-in.
+
+    received are (display_name, rarity, copies); rarest are listed first, and the embed
+    takes the color of the rarest.
+    """
+    ranked = sorted(received, key=lambda r: (-RARITY_ORDER.index(r[1]), r[0]))
+    best = ranked[0][1] if ranked else "common"
+    lines = [
+        f"**{RARITY_LABELS[rarity]}** · {name}" + (f" ×{n}" if n > 1 else "")
+        for name, rarity, n in ranked[:EXCHANGE_EMBED_MAX_LINES]
+    ]
+    if len(ranked) > EXCHANGE_EMBED_MAX_LINES:
+        lines.append(f"…and {len(ranked) - EXCHANGE_EMBED_MAX_LINES} more")
+    embed = discord.Embed(
+        title=title,
+        description="\n".join([summary, "", *lines]) if lines else summary,
+        color=discord.Color(RARITY_COLORS[best]),
+    )
+    embed.set_footer(text="Bringus Card Game")
+    return embed
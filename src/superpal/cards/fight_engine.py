@@ -0,0 +1,501 @@
+"""In-memory state for fights in progress, persisted write-through one action at a time.
+
+A battle action used to read the fight row, run a handler issuing several statements,
+commit, and then re-read fights, fight_cards, fight_log and player_items to build the
+state both players are sent. The engine instead holds every active fight as a LiveFight:
+the columns play touches, its cards, both players' items and the recent log. Handlers in
+fight_service apply an action to a copy of it in memory; the engine then writes what the
+action changed in one transaction (one fights UPDATE, the changed fight_cards rows, the
+new log entries, any item spent and, for a finished fight, fight_stats) before the copy
+replaces the live one.
+
+Writes are awaited, not deferred, so the database is never behind what players were
+shown: a restart, or evict(), simply rebuilds a fight from its rows on next use. Writers
+elsewhere that change a live fight's rows or a player's items call evict() or
+forget_player() afterwards, as the member directory's callers do.
+
+Actions on one fight are ordered by that fight's own lock (FightEngine.exclusive), held
+from reading the fight until its new state is handed back: a double click or a second
+tab waits its turn rather than racing the first, while actions on other fights run
+alongside it and share the writer's group commits.
+"""
+
+import asyncio
+import contextlib
+import json
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime, timezone
+from typing import TypeVar
+
+import aiosqlite
+
+from superpal.cards.db import reader, transaction
+
+T = TypeVar("T")
+
+# How many log entries a fight's state carries.
+LOG_WINDOW = 20
+
+# The fights columns a LiveFight is built from, in SELECT order.
+_FIGHT_FIELDS = (
+    "id",
+    "mode",
+    "challenger_id",
+    "opponent_id",
+    "status",
+    "winner_id",
+    "current_turn_player_id",
+    "pending_swap_player_id",
+    "challenger_atk_boost",
+    "opponent_atk_boost",
+    "challenger_smoked",
+    "opponent_smoked",
+    "completed_at",
+    "last_activity_at",
+    "turn_started_at",
+    "revision",
+)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class LiveCard:
+    __slots__ = (
+        "card_member_id",
+        "hp_current",
+        "hp_max",
+        "id",
+        "is_active",
+        "is_fainted",
+        "name",
+        "player_id",
+        "rarity",
+        "slot",
+    )
+
+    id: int
+    player_id: str
+    card_member_id: str
+    name: str | None
+    rarity: str
+    slot: int
+    hp_current: int
+    hp_max: int
+    is_active: bool
+    is_fainted: bool
+
+    def __init__(self, row) -> None:
+        (
+            self.id,
+            self.player_id,
+            self.card_member_id,
+            self.name,
+            self.rarity,
+            self.slot,
+            self.hp_current,
+            self.hp_max,
+            is_active,
+            is_fainted,
+        ) = row
+        self.is_active = bool(is_active)
+        self.is_fainted = bool(is_fainted)
+
+    def copy(self) -> "LiveCard":
+        card = LiveCard.__new__(LiveCard)
+        for attr in LiveCard.__slots__:
+            setattr(card, attr, getattr(self, attr))
+        return card
+
+
+class LiveFight:
+    """One fight's playable state, plus the writes the current action has queued."""
+
+    __slots__ = (
+        "cards",
+        "challenger_atk_boost",
+        "challenger_id",
+        "challenger_smoked",
+        "changed_cards",
+        "completed_at",
+        "current_turn_player_id",
+        "id",
+        "items",
+        "items_spent",
+        "last_activity_at",
+        "log",
+        "mode",
+        "new_log",
+        "opponent_atk_boost",
+        "opponent_id",
+        "opponent_smoked",
+        "pending_swap_player_id",
+        "result",
+        "revision",
+        "status",
+        "turn_started_at",
+        "winner_id",
+    )
+
+    # The fights columns, as in _FIGHT_FIELDS.
+    id: int
+    mode: str
+    challenger_id: str
+    opponent_id: str
+    status: str
+    winner_id: str | None
+    current_turn_player_id: str | None
+    pending_swap_player_id: str | None
+    challenger_atk_boost: int
+    opponent_atk_boost: int
+    challenger_smoked: bool
+    opponent_smoked: bool
+    completed_at: str | None
+    last_activity_at: str | None
+    turn_started_at: str | None
+    revision: int
+
+    cards: list[LiveCard]
+    items: dict[str, dict[str, int]]
+    log: deque[dict]
+
+    # Queued writes: ids of changed cards, unsaved log entries, (player_id, item_type)
+    # spent, and (winner_id, loser_id, escaped, forfeited) once the fight is decided.
+    changed_cards: set[int]
+    new_log: list[dict]
+    items_spent: list[tuple[str, str]]
+    result: tuple[str, str, bool, bool] | None
+
+    def __init__(self, row, cards: list[LiveCard], items: dict, log: list[dict]) -> None:
+        (
+            self.id,
+            self.mode,
+            self.challenger_id,
+            self.opponent_id,
+            self.status,
+            self.winner_id,
+            self.current_turn_player_id,
+            self.pending_swap_player_id,
+            self.challenger_atk_boost,
+            self.opponent_atk_boost,
+            challenger_smoked,
+            opponent_smoked,
+            self.completed_at,
+            self.last_activity_at,
+            self.turn_started_at,
+            self.revision,
+        ) = row
+        self.challenger_smoked = bool(challenger_smoked)
+        self.opponent_smoked = bool(opponent_smoked)
+        self.cards = sorted(cards, key=lambda c: (c.player_id, c.slot))
+        self.items = items
+        self.log = deque(log, maxlen=LOG_WINDOW)
+        self._reset_writes()
+
+    def _reset_writes(self) -> None:
+        self.changed_cards = set()
+        self.new_log = []
+        self.items_spent = []
+        self.result = None
+
+    def copy(self) -> "LiveFight":
+        """A copy an action can change freely, with no writes queued."""
+        fight = LiveFight.__new__(LiveFight)
+        for attr in _FIGHT_FIELDS:
+            setattr(fight, attr, getattr(self, attr))
+        fight.cards = [c.copy() for c in self.cards]
+        fight.items = {pid: dict(held) for pid, held in self.items.items()}
+        fight.log = deque(self.log, maxlen=LOG_WINDOW)
+        fight._reset_writes()
+        return fight
+
+    def player_cards(self, player_id: str) -> list[LiveCard]:
+        return [c for c in self.cards if c.player_id == player_id]
+
+    def active_card(self, player_id: str) -> LiveCard | None:
+        for card in self.cards:
+            if card.player_id == player_id and card.is_active and not card.is_fainted:
+                return card
+        return None
+
+    def card_changed(self, card: LiveCard) -> None:
+        self.changed_cards.add(card.id)
+
+    def spend_item(self, player_id: str, item_type: str) -> None:
+        held = self.items.setdefault(player_id, {})
+        held[item_type] = held.get(item_type, 0) - 1
+        self.items_spent.append((player_id, item_type))
+
+    def add_log(
+        self,
+        actor_id: str | None,
+        action_type: str,
+        narrative: str,
+        d20_roll: int | None = None,
+        damage: int | None = None,
+        detail: dict | None = None,
+    ) -> None:
+        # id and created_at are filled in from the INSERT once the action is saved.
+        entry = {
+            "id": None,
+            "actor_id": actor_id,
+            "action_type": action_type,
+            "action_detail": json.dumps(detail) if detail else None,
+            "d20_roll": d20_roll,
+            "damage_dealt": damage,
+            "narrative_text": narrative,
+            "created_at": None,
+        }
+        self.log.append(entry)
+        self.new_log.append(entry)
+
+    def advance_turn(self, next_player_id: str) -> None:
+        now = _now()
+        self.current_turn_player_id = next_player_id
+        self.last_activity_at = now
+        self.turn_started_at = now
+
+    def finish(self, winner_id: str, *, escaped: bool = False, forfeited: bool = False) -> None:
+        loser_id = self.opponent_id if winner_id == self.challenger_id else self.challenger_id
+        self.status = "completed"
+        self.winner_id = winner_id
+        self.completed_at = _now()
+        self.result = (winner_id, loser_id, escaped, forfeited)
+
+
+async def record_fight_result(
+    db: aiosqlite.Connection,
+    winner_id: str,
+    loser_id: str,
+    *,
+    escaped: bool = False,
+    forfeited: bool = False,
+) -> None:
+    """Count a finished fight in fight_stats, in the caller's transaction."""
+    await db.execute(
+        """
+        INSERT INTO fight_stats (player_id, wins, losses, fights_played, escapes, forfeits)
+        VALUES (?, 1, 0, 1, 0, 0), (?, 0, 1, 1, ?, ?)
+        ON CONFLICT(player_id) DO UPDATE SET
+            wins = wins + excluded.wins,
+            losses = losses + excluded.losses,
+            fights_played = fights_played + excluded.fights_played,
+            escapes = escapes + excluded.escapes,
+            forfeits = forfeits + excluded.forfeits
+        """,
+        (winner_id, loser_id, int(escaped), int(forfeited)),
+    )
+
+
+async def load_fight(fight_id: int) -> LiveFight | None:
+    """Build a LiveFight from its rows, on one pooled connection."""
+    async with reader() as db:
+        async with db.execute(
+            f"SELECT {', '.join(_FIGHT_FIELDS)} FROM fights WHERE id = ?", (fight_id,)
+        ) as cur:
+            row = await cur.fetchone()
+        if row is None:
+            return None
+        async with db.execute(
+            "SELECT fc.id, fc.player_id, fc.card_member_id, m.display_name, fc.rarity, fc.slot, "
+            "fc.hp_current, fc.hp_max, fc.is_active, fc.is_fainted FROM fight_cards fc "
+            "LEFT JOIN members m ON m.discord_id = fc.card_member_id WHERE fc.fight_id = ?",
+            (fight_id,),
+        ) as cur:
+            cards = [LiveCard(r) for r in await cur.fetchall()]
+        async with db.execute(
+            "SELECT id, actor_id, action_type, action_detail, d20_roll, damage_dealt, "
+            "narrative_text, created_at FROM fight_log WHERE fight_id = ? ORDER BY id DESC LIMIT ?",
+            (fight_id, LOG_WINDOW),
+        ) as cur:
+            log_rows = await cur.fetchall()
+        players = (row[2], row[3])
+        async with db.execute(
+            "SELECT player_id, item_type, quantity FROM player_items "
+            "WHERE player_id IN (?, ?) AND quantity > 0",
+            players,
+        ) as cur:
+            item_rows = await cur.fetchall()
+    items: dict[str, dict[str, int]] = {pid: {} for pid in players}
+    for player_id, item_type, quantity in item_rows:
+        items[player_id][item_type] = quantity
+    keys = ("id", "actor_id", "action_type", "action_detail", "d20_roll", "damage_dealt")
+    log = [
+        dict(zip((*keys, "narrative_text", "created_at"), r, strict=True))
+        for r in reversed(list(log_rows))
+    ]
+    return LiveFight(row, cards, items, log)
+
+
+async def _save(fight: LiveFight) -> None:
+    """Write one action's queued changes in a single transaction.
+
+    Raises ValueError, rolling the action back, if the fight's row is no longer active
+    (something outside the engine finished it), another process saved an action since
+    this one's fight was loaded, or a spent item is no longer held.
+    """
+    async with transaction() as db:
+        cur = await db.execute(
+            "UPDATE fights SET status = ?, winner_id = ?, completed_at = ?, "
+            "current_turn_player_id = ?, pending_swap_player_id = ?, challenger_atk_boost = ?, "
+            "opponent_atk_boost = ?, challenger_smoked = ?, opponent_smoked = ?, "
+            "last_activity_at = ?, turn_started_at = ?, revision = ? "
+            "WHERE id = ? AND status = 'active' AND revision = ?",
+            (
+                fight.status,
+                fight.winner_id,
+                fight.completed_at,
+                fight.current_turn_player_id,
+                fight.pending_swap_player_id,
+                fight.challenger_atk_boost,
+                fight.opponent_atk_boost,
+                int(fight.challenger_smoked),
+                int(fight.opponent_smoked),
+                fight.last_activity_at,
+                fight.turn_started_at,
+                fight.revision,
+                fight.id,
+                fight.revision - 1,
+            ),
+        )
+        if cur.rowcount == 0:
+            async with db.execute("SELECT status FROM fights WHERE id = ?", (fight.id,)) as c:
+                row = await c.fetchone()
+            raise ValueError("fight_changed" if row and row[0] == "active" else "fight_not_active")
+        if fight.changed_cards:
+            await db.executemany(
+                "UPDATE fight_cards SET hp_current = ?, is_active = ?, is_fainted = ? WHERE id = ?",
+                [
+                    (c.hp_current, int(c.is_active), int(c.is_fainted), c.id)
+                    for c in fight.cards
+                    if c.id in fight.changed_cards
+                ],
+            )
+        for player_id, item_type in fight.items_spent:
+            cur = await db.execute(
+                "UPDATE player_items SET quantity = quantity - 1 "
+                "WHERE player_id = ? AND item_type = ? AND quantity > 0",
+                (player_id, item_type),
+            )
+            if cur.rowcount == 0:
+                raise ValueError("no_item")
+        for entry in fight.new_log:
+            async with db.execute(
+                "INSERT INTO fight_log (fight_id, actor_id, action_type, action_detail, "
+                "d20_roll, damage_dealt, narrative_text) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "RETURNING id, created_at",
+                (
+                    fight.id,
+                    entry["actor_id"],
+                    entry["action_type"],
+                    entry["action_detail"],
+                    entry["d20_roll"],
+                    entry["damage_dealt"],
+                    entry["narrative_text"],
+                ),
+            ) as cur:
+                row = await cur.fetchone()
+            assert row is not None
+            entry["id"], entry["created_at"] = row
+        if fight.result is not None:
+            winner_id, loser_id, escaped, forfeited = fight.result
+            await record_fight_result(db, winner_id, loser_id, escaped=escaped, forfeited=forfeited)
+
+
+class _FightLock:
+    __slots__ = ("lock", "users")
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class FightEngine:
+    """LiveFights by id for every active fight this process has touched."""
+
+    def __init__(self) -> None:
+        self._fights: dict[int, LiveFight] = {}
+        # Bumped by every eviction, so a load that overlapped one isn't kept.
+        self._generation = 0
+        # Only for fights someone holds or waits on; the last one out removes it.
+        self._locks: dict[int, _FightLock] = {}
+
+    @contextlib.asynccontextmanager
+    async def exclusive(self, fight_id: int) -> AsyncIterator[None]:
+        """Hold fight_id's lock. Waiters are let in one at a time, in arrival order."""
+        entry = self._locks.get(fight_id)
+        if entry is None:
+            entry = self._locks[fight_id] = _FightLock()
+        entry.users += 1
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.users -= 1
+            if not entry.users:
+                del self._locks[fight_id]
+
+    def evict(self, *fight_ids: int) -> None:
+        """Forget fights whose rows changed elsewhere; they rebuild on next use."""
+        self._generation += 1
+        for fight_id in fight_ids:
+            self._fights.pop(fight_id, None)
+
+    def forget_player(self, player_id: str) -> None:
+        """Forget the fights holding player_id's items, after their items changed."""
+        self.evict(
+            *(f.id for f in self._fights.values() if player_id in (f.challenger_id, f.opponent_id))
+        )
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._fights = {}
+
+    async def get(self, fight_id: int) -> LiveFight | None:
+        """The fight's current state. Only active fights are kept between calls."""
+        fight = self._fights.get(fight_id)
+        if fight is not None:
+            return fight
+        generation = self._generation
+        fight = await load_fight(fight_id)
+        if fight is None or fight.status != "active" or generation != self._generation:
+            return fight
+        return self._fights.setdefault(fight_id, fight)
+
+    async def run(
+        self, fight_id: int, action: Callable[[LiveFight], T]
+    ) -> tuple[LiveFight, T] | None:
+        """Apply action to a copy of the fight and save whatever it changed.
+
+        action mutates the copy it is given and returns its outcome; one that queued no
+        log entry is taken as a rejection and changes nothing. Exceptions from action or
+        from the save propagate, leaving the engine as it was before the action (a failed
+        save evicts the fight so it rebuilds from the database). Returns None if there
+        is no such fight.
+        """
+        fight = await self.get(fight_id)
+        if fight is None:
+            return None
+        draft = fight.copy()
+        outcome = action(draft)
+        if not draft.new_log:
+            return fight, outcome
+        draft.revision += 1
+        # Installed before the save is awaited, so an action arriving meanwhile
+        # builds on this one rather than on the state it replaced.
+        if draft.status == "active":
+            self._fights[fight_id] = draft
+        else:
+            self._fights.pop(fight_id, None)
+        try:
+            await _save(draft)
+        except BaseException:
+            self.evict(fight_id)
+            raise
+        draft._reset_writes()
+        return draft, outcome
+
+
+engine = FightEngine()
@@ -7,8 +7,12 @@ from math import floor
 import aiosqlite
 
 import superpal.sessions as sessions
-from superpal.cards.db import DB_PATH
+from superpal.cards.db import FIGHT_STATS_BACKFILL_SQL, reader, transaction
+from superpal.cards.deadlines import DeadlineScheduler
+from superpal.cards.fight_engine import LiveFight, engine, record_fight_result
+from superpal.cards.member_directory import directory
 from superpal.cards.models import Fight, FightCard, FightLogEntry
+from superpal.env import log
 
 FIGHT_TOKEN_EXPIRY_MINUTES = 5
 FIGHT_SESSION_HOURS = 24
@@ -102,14 +106,14 @@ _FIGHT_SELECT = (
 
 
 async def get_fight(fight_id: int) -> Fight | None:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(f"{_FIGHT_SELECT} WHERE id = ?", (fight_id,)) as cur:
             row = await cur.fetchone()
     return _row_to_fight(row) if row else None
 
 
 async def get_fight_cards(fight_id: int) -> list[FightCard]:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT id, fight_id, player_id, card_member_id, rarity, slot, "
             "hp_current, hp_max, is_active, is_fainted FROM fight_cards WHERE fight_id = ?",
@@ -134,7 +138,7 @@ async def get_fight_cards(fight_id: int) -> list[FightCard]:
 
 
 async def get_fight_log(fight_id: int, limit: int = 20) -> list[FightLogEntry]:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT id, fight_id, actor_id, action_type, action_detail, d20_roll, "
             "damage_dealt, narrative_text, created_at FROM fight_log "
@@ -166,18 +170,19 @@ async def create_fight(
 ) -> Fight:
     now = datetime.now(timezone.utc).isoformat()
     expires = (datetime.now(timezone.utc) + timedelta(minutes=CHALLENGE_EXPIRY_MINUTES)).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         cur = await db.execute(
             "INSERT INTO fights (mode, challenger_id, opponent_id, channel_id, "
             "created_at, expires_at, last_activity_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
             (mode, challenger_id, opponent_id, channel_id, now, expires, now),
         )
         fight_id = cur.lastrowid
-        await db.commit()
         async with db.execute(f"{_FIGHT_SELECT} WHERE id = ?", (fight_id,)) as c:
             row = await c.fetchone()
     assert row is not None
-    return _row_to_fight(row)
+    fight = _row_to_fight(row)
+    _schedule_deadline(fight)
+    return fight
 
 
 async def accept_fight(fight_id: int) -> Fight | None:
@@ -189,40 +194,43 @@ async def accept_fight(fight_id: int) -> Fight | None:
     now_dt = datetime.now(timezone.utc)
     now = now_dt.isoformat()
     lobby_deadline = (now_dt + timedelta(minutes=LOBBY_EXPIRY_MINUTES)).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         cur = await db.execute(
             "UPDATE fights SET status = 'lobby', last_activity_at = ?, expires_at = ? "
             "WHERE id = ? AND status = 'pending'",
             (now, lobby_deadline, fight_id),
         )
-        await db.commit()
         if cur.rowcount == 0:
             return None
         async with db.execute(f"{_FIGHT_SELECT} WHERE id = ?", (fight_id,)) as c:
             row = await c.fetchone()
-    return _row_to_fight(row) if row else None
+    if not row:
+        return None
+    fight = _row_to_fight(row)
+    _schedule_deadline(fight)
+    return fight
 
 
 async def decline_fight(fight_id: int) -> Fight | None:
     """Set fight status to 'declined'. Returns None if fight is not in pending state."""
     now = datetime.now(timezone.utc).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         cur = await db.execute(
             "UPDATE fights SET status = 'declined', last_activity_at = ? "
             "WHERE id = ? AND status = 'pending'",
             (now, fight_id),
         )
-        await db.commit()
         if cur.rowcount == 0:
             return None
         async with db.execute(f"{_FIGHT_SELECT} WHERE id = ?", (fight_id,)) as c:
             row = await c.fetchone()
+    fight_deadlines.cancel(fight_id)
     return _row_to_fight(row) if row else None
 
 
 async def get_pending_challenges(opponent_id: str) -> list[Fight]:
     """Return pending fights where opponent_id is the challenged player, newest first."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             f"{_FIGHT_SELECT} WHERE status = 'pending' AND opponent_id = ? "
             "ORDER BY created_at DESC",
@@ -234,7 +242,7 @@ async def get_pending_challenges(opponent_id: str) -> list[Fight]:
 
 async def get_active_fight_between(player_a: str, player_b: str) -> Fight | None:
     """Return the most recent unresolved fight (pending/lobby/active) between two players."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             f"{_FIGHT_SELECT} WHERE status IN ('pending','lobby','active') "
             "AND ((challenger_id = ? AND opponent_id = ?) "
@@ -251,14 +259,17 @@ async def touch_fight_activity(fight_id: int) -> None:
     `last_activity_at` is a presence signal, not an action signal — an open battle page
     keeps its fight alive even while a player sits and thinks. Only the turn clock
     (`turn_started_at`) decides whether someone has gone AFK.
+
+    A lobby's inactivity deadline moves later with every touch. It isn't rescheduled here:
+    when the old deadline comes up, resolve_fight_deadline finds the lobby still watched
+    and schedules the new one.
     """
     now = datetime.now(timezone.utc).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "UPDATE fights SET last_activity_at = ? WHERE id = ? AND status IN ('lobby', 'active')",
             (now, fight_id),
         )
-        await db.commit()
 
 
 async def get_player_fights(player_id: str, limit: int = 15) -> list[dict]:
@@ -267,7 +278,7 @@ async def get_player_fights(player_id: str, limit: int = 15) -> list[dict]:
     Each row: {id, mode, status, opponent_id, opponent_display_name,
     is_your_turn, winner_id, you_won, created_at}.
     """
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             """
             SELECT f.id, f.mode, f.status, f.winner_id, f.current_turn_player_id, f.created_at,
@@ -305,7 +316,7 @@ async def get_player_fights(player_id: str, limit: int = 15) -> list[dict]:
 
 async def fight_ended_by_escape(fight_id: int) -> bool:
     """True if the fight's most recent run attempt succeeded (loser escaped)."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT action_detail FROM fight_log "
             "WHERE fight_id = ? AND action_type = 'run' ORDER BY id DESC LIMIT 1",
@@ -322,7 +333,7 @@ async def fight_ended_by_escape(fight_id: int) -> bool:
 
 async def fight_ended_by_forfeit(fight_id: int) -> bool:
     """True if the fight was resolved by an AFK forfeit rather than a knockout."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT 1 FROM fight_log WHERE fight_id = ? AND action_type = 'forfeit' LIMIT 1",
             (fight_id,),
@@ -335,13 +346,12 @@ async def create_fight_token(fight_id: int, player_id: str, base_url: str) -> st
     token = str(uuid.uuid4())
     now = datetime.now(timezone.utc).isoformat()
     expires = (datetime.now(timezone.utc) + timedelta(hours=FIGHT_SESSION_HOURS)).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "INSERT INTO fight_tokens (token, fight_id, player_id, created_at, expires_at) "
             "VALUES (?, ?, ?, ?, ?)",
             (token, fight_id, player_id, now, expires),
         )
-        await db.commit()
     return f"{base_url}/fight/{fight_id}/lobby?ft={token}"
 
 
@@ -353,7 +363,7 @@ async def use_fight_token(token: str) -> tuple[int, str, str] | None:
     """
     now = datetime.now(timezone.utc).isoformat()
 
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT fight_id, player_id, expires_at, session_token "
             "FROM fight_tokens WHERE token = ?",
@@ -368,12 +378,11 @@ async def use_fight_token(token: str) -> tuple[int, str, str] | None:
         return fight_id, player_id, existing_session
 
     session = await sessions.create_session(player_id, f"fight:{fight_id}")
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "UPDATE fight_tokens SET session_token = ? WHERE token = ?",
             (session.token, token),
         )
-        await db.commit()
 
     return fight_id, player_id, session.token
 
@@ -387,7 +396,7 @@ async def set_fight_cards(
     Set a player's fight cards. card_slots is a list of {card_member_id, rarity, slot}.
     Returns False if any card is not owned by the player.
     """
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         for slot_info in card_slots:
             async with db.execute(
                 "SELECT quantity FROM user_cards WHERE owner_id = ? "
@@ -420,7 +429,7 @@ async def set_fight_cards(
                     is_active,
                 ),
             )
-        await db.commit()
+    engine.evict(fight_id)
     return True
 
 
@@ -429,7 +438,7 @@ async def mark_player_ready(fight_id: int, player_id: str) -> tuple[bool, str |
     Mark a player as ready. Returns (both_ready, first_turn_player_id).
     If both are ready, starts the fight with a coin toss.
     """
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         async with db.execute(f"{_FIGHT_SELECT} WHERE id = ?", (fight_id,)) as cur:
             row = await cur.fetchone()
         if not row:
@@ -450,12 +459,12 @@ async def mark_player_ready(fight_id: int, player_id: str) -> tuple[bool, str |
         fight = _row_to_fight(row)
 
         if not (fight.challenger_ready and fight.opponent_ready):
-            await db.commit()
             return False, None
 
         # Coin toss for first turn
         first_turn = random.choice([fight.challenger_id, fight.opponent_id])
-        now = datetime.now(timezone.utc).isoformat()
+        now_dt = datetime.now(timezone.utc)
+        now = now_dt.isoformat()
         await db.execute(
             "UPDATE fights SET status = 'active', current_turn_player_id = ?, "
             "started_at = ?, last_activity_at = ?, turn_started_at = ? WHERE id = ?",
@@ -465,86 +474,58 @@ async def mark_player_ready(fight_id: int, player_id: str) -> tuple[bool, str |
             "INSERT INTO fight_log (fight_id, action_type, narrative_text) VALUES (?, 'system', ?)",
             (fight_id, f"The fight begins! Coin toss: <@{first_turn}> goes first."),
         )
-        await db.commit()
 
+    fight_deadlines.schedule(fight_id, _afk_deadline(now_dt).timestamp())
     return True, first_turn
 
 
 async def get_fight_state(fight_id: int) -> dict:
     """Build the full state JSON dict sent to both WS clients."""
-    fight = await get_fight(fight_id)
+    fight = await engine.get(fight_id)
     if not fight:
         return {"error": "fight_not_found"}
+    return await _render_state(fight)
 
-    cards = await get_fight_cards(fight_id)
-    log_entries = await get_fight_log(fight_id)
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute(
-            "SELECT discord_id, display_name, avatar_url FROM members WHERE discord_id IN (?, ?)",
-            (fight.challenger_id, fight.opponent_id),
-        ) as cur:
-            member_rows = {
-                r[0]: {"display_name": r[1], "avatar_url": r[2]} for r in await cur.fetchall()
-            }
-
-        # Get card member names and avatars
-        card_member_ids = list({c.card_member_id for c in cards})
-        if card_member_ids:
-            placeholders = ",".join("?" * len(card_member_ids))
-            async with db.execute(
-                "SELECT discord_id, display_name, avatar_url FROM members "
-                f"WHERE discord_id IN ({placeholders})",
-                card_member_ids,
-            ) as cur:
-                card_info = {
-                    r[0]: {"display_name": r[1], "avatar_url": r[2]} for r in await cur.fetchall()
-                }
-        else:
-            card_info = {}
+async def _render_state(fight: LiveFight) -> dict:
+    player_ids = [fight.challenger_id, fight.opponent_id]
+    profiles = await directory.get_many([*player_ids, *(c.card_member_id for c in fight.cards)])
 
-        player_ids = [fight.challenger_id, fight.opponent_id]
-        id_placeholders = ",".join("?" * len(player_ids))
-        async with db.execute(
-            f"SELECT player_id, item_type, quantity FROM player_items"
-            f" WHERE player_id IN ({id_placeholders}) AND quantity > 0",
-            player_ids,
-        ) as cur:
-            item_rows = await cur.fetchall()
-    items_by_player: dict[str, dict[str, int]] = {pid: {} for pid in player_ids}
-    for row in item_rows:
-        items_by_player[row[0]][row[1]] = row[2]
+    def name(member_id: str) -> str:
+        profile = profiles.get(member_id)
+        return profile.display_name if profile else member_id
+
+    def avatar(member_id: str) -> str | None:
+        profile = profiles.get(member_id)
+        return profile.avatar_url if profile else None
 
     def player_state(pid: str) -> dict:
-        player_cards = [c for c in cards if c.player_id == pid]
         is_challenger = pid == fight.challenger_id
         return {
             "player_id": pid,
-            "display_name": member_rows.get(pid, {}).get("display_name", pid),
+            "display_name": name(pid),
             "atk_boost": fight.challenger_atk_boost if is_challenger else fight.opponent_atk_boost,
             "smoked": fight.challenger_smoked if is_challenger else fight.opponent_smoked,
-            "items": items_by_player.get(pid, {}),
+            "items": {k: n for k, n in fight.items.get(pid, {}).items() if n > 0},
             "cards": [
                 {
                     "id": c.id,
                     "slot": c.slot,
                     "card_member_id": c.card_member_id,
-                    "display_name": card_info.get(c.card_member_id, {}).get(
-                        "display_name", c.card_member_id
-                    ),
-                    "avatar_url": card_info.get(c.card_member_id, {}).get("avatar_url"),
+                    "display_name": name(c.card_member_id),
+                    "avatar_url": avatar(c.card_member_id),
                     "rarity": c.rarity,
                     "hp_current": c.hp_current,
                     "hp_max": c.hp_max,
                     "is_active": c.is_active,
                     "is_fainted": c.is_fainted,
                 }
-                for c in sorted(player_cards, key=lambda x: x.slot)
+                for c in fight.player_cards(pid)
             ],
         }
 
     return {
-        "fight_id": fight_id,
+        "fight_id": fight.id,
         "mode": fight.mode,
         "status": fight.status,
         "current_turn_player_id": fight.current_turn_player_id,
@@ -555,45 +536,38 @@ async def get_fight_state(fight_id: int) -> dict:
         "winner_id": fight.winner_id,
         "challenger": player_state(fight.challenger_id),
         "opponent": player_state(fight.opponent_id),
-        "log": [
-            {
-                "id": e.id,
-                "actor_id": e.actor_id,
-                "action_type": e.action_type,
-                "action_detail": e.action_detail,
-                "d20_roll": e.d20_roll,
-                "damage_dealt": e.damage_dealt,
-                "narrative_text": e.narrative_text,
-                "created_at": e.created_at,
-            }
-            for e in log_entries
-        ],
+        "log": [dict(entry) for entry in fight.log],
     }
 
 
-def _other_player(fight: Fight, player_id: str) -> str:
+def _other_player(fight: Fight | LiveFight, player_id: str) -> str:
     return fight.opponent_id if player_id == fight.challenger_id else fight.challenger_id
 
 
-def _waiting_on(fight: Fight) -> str | None:
+def _waiting_on(fight: Fight | LiveFight) -> str | None:
     """The player whose inaction is currently blocking the fight."""
     return fight.pending_swap_player_id or fight.current_turn_player_id
 
 
-def _turn_age_seconds(fight: Fight) -> float | None:
-    """Seconds since the current turn was handed to its player, or None if unknown."""
-    if not fight.turn_started_at:
+def _parse_utc(value: str | None) -> datetime | None:
+    if not value:
         return None
     try:
-        started = datetime.fromisoformat(fight.turn_started_at)
+        parsed = datetime.fromisoformat(value)
     except ValueError:
         return None
-    if started.tzinfo is None:
-        started = started.replace(tzinfo=timezone.utc)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _turn_age_seconds(fight: Fight | LiveFight) -> float | None:
+    """Seconds since the current turn was handed to its player, or None if unknown."""
+    started = _parse_utc(fight.turn_started_at)
+    if started is None:
+        return None
     return (datetime.now(timezone.utc) - started).total_seconds()
 
 
-def _is_challenger(fight: Fight, player_id: str) -> bool:
+def _is_challenger(fight: Fight | LiveFight, player_id: str) -> bool:
     return player_id == fight.challenger_id
 
 
@@ -622,72 +596,33 @@ async def _log_action(
     )
 
 
-async def _get_active_card(
-    db: aiosqlite.Connection, fight_id: int, player_id: str
-) -> aiosqlite.Row | None:
-    async with db.execute(
-        "SELECT id, rarity, hp_current, hp_max FROM fight_cards "
-        "WHERE fight_id = ? AND player_id = ? AND is_active = 1 AND is_fainted = 0",
-        (fight_id, player_id),
-    ) as cur:
-        return await cur.fetchone()
-
-
-async def _apply_damage(db: aiosqlite.Connection, card_id: int, damage: int) -> tuple[int, bool]:
-    """Apply damage to a card. Returns (new_hp, fainted)."""
-    async with db.execute("SELECT hp_current FROM fight_cards WHERE id = ?", (card_id,)) as cur:
-        row = await cur.fetchone()
-    assert row is not None
-    new_hp = max(0, row[0] - damage)
-    fainted = new_hp == 0
-    await db.execute(
-        "UPDATE fight_cards SET hp_current = ?, is_fainted = ?, is_active = ? WHERE id = ?",
-        (new_hp, 1 if fainted else 0, 0 if fainted else 1, card_id),
-    )
-    return new_hp, fainted
-
-
-async def _check_all_fainted(db: aiosqlite.Connection, fight_id: int, player_id: str) -> bool:
-    async with db.execute(
-        "SELECT COUNT(*) FROM fight_cards WHERE fight_id = ? AND player_id = ? AND is_fainted = 0",
-        (fight_id, player_id),
-    ) as cur:
-        row = await cur.fetchone()
-    assert row is not None
-    return row[0] == 0
-
-
-async def _has_non_fainted_cards(db: aiosqlite.Connection, fight_id: int, player_id: str) -> bool:
-    async with db.execute(
-        "SELECT COUNT(*) FROM fight_cards WHERE fight_id = ? AND player_id = ? "
-        "AND is_fainted = 0 AND is_active = 0",
-        (fight_id, player_id),
-    ) as cur:
-        row = await cur.fetchone()
-    assert row is not None
-    return row[0] > 0
-
-
-async def _finish_fight(db: aiosqlite.Connection, fight_id: int, winner_id: str) -> None:
+async def _finish_fight(
+    db: aiosqlite.Connection,
+    fight: Fight,
+    winner_id: str,
+    *,
+    escaped: bool = False,
+    forfeited: bool = False,
+) -> None:
+    """Complete the fight and count it in fight_stats, in the caller's transaction."""
     now = datetime.now(timezone.utc).isoformat()
-    await db.execute(
-        "UPDATE fights SET status = 'completed', winner_id = ?, completed_at = ? WHERE id = ?",
-        (winner_id, now, fight_id),
+    cur = await db.execute(
+        "UPDATE fights SET status = 'completed', winner_id = ?, completed_at = ? "
+        "WHERE id = ? AND status != 'completed'",
+        (winner_id, now, fight.id),
     )
+    if cur.rowcount:
+        await record_fight_result(
+            db, winner_id, _other_player(fight, winner_id), escaped=escaped, forfeited=forfeited
+        )
 
 
-async def _advance_turn(db: aiosqlite.Connection, fight_id: int, next_player_id: str) -> None:
-    now = datetime.now(timezone.utc).isoformat()
-    await db.execute(
-        "UPDATE fights SET current_turn_player_id = ?, last_activity_at = ?, "
-        "turn_started_at = ? WHERE id = ?",
-        (next_player_id, now, now, fight_id),
-    )
+# The handlers below apply one action to a LiveFight copy in memory (see FightEngine.run);
+# the engine saves what they changed. A ValueError discards the copy.
 
 
-async def _handle_attack(
-    db: aiosqlite.Connection,
-    fight: Fight,
+def _handle_attack(
+    fight: LiveFight,
     player_id: str,
     attack_key: str,
     detail: dict,
@@ -701,34 +636,33 @@ async def _handle_attack(
 
     # Check smoke screen (player's attack is auto-missed)
     smoked = fight.challenger_smoked if is_ch else fight.opponent_smoked
-    smoked_col = "challenger_smoked" if is_ch else "opponent_smoked"
     if smoked:
-        await db.execute(f"UPDATE fights SET {smoked_col} = 0 WHERE id = ?", (fight.id,))
-        await _log_action(
-            db,
-            fight.id,
+        if is_ch:
+            fight.challenger_smoked = False
+        else:
+            fight.opponent_smoked = False
+        fight.add_log(
             player_id,
             "attack",
             f"<@{player_id}>'s {ATTACKS[attack_key]['name']} was blocked by Smoke Screen!",
             detail={**detail, "tier": "miss"},
         )
-        await _advance_turn(db, fight.id, opponent_id)
+        fight.advance_turn(opponent_id)
         return False, "smoked"
 
     # ATK bonus from Bringus Boost
-    atk_bonus = RARITY_STATS["common"]["atk_bonus"]  # base
-    active_card = await _get_active_card(db, fight.id, player_id)
+    active_card = fight.active_card(player_id)
     if not active_card:
         raise ValueError("No active card for attacker")
-    atk_bonus = RARITY_STATS[active_card[1]]["atk_bonus"]
+    atk_bonus = RARITY_STATS[active_card.rarity]["atk_bonus"]
 
     boost = fight.challenger_atk_boost if is_ch else fight.opponent_atk_boost
     if boost > 0:
         atk_bonus += 10
-        boost_col = "challenger_atk_boost" if is_ch else "opponent_atk_boost"
-        await db.execute(
-            f"UPDATE fights SET {boost_col} = {boost_col} - 1 WHERE id = ?", (fight.id,)
-        )
+        if is_ch:
+            fight.challenger_atk_boost -= 1
+        else:
+            fight.opponent_atk_boost -= 1
 
     roll = roll_d20()
     damage, tier = calc_damage(attack_key, atk_bonus, roll)
@@ -744,9 +678,7 @@ async def _handle_attack(
 
     if damage == 0:
         narrative = f"<@{player_id}> used **{attack_name}** — rolled {roll}, missed!"
-        await _log_action(
-            db,
-            fight.id,
+        fight.add_log(
             player_id,
             "attack",
             narrative,
@@ -754,17 +686,21 @@ async def _handle_attack(
             damage=0,
             detail={**detail, "tier": tier},
         )
-        await _advance_turn(db, fight.id, opponent_id)
+        fight.advance_turn(opponent_id)
         return False, narrative
 
     # Damage > 0 — apply to opponent's active card
-    opp_card = await _get_active_card(db, fight.id, opponent_id)
+    opp_card = fight.active_card(opponent_id)
     if not opp_card:
         raise ValueError("No active card for defender")
-    new_hp, fainted = await _apply_damage(db, opp_card[0], damage)
+    opp_card.hp_current = max(0, opp_card.hp_current - damage)
+    fainted = opp_card.hp_current == 0
+    opp_card.is_fainted = fainted
+    opp_card.is_active = not fainted
+    fight.card_changed(opp_card)
     narrative = (
         f"<@{player_id}> used **{attack_name}** — rolled {roll} ({tier_text}), "
-        f"dealt {damage} damage! ({new_hp}/{opp_card[3]} HP remaining)"
+        f"dealt {damage} damage! ({opp_card.hp_current}/{opp_card.hp_max} HP remaining)"
     )
     if tier == "nat20":
         narrative += " ✨ UNBELIEVABLE POWER!"
@@ -772,9 +708,7 @@ async def _handle_attack(
     if fainted:
         narrative += f"\n<@{opponent_id}>'s card has fainted!"
 
-    await _log_action(
-        db,
-        fight.id,
+    fight.add_log(
         player_id,
         "attack",
         narrative,
@@ -784,47 +718,29 @@ async def _handle_attack(
     )
 
     if fainted:
-        all_fainted = await _check_all_fainted(db, fight.id, opponent_id)
-        if all_fainted:
-            await _finish_fight(db, fight.id, player_id)
-            return True, narrative
-
-        has_reserve = await _has_non_fainted_cards(db, fight.id, opponent_id)
-        if has_reserve:
+        # The fainted card is no longer active, so any card still standing is a reserve.
+        if any(not c.is_fainted for c in fight.player_cards(opponent_id)):
             now = datetime.now(timezone.utc).isoformat()
-            await db.execute(
-                "UPDATE fights SET pending_swap_player_id = ?, last_activity_at = ?, "
-                "turn_started_at = ? WHERE id = ?",
-                (opponent_id, now, now, fight.id),
-            )
-        else:
-            await _finish_fight(db, fight.id, player_id)
-            return True, narrative
-        return False, narrative
-
-    await _advance_turn(db, fight.id, opponent_id)
+            fight.pending_swap_player_id = opponent_id
+            fight.last_activity_at = now
+            fight.turn_started_at = now
+            return False, narrative
+        fight.finish(player_id)
+        return True, narrative
+
+    fight.advance_turn(opponent_id)
     return False, narrative
 
 
-async def _handle_item(
-    db: aiosqlite.Connection,
-    fight: Fight,
+def _handle_item(
+    fight: LiveFight,
     player_id: str,
     item_type: str,
 ) -> str:
     """Use an item on your turn. Returns narrative."""
-    async with db.execute(
-        "SELECT quantity FROM player_items WHERE player_id = ? AND item_type = ?",
-        (player_id, item_type),
-    ) as cur:
-        row = await cur.fetchone()
-    if not row or row[0] < 1:
+    if fight.items.get(player_id, {}).get(item_type, 0) < 1:
         raise ValueError("no_item")
-
-    await db.execute(
-        "UPDATE player_items SET quantity = quantity - 1 WHERE player_id = ? AND item_type = ?",
-        (player_id, item_type),
-    )
+    fight.spend_item(player_id, item_type)
 
     is_ch = _is_challenger(fight, player_id)
     opponent_id = _other_player(fight, player_id)
@@ -832,90 +748,76 @@ async def _handle_item(
 
     if item_type in ("heal_potion", "super_potion"):
         hp_restore = ITEM_EFFECTS[item_type]["hp_restore"]
-        active_card = await _get_active_card(db, fight.id, player_id)
+        active_card = fight.active_card(player_id)
         if not active_card:
             raise ValueError("no_active_card")
-        card_id, _rarity, hp_cur, hp_max = active_card
+        hp_cur, hp_max = active_card.hp_current, active_card.hp_max
         new_hp = min(hp_max, hp_cur + hp_restore)
-        await db.execute(
-            "UPDATE fight_cards SET hp_current = ? WHERE id = ?",
-            (new_hp, card_id),
-        )
+        active_card.hp_current = new_hp
+        fight.card_changed(active_card)
         item_name = "Heal Potion" if item_type == "heal_potion" else "Super Potion"
         narrative = (
             f"<@{player_id}> used **{item_name}**! "
             f"Restored {new_hp - hp_cur} HP ({new_hp}/{hp_max})."
         )
     elif item_type == "bringus_boost":
-        col = "challenger_atk_boost" if is_ch else "opponent_atk_boost"
-        await db.execute(f"UPDATE fights SET {col} = 3 WHERE id = ?", (fight.id,))
+        if is_ch:
+            fight.challenger_atk_boost = 3
+        else:
+            fight.opponent_atk_boost = 3
         narrative = f"<@{player_id}> activated **Bringus Boost**! +10 ATK for the next 3 turns."
     elif item_type == "smoke_screen":
         # Smoke screen makes the OPPONENT's next attack miss
-        opp_smoked_col = "opponent_smoked" if is_ch else "challenger_smoked"
-        await db.execute(f"UPDATE fights SET {opp_smoked_col} = 1 WHERE id = ?", (fight.id,))
+        if is_ch:
+            fight.opponent_smoked = True
+        else:
+            fight.challenger_smoked = True
         narrative = (
             f"<@{player_id}> deployed **Smoke Screen**! <@{opponent_id}>'s next attack will miss."
         )
 
-    await _log_action(db, fight.id, player_id, "item", narrative, detail={"item_type": item_type})
-    await _advance_turn(db, fight.id, opponent_id)
+    fight.add_log(player_id, "item", narrative, detail={"item_type": item_type})
+    fight.advance_turn(opponent_id)
     return narrative
 
 
-async def _handle_swap(
-    db: aiosqlite.Connection,
-    fight: Fight,
+def _handle_swap(
+    fight: LiveFight,
     player_id: str,
     slot: int,
     forced: bool = False,
 ) -> str:
     """Swap to a different card. forced=True means post-faint replacement (no turn cost)."""
-    async with db.execute(
-        "SELECT id, card_member_id, hp_current, is_fainted FROM fight_cards "
-        "WHERE fight_id = ? AND player_id = ? AND slot = ?",
-        (fight.id, player_id, slot),
-    ) as cur:
-        row = await cur.fetchone()
-    if not row:
+    cards = fight.player_cards(player_id)
+    card = next((c for c in cards if c.slot == slot), None)
+    if card is None:
         raise ValueError("invalid_slot")
-    card_id, card_member_id, hp_cur, is_fainted = row
-    if is_fainted:
+    if card.is_fainted:
         raise ValueError("card_fainted")
 
-    await db.execute(
-        "UPDATE fight_cards SET is_active = 0 WHERE fight_id = ? AND player_id = ?",
-        (fight.id, player_id),
-    )
-    await db.execute("UPDATE fight_cards SET is_active = 1 WHERE id = ?", (card_id,))
-
-    async with db.execute(
-        "SELECT display_name FROM members WHERE discord_id = ?", (card_member_id,)
-    ) as cur:
-        name_row = await cur.fetchone()
-    card_name = name_row[0] if name_row else card_member_id
+    for c in cards:
+        if c.is_active != (c is card):
+            c.is_active = c is card
+            fight.card_changed(c)
 
-    narrative = f"<@{player_id}> sent out **{card_name}** ({hp_cur} HP)!"
-    await _log_action(db, fight.id, player_id, "swap", narrative, detail={"slot": slot})
+    narrative = (
+        f"<@{player_id}> sent out **{card.name or card.card_member_id}** ({card.hp_current} HP)!"
+    )
+    fight.add_log(player_id, "swap", narrative, detail={"slot": slot})
 
     if forced:
         # Post-faint swap: clear pending_swap, give turn to the swapping player (defender)
-        now = datetime.now(timezone.utc).isoformat()
-        await db.execute(
-            "UPDATE fights SET pending_swap_player_id = NULL, current_turn_player_id = ?, "
-            "last_activity_at = ?, turn_started_at = ? WHERE id = ?",
-            (player_id, now, now, fight.id),
-        )
+        fight.pending_swap_player_id = None
+        fight.advance_turn(player_id)
     else:
         # Voluntary swap costs the turn
-        await _advance_turn(db, fight.id, _other_player(fight, player_id))
+        fight.advance_turn(_other_player(fight, player_id))
 
     return narrative
 
 
-async def _handle_run(
-    db: aiosqlite.Connection,
-    fight: Fight,
+def _handle_run(
+    fight: LiveFight,
     player_id: str,
 ) -> tuple[bool, bool, int, str]:
     """
@@ -933,29 +835,23 @@ async def _handle_run(
             f"<@{player_id}> attempted to flee — rolled {roll}! "
             "Free escape! The battle ends with no Pringle cost."
         )
-        await _log_action(
-            db, fight.id, player_id, "run", narrative, d20_roll=roll, detail={"escaped": True}
-        )
-        await _finish_fight(db, fight.id, opponent_id)
+        fight.add_log(player_id, "run", narrative, d20_roll=roll, detail={"escaped": True})
+        fight.finish(opponent_id, escaped=True)
         return True, True, roll, narrative
     elif roll >= 11:
         narrative = (
             f"<@{player_id}> attempted to flee — rolled {roll}! "
             "Escape successful, but forfeits 25 Pringles."
         )
-        await _log_action(
-            db, fight.id, player_id, "run", narrative, d20_roll=roll, detail={"escaped": True}
-        )
-        await _finish_fight(db, fight.id, opponent_id)
+        fight.add_log(player_id, "run", narrative, d20_roll=roll, detail={"escaped": True})
+        fight.finish(opponent_id, escaped=True)
         return True, True, roll, narrative
     else:
         narrative = (
             f"<@{player_id}> attempted to flee — rolled {roll}! Failed to escape! Loses their turn."
         )
-        await _log_action(
-            db, fight.id, player_id, "run", narrative, d20_roll=roll, detail={"escaped": False}
-        )
-        await _advance_turn(db, fight.id, opponent_id)
+        fight.add_log(player_id, "run", narrative, d20_roll=roll, detail={"escaped": False})
+        fight.advance_turn(opponent_id)
         return False, False, roll, narrative
 
 
@@ -990,25 +886,39 @@ async def forfeit_fight(fight_id: int, claimant_id: str) -> tuple[bool, str]:
     Only the player being waited on can be forfeited against, and only once their turn
     has sat untouched for AFK_CLAIM_MINUTES. Returns (success, error_msg).
     """
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with engine.exclusive(fight_id):
+        result = await _forfeit_locked(fight_id, claimant_id)
+    if isinstance(result, str):
+        return False, result
+    fight, afk_id = result
+    await _settle_finished_fight(fight_id, fight.mode, claimant_id, afk_id)
+    return True, ""
+
+
+async def _forfeit_locked(fight_id: int, claimant_id: str) -> tuple[Fight, str] | str:
+    """forfeit_fight's checks and writes, under the fight's lock.
+
+    Returns the fight as it was and the forfeiting player's id, or an error key.
+    """
+    async with transaction() as db:
         async with db.execute(f"{_FIGHT_SELECT} WHERE id = ?", (fight_id,)) as cur:
             row = await cur.fetchone()
         if not row:
-            return False, "fight_not_found"
+            return "fight_not_found"
         fight = _row_to_fight(row)
 
         if fight.status != "active":
-            return False, "fight_not_active"
+            return "fight_not_active"
         if claimant_id not in (fight.challenger_id, fight.opponent_id):
-            return False, "not_a_participant"
+            return "not_a_participant"
 
         afk_id = _waiting_on(fight)
         if afk_id is None or afk_id == claimant_id:
-            return False, "not_waiting_on_opponent"
+            return "not_waiting_on_opponent"
 
         age = _turn_age_seconds(fight)
         if age is None or age < AFK_CLAIM_MINUTES * 60:
-            return False, "opponent_not_afk_yet"
+            return "opponent_not_afk_yet"
 
         await _log_action(
             db,
@@ -1018,11 +928,10 @@ async def forfeit_fight(fight_id: int, claimant_id: str) -> tuple[bool, str]:
             f"<@{afk_id}> never made their move — <@{claimant_id}> wins by forfeit!",
             detail={"forfeited": True, "afk_player_id": afk_id},
         )
-        await _finish_fight(db, fight_id, claimant_id)
-        await db.commit()
-
-    await _settle_finished_fight(fight_id, fight.mode, claimant_id, afk_id)
-    return True, ""
+        await _finish_fight(db, fight, claimant_id, forfeited=True)
+    engine.evict(fight_id)
+    fight_deadlines.cancel(fight_id)
+    return fight, afk_id
 
 
 async def auto_forfeit_idle_fights() -> list[int]:
@@ -1030,9 +939,12 @@ async def auto_forfeit_idle_fights() -> list[int]:
 
     The backstop for when the present player never clicks "claim win" — an abandoned
     fight resolves itself instead of sitting active forever. Returns resolved fight ids.
+    While the bot runs, fight_deadlines does this for each fight as it comes due; this
+    sweep, run by reconcile_fight_deadlines at startup, catches the ones that came due
+    while it was down.
     """
     cutoff = (datetime.now(timezone.utc) - timedelta(minutes=AFK_AUTO_FORFEIT_MINUTES)).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             f"{_FIGHT_SELECT} WHERE status = 'active' AND turn_started_at IS NOT NULL "
             "AND turn_started_at < ?",
@@ -1062,105 +974,108 @@ async def process_action(
     """
     Process a player action. Returns (success, error_msg, new_state_dict).
     Pringles for run escape are handled here via pringle_service.
+
+    Runs under the fight's lock until its state is rendered, so concurrent actions on one
+    fight apply, and are handed back for broadcast, in the order they arrived.
     """
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute(f"{_FIGHT_SELECT} WHERE id = ?", (fight_id,)) as cur:
-            row = await cur.fetchone()
-        if not row:
+    async with engine.exclusive(fight_id):
+        try:
+            applied = await engine.run(
+                fight_id, lambda fight: _apply_action(fight, player_id, action, detail)
+            )
+        except ValueError as e:
+            # Raised mid-action or by the save: nothing the action changed was kept.
+            return False, str(e), {}
+        if applied is None:
             return False, "fight_not_found", {}
-        fight = _row_to_fight(row)
+        fight, outcome = applied
+        if isinstance(outcome, str):
+            return False, outcome, {}
+        fight_ended, escape_penalty = outcome
+        _schedule_turn_deadline(fight)
+        state = await _render_state(fight)
+
+    # Settling pays out and announces; a finished fight has no more actions to hold up.
+    if fight_ended and fight.winner_id:
+        await _settle_finished_fight(
+            fight_id,
+            fight.mode,
+            fight.winner_id,
+            _other_player(fight, fight.winner_id),
+            escape_penalty=escape_penalty,
+        )
 
-        if fight.status != "active":
-            return False, "fight_not_active", {}
-
-        # Forced swap takes priority over normal turn order
-        if fight.pending_swap_player_id:
-            if player_id != fight.pending_swap_player_id:
-                return False, "waiting_for_swap", {}
-            if action != "swap":
-                return False, "must_swap", {}
-            slot = detail.get("slot")
-            if not slot:
-                return False, "missing_slot", {}
-            try:
-                await _handle_swap(db, fight, player_id, int(slot), forced=True)
-            except ValueError as e:
-                return False, str(e), {}
-            await db.commit()
-            state = await get_fight_state(fight_id)
-            return True, "", state
-
-        if fight.current_turn_player_id != player_id:
-            return False, "not_your_turn", {}
-
-        fight_ended = False
-        escape_penalty = False
-
-        if action == "attack":
-            attack_key = detail.get("attack_key", "")
-            try:
-                fight_ended, _narrative = await _handle_attack(
-                    db, fight, player_id, attack_key, detail
-                )
-            except ValueError as e:
-                return False, str(e), {}
-
-        elif action == "item":
-            item_type = detail.get("item_type", "")
-            try:
-                await _handle_item(db, fight, player_id, item_type)
-            except ValueError as e:
-                return False, str(e), {}
-
-        elif action == "swap":
-            if fight.mode != "extended":
-                return False, "swap_not_allowed", {}
-            slot = detail.get("slot")
-            if not slot:
-                return False, "missing_slot", {}
-            try:
-                await _handle_swap(db, fight, player_id, int(slot), forced=False)
-            except ValueError as e:
-                return False, str(e), {}
-
-        elif action == "run":
-            try:
-                fight_ended, escaped, roll, _narrative = await _handle_run(db, fight, player_id)
-                if fight_ended and escaped and roll < 16:
-                    escape_penalty = True
-            except ValueError as e:
-                return False, str(e), {}
+    return True, "", state
 
-        else:
-            return False, "unknown_action", {}
-
-        await db.commit()
-
-    if fight_ended:
-        updated_fight = await get_fight(fight_id)
-        if updated_fight and updated_fight.winner_id:
-            winner_id = updated_fight.winner_id
-            await _settle_finished_fight(
-                fight_id,
-                fight.mode,
-                winner_id,
-                _other_player(fight, winner_id),
-                escape_penalty=escape_penalty,
-            )
 
-    state = await get_fight_state(fight_id)
-    return True, "", state
+def _apply_action(
+    fight: LiveFight,
+    player_id: str,
+    action: str,
+    detail: dict,
+) -> tuple[bool, bool] | str:
+    """Apply one action to a fight in memory.
+
+    Returns (fight_ended, escape_penalty), or an error key when the action is rejected
+    before anything is changed. Handlers raise ValueError for rejections they discover
+    part-way through, which discards their changes.
+    """
+    if fight.status != "active":
+        return "fight_not_active"
+
+    # Forced swap takes priority over normal turn order
+    if fight.pending_swap_player_id:
+        if player_id != fight.pending_swap_player_id:
+            return "waiting_for_swap"
+        if action != "swap":
+            return "must_swap"
+        slot = detail.get("slot")
+        if not slot:
+            return "missing_slot"
+        _handle_swap(fight, player_id, int(slot), forced=True)
+        return False, False
+
+    if fight.current_turn_player_id != player_id:
+        return "not_your_turn"
+
+    fight_ended = False
+    escape_penalty = False
+
+    if action == "attack":
+        attack_key = detail.get("attack_key", "")
+        fight_ended, _narrative = _handle_attack(fight, player_id, attack_key, detail)
+
+    elif action == "item":
+        item_type = detail.get("item_type", "")
+        _handle_item(fight, player_id, item_type)
+
+    elif action == "swap":
+        if fight.mode != "extended":
+            return "swap_not_allowed"
+        slot = detail.get("slot")
+        if not slot:
+            return "missing_slot"
+        _handle_swap(fight, player_id, int(slot), forced=False)
+
+    elif action == "run":
+        fight_ended, escaped, roll, _narrative = _handle_run(fight, player_id)
+        if fight_ended and escaped and roll < 16:
+            escape_penalty = True
+
+    else:
+        return "unknown_action"
+
+    return fight_ended, escape_penalty
 
 
 async def expire_pending_challenges() -> None:
     """Expire fights that have been pending past their expiry time."""
     now = datetime.now(timezone.utc).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "UPDATE fights SET status = 'expired' WHERE status = 'pending' AND expires_at < ?",
             (now,),
         )
-        await db.commit()
 
 
 async def expire_inactive_fights() -> None:
@@ -1178,13 +1093,136 @@ async def expire_inactive_fights() -> None:
     """
     now = datetime.now(timezone.utc)
     cutoff = (now - timedelta(minutes=INACTIVITY_EXPIRE_MINUTES)).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "UPDATE fights SET status = 'expired' "
             "WHERE status = 'lobby' AND (last_activity_at < ? OR expires_at < ?)",
             (cutoff, now.isoformat()),
         )
-        await db.commit()
+
+
+# Every unresolved fight has one deadline, held in fight_deadlines: a pending challenge
+# expires at expires_at, a lobby at expires_at or INACTIVITY_EXPIRE_MINUTES after it was
+# last watched (whichever is sooner), and an active fight auto-forfeits its AFK player
+# AFK_AUTO_FORFEIT_MINUTES into their turn. The writers that create fights or move them
+# between states schedule the new deadline, when they run in the bot process, which
+# enables and runs the scheduler, so the heap needs no sweeping while the bot runs.
+# reconcile_fight_deadlines fills it once at startup. Webapp workers in other processes
+# (a "unix:" FIGHT_BACKPLANE) can't reach it, so only in that deployment does the bot
+# also reconcile periodically, to pick up fights that changed there.
+
+
+def _afk_deadline(turn_started: datetime) -> datetime:
+    return turn_started + timedelta(minutes=AFK_AUTO_FORFEIT_MINUTES)
+
+
+def _deadline(fight: Fight) -> datetime | None:
+    """When the fight next needs resolving without its players, or None if never."""
+    if fight.status == "pending":
+        return _parse_utc(fight.expires_at)
+    if fight.status == "lobby":
+        watched = _parse_utc(fight.last_activity_at)
+        candidates = [
+            _parse_utc(fight.expires_at),
+            watched + timedelta(minutes=INACTIVITY_EXPIRE_MINUTES) if watched else None,
+        ]
+        return min((c for c in candidates if c is not None), default=None)
+    if fight.status == "active":
+        started = _parse_utc(fight.turn_started_at)
+        return _afk_deadline(started) if started else None
+    return None
+
+
+def _schedule_deadline(fight: Fight) -> None:
+    due = _deadline(fight)
+    if due is None:
+        fight_deadlines.cancel(fight.id)
+    else:
+        fight_deadlines.schedule(fight.id, due.timestamp())
+
+
+def _schedule_turn_deadline(fight: LiveFight) -> None:
+    """_schedule_deadline for a fight the engine just played a turn of."""
+    started = _parse_utc(fight.turn_started_at) if fight.status == "active" else None
+    if started is None:
+        fight_deadlines.cancel(fight.id)
+    else:
+        fight_deadlines.schedule(fight.id, _afk_deadline(started).timestamp())
+
+
+async def resolve_fight_deadline(fight_id: int) -> bool:
+    """Expire or auto-forfeit a fight whose deadline has come, reading it fresh.
+
+    Deadlines that moved later since they were scheduled (a lobby still being watched, a
+    turn taken in another process) are rescheduled instead. Returns True if the fight
+    was resolved.
+    """
+    fight = await get_fight(fight_id)
+    due = _deadline(fight) if fight else None
+    if fight is None or due is None:
+        return False
+    if due > datetime.now(timezone.utc):
+        fight_deadlines.schedule(fight_id, due.timestamp())
+        return False
+
+    if fight.status == "active":
+        afk_id = _waiting_on(fight)
+        resolved = False
+        if afk_id is not None:
+            resolved, _err = await forfeit_fight(fight_id, _other_player(fight, afk_id))
+        if resolved:
+            log.info("Auto-forfeited abandoned fight %d", fight_id)
+    else:
+        # Conditional on the row read above, so a touch landing in between wins.
+        async with transaction() as db:
+            cur = await db.execute(
+                "UPDATE fights SET status = 'expired' WHERE id = ? AND status = ? "
+                "AND expires_at IS ? AND last_activity_at IS ?",
+                (fight_id, fight.status, fight.expires_at, fight.last_activity_at),
+            )
+        resolved = cur.rowcount > 0
+    if not resolved:
+        fight = await get_fight(fight_id)
+        due = _deadline(fight) if fight else None
+        if due is not None and due > datetime.now(timezone.utc):
+            fight_deadlines.schedule(fight_id, due.timestamp())
+    return resolved
+
+
+fight_deadlines: DeadlineScheduler[int] = DeadlineScheduler(resolve_fight_deadline)
+
+
+async def reconcile_fight_deadlines() -> int:
+    """Resolve whatever is overdue, then schedule every unresolved fight's deadline.
+
+    Run at startup, to catch up on what came due while the bot was down and seed the
+    heap; the scheduling writers keep it current from then on. Returns how many
+    deadlines are scheduled.
+    """
+    await expire_pending_challenges()
+    await expire_inactive_fights()
+    resolved = await auto_forfeit_idle_fights()
+    if resolved:
+        log.info("Auto-forfeited %d abandoned fight(s): %s", len(resolved), resolved)
+    async with reader() as db:
+        async with db.execute(
+            f"{_FIGHT_SELECT} WHERE status IN ('pending', 'lobby', 'active')"
+        ) as cur:
+            rows = await cur.fetchall()
+    for row in rows:
+        _schedule_deadline(_row_to_fight(row))
+    return len(fight_deadlines)
+
+
+async def reload_fights() -> None:
+    """Drop the engine's fights and every deadline, for when the fights table was replaced.
+
+    In the process running the scheduler, the deadlines are then re-read as at startup.
+    """
+    engine.clear()
+    fight_deadlines.clear()
+    if fight_deadlines.enabled:
+        await reconcile_fight_deadlines()
 
 
 async def get_fight_leaderboard(sort_by: str = "wins") -> list[dict]:
@@ -1194,23 +1232,14 @@ async def get_fight_leaderboard(sort_by: str = "wins") -> list[dict]:
     All rows: {discord_id, display_name, total}.
     win_rate rows also include {total_fights} for display formatting.
     """
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         if sort_by == "win_rate":
             async with db.execute("""
-                SELECT discord_id, display_name,
-                  CAST(wins AS REAL) / total_fights AS total,
-                  total_fights
-                FROM (
-                  SELECT m.discord_id, m.display_name,
-                    SUM(CASE WHEN f.winner_id = m.discord_id THEN 1 ELSE 0 END) AS wins,
-                    COUNT(*) AS total_fights
-                  FROM members m
-                  JOIN fights f
-                    ON (f.challenger_id = m.discord_id OR f.opponent_id = m.discord_id)
-                  WHERE f.status = 'completed' AND m.is_excluded = 0
-                  GROUP BY m.discord_id
-                  HAVING total_fights >= 3
-                )
+                SELECT fs.player_id, m.display_name,
+                  CAST(fs.wins AS REAL) / fs.fights_played AS total,
+                  fs.fights_played
+                FROM fight_stats fs JOIN members m ON m.discord_id = fs.player_id
+                WHERE fs.fights_played >= 3 AND m.is_excluded = 0
                 ORDER BY total DESC LIMIT 10
             """) as cur:
                 rows = await cur.fetchall()
@@ -1224,41 +1253,32 @@ async def get_fight_leaderboard(sort_by: str = "wins") -> list[dict]:
                 for r in rows
             ]
 
-        if sort_by == "fights_played":
-            sql = """
-                SELECT m.discord_id, m.display_name, COUNT(*) AS total
-                FROM members m
-                JOIN fights f
-                  ON (f.challenger_id = m.discord_id OR f.opponent_id = m.discord_id)
-                WHERE f.status = 'completed' AND m.is_excluded = 0
-                GROUP BY m.discord_id ORDER BY total DESC LIMIT 10
-            """
-        elif sort_by == "pringle_balance":
+        if sort_by == "pringle_balance":
             sql = """
                 SELECT discord_id, display_name, pringle_balance AS total
                 FROM members WHERE is_excluded = 0
                 ORDER BY pringle_balance DESC LIMIT 10
             """
-        elif sort_by == "escapes":
-            sql = """
-                SELECT fl.actor_id AS discord_id, m.display_name, COUNT(*) AS total
-                FROM fight_log fl
-                JOIN fights f ON f.id = fl.fight_id
-                JOIN members m ON m.discord_id = fl.actor_id
-                WHERE fl.action_type = 'run'
-                  AND f.status = 'completed'
-                  AND f.winner_id != fl.actor_id
-                  AND m.is_excluded = 0
-                GROUP BY fl.actor_id ORDER BY total DESC LIMIT 10
-            """
-        else:  # wins
-            sql = """
-                SELECT m.discord_id, m.display_name, COUNT(*) AS total
-                FROM fights f JOIN members m ON m.discord_id = f.winner_id
-                WHERE f.status = 'completed' AND m.is_excluded = 0
-                GROUP BY f.winner_id ORDER BY total DESC LIMIT 10
+        else:
+            column = {"fights_played": "fights_played", "escapes": "escapes"}.get(sort_by, "wins")
+            sql = f"""
+                SELECT fs.player_id, m.display_name, fs.{column} AS total
+                FROM fight_stats fs JOIN members m ON m.discord_id = fs.player_id
+                WHERE fs.{column} > 0 AND m.is_excluded = 0
+                ORDER BY fs.{column} DESC LIMIT 10
             """
-
         async with db.execute(sql) as cur:
             rows = await cur.fetchall()
     return [{"discord_id": r[0], "display_name": r[1], "total": r[2]} for r in rows]
+
+
+async def backfill_fight_stats() -> int:
+    """Recount fight_stats from fights and fight_log. Returns how many players it covers.
+
+    Finishing a fight keeps fight_stats current; this is for fights completed before the
+    table existed or written around fight_service.
+    """
+    async with transaction() as db:
+        await db.execute("DELETE FROM fight_stats")
+        cur = await db.execute(FIGHT_STATS_BACKFILL_SQL)
+        return cur.rowcount
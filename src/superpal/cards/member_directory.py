@@ -0,0 +1,121 @@
+"""Process-wide directory of members: names, avatars, flags and parsed bio/stats.
+
+Card embeds, fight states, DMs and pages all need members' display names or avatars,
+often several at once. The directory reads the members table once, on first use, and
+answers those lookups from memory. cards.service keeps it current as sync_members and
+the admin setters write; those run in this process, which is the only writer of these
+columns. An id the directory doesn't hold (a row inserted some other way) is read on
+demand and kept from then on.
+"""
+
+import json
+from collections.abc import Iterable
+from dataclasses import replace
+
+from superpal.cards.db import reader
+from superpal.cards.models import MemberProfile
+
+_COLUMNS = "discord_id, display_name, avatar_url, is_synthetic, is_excluded, bio, stats"
+
+
+def parse_stats(raw: str | None) -> list[tuple[str, str]]:
+    if not raw:
+        return []
+    try:
+        return list(json.loads(raw).items())
+    except (json.JSONDecodeError, AttributeError):
+        return []
+
+
+def _profile(row) -> MemberProfile:
+    return MemberProfile(
+        discord_id=row[0],
+        display_name=row[1],
+        avatar_url=row[2],
+        is_synthetic=bool(row[3]),
+        is_excluded=bool(row[4]),
+        bio=row[5],
+        stats_pairs=tuple(parse_stats(row[6])),
+    )
+
+
+class MemberDirectory:
+    """MemberProfiles by discord_id, loaded once and updated in place."""
+
+    def __init__(self) -> None:
+        self._profiles: dict[str, MemberProfile] = {}
+        self._loaded = False
+        # Bumped by every change, so a load that overlapped one isn't kept.
+        self._generation = 0
+
+    def invalidate(self) -> None:
+        """Drop everything; the next lookup reloads the table."""
+        self._generation += 1
+        self._loaded = False
+        self._profiles = {}
+
+    def update(self, discord_id: str, **changes) -> None:
+        """Apply committed column changes to a held profile.
+
+        Ids the directory doesn't hold are left alone; a lookup reads them when needed.
+        """
+        self._generation += 1
+        profile = self._profiles.get(discord_id)
+        if profile is not None:
+            self._profiles[discord_id] = replace(profile, **changes)
+
+    def apply_sync(self, members: list[dict]) -> None:
+        """Apply a sync_members upsert, which leaves synthetic members untouched."""
+        self._generation += 1
+        for m in members:
+            profile = self._profiles.get(m["discord_id"])
+            if profile is not None and not profile.is_synthetic:
+                self._profiles[profile.discord_id] = replace(
+                    profile, display_name=m["display_name"], avatar_url=m["avatar_url"]
+                )
+
+    async def _load(self) -> None:
+        generation = self._generation
+        async with reader() as db:
+            async with db.execute(f"SELECT {_COLUMNS} FROM members") as cur:
+                rows = await cur.fetchall()
+        if generation == self._generation:
+            self._profiles = {row[0]: _profile(row) for row in rows}
+            self._loaded = True
+
+    async def get_many(self, discord_ids: Iterable[str]) -> dict[str, MemberProfile]:
+        """{discord_id: profile} for those of discord_ids that are members."""
+        ids = list(dict.fromkeys(discord_ids))
+        if not ids:
+            return {}
+        if not self._loaded:
+            await self._load()
+        found: dict[str, MemberProfile] = {}
+        missing: list[str] = []
+        for discord_id in ids:
+            profile = self._profiles.get(discord_id)
+            if profile is None:
+                missing.append(discord_id)
+            else:
+                found[discord_id] = profile
+        if missing:
+            generation = self._generation
+            async with reader() as db:
+                async with db.execute(
+                    f"SELECT {_COLUMNS} FROM members WHERE discord_id IN "
+                    f"({','.join('?' * len(missing))})",
+                    missing,
+                ) as cur:
+                    rows = await cur.fetchall()
+            for row in rows:
+                profile = _profile(row)
+                found[profile.discord_id] = profile
+                if generation == self._generation:
+                    self._profiles[profile.discord_id] = profile
+        return found
+
+    async def get(self, discord_id: str) -> MemberProfile | None:
+        return (await self.get_many([discord_id])).get(discord_id)
+
+
+directory = MemberDirectory()
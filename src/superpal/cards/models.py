@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 RARITY_ORDER: list[str] = ["common", "uncommon", "rare", "legendary"]
 
@@ -44,6 +44,28 @@ class MemberCardContext:
     stats_pairs: list[tuple[str, str]]
 
 
+@dataclass(frozen=True)
+class MemberProfile:
+    """A member as the member directory holds it (see cards.member_directory)."""
+
+    discord_id: str
+    display_name: str
+    avatar_url: str | None
+    is_synthetic: bool
+    is_excluded: bool
+    bio: str | None
+    stats_pairs: tuple[tuple[str, str], ...]
+
+    def card_context(self) -> MemberCardContext:
+        return MemberCardContext(
+            discord_id=self.discord_id,
+            display_name=self.display_name,
+            avatar_url=self.avatar_url,
+            bio=self.bio,
+            stats_pairs=list(self.stats_pairs),
+        )
+
+
 @dataclass
 class UserCard:
     id: int
@@ -163,3 +185,47 @@ class TradeOfferFull:
     expires_at: str
     items: list[CardRef]
     listing: TradeListingFull
+
+
+@dataclass
+class BulkResult:
+    """Outcome of an admin operation applied to every eligible member at once."""
+
+    members: int
+    rows_affected: int
+
+    def summary(self) -> str:
+        return f"{self.rows_affected} rows changed across {self.members} members"
+
+
+@dataclass
+class CardExchange:
+    """Net effect of a bulk upgrade or trade-in on one collection."""
+
+    # rarity -> copies given up
+    spent: dict[str, int] = field(default_factory=dict)
+    # (card_member_id, rarity) -> copies gained
+    received: dict[tuple[str, str], int] = field(default_factory=dict)
+
+    @property
+    def spent_count(self) -> int:
+        return sum(self.spent.values())
+
+    @property
+    def received_count(self) -> int:
+        return sum(self.received.values())
+
+    def summary(self) -> str:
+        if not self.received:
+            return "Nothing to exchange."
+        got: dict[str, int] = {}
+        for (_, rarity), n in self.received.items():
+            got[rarity] = got.get(rarity, 0) + n
+
+        def by_rarity(counts: dict[str, int]) -> str:
+            return ", ".join(f"{counts[r]} {r}" for r in RARITY_ORDER if counts.get(r))
+
+        return (
+            f"Spent {self.spent_count} cards ({by_rarity(self.spent)}) for "
+            f"{self.received_count} ({by_rarity(got)})."
+        )
@@ -0,0 +1,90 @@
+"""In-memory index of the card subjects each player owns, for autocomplete.
+
+Discord sends an autocomplete request on every keystroke and drops answers that take
+longer than a few seconds, so /card-display, /card-trade-in, /card-upgrade and /card-gift
+search this instead of querying user_cards each time. An owner's entry is loaded on
+their first search and kept until a service call changes their cards (invalidate) or
+renames members (clear); all of those live in cards.service, in this process.
+"""
+
+from collections.abc import Awaitable, Callable
+
+Loader = Callable[[str], Awaitable[list[dict]]]
+
+
+def label_card_subjects(subjects: list[dict]) -> list[tuple[str, str]]:
+    """Format (label, discord_id) pairs for card autocomplete, disambiguating collisions.
+
+    Synthetic (non-Discord) subjects get a " (Custom)" tag. Any label that still
+    collides with another entry after tagging gets the subject's last 4 ID chars appended.
+    """
+    labeled = [
+        (
+            f"{s['display_name']} (Custom)" if s["is_synthetic"] else s["display_name"],
+            s["discord_id"],
+        )
+        for s in subjects
+    ]
+    label_counts: dict[str, int] = {}
+    for label, _ in labeled:
+        label_counts[label] = label_counts.get(label, 0) + 1
+    return [
+        (f"{label} ({discord_id[-4:]})" if label_counts[label] > 1 else label, discord_id)
+        for label, discord_id in labeled
+    ]
+
+
+class OwnedSubjectIndex:
+    """Owned subjects' autocomplete labels per owner, searchable by prefix and substring.
+
+    Labels are computed over the owner's whole collection, so a collision suffix
+    doesn't depend on what the query happened to match, and can itself be searched.
+    """
+
+    def __init__(self, load: Loader):
+        self._load = load
+        # owner_id -> ((label, discord_id) ordered by display name, casefolded labels)
+        self._by_owner: dict[str, tuple[list[tuple[str, str]], list[str]]] = {}
+        self._generation = 0
+
+    def invalidate(self, *owner_ids: str) -> None:
+        """Forget these owners' entries; the next search reloads them."""
+        self._generation += 1
+        for owner_id in owner_ids:
+            self._by_owner.pop(owner_id, None)
+
+    def clear(self) -> None:
+        """Forget every entry, e.g. after display names change."""
+        self._generation += 1
+        self._by_owner.clear()
+
+    async def _entry(self, owner_id: str) -> tuple[list[tuple[str, str]], list[str]]:
+        entry = self._by_owner.get(owner_id)
+        if entry is None:
+            generation = self._generation
+            labels = label_card_subjects(await self._load(owner_id))
+            entry = (labels, [label.casefold() for label, _ in labels])
+            # An invalidation while loading may have raced the read; don't keep it.
+            if generation == self._generation:
+                self._by_owner[owner_id] = entry
+        return entry
+
+    async def search(self, owner_id: str, query: str, limit: int = 25) -> list[tuple[str, str]]:
+        """owner_id's (label, discord_id) pairs whose label starts with query, then those
+        merely containing it.
+
+        Case-insensitive; each group stays in display-name order. An empty query
+        matches everything.
+        """
+        labels, keys = await self._entry(owner_id)
+        needle = query.strip().casefold()
+        if not needle:
+            return labels[:limit]
+        prefix: list[tuple[str, str]] = []
+        infix: list[tuple[str, str]] = []
+        for labeled, key in zip(labels, keys, strict=True):
+            if key.startswith(needle):
+                prefix.append(labeled)
+            elif needle in key:
+                infix.append(labeled)
+        return (prefix + infix)[:limit]
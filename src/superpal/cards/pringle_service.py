@@ -1,6 +1,5 @@
-import aiosqlite
-
-from superpal.cards.db import DB_PATH
+from superpal.cards.db import reader, transaction
+from superpal.cards.fight_engine import engine
 
 ITEM_COSTS: dict[str, int] = {
     "heal_potion": 50,
@@ -25,7 +24,7 @@ ITEM_DESCRIPTIONS: dict[str, str] = {
 
 
 async def get_balance(player_id: str) -> int:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT pringle_balance FROM members WHERE discord_id = ?",
             (player_id,),
@@ -36,8 +35,7 @@ async def get_balance(player_id: str) -> int:
 
 async def spend_pringles(player_id: str, amount: int) -> bool:
     """Atomically deduct Pringles. Returns False if the balance is insufficient."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("BEGIN EXCLUSIVE")
+    async with transaction() as db:
         async with db.execute(
             "SELECT pringle_balance FROM members WHERE discord_id = ?",
             (player_id,),
@@ -50,22 +48,20 @@ async def spend_pringles(player_id: str, amount: int) -> bool:
             "UPDATE members SET pringle_balance = pringle_balance - ? WHERE discord_id = ?",
             (amount, player_id),
         )
-        await db.commit()
     return True
 
 
 async def add_pringles(player_id: str, amount: int) -> None:
     """Credit Pringles to a player."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "UPDATE members SET pringle_balance = pringle_balance + ? WHERE discord_id = ?",
             (amount, player_id),
         )
-        await db.commit()
 
 
 async def get_player_items(player_id: str) -> dict[str, int]:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT item_type, quantity FROM player_items WHERE player_id = ? AND quantity > 0",
             (player_id,),
@@ -80,8 +76,7 @@ async def buy_item(player_id: str, item_type: str) -> tuple[bool, str]:
         return False, "unknown_item"
     cost = ITEM_COSTS[item_type]
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("BEGIN EXCLUSIVE")
+    async with transaction() as db:
         async with db.execute(
             "SELECT pringle_balance FROM members WHERE discord_id = ?",
             (player_id,),
@@ -104,7 +99,8 @@ async def buy_item(player_id: str, item_type: str) -> tuple[bool, str]:
             """,
             (player_id, item_type),
         )
-        await db.commit()
+    # A fight in progress holds the player's items in memory.
+    engine.forget_player(player_id)
     return True, ""
 
 
@@ -123,9 +119,7 @@ async def award_fight_pringles(
     EXTENDED_BONUS = 25
     ESCAPE_PENALTY = 25
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("BEGIN EXCLUSIVE")
-
+    async with transaction() as db:
         async with db.execute(
             "SELECT pringle_balance FROM members WHERE discord_id = ?",
             (loser_id,),
@@ -182,8 +176,6 @@ async def award_fight_pringles(
                 (extended_bonus, loser_id),
             )
 
-        await db.commit()
-
     return {
         "loser_paid": loser_paid,
         "shortfall": shortfall,
@@ -197,7 +189,7 @@ async def award_fight_pringles(
 
 async def reset_heal_potions_for_empty_players() -> int:
     """Reset Heal Potions to 2 for all players with 0 on hand. Returns count reset."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         async with db.execute("SELECT discord_id FROM members WHERE is_excluded = 0") as cur:
             all_players = [r[0] for r in await cur.fetchall()]
 
@@ -217,6 +209,7 @@ async def reset_heal_potions_for_empty_players() -> int:
                 """,
                 (player_id,),
             )
-        await db.commit()
+    if empty_players:
+        engine.clear()
 
     return len(empty_players)
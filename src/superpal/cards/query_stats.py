@@ -0,0 +1,198 @@
+"""Per-statement timing for every pooled connection.
+
+Pooled connections are InstrumentedConnections: each execute() is timed and recorded
+under its normalized SQL (literals and IN-lists collapsed), so the same inline query
+from any service lands in one latency histogram. Statements slower than the slow-query
+threshold are logged, and the first time a statement is seen its EXPLAIN QUERY PLAN is
+captured and flagged if it scans a whole table.
+
+Times cover execution up to the first row; rows fetched afterwards are not included.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager as sync_contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+import aiosqlite
+from aiosqlite.context import contextmanager
+
+log = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is unbounded.
+BUCKETS_MS: tuple[float, ...] = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+
+_slow_query_ms: float = float(os.getenv("CARDS_DB_SLOW_QUERY_MS", "100"))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+# Only statements that read rows have a plan worth capturing.
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE|INSERT)\b", re.IGNORECASE)
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse a statement to its shape: literals become ?, IN-lists become IN (?)."""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("IN (?)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def is_full_scan(plan: list[str]) -> bool:
+    """True if any step of an EXPLAIN QUERY PLAN walks every row of a table or index."""
+    return any(d.startswith("SCAN ") and d != "SCAN CONSTANT ROW" for d in plan)
+
+
+@dataclass
+class StatementStats:
+    sql: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+    plan: list[str] | None = None
+
+    @property
+    def full_scan(self) -> bool:
+        return self.plan is not None and is_full_scan(self.plan)
+
+    def to_dict(self) -> dict:
+        return {
+            "sql": self.sql,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "histogram": {
+                (f"<={b}" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}"): n
+                for i, (b, n) in enumerate(zip((*BUCKETS_MS, None), self.buckets, strict=True))
+            },
+            "plan": self.plan,
+            "full_scan": self.full_scan,
+        }
+
+
+@dataclass
+class QueryCount:
+    """Statements executed inside one counting() block."""
+
+    statements: int = 0
+
+
+_stats: dict[str, StatementStats] = {}
+# The counting() block the current task is inside, if any.
+_active_count: ContextVar[QueryCount | None] = ContextVar("_active_count", default=None)
+_slow: list[dict] = []
+_SLOW_LOG_SIZE = 100
+
+
+def set_slow_query_threshold(ms: float) -> None:
+    """Log (and keep) statements slower than `ms` milliseconds."""
+    global _slow_query_ms
+    _slow_query_ms = ms
+
+
+def get_stats() -> list[StatementStats]:
+    """Recorded statements, most total time first."""
+    return sorted(_stats.values(), key=lambda s: s.total_ms, reverse=True)
+
+
+def get_slow_queries() -> list[dict]:
+    """The most recent statements over the slow-query threshold, oldest first."""
+    return list(_slow)
+
+
+def full_scans() -> list[StatementStats]:
+    """Statements whose captured plan scans a whole table."""
+    return [s for s in _stats.values() if s.full_scan]
+
+
+def snapshot() -> dict:
+    """Everything recorded so far, JSON-ready (for the admin endpoint)."""
+    return {
+        "slow_query_ms": _slow_query_ms,
+        "statements": [s.to_dict() for s in get_stats()],
+        "slow_queries": get_slow_queries(),
+        "full_scans": [s.sql for s in full_scans()],
+    }
+
+
+def reset() -> None:
+    _stats.clear()
+    _slow.clear()
+
+
+@sync_contextmanager
+def counting() -> Iterator[QueryCount]:
+    """Count the statements this task (and tasks it starts) executes inside the block."""
+    count = QueryCount()
+    token = _active_count.set(count)
+    try:
+        yield count
+    finally:
+        _active_count.reset(token)
+
+
+def _record(sql: str, elapsed_ms: float) -> StatementStats:
+    count = _active_count.get()
+    if count is not None:
+        count.statements += 1
+    key = normalize_sql(sql)
+    stats = _stats.get(key)
+    if stats is None:
+        stats = _stats[key] = StatementStats(key)
+    stats.count += 1
+    stats.total_ms += elapsed_ms
+    stats.max_ms = max(stats.max_ms, elapsed_ms)
+    bucket = next((i for i, b in enumerate(BUCKETS_MS) if elapsed_ms <= b), len(BUCKETS_MS))
+    stats.buckets[bucket] += 1
+    if elapsed_ms > _slow_query_ms:
+        log.warning("Slow query (%.1f ms): %s", elapsed_ms, key)
+        _slow.append({"sql": key, "ms": round(elapsed_ms, 3), "at": time.time()})
+        del _slow[:-_SLOW_LOG_SIZE]
+    return stats
+
+
+class InstrumentedConnection(aiosqlite.Connection):
+    """An aiosqlite connection that records every execute() in this module's stats."""
+
+    @contextmanager
+    async def execute(self, sql: str, parameters: Iterable[Any] | None = None) -> aiosqlite.Cursor:
+        started = time.perf_counter()
+        cursor = await super().execute(sql, parameters)
+        stats = _record(sql, (time.perf_counter() - started) * 1000)
+        if stats.plan is None and _EXPLAINABLE.match(sql):
+            await self._capture_plan(stats, sql, parameters)
+        return cursor
+
+    @contextmanager
+    async def executemany(self, sql: str, parameters: Iterable[Iterable[Any]]) -> aiosqlite.Cursor:
+        started = time.perf_counter()
+        cursor = await super().executemany(sql, parameters)
+        _record(sql, (time.perf_counter() - started) * 1000)
+        return cursor
+
+    async def _capture_plan(
+        self, stats: StatementStats, sql: str, parameters: Iterable[Any] | None
+    ) -> None:
+        try:
+            async with super().execute(f"EXPLAIN QUERY PLAN {sql}", parameters) as cur:
+                stats.plan = [row[3] for row in await cur.fetchall()]
+        except sqlite3.Error:
+            stats.plan = []  # don't retry a statement EXPLAIN can't handle
+            return
+        if stats.full_scan:
+            log.info("Full table scan: %s — plan: %s", stats.sql, "; ".join(stats.plan))
+
+
+def connect(path: str) -> InstrumentedConnection:
+    """Like aiosqlite.connect(path), returning an InstrumentedConnection."""
+    return InstrumentedConnection(lambda: sqlite3.connect(path), iter_chunk_size=64)
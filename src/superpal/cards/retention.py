@@ -0,0 +1,194 @@
+"""Retention and compaction for the tables that only ever grow.
+
+Each RetentionPolicy names a table, the timestamp column that ages its rows, and how many
+days to keep them. Expired rows are removed a chunk at a time: the chunk is read on a
+pooled reader (and, for archived tables, appended to a gzipped JSON-lines file) before a
+short write transaction deletes exactly those rows, so the writer is never held for more
+than one chunk and other writes interleave between chunks. Deleted pages are then handed
+back to the filesystem with PRAGMA incremental_vacuum, a step at a time.
+
+run_retention() is called daily from the maintenance cog; it can also be run by hand.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from superpal.cards.db import DB_PATH, reader, transaction, writer
+
+ARCHIVE_DIR = Path(os.getenv("CARDS_ARCHIVE_DIR", str(Path(DB_PATH).parent / "archive")))
+# Rows removed per write transaction.
+CHUNK_SIZE: int = int(os.getenv("CARDS_RETENTION_CHUNK", "500"))
+# Free pages released per PRAGMA incremental_vacuum step.
+VACUUM_STEP_PAGES = 256
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    table: str
+    column: str  # timestamp compared against now - days
+    days: int
+    archive: bool = False  # copy rows to ARCHIVE_DIR before deleting them
+    where: str = ""  # extra predicate narrowing which expired rows may go
+    # (table, column) pairs holding the parent's rowid; matching rows are deleted with it.
+    children: tuple[tuple[str, str], ...] = ()
+
+
+POLICIES: tuple[RetentionPolicy, ...] = (
+    # backfill_fight_stats recounts escapes and forfeits from these rows, so they stay.
+    RetentionPolicy(
+        "fight_log",
+        "created_at",
+        90,
+        archive=True,
+        where="action_type NOT IN ('run', 'forfeit')",
+    ),
+    # Open markets still chart their full history.
+    RetentionPolicy(
+        "market_probability_history",
+        "recorded_at",
+        180,
+        archive=True,
+        where="market_id IN (SELECT id FROM markets WHERE status IN ('resolved', 'rejected'))",
+    ),
+    RetentionPolicy("sessions", "expires_at", 0),
+    # Links stop working 24h after creation; a week leaves room to answer "my link broke".
+    RetentionPolicy("magic_links", "created_at", 7),
+    RetentionPolicy("fight_tokens", "expires_at", 1),
+    # Only the current week's row is ever read; older weeks are kept briefly for audits.
+    RetentionPolicy("draw_log", "week_start", 56),
+    RetentionPolicy(
+        "trade_offers",
+        "created_at",
+        30,
+        where="status IN ('declined', 'expired', 'cancelled')",
+        children=(("trade_offer_items", "offer_id"),),
+    ),
+)
+
+
+@dataclass
+class RetentionReport:
+    deleted: dict[str, int] = field(default_factory=dict)
+    archived: dict[str, int] = field(default_factory=dict)
+    bytes_reclaimed: int = 0
+    duration_s: float = 0.0
+
+    @property
+    def rows_deleted(self) -> int:
+        return sum(self.deleted.values())
+
+    def summary(self) -> str:
+        per_table = ", ".join(f"{t}={n}" for t, n in self.deleted.items() if n) or "nothing"
+        return (
+            f"Retention removed {self.rows_deleted} row(s) ({per_table}), "
+            f"archived {sum(self.archived.values())}, reclaimed {self.bytes_reclaimed} bytes "
+            f"in {self.duration_s:.2f}s"
+        )
+
+
+def _archive_path(table: str, now: datetime) -> Path:
+    return ARCHIVE_DIR / f"{table}-{now:%Y-%m}.jsonl.gz"
+
+
+def _write_archive(path: Path, columns: list[str], rows: Iterable[tuple]) -> None:
+    # Appending to a gzip file adds a new member; gzip readers concatenate them.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(path, "at", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(dict(zip(columns, row, strict=True))) + "\n")
+
+
+async def _purge_chunk(policy: RetentionPolicy, cutoff: str, now: datetime) -> int:
+    """Remove up to CHUNK_SIZE expired rows from policy.table. Returns how many went."""
+    where = f"{policy.column} < ?" + (f" AND ({policy.where})" if policy.where else "")
+    select = "rowid, *" if policy.archive else "rowid"
+    async with reader() as db:
+        async with db.execute(
+            f"SELECT {select} FROM {policy.table} WHERE {where} LIMIT ?", (cutoff, CHUNK_SIZE)
+        ) as cur:
+            rows = await cur.fetchall()
+            columns = [d[0] for d in cur.description[1:]]
+    if not rows:
+        return 0
+    rowids = [r[0] for r in rows]
+    if policy.archive:
+        # Written before the delete commits: a failed delete leaves duplicates in the
+        # archive on the next run, never rows that are in neither place.
+        await asyncio.to_thread(
+            _write_archive, _archive_path(policy.table, now), columns, (r[1:] for r in rows)
+        )
+    placeholders = ",".join("?" * len(rowids))
+    async with transaction() as db:
+        for child, fk in policy.children:
+            await db.execute(f"DELETE FROM {child} WHERE {fk} IN ({placeholders})", rowids)
+        await db.execute(f"DELETE FROM {policy.table} WHERE rowid IN ({placeholders})", rowids)
+    return len(rowids)
+
+
+async def purge(policy: RetentionPolicy, now: datetime | None = None) -> int:
+    """Delete (or archive then delete) every row of policy.table past its retention."""
+    now = now or datetime.now(timezone.utc)
+    cutoff = (now - timedelta(days=policy.days)).isoformat()
+    total = 0
+    while True:
+        removed = await _purge_chunk(policy, cutoff, now)
+        total += removed
+        if removed < CHUNK_SIZE:
+            return total
+
+
+async def incremental_vacuum(step_pages: int = VACUUM_STEP_PAGES) -> int:
+    """Release free pages to the filesystem, step_pages at a time. Returns bytes freed.
+
+    A no-op (returning 0) on a database whose auto_vacuum mode isn't INCREMENTAL.
+    """
+    reclaimed = 0
+    while True:
+        async with writer() as db:
+            async with db.execute("PRAGMA page_size") as cur:
+                row = await cur.fetchone()
+            assert row is not None
+            page_size = row[0]
+            async with db.execute("PRAGMA freelist_count") as cur:
+                row = await cur.fetchone()
+            assert row is not None
+            before = row[0]
+            if not before:
+                return reclaimed
+            async with db.execute(f"PRAGMA incremental_vacuum({step_pages})") as cur:
+                await cur.fetchall()
+            async with db.execute("PRAGMA freelist_count") as cur:
+                row = await cur.fetchone()
+            assert row is not None
+            after = row[0]
+        reclaimed += (before - after) * page_size
+        if after >= before:
+            return reclaimed
+
+
+async def run_retention(
+    policies: Iterable[RetentionPolicy] = POLICIES,
+    *,
+    now: datetime | None = None,
+    vacuum: bool = True,
+) -> RetentionReport:
+    """Apply every policy, then compact the file. Returns what was removed and reclaimed."""
+    started = time.perf_counter()
+    now = now or datetime.now(timezone.utc)
+    report = RetentionReport()
+    for policy in policies:
+        removed = await purge(policy, now)
+        report.deleted[policy.table] = removed
+        if policy.archive:
+            report.archived[policy.table] = removed
+    if vacuum:
+        report.bytes_reclaimed = await incremental_vacuum()
+    report.duration_s = time.perf_counter() - started
+    return report
@@ -1,16 +1,22 @@
-import json
-import random
 import uuid
+from collections import Counter
+from collections.abc import Callable
 from datetime import datetime, timedelta, timezone
+from itertools import pairwise
 from typing import cast
 
 import aiosqlite
 
 import superpal.sessions as sessions
-from superpal.cards.db import DB_PATH
+from superpal.cards.dataloader import DataLoader
+from superpal.cards.db import COLLECTION_STATS_REBUILD_SQL, reader, transaction
+from superpal.cards.draw_pool import AliasSampler, EligiblePool
+from superpal.cards.member_directory import directory, parse_stats
 from superpal.cards.models import (
     RARITY_ORDER,
     RARITY_WEIGHTS,
+    BulkResult,
+    CardExchange,
     CardRef,
     MagicLink,
     MemberCardContext,
@@ -18,18 +24,13 @@ from superpal.cards.models import (
     TradeOfferFull,
     UserCard,
 )
+from superpal.cards.owned_index import OwnedSubjectIndex
 from superpal.schedule import next_sunday_noon_utc
 
 TRADE_OFFER_EXPIRY_HOURS = 24
 
-
-def _parse_stats(raw: str | None) -> list[tuple[str, str]]:
-    if not raw:
-        return []
-    try:
-        return list(json.loads(raw).items())
-    except (json.JSONDecodeError, AttributeError):
-        return []
+_rarity_sampler = AliasSampler(RARITY_WEIGHTS)
+_eligible_pool = EligiblePool()
 
 
 def _get_week_start() -> str:
@@ -38,15 +39,13 @@ def _get_week_start() -> str:
 
 
 def _roll_rarity() -> str:
-    population = list(RARITY_WEIGHTS.keys())
-    weights = list(RARITY_WEIGHTS.values())
-    return random.choices(population, weights=weights, k=1)[0]
+    return _rarity_sampler.sample()
 
 
 async def sync_members(members: list[dict]) -> None:
     """Upsert Discord members. Synthetic (manually-created) members are never modified."""
     now = datetime.now(timezone.utc).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.executemany(
             """
             INSERT INTO members
@@ -60,92 +59,132 @@ async def sync_members(members: list[dict]) -> None:
         """,
             [{"synced_at": now, **m} for m in members],
         )
-        await db.commit()
+    directory.apply_sync(members)
+    _owned_subjects.clear()
 
 
 async def set_excluded(discord_id: str, *, excluded: bool) -> None:
     """Toggle exclusion status for a member."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "UPDATE members SET is_excluded = ? WHERE discord_id = ?",
             (1 if excluded else 0, discord_id),
         )
-        await db.commit()
+    directory.update(discord_id, is_excluded=excluded)
+
+
+async def toggle_excluded(discord_id: str) -> bool | None:
+    """Flip a member's exclusion. Returns the new state, or None if there's no such member."""
+    async with transaction() as db:
+        async with db.execute(
+            "UPDATE members SET is_excluded = 1 - is_excluded WHERE discord_id = ? "
+            "RETURNING is_excluded",
+            (discord_id,),
+        ) as cur:
+            row = await cur.fetchone()
+    if row is None:
+        return None
+    directory.update(discord_id, is_excluded=bool(row[0]))
+    return bool(row[0])
 
 
 async def set_forced_rarity(discord_id: str, rarity: str | None) -> None:
     """Lock a member to a specific rarity tier, or clear the lock when rarity is None."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "UPDATE members SET forced_rarity = ? WHERE discord_id = ?",
             (rarity or None, discord_id),
         )
-        await db.commit()
 
 
 async def draw_card(owner_id: str, max_draws: int, drawn_by_name: str = "") -> UserCard | None:
     """Draw a card for owner_id. Returns UserCard or None if weekly limit reached."""
+    cards = await draw_cards(owner_id, max_draws, 1, drawn_by_name)
+    return cards[0] if cards else None
+
+
+async def draw_cards(
+    owner_id: str, max_draws: int, count: int | None = None, drawn_by_name: str = ""
+) -> list[UserCard]:
+    """Draw up to `count` cards for owner_id in one transaction (all remaining if None).
+
+    Returns one UserCard per draw, in draw order; a card drawn twice appears twice, both
+    with its final quantity. Fewer than `count` come back if the weekly limit runs out,
+    and none if it already had. Draws that find no eligible member at their rarity are
+    skipped without being counted, as for a single draw.
+    """
     week_start = _get_week_start()
     now = datetime.now(timezone.utc).isoformat()
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("BEGIN EXCLUSIVE")
+    async with reader() as db:
         async with db.execute(
             "SELECT draws_used FROM draw_log WHERE user_id = ? AND week_start = ?",
             (owner_id, week_start),
         ) as cur:
             row = await cur.fetchone()
-        draws_used = row[0] if row else 0
-        if draws_used >= max_draws:
-            return None
+    remaining = max_draws - (row[0] if row else 0)
+    if count is not None:
+        remaining = min(remaining, count)
+    if remaining <= 0:
+        return []
 
+    # Picked before taking the write lock; picks past the limit are simply discarded.
+    await _eligible_pool.refresh()
+    picks: list[tuple[str, str]] = []
+    for _ in range(remaining):
         rarity = _roll_rarity()
+        card_member_id = _eligible_pool.choose(rarity)
+        if card_member_id is not None:
+            picks.append((card_member_id, rarity))
+    if not picks:
+        return []
 
+    async with transaction() as db:
+        # Re-checked under the lock: another draw may have landed since the read above.
         async with db.execute(
-            "SELECT discord_id FROM members "
-            "WHERE is_excluded = 0 AND (forced_rarity IS NULL OR forced_rarity = ?)",
-            (rarity,),
+            "SELECT draws_used FROM draw_log WHERE user_id = ? AND week_start = ?",
+            (owner_id, week_start),
         ) as cur:
-            eligible = [r[0] for r in await cur.fetchall()]
-
-        if not eligible:
-            return None
-
-        card_member_id = random.choice(eligible)
+            row = await cur.fetchone()
+        picks = picks[: max(max_draws - (row[0] if row else 0), 0)]
+        if not picks:
+            return []
 
-        await db.execute(
+        drawn = Counter(picks)
+        await db.executemany(
             """
             INSERT INTO user_cards
                 (owner_id, card_member_id, rarity, quantity, first_acquired_at, drawn_by_name)
-            VALUES (?, ?, ?, 1, ?, ?)
+            VALUES (?, ?, ?, ?, ?, ?)
             ON CONFLICT(owner_id, card_member_id, rarity)
-            DO UPDATE SET quantity = quantity + 1
+            DO UPDATE SET quantity = quantity + excluded.quantity
         """,
-            (owner_id, card_member_id, rarity, now, drawn_by_name),
+            [(owner_id, m, r, n, now, drawn_by_name) for (m, r), n in drawn.items()],
         )
 
         await db.execute(
             """
             INSERT INTO draw_log (user_id, week_start, draws_used)
-            VALUES (?, ?, 1)
+            VALUES (?, ?, ?)
             ON CONFLICT(user_id, week_start)
-            DO UPDATE SET draws_used = draws_used + 1
+            DO UPDATE SET draws_used = draws_used + excluded.draws_used
         """,
-            (owner_id, week_start),
+            (owner_id, week_start, len(picks)),
         )
 
-        await db.commit()
-
+        member_ids = sorted({m for m, _ in drawn})
         async with db.execute(
             "SELECT id, owner_id, card_member_id, rarity, quantity, "
             "first_acquired_at, drawn_by_name "
-            "FROM user_cards WHERE owner_id = ? AND card_member_id = ? AND rarity = ?",
-            (owner_id, card_member_id, rarity),
+            f"FROM user_cards WHERE owner_id = ? AND card_member_id IN "
+            f"({','.join('?' * len(member_ids))})",
+            (owner_id, *member_ids),
         ) as cur:
-            r = await cur.fetchone()
+            rows = await cur.fetchall()
+    _owned_subjects.invalidate(owner_id)
 
-        assert r is not None
-        return UserCard(
+    cards = {
+        (r[2], r[3]): UserCard(
             id=r[0],
             owner_id=r[1],
             card_member_id=r[2],
@@ -154,11 +193,14 @@ async def draw_card(owner_id: str, max_draws: int, drawn_by_name: str = "") -> U
             first_acquired_at=r[5],
             drawn_by_name=r[6],
         )
+        for r in rows
+    }
+    return [cards[pick] for pick in picks]
 
 
 async def get_card_quantity(owner_id: str, card_member_id: str, rarity: str) -> int:
     """Return how many copies owner has of [card_member_id, rarity]."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT quantity FROM user_cards "
             "WHERE owner_id = ? AND card_member_id = ? AND rarity = ?",
@@ -185,9 +227,7 @@ async def gift_card(
 
     now = datetime.now(timezone.utc).isoformat()
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("BEGIN EXCLUSIVE")
-
+    async with transaction() as db:
         async with db.execute(
             "SELECT quantity FROM user_cards "
             "WHERE owner_id = ? AND card_member_id = ? AND rarity = ?",
@@ -218,8 +258,6 @@ async def gift_card(
             (recipient_id, card_member_id, rarity, now, drawn_by_name),
         )
 
-        await db.commit()
-
         async with db.execute(
             "SELECT id, owner_id, card_member_id, rarity, quantity, "
             "first_acquired_at, drawn_by_name "
@@ -227,6 +265,7 @@ async def gift_card(
             (recipient_id, card_member_id, rarity),
         ) as cur:
             r = await cur.fetchone()
+    _owned_subjects.invalidate(gifter_id, recipient_id)
 
     assert r is not None
     return UserCard(
@@ -249,8 +288,11 @@ async def trade_in(
         return None
 
     now = datetime.now(timezone.utc).isoformat()
+    new_member_id = await _eligible_pool.pick(rarity)
+    if new_member_id is None:
+        return None
 
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         async with db.execute(
             "SELECT quantity FROM user_cards "
             "WHERE owner_id = ? AND card_member_id = ? AND rarity = ?",
@@ -270,19 +312,6 @@ async def trade_in(
             (owner_id,),
         )
 
-        async with db.execute(
-            "SELECT discord_id FROM members "
-            "WHERE is_excluded = 0 AND (forced_rarity IS NULL OR forced_rarity = ?)",
-            (rarity,),
-        ) as cur:
-            eligible = [r[0] for r in await cur.fetchall()]
-
-        if not eligible:
-            await db.commit()
-            return None
-
-        new_member_id = random.choice(eligible)
-
         await db.execute(
             """
             INSERT INTO user_cards
@@ -294,8 +323,6 @@ async def trade_in(
             (owner_id, new_member_id, rarity, now, drawn_by_name),
         )
 
-        await db.commit()
-
         async with db.execute(
             "SELECT id, owner_id, card_member_id, rarity, quantity, "
             "first_acquired_at, drawn_by_name "
@@ -303,6 +330,7 @@ async def trade_in(
             (owner_id, new_member_id, rarity),
         ) as cur:
             r = await cur.fetchone()
+    _owned_subjects.invalidate(owner_id)
 
     assert r is not None
     return UserCard(
@@ -327,7 +355,7 @@ async def upgrade(
     next_rarity = RARITY_ORDER[RARITY_ORDER.index(rarity) + 1]
     now = datetime.now(timezone.utc).isoformat()
 
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         async with db.execute(
             "SELECT quantity FROM user_cards "
             "WHERE owner_id = ? AND card_member_id = ? AND rarity = ?",
@@ -356,7 +384,6 @@ async def upgrade(
         """,
             (owner_id, card_member_id, next_rarity, now, drawn_by_name),
         )
-        await db.commit()
 
         async with db.execute(
             "SELECT id, owner_id, card_member_id, rarity, quantity, "
@@ -365,6 +392,7 @@ async def upgrade(
             (owner_id, card_member_id, next_rarity),
         ) as cur:
             r = await cur.fetchone()
+    _owned_subjects.invalidate(owner_id)
 
     assert r is not None
     return UserCard(
@@ -378,16 +406,101 @@ async def upgrade(
     )
 
 
+Holdings = dict[tuple[str, str], int]
+
+
+def _plan_upgrades(holdings: Holdings) -> Holdings:
+    """Quantity changes for upgrading every 5 copies, tier by tier.
+
+    Tiers are worked lowest first, so copies an upgrade creates can themselves be
+    upgraded in the same pass: 25 commons become 5 uncommons and then 1 rare.
+    """
+    held = dict(holdings)
+    deltas: Holdings = Counter()
+    for rarity, next_rarity in pairwise(RARITY_ORDER):
+        for (member_id, r), qty in list(held.items()):
+            if r != rarity or qty < 5:
+                continue
+            n = qty // 5
+            for key, change in (((member_id, r), -5 * n), ((member_id, next_rarity), n)):
+                held[key] = held.get(key, 0) + change
+                deltas[key] += change
+    return deltas
+
+
+def _plan_trade_ins(holdings: Holdings) -> Holdings:
+    """Quantity changes for trading in every 3 spare copies, keeping one of each card.
+
+    New cards come from _eligible_pool as of its last refresh and aren't traded in again.
+    """
+    deltas: Holdings = Counter()
+    for (member_id, rarity), qty in holdings.items():
+        for _ in range((qty - 1) // 3):
+            new_member_id = _eligible_pool.choose(rarity)
+            if new_member_id is None:
+                break
+            deltas[member_id, rarity] -= 3
+            deltas[new_member_id, rarity] += 1
+    return deltas
+
+
+async def _exchange_all(
+    owner_id: str, plan: Callable[[Holdings], Holdings], drawn_by_name: str
+) -> CardExchange:
+    """Plan changes against owner_id's whole collection and apply them in one transaction."""
+    now = datetime.now(timezone.utc).isoformat()
+    async with transaction() as db:
+        async with db.execute(
+            "SELECT card_member_id, rarity, quantity FROM user_cards "
+            "WHERE owner_id = ? AND quantity > 0",
+            (owner_id,),
+        ) as cur:
+            holdings = {(r[0], r[1]): r[2] for r in await cur.fetchall()}
+        deltas = {key: n for key, n in plan(holdings).items() if n}
+        if not deltas:
+            return CardExchange()
+        await db.executemany(
+            """
+            INSERT INTO user_cards
+                (owner_id, card_member_id, rarity, quantity, first_acquired_at, drawn_by_name)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(owner_id, card_member_id, rarity)
+            DO UPDATE SET quantity = quantity + excluded.quantity
+            """,
+            [(owner_id, mid, rarity, n, now, drawn_by_name) for (mid, rarity), n in deltas.items()],
+        )
+        await db.execute(
+            "DELETE FROM user_cards WHERE owner_id = ? AND quantity <= 0",
+            (owner_id,),
+        )
+    _owned_subjects.invalidate(owner_id)
+    spent: dict[str, int] = Counter()
+    for (_, rarity), n in deltas.items():
+        if n < 0:
+            spent[rarity] -= n
+    return CardExchange(spent=dict(spent), received={key: n for key, n in deltas.items() if n > 0})
+
+
+async def upgrade_all(owner_id: str, drawn_by_name: str = "") -> CardExchange:
+    """upgrade() every card owner_id has 5 or more of, cascading up the tiers."""
+    return await _exchange_all(owner_id, _plan_upgrades, drawn_by_name)
+
+
+async def trade_in_all(owner_id: str, drawn_by_name: str = "") -> CardExchange:
+    """trade_in() every 3 spare copies owner_id holds, keeping one of each card."""
+    await _eligible_pool.refresh()
+    return await _exchange_all(owner_id, _plan_trade_ins, drawn_by_name)
+
+
 async def generate_magic_link(user_id: str, link_type: str, base_url: str) -> str:
     """Insert a new unconsumed token and return the full URL."""
     token = str(uuid.uuid4())
     now = datetime.now(timezone.utc).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "INSERT INTO magic_links (token, user_id, link_type, created_at) VALUES (?, ?, ?, ?)",
             (token, user_id, link_type, now),
         )
-        await db.commit()
     return f"{base_url}/link/{token}"
 
 
@@ -397,7 +510,7 @@ async def use_magic_link(token: str) -> MagicLink | None:
     Returns None if the token is unknown or the link has expired."""
     now = datetime.now(timezone.utc)
 
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         async with db.execute(
             "SELECT token, user_id, link_type, created_at, consumed_at "
             "FROM magic_links WHERE token = ?",
@@ -421,7 +534,6 @@ async def use_magic_link(token: str) -> MagicLink | None:
             "UPDATE magic_links SET consumed_at = ? WHERE token = ?",
             (consumed_at, token),
         )
-        await db.commit()
 
     session = await sessions.create_session(row[1], row[2])
     return MagicLink(
@@ -437,7 +549,7 @@ async def use_magic_link(token: str) -> MagicLink | None:
 
 async def get_collection(owner_id: str) -> dict:
     """Return all cards for a user plus silhouettes for undiscovered members."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT discord_id, display_name, avatar_url FROM members WHERE is_excluded = 0"
         ) as cur:
@@ -463,7 +575,7 @@ async def get_collection(owner_id: str) -> dict:
             "rarity": r[3],
             "quantity": r[4],
             "bio": r[5],
-            "stats_pairs": _parse_stats(r[6]),
+            "stats_pairs": parse_stats(r[6]),
         }
         for r in owned_rows
     ]
@@ -480,7 +592,7 @@ async def get_collection(owner_id: str) -> dict:
 
 async def get_fight_opponents(exclude_id: str) -> list[dict]:
     """Return real, non-excluded members eligible to be challenged to a fight."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT discord_id, display_name FROM members "
             "WHERE is_excluded = 0 AND is_synthetic = 0 AND discord_id != ? "
@@ -494,27 +606,42 @@ async def get_fight_opponents(exclude_id: str) -> list[dict]:
 async def reset_draw_log() -> None:
     """Delete all draw_log entries for the current week, restoring everyone's draws."""
     week_start = _get_week_start()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute("DELETE FROM draw_log WHERE week_start = ?", (week_start,))
-        await db.commit()
 
 
 async def add_draws(user_id: str, quantity: int) -> None:
     """Restore up to `quantity` draws for a user in the current week."""
     week_start = _get_week_start()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "UPDATE draw_log SET draws_used = MAX(0, draws_used - ?) "
             "WHERE user_id = ? AND week_start = ?",
             (quantity, user_id, week_start),
         )
-        await db.commit()
+
+
+async def add_draws_to_all(quantity: int) -> BulkResult:
+    """add_draws for every non-excluded member, as one statement in one transaction."""
+    week_start = _get_week_start()
+    async with transaction() as db:
+        async with db.execute("SELECT COUNT(*) FROM members WHERE is_excluded = 0") as cur:
+            row = await cur.fetchone()
+        assert row is not None
+        members = row[0]
+        cur = await db.execute(
+            "UPDATE draw_log SET draws_used = MAX(0, draws_used - ?) "
+            "WHERE week_start = ? AND draws_used > 0 "
+            "AND user_id IN (SELECT discord_id FROM members WHERE is_excluded = 0)",
+            (quantity, week_start),
+        )
+        return BulkResult(members, cur.rowcount)
 
 
 async def get_draw_audit(user_id: str) -> dict:
     """Return draw count and newly acquired cards this week for a user."""
     week_start = _get_week_start()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT draws_used FROM draw_log WHERE user_id = ? AND week_start = ?",
             (user_id, week_start),
@@ -568,7 +695,7 @@ async def get_draw_audit(user_id: str) -> dict:
 
 async def get_all_members_for_admin() -> list[dict]:
     """Return all members with exclusion and rarity-lock status for admin dashboard."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT discord_id, display_name, avatar_url, is_excluded, forced_rarity, "
             "is_synthetic, bio, stats FROM members ORDER BY display_name"
@@ -591,7 +718,7 @@ async def get_all_members_for_admin() -> list[dict]:
 
 async def get_pool_stats() -> dict:
     """Card pool statistics for admin dashboard."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute("SELECT COUNT(*) FROM members WHERE is_excluded = 0") as cur:
             row = await cur.fetchone()
             assert row is not None
@@ -610,7 +737,7 @@ async def get_pool_stats() -> dict:
 async def add_member(discord_id: str, display_name: str) -> None:
     """Insert a synthetic (non-Discord) member, or update its display name if it already exists."""
     now = datetime.now(timezone.utc).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             """
             INSERT INTO members
@@ -622,64 +749,165 @@ async def add_member(discord_id: str, display_name: str) -> None:
             """,
             (discord_id, display_name, now),
         )
-        await db.commit()
+    directory.update(discord_id, display_name=display_name)
+    _owned_subjects.clear()
 
 
 async def set_member_avatar(member_id: str, avatar_url: str) -> None:
     """Update the stored avatar URL for a member."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "UPDATE members SET avatar_url = ? WHERE discord_id = ?",
             (avatar_url, member_id),
         )
-        await db.commit()
+    directory.update(member_id, avatar_url=avatar_url)
 
 
 async def set_member_bio_stats(member_id: str, bio: str, stats: str) -> None:
     """Update bio (lore text) and stats (JSON blob) for a member."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "UPDATE members SET bio = ?, stats = ? WHERE discord_id = ?",
             (bio or None, stats or None, member_id),
         )
-        await db.commit()
+    directory.update(member_id, bio=bio or None, stats_pairs=tuple(parse_stats(stats or None)))
+
+
+# Rows per IN (...) list in the set-based loaders; keeps each statement under SQLite's
+# bound-variable limit on any build, however many ids a page asks for.
+_IN_CHUNK = 500
+
+
+def _chunked(ids: list[int]) -> list[list[int]]:
+    return [ids[i : i + _IN_CHUNK] for i in range(0, len(ids), _IN_CHUNK)]
+
+
+async def _load_card_refs(
+    db: aiosqlite.Connection, table: str, fk: str, ids: list[int]
+) -> dict[int, list[CardRef]]:
+    """{parent id: its CardRefs} from trade_listing_items or trade_offer_items."""
+    refs: dict[int, list[CardRef]] = {i: [] for i in ids}
+    for chunk in _chunked(ids):
+        async with db.execute(
+            f"SELECT t.{fk}, t.card_member_id, t.rarity, cm.display_name, cm.avatar_url "
+            f"FROM {table} t "
+            "LEFT JOIN members cm ON t.card_member_id = cm.discord_id "
+            f"WHERE t.{fk} IN ({','.join('?' * len(chunk))}) ORDER BY t.id",
+            chunk,
+        ) as cur:
+            for r in await cur.fetchall():
+                refs[r[0]].append(
+                    CardRef(member_id=r[1], rarity=r[2], display_name=r[3], avatar_url=r[4])
+                )
+    return refs
+
+
+async def _load_listings_full(
+    db: aiosqlite.Connection, listing_ids: list[int]
+) -> list[TradeListingFull]:
+    """Load TradeListingFulls for listing_ids, in that order, with two queries per chunk.
+
+    Ids with no listing (or whose owner is missing from members) are skipped.
+    """
+    headers: dict[int, tuple] = {}
+    for chunk in _chunked(listing_ids):
+        async with db.execute(
+            "SELECT tl.id, tl.owner_id, m.display_name, tl.status, tl.ask_note, tl.created_at, "
+            "(SELECT COUNT(*) FROM trade_offers to_ "
+            " WHERE to_.listing_id = tl.id AND to_.status = 'pending') "
+            "FROM trade_listings tl "
+            "JOIN members m ON tl.owner_id = m.discord_id "
+            f"WHERE tl.id IN ({','.join('?' * len(chunk))})",
+            chunk,
+        ) as cur:
+            headers.update({r[0]: r for r in await cur.fetchall()})
+    items = await _load_card_refs(db, "trade_listing_items", "listing_id", list(headers))
+    listings = []
+    for lid in listing_ids:
+        if lid not in headers:
+            continue
+        _, owner_id, owner_name, status, ask_note, created_at, offer_count = headers[lid]
+        listings.append(
+            TradeListingFull(
+                id=lid,
+                owner_id=owner_id,
+                owner_display_name=owner_name,
+                status=status,
+                ask_note=ask_note,
+                created_at=created_at,
+                items=items[lid],
+                offer_count=offer_count,
+            )
+        )
+    return listings
 
 
 async def _load_listing_full(db: aiosqlite.Connection, listing_id: int) -> TradeListingFull | None:
     """Load a TradeListingFull from an open aiosqlite connection."""
+    listings = await _load_listings_full(db, [listing_id])
+    return listings[0] if listings else None
+
+
+async def _holds_cards(db: aiosqlite.Connection, owner_id: str, items: list[CardRef]) -> bool:
+    """True if owner_id holds every card in items, repeats included, checked in one query."""
+    wanted = Counter((item.member_id, item.rarity) for item in items)
     async with db.execute(
-        "SELECT tl.id, tl.owner_id, m.display_name, tl.status, tl.ask_note, tl.created_at, "
-        "COUNT(DISTINCT to_.id) "
-        "FROM trade_listings tl "
-        "JOIN members m ON tl.owner_id = m.discord_id "
-        "LEFT JOIN trade_offers to_ ON to_.listing_id = tl.id AND to_.status = 'pending' "
-        "WHERE tl.id = ? GROUP BY tl.id",
-        (listing_id,),
-    ) as cur:
-        row = await cur.fetchone()
-    if row is None:
-        return None
-    listing_id_, owner_id, owner_name, status, ask_note, created_at, offer_count = row
-    async with db.execute(
-        "SELECT tli.card_member_id, tli.rarity, cm.display_name, cm.avatar_url "
-        "FROM trade_listing_items tli "
-        "LEFT JOIN members cm ON tli.card_member_id = cm.discord_id "
-        "WHERE tli.listing_id = ?",
-        (listing_id,),
+        "WITH wanted(card_member_id, rarity, n) AS "
+        f"(VALUES {','.join(['(?, ?, ?)'] * len(wanted))}) "
+        "SELECT 1 FROM wanted LEFT JOIN user_cards uc ON uc.owner_id = ? "
+        "AND uc.card_member_id = wanted.card_member_id AND uc.rarity = wanted.rarity "
+        "WHERE COALESCE(uc.quantity, 0) < wanted.n LIMIT 1",
+        [*(v for (mid, rarity), n in wanted.items() for v in (mid, rarity, n)), owner_id],
     ) as cur:
-        items = [
-            CardRef(member_id=r[0], rarity=r[1], display_name=r[2], avatar_url=r[3])
-            for r in await cur.fetchall()
-        ]
-    return TradeListingFull(
-        id=listing_id_,
-        owner_id=owner_id,
-        owner_display_name=owner_name,
-        status=status,
-        ask_note=ask_note,
-        created_at=created_at,
-        items=items,
-        offer_count=offer_count,
+        return await cur.fetchone() is None
+
+
+def _grouped_items(table: str, fk: str) -> str:
+    """Distinct cards, and how many of each, in one listing's or offer's items."""
+    return (
+        f"SELECT card_member_id, rarity, COUNT(*) AS n FROM {table} WHERE {fk} = ? "
+        "GROUP BY card_member_id, rarity"
+    )
+
+
+def _shortfall(table: str, fk: str) -> str:
+    """EXISTS over cards in a listing's or offer's items that the holder has too few of."""
+    return (
+        f"EXISTS (SELECT 1 FROM ({_grouped_items(table, fk)}) w "
+        "LEFT JOIN user_cards uc ON uc.owner_id = ? "
+        "AND uc.card_member_id = w.card_member_id AND uc.rarity = w.rarity "
+        "WHERE COALESCE(uc.quantity, 0) < w.n)"
+    )
+
+
+async def _move_items(
+    db: aiosqlite.Connection,
+    table: str,
+    fk: str,
+    parent_id: int,
+    from_id: str,
+    to_id: str,
+    now_iso: str,
+) -> None:
+    """Move every card in a listing's or offer's items from one owner to another.
+
+    Two statements whatever the number of cards; the caller has already checked that
+    from_id holds them all.
+    """
+    await db.execute(
+        "UPDATE user_cards SET quantity = user_cards.quantity - w.n "
+        f"FROM ({_grouped_items(table, fk)}) AS w "
+        "WHERE user_cards.owner_id = ? AND user_cards.card_member_id = w.card_member_id "
+        "AND user_cards.rarity = w.rarity",
+        (parent_id, from_id),
+    )
+    await db.execute(
+        "INSERT INTO user_cards (owner_id, card_member_id, rarity, quantity, first_acquired_at) "
+        f"SELECT ?, card_member_id, rarity, COUNT(*), ? FROM {table} WHERE {fk} = ? "
+        "GROUP BY card_member_id, rarity "
+        "ON CONFLICT(owner_id, card_member_id, rarity) "
+        "DO UPDATE SET quantity = quantity + excluded.quantity",
+        (to_id, now_iso, parent_id),
     )
 
 
@@ -692,17 +920,9 @@ async def create_listing(
     if not items:
         return "empty_items"
     now = datetime.now(timezone.utc).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("BEGIN EXCLUSIVE")
-        for item in items:
-            async with db.execute(
-                "SELECT quantity FROM user_cards "
-                "WHERE owner_id = ? AND card_member_id = ? AND rarity = ?",
-                (owner_id, item.member_id, item.rarity),
-            ) as cur:
-                row = await cur.fetchone()
-            if not row or row[0] < 1:
-                return "no_card"
+    async with transaction() as db:
+        if not await _holds_cards(db, owner_id, items):
+            return "no_card"
         await db.execute(
             "INSERT INTO trade_listings (owner_id, status, ask_note, created_at) "
             "VALUES (?, 'active', ?, ?)",
@@ -712,110 +932,140 @@ async def create_listing(
             rowid_row = await cur.fetchone()
         assert rowid_row is not None
         listing_id = rowid_row[0]
-        for item in items:
-            await db.execute(
-                "INSERT INTO trade_listing_items (listing_id, card_member_id, rarity) "
-                "VALUES (?, ?, ?)",
-                (listing_id, item.member_id, item.rarity),
-            )
-        await db.commit()
+        await db.executemany(
+            "INSERT INTO trade_listing_items (listing_id, card_member_id, rarity) VALUES (?, ?, ?)",
+            [(listing_id, item.member_id, item.rarity) for item in items],
+        )
         listing = await _load_listing_full(db, listing_id)
     return listing or "no_card"
 
 
 async def cancel_listing(listing_id: int, owner_id: str) -> bool:
     """Cancel an active listing. Returns True if found and cancelled."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         result = await db.execute(
             "UPDATE trade_listings SET status = 'cancelled' "
             "WHERE id = ? AND owner_id = ? AND status = 'active'",
             (listing_id, owner_id),
         )
-        await db.commit()
     return result.rowcount > 0
 
 
 async def get_active_listings(
     exclude_owner_id: str | None = None,
+    *,
+    card_member_id: str | None = None,
+    rarity: str | None = None,
+    before_id: int | None = None,
+    limit: int | None = None,
 ) -> list[TradeListingFull]:
-    """Return all active listings, newest first. Optionally exclude one owner."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        if exclude_owner_id:
-            async with db.execute(
-                "SELECT id FROM trade_listings WHERE status = 'active' AND owner_id != ? "
-                "ORDER BY created_at DESC",
-                (exclude_owner_id,),
-            ) as cur:
-                ids = [r[0] for r in await cur.fetchall()]
-        else:
-            async with db.execute(
-                "SELECT id FROM trade_listings WHERE status = 'active' ORDER BY created_at DESC"
-            ) as cur:
-                ids = [r[0] for r in await cur.fetchall()]
-        results = []
-        for lid in ids:
-            listing = await _load_listing_full(db, lid)
-            if listing:
-                results.append(listing)
-    return results
+    """Return active listings, newest first. Optionally exclude one owner.
+
+    card_member_id and rarity keep only listings offering a matching card. For keyset
+    pagination pass limit, then the last listing's id as before_id to get the next page.
+    """
+    where = ["tl.status = 'active'"]
+    params: list = []
+    if exclude_owner_id:
+        where.append("tl.owner_id != ?")
+        params.append(exclude_owner_id)
+    if card_member_id or rarity:
+        where.append(
+            "EXISTS (SELECT 1 FROM trade_listing_items tli WHERE tli.listing_id = tl.id"
+            + (" AND tli.card_member_id = ?" if card_member_id else "")
+            + (" AND tli.rarity = ?" if rarity else "")
+            + ")"
+        )
+        params += [v for v in (card_member_id, rarity) if v]
+    if before_id is not None:
+        where.append(
+            "(tl.created_at, tl.id) < (SELECT created_at, id FROM trade_listings WHERE id = ?)"
+        )
+        params.append(before_id)
+    sql = (
+        f"SELECT tl.id FROM trade_listings tl WHERE {' AND '.join(where)} "
+        "ORDER BY tl.created_at DESC, tl.id DESC"
+    )
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    async with reader() as db:
+        async with db.execute(sql, params) as cur:
+            ids = [r[0] for r in await cur.fetchall()]
+        return await _load_listings_full(db, ids)
+
+
+async def get_active_trader_counts(exclude_owner_id: str | None = None) -> list[dict]:
+    """Owners with active listings and how many each has, most first."""
+    async with reader() as db:
+        async with db.execute(
+            "SELECT m.display_name, COUNT(*) AS n FROM trade_listings tl "
+            "JOIN members m ON tl.owner_id = m.discord_id "
+            "WHERE tl.status = 'active' AND tl.owner_id != ? "
+            "GROUP BY tl.owner_id ORDER BY n DESC, m.display_name",
+            (exclude_owner_id or "",),
+        ) as cur:
+            return [{"display_name": r[0], "count": r[1]} for r in await cur.fetchall()]
 
 
 async def get_player_listings(player_id: str) -> list[TradeListingFull]:
     """Return all active listings for a specific player."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT id FROM trade_listings WHERE status = 'active' AND owner_id = ? "
             "ORDER BY created_at DESC",
             (player_id,),
         ) as cur:
             ids = [r[0] for r in await cur.fetchall()]
-        results = []
-        for lid in ids:
-            listing = await _load_listing_full(db, lid)
-            if listing:
-                results.append(listing)
-    return results
+        return await _load_listings_full(db, ids)
+
+
+async def _load_offers_full(db: aiosqlite.Connection, offer_ids: list[int]) -> list[TradeOfferFull]:
+    """Load TradeOfferFulls for offer_ids, in that order, with a constant number of queries.
+
+    Offers whose proposer or listing can't be loaded are skipped.
+    """
+    headers: dict[int, tuple] = {}
+    for chunk in _chunked(offer_ids):
+        async with db.execute(
+            "SELECT to_.id, to_.listing_id, to_.proposer_id, pm.display_name, "
+            "to_.status, to_.created_at, to_.expires_at "
+            "FROM trade_offers to_ "
+            "JOIN members pm ON to_.proposer_id = pm.discord_id "
+            f"WHERE to_.id IN ({','.join('?' * len(chunk))})",
+            chunk,
+        ) as cur:
+            headers.update({r[0]: r for r in await cur.fetchall()})
+    items = await _load_card_refs(db, "trade_offer_items", "offer_id", list(headers))
+    listing_ids = list(dict.fromkeys(h[1] for h in headers.values()))
+    listings = {lst.id: lst for lst in await _load_listings_full(db, listing_ids)}
+    offers = []
+    for oid in offer_ids:
+        if oid not in headers:
+            continue
+        _, listing_id, proposer_id, proposer_name, status, created_at, expires_at = headers[oid]
+        if listing_id not in listings:
+            continue
+        offers.append(
+            TradeOfferFull(
+                id=oid,
+                listing_id=listing_id,
+                proposer_id=proposer_id,
+                proposer_display_name=proposer_name,
+                status=status,
+                created_at=created_at,
+                expires_at=expires_at,
+                items=items[oid],
+                listing=listings[listing_id],
+            )
+        )
+    return offers
 
 
 async def _load_offer_full(db: aiosqlite.Connection, offer_id: int) -> TradeOfferFull | None:
     """Load a TradeOfferFull from an open aiosqlite connection."""
-    async with db.execute(
-        "SELECT to_.id, to_.listing_id, to_.proposer_id, pm.display_name, "
-        "to_.status, to_.created_at, to_.expires_at "
-        "FROM trade_offers to_ "
-        "JOIN members pm ON to_.proposer_id = pm.discord_id "
-        "WHERE to_.id = ?",
-        (offer_id,),
-    ) as cur:
-        row = await cur.fetchone()
-    if row is None:
-        return None
-    offer_id_, listing_id, proposer_id, proposer_name, status, created_at, expires_at = row
-    async with db.execute(
-        "SELECT toi.card_member_id, toi.rarity, cm.display_name, cm.avatar_url "
-        "FROM trade_offer_items toi "
-        "LEFT JOIN members cm ON toi.card_member_id = cm.discord_id "
-        "WHERE toi.offer_id = ?",
-        (offer_id,),
-    ) as cur:
-        items = [
-            CardRef(member_id=r[0], rarity=r[1], display_name=r[2], avatar_url=r[3])
-            for r in await cur.fetchall()
-        ]
-    listing = await _load_listing_full(db, listing_id)
-    if listing is None:
-        return None
-    return TradeOfferFull(
-        id=offer_id_,
-        listing_id=listing_id,
-        proposer_id=proposer_id,
-        proposer_display_name=proposer_name,
-        status=status,
-        created_at=created_at,
-        expires_at=expires_at,
-        items=items,
-        listing=listing,
-    )
+    offers = await _load_offers_full(db, [offer_id])
+    return offers[0] if offers else None
 
 
 async def create_offer(
@@ -829,18 +1079,15 @@ async def create_offer(
     now = datetime.now(timezone.utc)
     now_iso = now.isoformat()
     expires_iso = (now + timedelta(hours=TRADE_OFFER_EXPIRY_HOURS)).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("BEGIN EXCLUSIVE")
+    async with transaction() as db:
         async with db.execute(
             "SELECT owner_id FROM trade_listings WHERE id = ? AND status = 'active'",
             (listing_id,),
         ) as cur:
             row = await cur.fetchone()
         if not row:
-            await db.rollback()
             return "not_found"
         if row[0] == proposer_id:
-            await db.rollback()
             return "self_offer"
         async with db.execute(
             "SELECT id FROM trade_offers "
@@ -848,18 +1095,9 @@ async def create_offer(
             (listing_id, proposer_id),
         ) as cur:
             if await cur.fetchone():
-                await db.rollback()
                 return "duplicate_offer"
-        for item in items:
-            async with db.execute(
-                "SELECT quantity FROM user_cards "
-                "WHERE owner_id = ? AND card_member_id = ? AND rarity = ?",
-                (proposer_id, item.member_id, item.rarity),
-            ) as cur:
-                card_row = await cur.fetchone()
-            if not card_row or card_row[0] < 1:
-                await db.rollback()
-                return "no_card"
+        if not await _holds_cards(db, proposer_id, items):
+            return "no_card"
         await db.execute(
             "INSERT INTO trade_offers (listing_id, proposer_id, status, created_at, expires_at) "
             "VALUES (?, ?, 'pending', ?, ?)",
@@ -869,20 +1107,17 @@ async def create_offer(
             rowid_row = await cur.fetchone()
         assert rowid_row is not None
         offer_id = rowid_row[0]
-        for item in items:
-            await db.execute(
-                "INSERT INTO trade_offer_items (offer_id, card_member_id, rarity) VALUES (?, ?, ?)",
-                (offer_id, item.member_id, item.rarity),
-            )
-        await db.commit()
+        await db.executemany(
+            "INSERT INTO trade_offer_items (offer_id, card_member_id, rarity) VALUES (?, ?, ?)",
+            [(offer_id, item.member_id, item.rarity) for item in items],
+        )
         offer = await _load_offer_full(db, offer_id)
     return offer or "not_found"
 
 
 async def accept_offer(offer_id: int, recipient_id: str) -> tuple[bool, str | None]:
     """Accept an offer: atomically swap cards, mark listing completed, decline siblings."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("BEGIN EXCLUSIVE")
+    async with transaction() as db:
         async with db.execute(
             "SELECT to_.listing_id, to_.proposer_id, tl.owner_id "
             "FROM trade_offers to_ "
@@ -892,71 +1127,33 @@ async def accept_offer(offer_id: int, recipient_id: str) -> tuple[bool, str | No
         ) as cur:
             row = await cur.fetchone()
         if not row:
-            await db.rollback()
             return False, "not_found"
         listing_id, proposer_id, listing_owner_id = row
         if listing_owner_id != recipient_id:
-            await db.rollback()
             return False, "not_owner"
-        now_iso = datetime.now(timezone.utc).isoformat()
-        async with db.execute(
-            "SELECT card_member_id, rarity FROM trade_listing_items WHERE listing_id = ?",
-            (listing_id,),
-        ) as cur:
-            listing_items = await cur.fetchall()
         async with db.execute(
-            "SELECT card_member_id, rarity FROM trade_offer_items WHERE offer_id = ?",
-            (offer_id,),
+            f"SELECT {_shortfall('trade_listing_items', 'listing_id')}, "
+            f"{_shortfall('trade_offer_items', 'offer_id')}",
+            (listing_id, recipient_id, offer_id, proposer_id),
         ) as cur:
-            offer_items = await cur.fetchall()
-        for card_member_id, rarity in listing_items:
-            async with db.execute(
-                "SELECT quantity FROM user_cards "
-                "WHERE owner_id = ? AND card_member_id = ? AND rarity = ?",
-                (recipient_id, card_member_id, rarity),
-            ) as cur:
-                if not (row2 := await cur.fetchone()) or row2[0] < 1:
-                    await db.rollback()
-                    return False, "listing_no_card"
-        for card_member_id, rarity in offer_items:
-            async with db.execute(
-                "SELECT quantity FROM user_cards "
-                "WHERE owner_id = ? AND card_member_id = ? AND rarity = ?",
-                (proposer_id, card_member_id, rarity),
-            ) as cur:
-                if not (row2 := await cur.fetchone()) or row2[0] < 1:
-                    await db.rollback()
-                    return False, "offer_no_card"
-        # listing items: recipient → proposer
-        for card_member_id, rarity in listing_items:
-            await db.execute(
-                "UPDATE user_cards SET quantity = quantity - 1 "
-                "WHERE owner_id = ? AND card_member_id = ? AND rarity = ?",
-                (recipient_id, card_member_id, rarity),
-            )
-            await db.execute(
-                "INSERT INTO user_cards "
-                "(owner_id, card_member_id, rarity, quantity, first_acquired_at) "
-                "VALUES (?, ?, ?, 1, ?) "
-                "ON CONFLICT(owner_id, card_member_id, rarity) "
-                "DO UPDATE SET quantity = quantity + 1",
-                (proposer_id, card_member_id, rarity, now_iso),
-            )
-        # offer items: proposer → recipient
-        for card_member_id, rarity in offer_items:
-            await db.execute(
-                "UPDATE user_cards SET quantity = quantity - 1 "
-                "WHERE owner_id = ? AND card_member_id = ? AND rarity = ?",
-                (proposer_id, card_member_id, rarity),
-            )
-            await db.execute(
-                "INSERT INTO user_cards "
-                "(owner_id, card_member_id, rarity, quantity, first_acquired_at) "
-                "VALUES (?, ?, ?, 1, ?) "
-                "ON CONFLICT(owner_id, card_member_id, rarity) "
-                "DO UPDATE SET quantity = quantity + 1",
-                (recipient_id, card_member_id, rarity, now_iso),
-            )
+            row = await cur.fetchone()
+        assert row is not None
+        listing_short, offer_short = row
+        if listing_short:
+            return False, "listing_no_card"
+        if offer_short:
+            return False, "offer_no_card"
+        now_iso = datetime.now(timezone.utc).isoformat()
+        await _move_items(
+            db, "trade_listing_items", "listing_id", listing_id, recipient_id, proposer_id, now_iso
+        )
+        await _move_items(
+            db, "trade_offer_items", "offer_id", offer_id, proposer_id, recipient_id, now_iso
+        )
+        await db.execute(
+            "DELETE FROM user_cards WHERE owner_id IN (?, ?) AND quantity <= 0",
+            (recipient_id, proposer_id),
+        )
         await db.execute("UPDATE trade_offers SET status = 'accepted' WHERE id = ?", (offer_id,))
         await db.execute(
             "UPDATE trade_listings SET status = 'completed' WHERE id = ?", (listing_id,)
@@ -966,13 +1163,13 @@ async def accept_offer(offer_id: int, recipient_id: str) -> tuple[bool, str | No
             "WHERE listing_id = ? AND id != ? AND status = 'pending'",
             (listing_id, offer_id),
         )
-        await db.commit()
+    _owned_subjects.invalidate(recipient_id, proposer_id)
     return True, None
 
 
 async def decline_offer(offer_id: int, recipient_id: str) -> bool:
     """Decline an offer (called by listing owner)."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         async with db.execute(
             "SELECT tl.owner_id FROM trade_offers to_ "
             "JOIN trade_listings tl ON to_.listing_id = tl.id "
@@ -985,108 +1182,103 @@ async def decline_offer(offer_id: int, recipient_id: str) -> bool:
         result = await db.execute(
             "UPDATE trade_offers SET status = 'declined' WHERE id = ?", (offer_id,)
         )
-        await db.commit()
     return result.rowcount > 0
 
 
 async def cancel_offer(offer_id: int, proposer_id: str) -> bool:
     """Cancel an offer (called by the proposer)."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         result = await db.execute(
             "UPDATE trade_offers SET status = 'cancelled' "
             "WHERE id = ? AND proposer_id = ? AND status = 'pending'",
             (offer_id, proposer_id),
         )
-        await db.commit()
     return result.rowcount > 0
 
 
 async def expire_offer(offer_id: int) -> None:
     """Mark an offer as expired (called on Discord view timeout)."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "UPDATE trade_offers SET status = 'expired' WHERE id = ? AND status = 'pending'",
             (offer_id,),
         )
-        await db.commit()
 
 
 async def get_offers_for_listing(listing_id: int) -> list[TradeOfferFull]:
     """Return all pending offers against a listing."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT id FROM trade_offers WHERE listing_id = ? AND status = 'pending'",
             (listing_id,),
         ) as cur:
             ids = [r[0] for r in await cur.fetchall()]
-        return [o for oid in ids if (o := await _load_offer_full(db, oid))]
+        return await _load_offers_full(db, ids)
 
 
 async def get_my_offers(user_id: str) -> list[TradeOfferFull]:
     """Return all pending offers sent by a user."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT id FROM trade_offers WHERE proposer_id = ? AND status = 'pending' "
             "ORDER BY created_at DESC",
             (user_id,),
         ) as cur:
             ids = [r[0] for r in await cur.fetchall()]
-        return [o for oid in ids if (o := await _load_offer_full(db, oid))]
+        return await _load_offers_full(db, ids)
 
 
 async def get_offer_by_id(offer_id: int) -> TradeOfferFull | None:
     """Load any offer by ID regardless of status."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         return await _load_offer_full(db, offer_id)
 
 
 async def set_offer_discord_message_id(offer_id: int, message_id: str) -> None:
     """Store the Discord DM message ID on an offer so the web UI can edit it."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "UPDATE trade_offers SET discord_message_id = ? WHERE id = ?",
             (message_id, offer_id),
         )
-        await db.commit()
+
+
+_LEADERBOARD_COLUMNS = {
+    "total": "total_cards",
+    "legendary": "legendary_cards",
+    "unique": "unique_subjects",
+}
 
 
 async def get_leaderboard(sort_by: str = "total") -> list[dict]:
     """Return top 10 players ranked by sort_by ('total', 'legendary', 'unique').
     Returns list of dicts with keys: owner_id, display_name, total."""
-    if sort_by == "legendary":
-        sql = """
-            SELECT uc.owner_id, m.display_name,
-                COALESCE(SUM(
-                    CASE WHEN uc.rarity = 'legendary' THEN uc.quantity ELSE 0 END
-                ), 0) AS total
-            FROM user_cards uc JOIN members m ON uc.owner_id = m.discord_id
-            WHERE m.is_excluded = 0
-            GROUP BY uc.owner_id, m.display_name
-            ORDER BY total DESC LIMIT 10
-        """
-    elif sort_by == "unique":
-        sql = """
-            SELECT uc.owner_id, m.display_name,
-                COUNT(DISTINCT uc.card_member_id) AS total
-            FROM user_cards uc JOIN members m ON uc.owner_id = m.discord_id
-            WHERE m.is_excluded = 0 AND uc.quantity > 0
-            GROUP BY uc.owner_id, m.display_name
-            ORDER BY total DESC LIMIT 10
-        """
-    else:
-        sql = """
-            SELECT uc.owner_id, m.display_name, SUM(uc.quantity) AS total
-            FROM user_cards uc JOIN members m ON uc.owner_id = m.discord_id
-            WHERE m.is_excluded = 0
-            GROUP BY uc.owner_id, m.display_name
-            ORDER BY total DESC LIMIT 10
-        """
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute(sql) as cur:
+    column = _LEADERBOARD_COLUMNS.get(sort_by, "total_cards")
+    async with reader() as db:
+        async with db.execute(
+            f"""
+            SELECT cs.owner_id, m.display_name, cs.{column} AS total
+            FROM collection_stats cs JOIN members m ON cs.owner_id = m.discord_id
+            WHERE m.is_excluded = 0 AND cs.total_cards > 0
+            ORDER BY cs.{column} DESC LIMIT 10
+            """
+        ) as cur:
             rows = await cur.fetchall()
     return [{"owner_id": r[0], "display_name": r[1], "total": r[2]} for r in rows]
 
 
+async def rebuild_collection_stats() -> int:
+    """Recompute the leaderboard counters from user_cards. Returns how many owners have them.
+
+    Triggers keep collection_stats current, so this is only needed if it's been edited by
+    hand or is suspected to have drifted.
+    """
+    async with transaction() as db:
+        await db.execute("DELETE FROM collection_stats")
+        cur = await db.execute(COLLECTION_STATS_REBUILD_SQL)
+        return cur.rowcount
+
+
 async def award_card(
     owner_id: str, card_member_id: str, rarity: str, quantity: int, drawn_by_name: str = "admin"
 ) -> UserCard | None:
@@ -1094,7 +1286,7 @@ async def award_card(
     if rarity not in RARITY_ORDER:
         return None
     now = datetime.now(timezone.utc).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             """
             INSERT INTO user_cards
@@ -1105,7 +1297,6 @@ async def award_card(
             """,
             (owner_id, card_member_id, rarity, quantity, now, drawn_by_name),
         )
-        await db.commit()
         async with db.execute(
             "SELECT id, owner_id, card_member_id, rarity, quantity, "
             "first_acquired_at, drawn_by_name "
@@ -1113,6 +1304,7 @@ async def award_card(
             (owner_id, card_member_id, rarity),
         ) as cur:
             r = await cur.fetchone()
+    _owned_subjects.invalidate(owner_id)
     assert r is not None
     return UserCard(
         id=r[0],
@@ -1125,10 +1317,39 @@ async def award_card(
     )
 
 
+async def award_card_to_all(
+    card_member_id: str, rarity: str, quantity: int, drawn_by_name: str = "admin"
+) -> BulkResult | None:
+    """award_card for every non-excluded member, as one statement in one transaction.
+
+    Returns None if rarity is invalid.
+    """
+    if rarity not in RARITY_ORDER:
+        return None
+    now = datetime.now(timezone.utc).isoformat()
+    async with transaction() as db:
+        async with db.execute("SELECT COUNT(*) FROM members WHERE is_excluded = 0") as cur:
+            row = await cur.fetchone()
+        assert row is not None
+        members = row[0]
+        cur = await db.execute(
+            """
+            INSERT INTO user_cards
+                (owner_id, card_member_id, rarity, quantity, first_acquired_at, drawn_by_name)
+            SELECT discord_id, ?, ?, ?, ?, ? FROM members WHERE is_excluded = 0
+            ON CONFLICT(owner_id, card_member_id, rarity)
+            DO UPDATE SET quantity = quantity + excluded.quantity
+            """,
+            (card_member_id, rarity, quantity, now, drawn_by_name),
+        )
+    _owned_subjects.clear()
+    return BulkResult(members, cur.rowcount)
+
+
 async def get_owned_card_subjects(owner_id: str) -> list[dict]:
     """Return distinct card subjects (real or synthetic) the owner has at least one copy of.
     Returns list of dicts with keys: discord_id, display_name, is_synthetic."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT DISTINCT m.discord_id, m.display_name, m.is_synthetic "
             "FROM user_cards uc JOIN members m ON uc.card_member_id = m.discord_id "
@@ -1140,38 +1361,64 @@ async def get_owned_card_subjects(owner_id: str) -> list[dict]:
     return [{"discord_id": r[0], "display_name": r[1], "is_synthetic": bool(r[2])} for r in rows]
 
 
+_owned_subjects = OwnedSubjectIndex(get_owned_card_subjects)
+
+
+async def search_owned_card_subjects(
+    owner_id: str, query: str, limit: int = 25
+) -> list[tuple[str, str]]:
+    """Autocomplete (label, discord_id) pairs for owner_id's cards matching query by label
+    prefix, then substring, up to limit.
+
+    Served from memory after the owner's first search; the card-mutating calls in this
+    module drop the owner's entry so the next search sees their new collection.
+    """
+    return await _owned_subjects.search(owner_id, query, limit)
+
+
+def drop_caches() -> None:
+    """Forget everything this module holds in memory about the card tables.
+
+    For when the tables were replaced wholesale (backup.restore): the member directory,
+    the owned-subject index and the draw pool all rebuild from the database on next use.
+    """
+    directory.invalidate()
+    _owned_subjects.clear()
+    _eligible_pool.invalidate()
+
+
 async def get_member_display_name(discord_id: str) -> str | None:
     """Return a member's display name, or None if no such member exists."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute(
-            "SELECT display_name FROM members WHERE discord_id = ?", (discord_id,)
-        ) as cur:
-            row = await cur.fetchone()
-    return row[0] if row else None
+    profile = await directory.get(discord_id)
+    return profile.display_name if profile else None
+
+
+async def get_member_display_names(discord_ids: list[str]) -> dict[str, str]:
+    """Return {discord_id: display_name} for those of discord_ids that exist."""
+    profiles = await directory.get_many(discord_ids)
+    return {discord_id: p.display_name for discord_id, p in profiles.items()}
+
+
+def member_names() -> DataLoader[str, str]:
+    """A DataLoader of display names, batching through get_member_display_names.
+
+    Each batch is one directory.get_many: answered from memory once the directory has
+    loaded, with a single IN (...) query only for ids it doesn't hold. What the loader
+    adds is one lookup per batch, and per-key caching, for callers that await their
+    names row by row.
+    """
+    return DataLoader(get_member_display_names)
 
 
 async def get_member_card_context(discord_id: str) -> MemberCardContext | None:
     """Return the member fields used to render card embeds and page headers."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        async with db.execute(
-            "SELECT display_name, avatar_url, bio, stats FROM members WHERE discord_id = ?",
-            (discord_id,),
-        ) as cur:
-            row = await cur.fetchone()
-    if row is None:
-        return None
-    return MemberCardContext(
-        discord_id=discord_id,
-        display_name=row[0],
-        avatar_url=row[1],
-        bio=row[2],
-        stats_pairs=_parse_stats(row[3]),
-    )
+    profile = await directory.get(discord_id)
+    return profile.card_context() if profile else None
 
 
 async def get_offer_discord_message_id(offer_id: int) -> str | None:
     """Return the Discord DM message ID stored on an offer, or None."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT discord_message_id FROM trade_offers WHERE id = ?", (offer_id,)
         ) as cur:
@@ -7,5 +7,6 @@ EXTENSIONS = [
     "superpal.cogs.shop",
     "superpal.cogs.palymarket",
     "superpal.cogs.admin",
+    "superpal.cogs.maintenance",
     "superpal.cogs.legacy",
 ]
@@ -7,7 +7,9 @@ from discord import app_commands
 from discord.ext import commands
 
 import superpal.env as superpal_env
-from superpal.cards.service import generate_magic_link
+from superpal.cards.backup import snapshot
+from superpal.cards.fight_service import backfill_fight_stats
+from superpal.cards.service import generate_magic_link, rebuild_collection_stats
 from superpal.cogs.helpers import _is_clippy
 from superpal.env import WEBAPP_BASE_URL
 
@@ -70,6 +72,48 @@ class AdminCog(commands.Cog):
         await channel.send(message)
         await interaction.response.send_message("Announcement posted!", ephemeral=True)
 
+    @app_commands.command(
+        name="admin-backup",
+        description="Snapshot the card database now (The Clippy only)",
+    )
+    async def admin_backup_command(self, interaction: discord.Interaction) -> None:
+        if not _is_clippy(interaction):
+            await interaction.response.send_message(
+                "You don't have permission to use this command.", ephemeral=True
+            )
+            return
+        await interaction.response.defer(ephemeral=True)
+        try:
+            snap = await snapshot("manual")
+        except Exception as e:
+            log.error("Error in admin-backup: %s", e)
+            await interaction.followup.send(f"Snapshot failed: {e}", ephemeral=True)
+            return
+        log.info(snap.summary())
+        await interaction.followup.send(snap.summary(), ephemeral=True)
+
+    @app_commands.command(
+        name="admin-rebuild-leaderboards",
+        description="Recompute leaderboard counters from scratch (The Clippy only)",
+    )
+    async def admin_rebuild_leaderboards_command(self, interaction: discord.Interaction) -> None:
+        if not _is_clippy(interaction):
+            await interaction.response.send_message(
+                "You don't have permission to use this command.", ephemeral=True
+            )
+            return
+        await interaction.response.defer(ephemeral=True)
+        try:
+            owners = await rebuild_collection_stats()
+            fighters = await backfill_fight_stats()
+        except Exception as e:
+            log.error("Error in admin-rebuild-leaderboards: %s", e)
+            await interaction.followup.send(f"Rebuild failed: {e}", ephemeral=True)
+            return
+        message = f"Rebuilt leaderboard counters: {owners} collections, {fighters} fighters."
+        log.info(message)
+        await interaction.followup.send(message, ephemeral=True)
+
 
 async def setup(bot: commands.Bot) -> None:
     await bot.add_cog(AdminCog(bot))
@@ -1,30 +1,33 @@
 """Card game commands: draws, collection, trade-in, upgrade, gifts, marketplace links."""
 
-import aiosqlite
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 import superpal.env as superpal_env
 import superpal.static as superpal_static
-from superpal.cards.db import DB_PATH
-from superpal.cards.models import RARITY_LABELS
+from superpal.cards.db import reader
+from superpal.cards.embeds import build_draw_summary_embed, build_exchange_embed
+from superpal.cards.models import RARITY_LABELS, CardExchange
 from superpal.cards.service import (
     accept_offer,
     decline_offer,
-    draw_card,
+    draw_cards,
     expire_offer,
     generate_magic_link,
     get_card_quantity,
     get_collection,
     get_leaderboard,
     get_member_display_name,
-    get_owned_card_subjects,
+    get_member_display_names,
     gift_card,
+    search_owned_card_subjects,
     trade_in,
+    trade_in_all,
     upgrade,
+    upgrade_all,
 )
-from superpal.cogs.helpers import _label_card_subjects, _member_card_embed
+from superpal.cogs.helpers import _member_card_embed
 from superpal.env import WEBAPP_BASE_URL
 
 log = superpal_env.log
@@ -183,7 +186,10 @@ class CardsCog(commands.Cog):
         name="card-draw",
         description="Draw a card from the Bringus deck (up to 5 per week)",
     )
-    async def draw_card_command(self, interaction: discord.Interaction) -> None:
+    @app_commands.describe(all_remaining="Spend every draw you have left this week at once")
+    async def draw_card_command(
+        self, interaction: discord.Interaction, all_remaining: bool = False
+    ) -> None:
         await interaction.response.defer()
         member = interaction.user
         is_super_pal = any(
@@ -191,10 +197,13 @@ class CardsCog(commands.Cog):
         )
         max_draws = 10 if is_super_pal else 5
 
-        card = await draw_card(
-            owner_id=str(member.id), max_draws=max_draws, drawn_by_name=member.display_name
+        cards = await draw_cards(
+            owner_id=str(member.id),
+            max_draws=max_draws,
+            count=None if all_remaining else 1,
+            drawn_by_name=member.display_name,
         )
-        if card is None:
+        if not cards:
             limit_label = "10 draws" if is_super_pal else "5 draws"
             await interaction.followup.send(
                 f"You've used your {limit_label} for this week. Come back Sunday!",
@@ -202,12 +211,20 @@ class CardsCog(commands.Cog):
             )
             return
 
-        embed = await _member_card_embed(
-            card.card_member_id,
-            rarity=card.rarity,
-            card_number=card.id,
-            drawn_by=card.drawn_by_name or member.display_name,
-        )
+        if len(cards) == 1:
+            card = cards[0]
+            embed = await _member_card_embed(
+                card.card_member_id,
+                rarity=card.rarity,
+                card_number=card.id,
+                drawn_by=card.drawn_by_name or member.display_name,
+            )
+        else:
+            names = await get_member_display_names(sorted({c.card_member_id for c in cards}))
+            embed = build_draw_summary_embed(
+                drawn_by=member.display_name,
+                draws=[(names.get(c.card_member_id, "Unknown"), c.rarity, c.id) for c in cards],
+            )
         await interaction.followup.send(embed=embed)
 
     @app_commands.command(name="card-display", description="Show a card you own in the channel")
@@ -223,7 +240,7 @@ class CardsCog(commands.Cog):
         rarity: str,
     ) -> None:
         await interaction.response.defer()
-        async with aiosqlite.connect(DB_PATH) as db:
+        async with reader() as db:
             async with db.execute(
                 "SELECT uc.id, uc.drawn_by_name FROM user_cards uc "
                 "WHERE uc.owner_id = ? AND uc.card_member_id = ? AND uc.rarity = ? "
@@ -279,15 +296,29 @@ class CardsCog(commands.Cog):
     @app_commands.describe(
         card="The card you want to trade in",
         rarity="The rarity of the card to trade",
+        everything="Trade in every 3 spare copies you hold, keeping one of each card",
     )
     @app_commands.choices(rarity=RARITY_CHOICES)
     async def trade_in_command(
         self,
         interaction: discord.Interaction,
-        card: str,
-        rarity: str,
+        card: str | None = None,
+        rarity: str | None = None,
+        everything: bool = False,
     ) -> None:
         await interaction.response.defer(ephemeral=True)
+        if everything:
+            exchange = await trade_in_all(
+                str(interaction.user.id), drawn_by_name=interaction.user.display_name
+            )
+            await self._send_exchange(interaction, "Trade-in complete", exchange)
+            return
+        if card is None or rarity is None:
+            await interaction.followup.send(
+                "Pick a card and rarity, or set everything to trade in all your spares.",
+                ephemeral=True,
+            )
+            return
         result_card = await trade_in(
             owner_id=str(interaction.user.id),
             card_member_id=card,
@@ -319,6 +350,7 @@ class CardsCog(commands.Cog):
     @app_commands.describe(
         card="The card you want to upgrade",
         rarity="The current rarity of the card",
+        everything="Upgrade every card you have 5 or more of, all the way up the tiers",
     )
     @app_commands.choices(
         rarity=[
@@ -330,10 +362,23 @@ class CardsCog(commands.Cog):
     async def upgrade_command(
         self,
         interaction: discord.Interaction,
-        card: str,
-        rarity: str,
+        card: str | None = None,
+        rarity: str | None = None,
+        everything: bool = False,
     ) -> None:
         await interaction.response.defer(ephemeral=True)
+        if everything:
+            exchange = await upgrade_all(
+                str(interaction.user.id), drawn_by_name=interaction.user.display_name
+            )
+            await self._send_exchange(interaction, "Upgrade complete", exchange)
+            return
+        if card is None or rarity is None:
+            await interaction.followup.send(
+                "Pick a card and rarity, or set everything to upgrade all you can.",
+                ephemeral=True,
+            )
+            return
         result_card = await upgrade(
             owner_id=str(interaction.user.id),
             card_member_id=card,
@@ -361,6 +406,26 @@ class CardsCog(commands.Cog):
             ephemeral=True,
         )
 
+    async def _send_exchange(
+        self, interaction: discord.Interaction, title: str, exchange: CardExchange
+    ) -> None:
+        """Follow up a bulk upgrade or trade-in with one summary embed."""
+        if not exchange.received:
+            await interaction.followup.send(
+                "You don't have enough duplicates for that yet.", ephemeral=True
+            )
+            return
+        names = await get_member_display_names(sorted({mid for mid, _ in exchange.received}))
+        embed = build_exchange_embed(
+            title=title,
+            summary=exchange.summary(),
+            received=[
+                (names.get(mid, "Unknown"), rarity, n)
+                for (mid, rarity), n in exchange.received.items()
+            ],
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
     @app_commands.command(
         name="card-trade",
         description="Open the trade marketplace to list cards and make offers",
@@ -442,14 +507,9 @@ class CardsCog(commands.Cog):
     async def _card_subject_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> list[app_commands.Choice[str]]:
-        subjects = await get_owned_card_subjects(str(interaction.user.id))
-        labeled = _label_card_subjects(subjects)
-        matches = [
-            (label, discord_id) for label, discord_id in labeled if current.lower() in label.lower()
-        ]
+        labels = await search_owned_card_subjects(str(interaction.user.id), current)
         return [
-            app_commands.Choice(name=label[:100], value=discord_id)
-            for label, discord_id in matches[:25]
+            app_commands.Choice(name=label[:100], value=discord_id) for label, discord_id in labels
         ]
 
     @app_commands.command(
@@ -1,25 +1,32 @@
 """Card fight commands: challenges, fight leaderboard, and fight expiry."""
 
+import asyncio
+
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 
 import superpal.env as superpal_env
 import superpal.notify as notify
 from superpal.cards.fight_service import (
     FIGHT_TOKEN_EXPIRY_MINUTES,
     accept_fight,
-    auto_forfeit_idle_fights,
     create_fight,
     decline_fight,
-    expire_inactive_fights,
-    expire_pending_challenges,
+    fight_deadlines,
     get_fight_leaderboard,
+    reconcile_fight_deadlines,
+    resolve_fight_deadline,
 )
 
 log = superpal_env.log
 
 FIGHT_CHALLENGE_TIMEOUT = FIGHT_TOKEN_EXPIRY_MINUTES * 60
+# How soon a failed seeding of the deadline heap is first retried, doubling up to the
+# interval. The interval is also how often the heap is re-read when webapp workers in
+# other processes change fights (a "unix:" FIGHT_BACKPLANE); otherwise it is read once.
+RECONCILE_INTERVAL_SECONDS = 5 * 60
+RECONCILE_RETRY_SECONDS = 5
 
 
 class FightChallengeView(discord.ui.View):
@@ -80,7 +87,7 @@ class FightChallengeView(discord.ui.View):
         await interaction.response.edit_message(content="Challenge declined.", view=None)
 
     async def on_timeout(self) -> None:
-        await expire_pending_challenges()
+        await resolve_fight_deadline(self.fight_id)
         if self.message:
             try:
                 await self.message.edit(content="Fight challenge expired.", view=None)
@@ -91,33 +98,47 @@ class FightChallengeView(discord.ui.View):
 class FightsCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.fight_expiry: asyncio.Task | None = None
 
     async def cog_load(self) -> None:
-        if not self.fight_expiry.is_running():
-            self.fight_expiry.start()
+        if self.fight_expiry is None or self.fight_expiry.done():
+            self.fight_expiry = asyncio.create_task(self._run_fight_expiry())
 
     async def cog_unload(self) -> None:
-        self.fight_expiry.cancel()
+        if self.fight_expiry is not None:
+            self.fight_expiry.cancel()
 
-    @tasks.loop(minutes=5)
-    async def fight_expiry(self) -> None:
+    async def _run_fight_expiry(self) -> None:
         """Expire stale challenges and abandoned lobbies, and resolve ghosted battles.
 
-        The challenge View also expires on its timeout, but that timer is
-        lost on process restart — this loop is the durable fallback.
+        Each fight's deadline fires when it is due, and the writers that change a fight
+        keep its deadline current. The challenge View also expires on its timeout, but
+        that timer is lost on process restart, so the heap is seeded from the database
+        once at startup, after sweeping whatever came due while the bot was down; a
+        failed seeding is retried with backoff. Only when other worker processes share
+        the fights, whose writers can't reach this heap, is it re-read periodically.
         """
-        try:
-            await expire_pending_challenges()
-            await expire_inactive_fights()
-            resolved = await auto_forfeit_idle_fights()
-            if resolved:
-                log.info("Auto-forfeited %d abandoned fight(s): %s", len(resolved), resolved)
-        except Exception as e:
-            log.error("Error in fight_expiry task: %s", e)
-
-    @fight_expiry.before_loop
-    async def before_fight_expiry(self) -> None:
         await self.bot.wait_until_ready()
+        fight_deadlines.enable()
+        runner = asyncio.create_task(fight_deadlines.run())
+        retry = RECONCILE_RETRY_SECONDS
+        try:
+            while True:
+                try:
+                    scheduled = await reconcile_fight_deadlines()
+                except Exception as e:
+                    log.error("Error reconciling fight deadlines (retry in %ds): %s", retry, e)
+                    await asyncio.sleep(retry)
+                    retry = min(retry * 2, RECONCILE_INTERVAL_SECONDS)
+                    continue
+                log.debug("Scheduled %d fight deadline(s)", scheduled)
+                if not superpal_env.FIGHT_BACKPLANE.startswith("unix:"):
+                    break
+                retry = RECONCILE_RETRY_SECONDS
+                await asyncio.sleep(RECONCILE_INTERVAL_SECONDS)
+            await runner
+        finally:
+            runner.cancel()
 
     @app_commands.command(
         name="card-fight", description="Challenge another player to a card battle"
@@ -0,0 +1,68 @@
+"""Background upkeep of the cards database: retention, compaction and snapshots."""
+
+import asyncio
+import datetime
+
+from discord.ext import commands, tasks
+
+import superpal.env as superpal_env
+from superpal.cards.backup import snapshot_and_rotate
+from superpal.cards.retention import run_retention
+from superpal.schedule import next_hour_utc
+
+log = superpal_env.log
+
+# Quietest hour on the server; retention deletes in small chunks but still competes
+# with card draws and fights for the writer.
+RETENTION_HOUR_UTC = 4
+
+
+class MaintenanceCog(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def cog_load(self) -> None:
+        if not self.retention.is_running():
+            self.retention.start()
+        if not self.scheduled_backup.is_running():
+            self.scheduled_backup.start()
+
+    async def cog_unload(self) -> None:
+        self.retention.cancel()
+        self.scheduled_backup.cancel()
+
+    @tasks.loop(hours=24)
+    async def retention(self) -> None:
+        """Purge and archive expired rows, then hand freed pages back to the filesystem."""
+        try:
+            report = await run_retention()
+            log.info(report.summary())
+        except Exception as e:
+            log.error("Error in retention task: %s", e)
+
+    @retention.before_loop
+    async def before_retention(self) -> None:
+        await self.bot.wait_until_ready()
+        try:
+            delta = next_hour_utc(RETENTION_HOUR_UTC) - datetime.datetime.now(datetime.timezone.utc)
+            log.info("Retention: sleeping %s until %02d:00 UTC", delta, RETENTION_HOUR_UTC)
+            await asyncio.sleep(delta.total_seconds())
+        except Exception as e:
+            log.error("Error in before_retention: %s", e)
+
+    @tasks.loop(hours=6)
+    async def scheduled_backup(self) -> None:
+        """Snapshot the database and drop the oldest scheduled snapshots."""
+        try:
+            snap = await snapshot_and_rotate()
+            log.info(snap.summary())
+        except Exception as e:
+            log.error("Error in scheduled_backup task: %s", e)
+
+    @scheduled_backup.before_loop
+    async def before_scheduled_backup(self) -> None:
+        await self.bot.wait_until_ready()
+
+
+async def setup(bot: commands.Bot) -> None:
+    await bot.add_cog(MaintenanceCog(bot))
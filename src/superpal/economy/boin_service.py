@@ -1,15 +1,13 @@
 import logging
 import random
 
-import aiosqlite
-
-from superpal.cards.db import DB_PATH
+from superpal.cards.db import reader, transaction
 
 log = logging.getLogger(__name__)
 
 
 async def get_balance(player_id: str) -> int:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT boin_balance FROM members WHERE discord_id = ?", (player_id,)
         ) as cur:
@@ -18,17 +16,15 @@ async def get_balance(player_id: str) -> int:
 
 
 async def add_boins(player_id: str, amount: int) -> None:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "UPDATE members SET boin_balance = boin_balance + ? WHERE discord_id = ?",
             (amount, player_id),
         )
-        await db.commit()
 
 
 async def deduct_boins(player_id: str, amount: int) -> bool:
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("BEGIN EXCLUSIVE")
+    async with transaction() as db:
         async with db.execute(
             "SELECT boin_balance FROM members WHERE discord_id = ?", (player_id,)
         ) as cur:
@@ -40,14 +36,13 @@ async def deduct_boins(player_id: str, amount: int) -> bool:
             "UPDATE members SET boin_balance = boin_balance - ? WHERE discord_id = ?",
             (amount, player_id),
         )
-        await db.commit()
     return True
 
 
 async def award_daily_to_all(member_ids: list[str]) -> dict[str, int]:
     """Award a random daily boin grant to all members. Returns {discord_id: amount} map."""
     results: dict[str, int] = {}
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         for member_id in member_ids:
             amount = int(random.triangular(50, 200, 75))
             await db.execute(
@@ -55,13 +50,12 @@ async def award_daily_to_all(member_ids: list[str]) -> dict[str, int]:
                 (amount, member_id),
             )
             results[member_id] = amount
-        await db.commit()
     return results
 
 
 async def import_initial_balances(data: dict[str, int]) -> None:
     """Seed boin balances from a display_name → amount map. Logs unmatched names."""
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         async with db.execute("SELECT discord_id, display_name FROM members") as cur:
             rows = await cur.fetchall()
         name_to_id = {row[1].lower(): row[0] for row in rows}
@@ -81,4 +75,3 @@ async def import_initial_balances(data: dict[str, int]) -> None:
                 display_name,
                 discord_id,
             )
-        await db.commit()
@@ -1,6 +1,4 @@
-import aiosqlite
-
-from superpal.cards.db import DB_PATH
+from superpal.cards.db import transaction
 
 BOINS = "boins"
 PRINGLES = "pringles"
@@ -48,8 +46,7 @@ async def exchange(
     from_col = _BALANCE_COL[from_currency]
     to_col = _BALANCE_COL[to_currency]
 
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("BEGIN EXCLUSIVE")
+    async with transaction() as db:
         async with db.execute(
             f"SELECT {from_col} FROM members WHERE discord_id = ?", (player_id,)
         ) as cur:
@@ -63,6 +60,5 @@ async def exchange(
             "WHERE discord_id = ?",
             (amount, received, player_id),
         )
-        await db.commit()
 
     return True, "", received
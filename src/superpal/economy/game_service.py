@@ -1,8 +1,6 @@
 import random
 
-import aiosqlite
-
-from superpal.cards.db import DB_PATH
+from superpal.cards.db import transaction
 
 MIN_BET = 10
 
@@ -27,8 +25,7 @@ _ROULETTE_BETS: dict[str, tuple[set[int], int]] = {
 async def _check_and_deduct(player_id: str, bet: int) -> tuple[bool, str]:
     if bet < MIN_BET:
         return False, f"minimum_bet_{MIN_BET}"
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("BEGIN EXCLUSIVE")
+    async with transaction() as db:
         async with db.execute(
             "SELECT boin_balance FROM members WHERE discord_id = ?", (player_id,)
         ) as cur:
@@ -40,17 +37,15 @@ async def _check_and_deduct(player_id: str, bet: int) -> tuple[bool, str]:
             "UPDATE members SET boin_balance = boin_balance - ? WHERE discord_id = ?",
             (bet, player_id),
         )
-        await db.commit()
     return True, ""
 
 
 async def _award(player_id: str, amount: int) -> None:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "UPDATE members SET boin_balance = boin_balance + ? WHERE discord_id = ?",
             (amount, player_id),
         )
-        await db.commit()
 
 
 async def play_dice(player_id: str, bet: int) -> dict:
@@ -102,6 +102,8 @@ WEBAPP_BASE_URL = (
     get_env("WEBAPP_BASE_URL", default=f"http://localhost:{WEBAPP_PORT}")
     or f"http://localhost:{WEBAPP_PORT}"
 )
+# How webapp processes share fight updates: "local" (one process) or "unix:<socket path>"
+FIGHT_BACKPLANE = get_env("FIGHT_BACKPLANE", default="local") or "local"
 
 # Log configuration status
 log.info("Environment configuration loaded successfully")
@@ -5,6 +5,8 @@ import; bot.py registers itself here at startup. Every function no-ops
 when no bot is registered (e.g. webapp running standalone or in tests).
 """
 
+import asyncio
+
 import discord
 from discord.ext import commands
 
@@ -16,11 +18,13 @@ from superpal.cards.fight_service import (
     fight_ended_by_forfeit,
     get_fight,
 )
-from superpal.cards.models import RARITY_LABELS
+from superpal.cards.models import RARITY_LABELS, CardRef
 from superpal.cards.service import (
     get_member_display_name,
+    get_member_display_names,
     get_offer_by_id,
     get_offer_discord_message_id,
+    member_names,
     set_offer_discord_message_id,
 )
 from superpal.env import WEBAPP_BASE_URL
@@ -58,16 +62,17 @@ async def notify_trade_offer(offer_id: int) -> None:
     member = guild.get_member(int(offer.listing.owner_id))
     if member is None:
         return
-    offer_names = [
-        f"{RARITY_LABELS[item.rarity]} "
-        f"{await get_member_display_name(item.member_id) or item.member_id}"
-        for item in offer.items
-    ]
-    listing_names = [
-        f"{RARITY_LABELS[item.rarity]} "
-        f"{await get_member_display_name(item.member_id) or item.member_id}"
-        for item in offer.listing.items
-    ]
+    # The offer's CardRefs usually carry their names already; the rest share one lookup.
+    names = member_names()
+
+    async def label(item: CardRef) -> str:
+        name = item.display_name or await names.load(item.member_id)
+        return f"{RARITY_LABELS[item.rarity]} {name or item.member_id}"
+
+    offer_names, listing_names = await asyncio.gather(
+        asyncio.gather(*map(label, offer.items)),
+        asyncio.gather(*map(label, offer.listing.items)),
+    )
     from superpal.cogs.cards import TradeOfferView
 
     view = TradeOfferView(offer_id=offer_id, listing_owner_id=offer.listing.owner_id)
@@ -94,7 +99,7 @@ async def send_fight_lobby_dms(
     guild = _bot.get_guild(superpal_env.GUILD_ID or 0)
     if guild is None:
         return
-    names = {uid: await get_member_display_name(uid) or uid for uid in (challenger_id, opponent_id)}
+    names = await get_member_display_names([challenger_id, opponent_id])
     for uid, other_uid in ((challenger_id, opponent_id), (opponent_id, challenger_id)):
         member = guild.get_member(int(uid))
         if member is None:
@@ -102,7 +107,7 @@ async def send_fight_lobby_dms(
         url = await create_fight_token(fight_id, uid, WEBAPP_BASE_URL)
         try:
             await member.send(
-                f"Your **{mode}** battle vs. **{names[other_uid]}** "
+                f"Your **{mode}** battle vs. **{names.get(other_uid, other_uid)}** "
                 f"is ready!\n\nOpen the fight lobby: <{url}>",
                 suppress_embeds=True,
             )
@@ -157,9 +162,10 @@ async def announce_fight_result(fight_id: int) -> None:
     if not isinstance(channel, discord.abc.Messageable):
         return
 
-    winner_name = await get_member_display_name(fight.winner_id) or fight.winner_id
     loser_id = fight.opponent_id if fight.winner_id == fight.challenger_id else fight.challenger_id
-    loser_name = await get_member_display_name(loser_id) or loser_id
+    names = await get_member_display_names([fight.winner_id, loser_id])
+    winner_name = names.get(fight.winner_id, fight.winner_id)
+    loser_name = names.get(loser_id, loser_id)
     escaped = await fight_ended_by_escape(fight_id)
     forfeited = await fight_ended_by_forfeit(fight_id)
 
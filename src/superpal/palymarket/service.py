@@ -5,18 +5,18 @@ from datetime import datetime, timezone
 
 import aiosqlite
 
-from superpal.cards.db import DB_PATH
+from superpal.cards.db import reader, transaction
 from superpal.palymarket.models import Bet, Market
 
 
 async def record_probability_snapshot(market_id: int) -> None:
     """Snapshot current YES% into market_probability_history."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with transaction() as db:
         async with db.execute(
             "SELECT yes_pool, no_pool FROM markets WHERE id = ?",
             (market_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             row = await cur.fetchone()
         if row is None:
             return
@@ -29,18 +29,17 @@ async def record_probability_snapshot(market_id: int) -> None:
             "VALUES (?, ?, ?, ?, ?)",
             (market_id, yes_pct, row["yes_pool"], row["no_pool"], now),
         )
-        await db.commit()
 
 
 async def get_probability_history(market_id: int) -> list[tuple[float, datetime]]:
     """Return (yes_pct, recorded_at) pairs ordered by time."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with reader() as db:
         async with db.execute(
             "SELECT yes_pct, recorded_at FROM market_probability_history "
             "WHERE market_id = ? ORDER BY recorded_at",
             (market_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             rows = await cur.fetchall()
     return [(row["yes_pct"], datetime.fromisoformat(row["recorded_at"])) for row in rows]
 
@@ -74,45 +73,43 @@ def _parse_bet(row: aiosqlite.Row) -> Bet:
 
 async def get_palycoin_balance(player_id: str) -> int:
     """Return balance. Issue 100 Palycoin starting grant if balance==0 and player has no bets."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with reader() as db:
         async with db.execute(
             "SELECT palycoin_balance FROM members WHERE discord_id = ?",
             (player_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             row = await cur.fetchone()
-        if row is None:
-            return 0
-        balance = row["palycoin_balance"] if row["palycoin_balance"] is not None else 0
-        if balance != 0:
-            return balance
-        await db.execute("BEGIN EXCLUSIVE")
+    if row is None:
+        return 0
+    balance = row["palycoin_balance"] if row["palycoin_balance"] is not None else 0
+    if balance != 0:
+        return balance
+    async with transaction() as db:
         async with db.execute(
             "SELECT palycoin_balance FROM members WHERE discord_id = ?",
             (player_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             row = await cur.fetchone()
         if row is None:
-            await db.commit()
             return 0
         balance = row["palycoin_balance"] if row["palycoin_balance"] is not None else 0
         if balance != 0:
-            await db.commit()
             return balance
         async with db.execute(
             "SELECT COUNT(*) AS cnt FROM market_bets WHERE player_id = ?",
             (player_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             cnt_row = await cur.fetchone()
         assert cnt_row is not None
         if cnt_row["cnt"] > 0:
-            await db.commit()
             return 0
         await db.execute(
             "UPDATE members SET palycoin_balance = palycoin_balance + 100 WHERE discord_id = ?",
             (player_id,),
         )
-        await db.commit()
         return 100
 
 
@@ -121,13 +118,12 @@ async def exchange_pringles(player_id: str, pringle_amount: int) -> tuple[bool,
     if pringle_amount < 200:
         return False, "minimum_not_met"
     palycoin_gain = (pringle_amount // 200) * 100
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        await db.execute("BEGIN EXCLUSIVE")
+    async with transaction() as db:
         async with db.execute(
             "SELECT pringle_balance FROM members WHERE discord_id = ?",
             (player_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             row = await cur.fetchone()
         pringle_bal = row["pringle_balance"] if row and row["pringle_balance"] is not None else 0
         if pringle_bal < pringle_amount:
@@ -139,25 +135,23 @@ async def exchange_pringles(player_id: str, pringle_amount: int) -> tuple[bool,
             "WHERE discord_id = ?",
             (pringle_amount, palycoin_gain, player_id),
         )
-        await db.commit()
     return True, ""
 
 
 async def propose_market(title: str, description: str, created_by: str) -> Market:
     """Insert market with status='pending_approval'. Return the new Market."""
     now = datetime.now(timezone.utc).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with transaction() as db:
         cur = await db.execute(
             "INSERT INTO markets (title, description, created_by, created_at) VALUES (?, ?, ?, ?)",
             (title, description, created_by, now),
         )
         market_id = cur.lastrowid
-        await db.commit()
         async with db.execute(
             "SELECT * FROM markets WHERE id = ?",
             (market_id,),
         ) as cur2:
+            cur2.row_factory = aiosqlite.Row
             row = await cur2.fetchone()
     assert row is not None
     return _parse_market(row)
@@ -165,12 +159,12 @@ async def propose_market(title: str, description: str, created_by: str) -> Marke
 
 async def approve_market(market_id: int, admin_id: str) -> tuple[bool, str]:
     """Set status='open'. Return (True, '') or (False, reason)."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with transaction() as db:
         async with db.execute(
             "SELECT status FROM markets WHERE id = ?",
             (market_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             row = await cur.fetchone()
         if row is None or row["status"] != "pending_approval":
             return False, "not_pending"
@@ -178,18 +172,17 @@ async def approve_market(market_id: int, admin_id: str) -> tuple[bool, str]:
             "UPDATE markets SET status = 'open' WHERE id = ?",
             (market_id,),
         )
-        await db.commit()
     return True, ""
 
 
 async def reject_market(market_id: int, admin_id: str) -> tuple[bool, str]:
     """Set status='rejected'. Return (True, '') or (False, reason)."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with transaction() as db:
         async with db.execute(
             "SELECT status FROM markets WHERE id = ?",
             (market_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             row = await cur.fetchone()
         if row is None or row["status"] != "pending_approval":
             return False, "not_pending"
@@ -197,18 +190,17 @@ async def reject_market(market_id: int, admin_id: str) -> tuple[bool, str]:
             "UPDATE markets SET status = 'rejected' WHERE id = ?",
             (market_id,),
         )
-        await db.commit()
     return True, ""
 
 
 async def close_market(market_id: int, admin_id: str) -> tuple[bool, str]:
     """Set status='closed'. Return (True, '') or (False, reason)."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with transaction() as db:
         async with db.execute(
             "SELECT status FROM markets WHERE id = ?",
             (market_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             row = await cur.fetchone()
         if row is None or row["status"] != "open":
             return False, "not_open"
@@ -216,19 +208,17 @@ async def close_market(market_id: int, admin_id: str) -> tuple[bool, str]:
             "UPDATE markets SET status = 'closed' WHERE id = ?",
             (market_id,),
         )
-        await db.commit()
     return True, ""
 
 
 async def resolve_market(market_id: int, outcome: str, admin_id: str) -> dict:
     """Resolve market, compute parimutuel payouts, credit winners."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        await db.execute("BEGIN EXCLUSIVE")
+    async with transaction() as db:
         async with db.execute(
             "SELECT * FROM markets WHERE id = ?",
             (market_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             market_row = await cur.fetchone()
         if market_row is None or market_row["status"] != "closed":
             return {"error": "not_closed"}
@@ -242,6 +232,7 @@ async def resolve_market(market_id: int, outcome: str, admin_id: str) -> dict:
             "SELECT * FROM market_bets WHERE market_id = ?",
             (market_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             bet_rows = await cur.fetchall()
         total_pool = market_row["yes_pool"] + market_row["no_pool"]
         winning_bets = [r for r in bet_rows if r["side"] == outcome]
@@ -256,7 +247,6 @@ async def resolve_market(market_id: int, outcome: str, admin_id: str) -> dict:
                     (payout, bet_row["player_id"]),
                 )
                 payouts.append({"player_id": bet_row["player_id"], "payout": payout})
-        await db.commit()
     return {
         "outcome": outcome,
         "total_pool": total_pool,
@@ -271,13 +261,12 @@ async def place_or_update_bet(
     """Place or update a bet. One bet per player per market."""
     if amount <= 0:
         return (False, "invalid_amount")
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        await db.execute("BEGIN EXCLUSIVE")
+    async with transaction() as db:
         async with db.execute(
             "SELECT status FROM markets WHERE id = ?",
             (market_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             market_row = await cur.fetchone()
         if market_row is None or market_row["status"] != "open":
             return False, "market_not_open"
@@ -285,12 +274,14 @@ async def place_or_update_bet(
             "SELECT id, side, amount FROM market_bets WHERE market_id = ? AND player_id = ?",
             (market_id, player_id),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             existing = await cur.fetchone()
         old_amount = existing["amount"] if existing else 0
         async with db.execute(
             "SELECT palycoin_balance FROM members WHERE discord_id = ?",
             (player_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             bal_row = await cur.fetchone()
         balance = (
             bal_row["palycoin_balance"]
@@ -337,69 +328,68 @@ async def place_or_update_bet(
             "VALUES (?, ?, ?, ?, ?)",
             (market_id, player_id, side, amount, now),
         )
-        await db.commit()
     await record_probability_snapshot(market_id)
     return True, ""
 
 
 async def get_market(market_id: int) -> Market | None:
     """Return market by id, or None if not found."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with reader() as db:
         async with db.execute(
             "SELECT * FROM markets WHERE id = ?",
             (market_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             row = await cur.fetchone()
     return _parse_market(row) if row else None
 
 
 async def list_markets(status: str | None = None) -> list[Market]:
     """Return all markets, optionally filtered by status."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with reader() as db:
         if status is not None:
             async with db.execute(
                 "SELECT * FROM markets WHERE status = ? ORDER BY created_at DESC",
                 (status,),
             ) as cur:
+                cur.row_factory = aiosqlite.Row
                 rows = await cur.fetchall()
         else:
             async with db.execute(
                 "SELECT * FROM markets ORDER BY created_at DESC",
             ) as cur:
+                cur.row_factory = aiosqlite.Row
                 rows = await cur.fetchall()
     return [_parse_market(r) for r in rows]
 
 
 async def get_bets_for_market(market_id: int) -> list[Bet]:
     """Return all bets for a market."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with reader() as db:
         async with db.execute(
             "SELECT * FROM market_bets WHERE market_id = ? ORDER BY placed_at",
             (market_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             rows = await cur.fetchall()
     return [_parse_bet(r) for r in rows]
 
 
 async def get_player_bet(market_id: int, player_id: str) -> Bet | None:
     """Return the player's bet on a market, or None."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with reader() as db:
         async with db.execute(
             "SELECT * FROM market_bets WHERE market_id = ? AND player_id = ?",
             (market_id, player_id),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             row = await cur.fetchone()
     return _parse_bet(row) if row else None
 
 
 async def get_player_active_bets(player_id: str) -> list[tuple[Market, Bet]]:
     """Return (Market, Bet) pairs for all bets in non-resolved/rejected markets."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with reader() as db:
         query = """
             SELECT
                 m.id AS m_id, m.title, m.description, m.created_by, m.status,
@@ -413,6 +403,7 @@ async def get_player_active_bets(player_id: str) -> list[tuple[Market, Bet]]:
             ORDER BY b.placed_at DESC
         """
         async with db.execute(query, (player_id,)) as cur:
+            cur.row_factory = aiosqlite.Row
             rows = await cur.fetchall()
     result = []
     for row in rows:
@@ -450,8 +441,7 @@ async def list_pending_markets() -> list[Market]:
 
 async def get_player_portfolio(player_id: str) -> dict:
     """Return active positions and resolved history for portfolio page."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with reader() as db:
         async with db.execute(
             """
             SELECT
@@ -467,6 +457,7 @@ async def get_player_portfolio(player_id: str) -> dict:
             """,
             (player_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             rows = await cur.fetchall()
 
     active: list[dict] = []
@@ -529,8 +520,7 @@ async def get_player_portfolio(player_id: str) -> dict:
 
 async def get_recent_activity(limit: int = 50) -> list[dict]:
     """Return recent bets across all markets, newest first, with display names."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with reader() as db:
         async with db.execute(
             """
             SELECT mb.player_id, mb.side, mb.amount, mb.placed_at,
@@ -544,6 +534,7 @@ async def get_recent_activity(limit: int = 50) -> list[dict]:
             """,
             (limit,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             rows = await cur.fetchall()
     return [
         {
@@ -561,8 +552,7 @@ async def get_recent_activity(limit: int = 50) -> list[dict]:
 
 async def get_bets_for_market_with_names(market_id: int) -> list[dict]:
     """Return bets for a market with player display names, ordered by placed_at."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with reader() as db:
         async with db.execute(
             """
             SELECT mb.player_id, mb.side, mb.amount, mb.placed_at,
@@ -574,6 +564,7 @@ async def get_bets_for_market_with_names(market_id: int) -> list[dict]:
             """,
             (market_id,),
         ) as cur:
+            cur.row_factory = aiosqlite.Row
             rows = await cur.fetchall()
     return [
         {
@@ -9,9 +9,7 @@ import uuid
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 
-import aiosqlite
-
-from superpal.cards.db import DB_PATH
+from superpal.cards.db import reader, transaction
 
 SESSION_TTL_HOURS = 24
 
@@ -41,13 +39,12 @@ async def create_session(user_id: str, scope: str) -> Session:
     now = datetime.now(timezone.utc)
     created_at = now.isoformat()
     expires_at = (now + timedelta(hours=SESSION_TTL_HOURS)).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         await db.execute(
             "INSERT INTO sessions (token, user_id, scope, created_at, expires_at) "
             "VALUES (?, ?, ?, ?, ?)",
             (token, user_id, scope, created_at, expires_at),
         )
-        await db.commit()
     return Session(
         token=token, user_id=user_id, scope=scope, created_at=created_at, expires_at=expires_at
     )
@@ -57,17 +54,17 @@ async def get_session(token: str) -> Session | None:
     """Look up an active session and extend its expiry (rolling TTL)."""
     now = datetime.now(timezone.utc)
     new_expiry = (now + timedelta(hours=SESSION_TTL_HOURS)).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT token, user_id, scope, created_at, expires_at "
             "FROM sessions WHERE token = ? AND expires_at > ?",
             (token, now.isoformat()),
         ) as cur:
             row = await cur.fetchone()
-        if not row:
-            return None
+    if not row:
+        return None
+    async with transaction() as db:
         await db.execute("UPDATE sessions SET expires_at = ? WHERE token = ?", (new_expiry, token))
-        await db.commit()
     return Session(
         token=row[0], user_id=row[1], scope=row[2], created_at=row[3], expires_at=new_expiry
     )
@@ -76,7 +73,6 @@ async def get_session(token: str) -> Session | None:
 async def delete_expired_sessions() -> int:
     """Delete sessions past their expiry. Returns the number removed."""
     now = datetime.now(timezone.utc).isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with transaction() as db:
         cur = await db.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
-        await db.commit()
         return cur.rowcount
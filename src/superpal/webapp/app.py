@@ -4,14 +4,18 @@ from pathlib import Path
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
-from superpal.cards.db import DB_PATH, init_db
+from superpal.cards.db import DB_PATH, close_pool, init_db
+from superpal.webapp.backplane import backplane
 from superpal.webapp.routes import router
 
 
 @asynccontextmanager
 async def _lifespan(app: FastAPI):
     await init_db()
+    await backplane.start()
     yield
+    await backplane.close()
+    await close_pool()
 
 
 def create_app() -> FastAPI:
@@ -0,0 +1,238 @@
+"""Carries fight state updates between the webapp processes serving the same fights.
+
+Battle sockets are registered in the process that accepted them, so when both players of
+a fight are connected to different webapp workers, the worker that applies an action
+must hand the new state to the other one. Every broadcast goes through the backplane:
+publish() sends a fight's state to every process, including this one, and each process
+delivers it to whichever of that fight's sockets it holds (see routes._deliver_local).
+Each worker diffs states into its own feed for its own sockets, so only whole states
+cross the backplane.
+
+Two implementations, chosen by FIGHT_BACKPLANE:
+
+- "" or "local" (InProcessBackplane): delivery is a function call. This is right for the
+  default deployment, where the bot runs the only webapp worker in its own event loop.
+- "unix:<path>" (UnixSocketBackplane): the workers share a broker on a Unix socket. The
+  first worker to take <path>.lock runs the broker, and every worker connects to it as a
+  peer. The broker relays each newline-delimited JSON frame to every other peer. If the
+  broker's worker exits, the others elect a new one and reconnect. States published
+  while no broker is up reach only the publishing worker; the battle page's poll
+  fallback covers the gap.
+
+The broker queues frames for each peer and sends them from a task of its own, the way
+fanout.Outbox does for sockets: a worker whose queue fills up, or whose connection stops
+draining, is disconnected rather than buffered for without limit. It reconnects, and
+its battle pages catch up by polling.
+"""
+
+import asyncio
+import contextlib
+import fcntl
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+
+from superpal.env import FIGHT_BACKPLANE, log
+
+# handler(fight_id, state, remote): remote is True when another process published it.
+Handler = Callable[[int, dict, bool], None]
+
+RECONNECT_DELAY_SECONDS = 0.5
+# Frames the broker holds for one worker before disconnecting it as too slow.
+PEER_QUEUE_SIZE = 256
+PEER_SEND_TIMEOUT_SECONDS = 5.0
+
+
+class Backplane(ABC):
+    def __init__(self) -> None:
+        self._handlers: list[Handler] = []
+
+    def subscribe(self, handler: Handler) -> None:
+        self._handlers.append(handler)
+
+    def _deliver(self, fight_id: int, state: dict, remote: bool) -> None:
+        for handler in self._handlers:
+            handler(fight_id, state, remote)
+
+    @abstractmethod
+    async def start(self) -> None:
+        """Connect to the other processes; called once the event loop is running."""
+
+    @abstractmethod
+    async def publish(self, fight_id: int, state: dict) -> None:
+        """Deliver state to this process's subscribers and to every other process."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Disconnect, at shutdown."""
+
+
+class InProcessBackplane(Backplane):
+    async def start(self) -> None:
+        pass
+
+    async def publish(self, fight_id: int, state: dict) -> None:
+        self._deliver(fight_id, state, remote=False)
+
+    async def close(self) -> None:
+        pass
+
+
+class UnixSocketBackplane(Backplane):
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+        self.origin = uuid.uuid4().hex
+        self._writer: asyncio.StreamWriter | None = None
+        self._runner: asyncio.Task | None = None
+        self._server: asyncio.Server | None = None
+        self._lock_fd: int | None = None
+        # The broker's connected peers, and the tasks reading frames from each.
+        self._peers: set[_Peer] = set()
+        self._relays: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self._runner = asyncio.create_task(self._run())
+
+    async def publish(self, fight_id: int, state: dict) -> None:
+        self._deliver(fight_id, state, remote=False)
+        if self._writer is None:
+            return
+        frame = json.dumps({"origin": self.origin, "fight_id": fight_id, "state": state})
+        try:
+            self._writer.write(frame.encode() + b"\n")
+            await self._writer.drain()
+        except (ConnectionError, RuntimeError) as e:
+            log.warning(f"Fight backplane publish failed: {e!r}")
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._runner
+            self._runner = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._server is not None:
+            self._server.close()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)
+            self._server = None
+        for peer in list(self._peers):
+            peer.close()
+        # Let each relay task see its connection close, so none is left pending.
+        await asyncio.gather(*self._relays, return_exceptions=True)
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                await self._try_become_broker()
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS if self._server is None else 0)
+                continue
+            try:
+                while line := await reader.readline():
+                    self._receive(line)
+            except ConnectionError:
+                pass
+            self._writer = None
+            log.warning("Fight backplane lost its broker; reconnecting.")
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+
+    def _receive(self, line: bytes) -> None:
+        try:
+            frame = json.loads(line)
+        except json.JSONDecodeError:
+            return
+        if frame.get("origin") != self.origin:
+            self._deliver(frame["fight_id"], frame["state"], remote=True)
+
+    async def _try_become_broker(self) -> None:
+        """Run the broker if no other worker holds the lock for it."""
+        if self._server is not None:
+            return
+        fd = os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return
+        # Holding the lock, any socket file left behind is from a broker that died.
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+        self._server = await asyncio.start_unix_server(self._serve_peer, self.path)
+        self._lock_fd = fd
+        log.info(f"Fight backplane broker listening on {self.path}")
+
+    async def _serve_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        relay = asyncio.current_task()
+        assert relay is not None
+        self._relays.add(relay)
+        peer = _Peer(writer)
+        self._peers.add(peer)
+        try:
+            while line := await reader.readline():
+                for other in list(self._peers):
+                    if other is not peer:
+                        other.offer(line)
+        except ConnectionError:
+            pass
+        finally:
+            self._peers.discard(peer)
+            self._relays.discard(relay)
+            peer.close()
+
+
+class _Peer:
+    """A worker connected to the broker, with a bounded queue of frames to relay to it."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self._queue: asyncio.Queue[bytes] = asyncio.Queue(PEER_QUEUE_SIZE)
+        self._sender = asyncio.create_task(self._send_frames())
+
+    def offer(self, line: bytes) -> None:
+        try:
+            self._queue.put_nowait(line)
+        except asyncio.QueueFull:
+            self.drop("queue full")
+
+    async def _send_frames(self) -> None:
+        while True:
+            line = await self._queue.get()
+            try:
+                self.writer.write(line)
+                await asyncio.wait_for(self.writer.drain(), PEER_SEND_TIMEOUT_SECONDS)
+            except (asyncio.TimeoutError, ConnectionError) as e:
+                self.drop(f"send failed: {e!r}")
+                return
+
+    def drop(self, reason: str) -> None:
+        """Disconnect a worker that fell behind; it reconnects on its own."""
+        if self.writer.is_closing():
+            return
+        log.warning(f"Fight backplane dropping a slow worker ({reason}).")
+        self.close()
+
+    def close(self) -> None:
+        if self._sender is not asyncio.current_task():
+            self._sender.cancel()
+        self.writer.close()
+
+
+def from_config(setting: str) -> Backplane:
+    if setting.startswith("unix:"):
+        return UnixSocketBackplane(setting.removeprefix("unix:"))
+    if setting not in ("", "local"):
+        log.warning(f"Unknown FIGHT_BACKPLANE {setting!r}; using the in-process backplane.")
+    return InProcessBackplane()
+
+
+backplane = from_config(FIGHT_BACKPLANE)
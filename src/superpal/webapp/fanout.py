@@ -0,0 +1,144 @@
+"""Outbound queues for battle WebSocket broadcasts.
+
+The broadcast used to await send_json on one socket after another: the same dict was
+encoded once per socket, and a player on a slow connection held up delivery to everyone
+after them. Now a broadcast encodes its message once and offers the frame to each
+socket's Outbox, which returns straight away. Each Outbox has its own task sending
+frames in order, each with a timeout.
+
+A consumer that falls behind is dropped: its queue filled up, or a send failed or timed
+out. Its socket is closed with 1013 (try again later), and the battle page reconnects and
+resumes from the last state it applied. Every frame's latency, from broadcast to send
+complete, is recorded per recipient and in aggregate.
+"""
+
+import asyncio
+import json
+import time
+from collections.abc import Callable
+
+from fastapi import WebSocket
+
+from superpal.env import log
+
+# Frames a socket may have waiting before it counts as too slow to keep.
+OUTBOX_SIZE = 16
+SEND_TIMEOUT_SECONDS = 5.0
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Closes in flight, held so they aren't garbage collected mid-await.
+_closing: set[asyncio.Task] = set()
+
+
+class LatencyStats:
+    def __init__(self) -> None:
+        self.frames = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        self.frames += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def to_dict(self) -> dict:
+        return {
+            "frames": self.frames,
+            "mean_ms": round(self.total_ms / self.frames, 3) if self.frames else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+_overall = LatencyStats()
+_dropped = 0
+
+
+def encode(message: dict) -> str:
+    """Serialize a message once for every recipient."""
+    return json.dumps(message, separators=(",", ":"))
+
+
+class Outbox:
+    """One socket's queue of encoded frames, drained by its own sender task."""
+
+    def __init__(self, ws: WebSocket, on_drop: Callable[[], None]) -> None:
+        self.ws = ws
+        self.latency = LatencyStats()
+        self.closed = False
+        self._on_drop = on_drop
+        self._queue: asyncio.Queue[tuple[str, float]] = asyncio.Queue(OUTBOX_SIZE)
+        self._sender = asyncio.create_task(self._send_frames())
+
+    def offer(self, frame: str) -> bool:
+        """Queue a frame, dropping the consumer if its queue is already full."""
+        if self.closed:
+            return False
+        try:
+            self._queue.put_nowait((frame, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.drop("outbox full")
+            return False
+        return True
+
+    async def _send_frames(self) -> None:
+        while True:
+            frame, queued_at = await self._queue.get()
+            try:
+                await asyncio.wait_for(self.ws.send_text(frame), SEND_TIMEOUT_SECONDS)
+            except Exception as e:
+                self._queue.task_done()
+                self.drop(f"send failed: {e!r}")
+                return
+            ms = (time.perf_counter() - queued_at) * 1000
+            self.latency.record(ms)
+            _overall.record(ms)
+            self._queue.task_done()
+
+    async def drained(self) -> None:
+        """Wait until every queued frame has been sent (or the consumer dropped)."""
+        await self._queue.join()
+
+    async def flush(self) -> None:
+        """Give queued frames up to one send timeout to go out, before a socket closes."""
+        try:
+            await asyncio.wait_for(self.drained(), SEND_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+    def stop(self) -> None:
+        """Stop sending; the socket is already closing."""
+        self.closed = True
+        if self._sender is not asyncio.current_task():
+            self._sender.cancel()
+
+    def drop(self, reason: str) -> None:
+        """Give up on a consumer that fell behind, and close its socket."""
+        global _dropped
+        if self.closed:
+            return
+        _dropped += 1
+        log.info(f"Dropping slow fight socket ({reason}); it will reconnect and resume.")
+        self.stop()
+        self._on_drop()
+        # Anything still queued will never be sent; release drained() waiters.
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+        task = asyncio.create_task(self._close())
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+
+    async def _close(self) -> None:
+        try:
+            await self.ws.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+
+
+def snapshot(outboxes: dict[str, Outbox]) -> dict:
+    """Delivery latency overall and per live connection, JSON-ready."""
+    return {
+        "overall": _overall.to_dict(),
+        "dropped_consumers": _dropped,
+        "connections": {conn_id: box.latency.to_dict() for conn_id, box in outboxes.items()},
+    }
@@ -0,0 +1,110 @@
+"""Versioned fight states for the battle WebSocket.
+
+Broadcasting the whole get_fight_state dict after every action resends both players, all
+their cards and twenty log entries to change a few hit points. A FightFeed numbers the
+states it publishes instead: each broadcast is a delta carrying its sequence number, the
+`[path, value]` pairs that changed and any new log entries. A client tracks the stream
+and sequence number it last applied. On reconnect it sends them back (as ?stream=&since=)
+and is sent just the deltas it missed, or a full snapshot if the feed has moved to a new
+stream or no longer holds them.
+
+Feeds live as long as a fight has sockets open in this process.
+"""
+
+import uuid
+from collections import deque
+
+# How many deltas a feed keeps for clients catching up after a reconnect.
+HISTORY = 32
+
+
+def _diff(old, new, path: list, changes: list[list]) -> None:
+    if old == new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict) and old.keys() == new.keys():
+        for key in new:
+            _diff(old[key], new[key], [*path, key], changes)
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for i, (a, b) in enumerate(zip(old, new, strict=True)):
+            _diff(a, b, [*path, i], changes)
+    else:
+        changes.append([path, new])
+
+
+def diff_state(old: dict, new: dict) -> list[list] | None:
+    """[path, value] pairs that turn old into new, leaving out the log.
+
+    None if the two don't share a shape (an error dict, say) and need a snapshot instead.
+    """
+    if old.keys() != new.keys():
+        return None
+    changes: list[list] = []
+    for key in new:
+        if key != "log":
+            _diff(old[key], new[key], [key], changes)
+    return changes
+
+
+class FightFeed:
+    def __init__(self) -> None:
+        # Identifies this feed's numbering, so a seq from a feed since dropped (or from
+        # before a restart) is never mistaken for one of ours.
+        self.stream = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self._state: dict | None = None
+        self._history: deque[dict] = deque(maxlen=HISTORY)
+
+    def snapshot(self, state: dict) -> dict:
+        """A full-state message at the current seq, for a client joining afresh.
+
+        Once the feed has published, its own latest state is sent rather than state, which
+        may have been read before that publish: the next delta applies to the feed's state.
+        """
+        if self._state is None:
+            self._state = state
+        return {"type": "state", "stream": self.stream, "seq": self.seq, "data": self._state}
+
+    def publish(self, state: dict) -> dict:
+        """Advance the feed to state; returns the message to broadcast."""
+        changes = diff_state(self._state, state) if self._state is not None else None
+        old_log = self._state.get("log", []) if self._state is not None else []
+        self.seq += 1
+        self._state = state
+        if changes is None:
+            self._history.clear()
+            return self.snapshot(state)
+        seen = {entry["id"] for entry in old_log}
+        log = state.get("log", [])
+        message = {
+            "type": "delta",
+            "stream": self.stream,
+            "seq": self.seq,
+            "changes": changes,
+            "log": [entry for entry in log if entry["id"] not in seen],
+            "log_keep": len(log),
+        }
+        self._history.append(message)
+        return message
+
+    def since(self, stream: str, seq: int) -> list[dict] | None:
+        """The deltas a client at (stream, seq) missed, or None if it needs a snapshot."""
+        if stream != self.stream or not 0 <= seq <= self.seq:
+            return None
+        missed = [m for m in self._history if m["seq"] > seq]
+        if len(missed) != self.seq - seq:
+            return None
+        return missed
+
+
+_feeds: dict[int, FightFeed] = {}
+
+
+def feed_for(fight_id: int) -> FightFeed:
+    feed = _feeds.get(fight_id)
+    if feed is None:
+        feed = _feeds[fight_id] = FightFeed()
+    return feed
+
+
+def drop_feed(fight_id: int) -> None:
+    _feeds.pop(fight_id, None)
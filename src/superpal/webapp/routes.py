@@ -5,15 +5,26 @@ import logging
 import uuid
 from pathlib import Path
 
-import aiosqlite
-from fastapi import APIRouter, File, Form, Request, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi import (
+    APIRouter,
+    Depends,
+    File,
+    Form,
+    Request,
+    UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
+)
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from markupsafe import Markup
 
+import superpal.cards.fight_engine as fight_engine
 import superpal.notify as notify
 import superpal.palymarket.service as palymarket_svc
-from superpal.cards.db import DB_PATH
+from superpal.cards import query_stats
+from superpal.cards.dataloader import DataLoader
+from superpal.cards.db import DB_PATH, reader
 from superpal.cards.fight_service import (
     ATTACKS,
     RARITY_STATS,
@@ -32,7 +43,7 @@ from superpal.cards.fight_service import (
     touch_fight_activity,
     use_fight_token,
 )
-from superpal.cards.models import CardRef
+from superpal.cards.models import RARITY_ORDER, CardExchange, CardRef
 from superpal.cards.pringle_service import (
     ITEM_COSTS,
     ITEM_DESCRIPTIONS,
@@ -44,29 +55,36 @@ from superpal.cards.pringle_service import (
 from superpal.cards.service import (
     accept_offer,
     add_draws,
+    add_draws_to_all,
     add_member,
     award_card,
+    award_card_to_all,
     cancel_listing,
     cancel_offer,
     create_listing,
     create_offer,
     decline_offer,
     get_active_listings,
+    get_active_trader_counts,
     get_all_members_for_admin,
     get_collection,
     get_draw_audit,
     get_fight_opponents,
     get_member_card_context,
     get_member_display_name,
+    get_member_display_names,
     get_my_offers,
     get_player_listings,
     get_pool_stats,
+    member_names,
     reset_draw_log,
-    set_excluded,
     set_forced_rarity,
     set_member_avatar,
     set_member_bio_stats,
+    toggle_excluded,
     trade_in,
+    trade_in_all,
+    upgrade_all,
     use_magic_link,
 )
 from superpal.cards.service import (
@@ -75,20 +93,28 @@ from superpal.cards.service import (
 from superpal.economy import boin_service, exchange_service
 from superpal.sessions import Session
 from superpal.sessions import get_session as get_web_session
+from superpal.webapp import fanout
 from superpal.webapp.auth import (
     SESSION_COOKIE_NAME,
     get_session_from_request,
     set_session_cookie,
 )
+from superpal.webapp.backplane import backplane
+from superpal.webapp.fanout import Outbox, encode
+from superpal.webapp.fight_feed import drop_feed, feed_for
+from superpal.webapp.unit_of_work import UnitOfWork, unit_of_work
 
-# fight_id -> player_id -> connection_id -> WebSocket.
+# fight_id -> player_id -> connection_id -> Outbox (the socket and its send queue).
 # Keyed per connection, not per player: a reconnecting client (or a second tab) briefly
 # holds two sockets, and keying by player alone means the older one's cleanup unhooks the
 # live one — the player then sits on an open socket that never receives another update.
-_fight_connections: dict[int, dict[str, dict[str, WebSocket]]] = {}
+_fight_connections: dict[int, dict[str, dict[str, Outbox]]] = {}
 
 IMAGES_DIR = Path(DB_PATH).parent / "images"
 
+# Listings per marketplace page; further pages are fetched by keyset (?before=<listing id>).
+MARKETPLACE_PAGE_SIZE = 60
+
 TEMPLATES_DIR = Path(__file__).parent / "templates"
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
@@ -122,25 +148,28 @@ router = APIRouter()
 
 
 @router.get("/", response_class=HTMLResponse)
-async def landing(request: Request):
+async def landing(request: Request, uow: UnitOfWork = Depends(unit_of_work)):
     session = await get_session_from_request(request)
     if session is None:
         return templates.TemplateResponse(request, "index.html")
     member = await _member_display(session.user_id)
-    return templates.TemplateResponse(
-        request,
-        "home.html",
-        {
-            **member,
-            "active_page": None,
-        },
+    return uow.finish(
+        templates.TemplateResponse(
+            request,
+            "home.html",
+            {
+                **member,
+                "active_page": None,
+            },
+        )
     )
 
 
-async def _collection_context(user_id: str) -> dict:
+async def _collection_context(user_id: str, names: DataLoader[str, str] | None = None) -> dict:
+    names = names or member_names()
     data = await get_collection(user_id)
     member = await _member_display(user_id)
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute(
             "SELECT COALESCE(SUM(draws_used), 0) FROM draw_log WHERE user_id = ?",
             (user_id,),
@@ -164,15 +193,16 @@ async def _collection_context(user_id: str) -> dict:
 
     fight_opponents = await get_fight_opponents(user_id)
 
+    challenges = await get_pending_challenges(user_id)
+    challenger_names = await names.load_many(c.challenger_id for c in challenges)
     pending_challenges = [
         {
             "id": c.id,
             "mode": c.mode,
             "challenger_id": c.challenger_id,
-            "challenger_display_name": await get_member_display_name(c.challenger_id)
-            or c.challenger_id,
+            "challenger_display_name": name or c.challenger_id,
         }
-        for c in await get_pending_challenges(user_id)
+        for c, name in zip(challenges, challenger_names, strict=True)
     ]
 
     return {
@@ -189,20 +219,29 @@ async def _collection_context(user_id: str) -> dict:
     }
 
 
-async def _marketplace_context(user_id: str) -> dict:
-    listings = await get_active_listings(exclude_owner_id=user_id)
+async def _marketplace_context(
+    user_id: str,
+    *,
+    card_member_id: str | None = None,
+    rarity: str | None = None,
+    before_id: int | None = None,
+) -> dict:
+    # One extra row tells us whether there's a next page without a COUNT(*).
+    listings = await get_active_listings(
+        exclude_owner_id=user_id,
+        card_member_id=card_member_id,
+        rarity=rarity,
+        before_id=before_id,
+        limit=MARKETPLACE_PAGE_SIZE + 1,
+    )
+    next_before_id = None
+    if len(listings) > MARKETPLACE_PAGE_SIZE:
+        listings = listings[:MARKETPLACE_PAGE_SIZE]
+        next_before_id = listings[-1].id
     my_listings = await get_player_listings(user_id)
     my_offers = await get_my_offers(user_id)
     collection = await get_collection(user_id)
-
-    # Aggregate active traders for sidebar
-    trader_counts: dict[str, dict] = {}
-    for listing in listings:
-        oid = listing.owner_id
-        if oid not in trader_counts:
-            trader_counts[oid] = {"display_name": listing.owner_display_name, "count": 0}
-        trader_counts[oid]["count"] += 1
-    active_traders = sorted(trader_counts.values(), key=lambda x: -x["count"])
+    active_traders = await get_active_trader_counts(exclude_owner_id=user_id)
 
     return {
         **(await _member_display(user_id)),
@@ -212,6 +251,16 @@ async def _marketplace_context(user_id: str) -> dict:
         "my_collection": collection["owned"],
         "active_traders": active_traders,
         "pending_offer_count": len(my_offers),
+        "filter_members": sorted(
+            (
+                {c["member_id"]: c["display_name"] for c in collection["owned"]}
+                | {m["discord_id"]: m["display_name"] for m in collection["undiscovered"]}
+            ).items(),
+            key=lambda kv: kv[1].lower(),
+        ),
+        "filter_member_id": card_member_id or "",
+        "filter_rarity": rarity or "",
+        "next_before_id": next_before_id,
     }
 
 
@@ -224,13 +273,24 @@ async def _member_display(user_id: str) -> dict:
 
 
 @router.get("/marketplace", response_class=HTMLResponse)
-async def marketplace_view(request: Request):
+async def marketplace_view(
+    request: Request,
+    member: str | None = None,
+    rarity: str | None = None,
+    before: int | None = None,
+    uow: UnitOfWork = Depends(unit_of_work),
+):
     session = await get_session_from_request(request)
     if session is None:
         return templates.TemplateResponse(request, "expired.html")
-    ctx = await _marketplace_context(session.user_id)
+    ctx = await _marketplace_context(
+        session.user_id,
+        card_member_id=member or None,
+        rarity=rarity if rarity in RARITY_ORDER else None,
+        before_id=before,
+    )
     ctx["active_page"] = "marketplace"
-    return templates.TemplateResponse(request, "marketplace.html", ctx)
+    return uow.finish(templates.TemplateResponse(request, "marketplace.html", ctx))
 
 
 @router.post("/marketplace/listing")
@@ -320,7 +380,7 @@ async def _admin_context() -> dict:
 
 
 async def _expired_command_for_token(token: str) -> str:
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with reader() as db:
         async with db.execute("SELECT link_type FROM magic_links WHERE token = ?", (token,)) as cur:
             row = await cur.fetchone()
     return "/admin-link" if row and row[0] == "admin" else "/my-collection"
@@ -345,13 +405,13 @@ async def magic_link_landing(token: str, request: Request):
 
 
 @router.get("/collection", response_class=HTMLResponse)
-async def collection_view(request: Request):
+async def collection_view(request: Request, uow: UnitOfWork = Depends(unit_of_work)):
     session = await get_session_from_request(request)
     if session is None:
         return templates.TemplateResponse(request, "expired.html")
-    ctx = await _collection_context(session.user_id)
+    ctx = await _collection_context(session.user_id, uow.names)
     ctx["active_page"] = "collection"
-    return templates.TemplateResponse(request, "collection.html", ctx)
+    return uow.finish(templates.TemplateResponse(request, "collection.html", ctx))
 
 
 @router.post("/collection/trade-in", response_class=HTMLResponse)
@@ -377,13 +437,73 @@ async def collection_trade_in(
     )
 
 
+async def _exchange_response(request: Request, title: str, exchange: CardExchange):
+    names = await get_member_display_names(sorted({mid for mid, _ in exchange.received}))
+    rows = sorted(
+        ((names.get(mid, "Unknown"), rarity, n) for (mid, rarity), n in exchange.received.items()),
+        key=lambda r: (-RARITY_ORDER.index(r[1]), r[0].lower()),
+    )
+    received = [{"display_name": name, "rarity": rarity, "quantity": n} for name, rarity, n in rows]
+    return templates.TemplateResponse(
+        request,
+        "exchange_result.html",
+        {"title": title, "summary": exchange.summary(), "received": received},
+    )
+
+
+@router.post("/collection/trade-in-all", response_class=HTMLResponse)
+async def collection_trade_in_all(request: Request):
+    session = await get_session_from_request(request)
+    if session is None:
+        return templates.TemplateResponse(request, "expired.html")
+    exchange = await trade_in_all(session.user_id)
+    if not exchange.received:
+        return RedirectResponse(url="/collection", status_code=303)
+    return await _exchange_response(request, "Trade-in complete", exchange)
+
+
+@router.post("/collection/upgrade-all", response_class=HTMLResponse)
+async def collection_upgrade_all(request: Request):
+    session = await get_session_from_request(request)
+    if session is None:
+        return templates.TemplateResponse(request, "expired.html")
+    exchange = await upgrade_all(session.user_id)
+    if not exchange.received:
+        return RedirectResponse(url="/collection", status_code=303)
+    return await _exchange_response(request, "Upgrade complete", exchange)
+
+
 @router.get("/admin", response_class=HTMLResponse)
-async def admin_view(request: Request):
+async def admin_view(request: Request, uow: UnitOfWork = Depends(unit_of_work)):
     session = await get_session_from_request(request)
     if session is None or not session.is_admin:
         return templates.TemplateResponse(request, "expired.html", {"command": "/admin-link"})
     ctx = await _admin_context()
-    return templates.TemplateResponse(request, "admin.html", ctx)
+    return uow.finish(templates.TemplateResponse(request, "admin.html", ctx))
+
+
+@router.get("/admin/db/queries")
+async def admin_query_stats(request: Request):
+    """Per-statement latency histograms, recent slow queries and full-scan plans."""
+    session = await get_session_from_request(request)
+    if session is None or not session.is_admin:
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    return JSONResponse(query_stats.snapshot())
+
+
+@router.get("/admin/fights/sockets")
+async def admin_fight_socket_stats(request: Request):
+    """Battle broadcast delivery latency, overall and per connected socket."""
+    session = await get_session_from_request(request)
+    if session is None or not session.is_admin:
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    outboxes = {
+        conn_id: outbox
+        for players in _fight_connections.values()
+        for conns in players.values()
+        for conn_id, outbox in conns.items()
+    }
+    return JSONResponse(fanout.snapshot(outboxes))
 
 
 @router.post("/admin/exclude/{member_id}")
@@ -391,10 +511,7 @@ async def toggle_exclude(member_id: str, request: Request):
     session = await get_session_from_request(request)
     if session is None or not session.is_admin:
         return templates.TemplateResponse(request, "expired.html", {"command": "/admin-link"})
-    members = await get_all_members_for_admin()
-    current = next((m for m in members if m["discord_id"] == member_id), None)
-    if current:
-        await set_excluded(member_id, excluded=not current["is_excluded"])
+    await toggle_excluded(member_id)
     return RedirectResponse(url="/admin", status_code=303)
 
 
@@ -478,29 +595,27 @@ async def admin_award_card(
         return templates.TemplateResponse(request, "expired.html", {"command": "/admin-link"})
     quantity = max(1, quantity)
     if owner_id == "everyone":
-        members = await get_all_members_for_admin()
-        for m in members:
-            if not m["is_excluded"]:
-                try:
-                    await award_card(m["discord_id"], card_member_id, rarity, quantity)
-                except aiosqlite.OperationalError:
-                    log.exception("award_card failed for member %s", m["discord_id"])
+        result = await award_card_to_all(card_member_id, rarity, quantity)
+        if result is not None:
+            log.info("Awarded %s %s to everyone: %s", rarity, card_member_id, result.summary())
     else:
         await award_card(owner_id, card_member_id, rarity, quantity)
     return RedirectResponse(url="/admin", status_code=303)
 
 
 @router.get("/admin/audit", response_class=HTMLResponse)
-async def admin_audit(request: Request, user_id: str = ""):
+async def admin_audit(request: Request, user_id: str = "", uow: UnitOfWork = Depends(unit_of_work)):
     session = await get_session_from_request(request)
     if session is None or not session.is_admin:
         return templates.TemplateResponse(request, "expired.html", {"command": "/admin-link"})
     ctx = await _admin_context()
     audit_result = await get_draw_audit(user_id) if user_id else None
-    return templates.TemplateResponse(
-        request,
-        "admin.html",
-        {**ctx, "audit_result": audit_result, "audit_user_id": user_id},
+    return uow.finish(
+        templates.TemplateResponse(
+            request,
+            "admin.html",
+            {**ctx, "audit_result": audit_result, "audit_user_id": user_id},
+        )
     )
 
 
@@ -515,13 +630,8 @@ async def admin_add_draws(
         return templates.TemplateResponse(request, "expired.html", {"command": "/admin-link"})
     quantity = max(1, quantity)
     if user_id == "everyone":
-        members = await get_all_members_for_admin()
-        for m in members:
-            if not m["is_excluded"]:
-                try:
-                    await add_draws(m["discord_id"], quantity)
-                except aiosqlite.OperationalError:
-                    log.exception("add_draws failed for member %s", m["discord_id"])
+        result = await add_draws_to_all(quantity)
+        log.info("Added %d draws for everyone: %s", quantity, result.summary())
     else:
         await add_draws(user_id, quantity)
     return RedirectResponse(url="/admin", status_code=303)
@@ -619,29 +729,31 @@ async def decline_fight_challenge_route(fight_id: int, request: Request):
 
 
 @router.get("/shop", response_class=HTMLResponse)
-async def shop_view(request: Request):
+async def shop_view(request: Request, uow: UnitOfWork = Depends(unit_of_work)):
     session = await get_session_from_request(request)
     if session is None:
         return templates.TemplateResponse(request, "expired.html")
     items_owned = await get_player_items(session.user_id)
-    return templates.TemplateResponse(
-        request,
-        "shop.html",
-        {
-            **(await _member_display(session.user_id)),
-            "balance": await get_balance(session.user_id),
-            "items": [
-                {
-                    "type": item_type,
-                    "name": ITEM_NAMES[item_type],
-                    "cost": cost,
-                    "description": ITEM_DESCRIPTIONS[item_type],
-                    "owned": items_owned.get(item_type, 0),
-                }
-                for item_type, cost in ITEM_COSTS.items()
-            ],
-            "active_page": "shop",
-        },
+    return uow.finish(
+        templates.TemplateResponse(
+            request,
+            "shop.html",
+            {
+                **(await _member_display(session.user_id)),
+                "balance": await get_balance(session.user_id),
+                "items": [
+                    {
+                        "type": item_type,
+                        "name": ITEM_NAMES[item_type],
+                        "cost": cost,
+                        "description": ITEM_DESCRIPTIONS[item_type],
+                        "owned": items_owned.get(item_type, 0),
+                    }
+                    for item_type, cost in ITEM_COSTS.items()
+                ],
+                "active_page": "shop",
+            },
+        )
     )
 
 
@@ -660,19 +772,21 @@ async def shop_buy(request: Request, item_type: str = Form(...)):
 
 
 @router.get("/fights", response_class=HTMLResponse)
-async def fights_view(request: Request):
+async def fights_view(request: Request, uow: UnitOfWork = Depends(unit_of_work)):
     session = await get_session_from_request(request)
     if session is None:
         return templates.TemplateResponse(request, "expired.html")
     fights = await get_player_fights(session.user_id)
-    return templates.TemplateResponse(
-        request,
-        "fights.html",
-        {
-            **(await _member_display(session.user_id)),
-            "fights": fights,
-            "active_page": "fights",
-        },
+    return uow.finish(
+        templates.TemplateResponse(
+            request,
+            "fights.html",
+            {
+                **(await _member_display(session.user_id)),
+                "fights": fights,
+                "active_page": "fights",
+            },
+        )
     )
 
 
@@ -826,8 +940,10 @@ async def fight_battle(fight_id: int, request: Request):
     )
 
 
-def _register_connection(fight_id: int, player_id: str, conn_id: str, ws: WebSocket) -> None:
-    _fight_connections.setdefault(fight_id, {}).setdefault(player_id, {})[conn_id] = ws
+def _register_connection(fight_id: int, player_id: str, conn_id: str, ws: WebSocket) -> Outbox:
+    outbox = Outbox(ws, on_drop=lambda: _drop_connection(fight_id, player_id, conn_id))
+    _fight_connections.setdefault(fight_id, {}).setdefault(player_id, {})[conn_id] = outbox
+    return outbox
 
 
 def _drop_connection(fight_id: int, player_id: str, conn_id: str) -> None:
@@ -838,27 +954,41 @@ def _drop_connection(fight_id: int, player_id: str, conn_id: str) -> None:
     conns = players.get(player_id)
     if conns is None:
         return
-    conns.pop(conn_id, None)
+    outbox = conns.pop(conn_id, None)
+    if outbox is not None:
+        outbox.stop()
     if not conns:
         players.pop(player_id, None)
     if not players:
         _fight_connections.pop(fight_id, None)
+        drop_feed(fight_id)
 
 
-async def _broadcast(fight_id: int, message: dict) -> None:
-    """Send to every live socket for both players. Iterates a snapshot — a disconnect
-    handler may mutate the registry while we are awaiting a send."""
-    players = _fight_connections.get(fight_id, {})
-    targets = [
-        (pid, conn_id, ws)
-        for pid, conns in list(players.items())
-        for conn_id, ws in list(conns.items())
-    ]
-    for pid, conn_id, ws in targets:
-        try:
-            await ws.send_json(message)
-        except Exception:
-            _drop_connection(fight_id, pid, conn_id)
+async def _broadcast(fight_id: int, state: dict) -> None:
+    """Send a fight's new state to its sockets in every webapp process, this one included."""
+    await backplane.publish(fight_id, state)
+
+
+def _deliver_local(fight_id: int, state: dict, remote: bool) -> None:
+    """Queue one encoding of a published state on every socket this process holds for it.
+
+    A state published by another process also means its action was saved there, so this
+    process's in-memory copy of the fight is stale. Doesn't wait for delivery: each
+    socket's Outbox sends on its own, and drops itself from the registry if it falls
+    behind. Iterates a snapshot, since a drop mutates it.
+    """
+    if remote:
+        fight_engine.engine.evict(fight_id)
+    players = _fight_connections.get(fight_id)
+    if not players:
+        return
+    frame = encode(feed_for(fight_id).publish(state))
+    for conns in list(players.values()):
+        for outbox in list(conns.values()):
+            outbox.offer(frame)
+
+
+backplane.subscribe(_deliver_local)
 
 
 @router.websocket("/ws/fight/{fight_id}")
@@ -878,13 +1008,37 @@ async def fight_ws(websocket: WebSocket, fight_id: int):
         return
 
     await websocket.accept()
+    await touch_fight_activity(fight_id)
+    state = await get_fight_state(fight_id)
+
+    # From here to the first reply nothing is awaited, so no broadcast can reach the new
+    # outbox ahead of the snapshot or catch-up deltas it is seeded with.
     conn_id = uuid.uuid4().hex
-    _register_connection(fight_id, player_id, conn_id, websocket)
+    feed = feed_for(fight_id)
+    outbox = _register_connection(fight_id, player_id, conn_id, websocket)
+
+    def reply(message: dict) -> None:
+        # Through the outbox, so replies never race a broadcast on the same socket.
+        outbox.offer(encode(message))
 
     try:
-        await touch_fight_activity(fight_id)
-        state = await get_fight_state(fight_id)
-        await websocket.send_json({"type": "state", "data": state})
+        # A reconnecting client names the last state it applied; send only what it missed.
+        missed = None
+        stream, since = websocket.query_params.get("stream"), websocket.query_params.get("since")
+        if stream and since and since.isdigit():
+            missed = feed.since(stream, int(since))
+        if missed is None:
+            snapshot = feed.snapshot(state)
+            # The feed's state is what its next delta applies to, but its turn clock dates
+            # from the last publish; send the one just read.
+            if "turn_age_seconds" in state:
+                snapshot["data"] = {
+                    **snapshot["data"],
+                    "turn_age_seconds": state["turn_age_seconds"],
+                }
+            reply(snapshot)
+        for message in missed or ():
+            reply(message)
 
         while True:
             data = await websocket.receive_json()
@@ -895,25 +1049,23 @@ async def fight_ws(websocket: WebSocket, fight_id: int):
             # being culled by an idle proxy timeout mid-battle.
             if action == "ping":
                 await touch_fight_activity(fight_id)
-                await websocket.send_json({"type": "pong"})
+                reply({"type": "pong"})
                 continue
 
             if action == "claim_win":
                 ok, err = await forfeit_fight(fight_id, player_id)
                 if not ok:
-                    await websocket.send_json({"type": "error", "message": err})
+                    reply({"type": "error", "message": err})
                     continue
-                await _broadcast(
-                    fight_id, {"type": "state", "data": await get_fight_state(fight_id)}
-                )
+                await _broadcast(fight_id, await get_fight_state(fight_id))
                 break
 
             success, err, new_state = await process_action(fight_id, player_id, action, detail)
             if not success:
-                await websocket.send_json({"type": "error", "message": err})
+                reply({"type": "error", "message": err})
                 continue
 
-            await _broadcast(fight_id, {"type": "state", "data": new_state})
+            await _broadcast(fight_id, new_state)
 
             if new_state.get("status") == "completed":
                 break
@@ -921,6 +1073,7 @@ async def fight_ws(websocket: WebSocket, fight_id: int):
     except WebSocketDisconnect:
         pass
     finally:
+        await outbox.flush()
         _drop_connection(fight_id, player_id, conn_id)
 
 
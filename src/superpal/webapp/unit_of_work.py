@@ -0,0 +1,47 @@
+"""Request-scoped database context for the webapp's page handlers.
+
+A page like /collection calls half a dozen services, each of which borrows its own
+pooled reader, so one render used to see the database at several slightly different
+moments. A handler that depends on unit_of_work instead renders from one snapshot:
+every reader() the services open while it runs shares the request's connection and
+read transaction (see ConnectionPool.snapshot). The statements run are counted, and
+finish() reports the count in an X-DB-Queries response header so tests can pin it.
+Per-row name lookups go through the request's `names` DataLoader.
+"""
+
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+
+import aiosqlite
+from fastapi import Response
+
+from superpal.cards import query_stats
+from superpal.cards.dataloader import DataLoader
+from superpal.cards.db import snapshot
+from superpal.cards.service import member_names
+
+QUERY_COUNT_HEADER = "X-DB-Queries"
+
+
+@dataclass
+class UnitOfWork:
+    db: aiosqlite.Connection
+    queries: query_stats.QueryCount
+    # Display names by discord_id, batched across everything the request renders.
+    names: DataLoader[str, str] = field(default_factory=member_names)
+
+    @property
+    def query_count(self) -> int:
+        return self.queries.statements
+
+    def finish(self, response: Response) -> Response:
+        """Stamp the response with how many statements the request has run."""
+        response.headers[QUERY_COUNT_HEADER] = str(self.query_count)
+        return response
+
+
+async def unit_of_work() -> AsyncIterator[UnitOfWork]:
+    """FastAPI dependency: one read snapshot and query count for the whole request."""
+    with query_stats.counting() as queries:
+        async with snapshot() as db:
+            yield UnitOfWork(db, queries)
@@ -10,14 +10,19 @@ async def db_mods(tmp_path, monkeypatch):
     monkeypatch.setenv("CARDS_DB_PATH", db_file)
 
     import superpal.cards.db as db_mod
+    import superpal.cards.fight_engine as fe_mod
     import superpal.cards.fight_service as fs_mod
+    import superpal.cards.member_directory as md_mod
     import superpal.cards.pringle_service as ps_mod
     import superpal.cards.service as svc_mod
     import superpal.sessions as sessions_mod
 
     importlib.reload(db_mod)
+    importlib.reload(md_mod)
     importlib.reload(sessions_mod)
     importlib.reload(svc_mod)
+    importlib.reload(fe_mod)
     importlib.reload(fs_mod)
     importlib.reload(ps_mod)
-    return db_mod, svc_mod, fs_mod, ps_mod
+    yield db_mod, svc_mod, fs_mod, ps_mod
+    await db_mod.close_pool()
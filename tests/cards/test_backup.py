@@ -0,0 +1,119 @@
+import asyncio
+import importlib
+
+import aiosqlite
+import pytest
+
+
+@pytest.fixture
+async def backup(db_mods):
+    db_mod, *_ = db_mods
+    import superpal.cards.backup as backup_mod
+
+    importlib.reload(backup_mod)
+    await db_mod.init_db()
+    return backup_mod
+
+
+async def _add_members(backup, *names: str) -> None:
+    async with backup.writer() as db:
+        await db.executemany(
+            "INSERT INTO members (discord_id, display_name, synced_at) VALUES (?, ?, 'now')",
+            [(name, name) for name in names],
+        )
+        await db.commit()
+
+
+async def _names(path) -> list[str]:
+    async with aiosqlite.connect(path) as db:
+        async with db.execute("SELECT display_name FROM members ORDER BY display_name") as cur:
+            return [row[0] for row in await cur.fetchall()]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_copies_database_and_reports_size(backup):
+    await _add_members(backup, "A", "B")
+
+    snap = await backup.snapshot()
+
+    assert snap.path.parent == backup.BACKUP_DIR
+    assert snap.size_bytes == snap.path.stat().st_size > 0
+    assert snap.pages > 0
+    assert snap.duration_s >= 0
+    assert await _names(snap.path) == ["A", "B"]
+    assert not list(backup.BACKUP_DIR.glob("*.partial"))
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_consistent_under_concurrent_writes(backup, monkeypatch):
+    monkeypatch.setattr(backup, "BACKUP_STEP_PAGES", 1)
+    async with backup.writer() as db:
+        await db.executemany(
+            "INSERT INTO members (discord_id, display_name, synced_at) VALUES (?, ?, 'now')",
+            [(f"seed{i}", "x" * 500) for i in range(200)],
+        )
+        await db.commit()
+
+    async def keep_writing() -> None:
+        for i in range(50):
+            await _add_members(backup, f"live{i:02d}")
+            await asyncio.sleep(0)
+
+    snap, _ = await asyncio.gather(backup.snapshot(), keep_writing())
+
+    live = [n for n in await _names(snap.path) if n.startswith("live")]
+    # Whatever was committed before the copy's read began, and nothing after.
+    assert live == [f"live{i:02d}" for i in range(len(live))]
+
+
+@pytest.mark.asyncio
+async def test_rotate_keeps_newest_per_label(backup):
+    scheduled = [await backup.snapshot("scheduled") for _ in range(4)]
+    manual = await backup.snapshot("manual")
+
+    deleted = backup.rotate("scheduled", keep=2)
+
+    assert deleted == [s.path for s in scheduled[:2]]
+    assert [s.path for s in backup.list_snapshots("scheduled")] == [s.path for s in scheduled[2:]]
+    assert manual.path.exists()
+
+
+@pytest.mark.asyncio
+async def test_restore_replaces_live_data(backup):
+    await _add_members(backup, "A")
+    snap = await backup.snapshot()
+    await _add_members(backup, "B")
+
+    before = await backup.restore(snap.path)
+
+    async with backup.writer() as db:
+        async with db.execute("SELECT display_name FROM members") as cur:
+            assert [row[0] for row in await cur.fetchall()] == ["A"]
+        async with db.execute("PRAGMA journal_mode") as cur:
+            assert (await cur.fetchone())[0] == "wal"
+    assert before.label == "pre-restore"
+    assert await _names(before.path) == ["A", "B"]
+
+
+@pytest.mark.asyncio
+async def test_restore_rebuilds_in_memory_state(backup, db_mods):
+    _, svc, fs, _ = db_mods
+    fs.fight_deadlines.enable()
+    await _add_members(backup, "A")
+    snap = await backup.snapshot()
+    await _add_members(backup, "B")
+    fight = await fs.create_fight("A", "B", "quick")
+    assert await svc.get_member_display_names(["A", "B"]) == {"A": "A", "B": "B"}
+    assert fs.fight_deadlines.due_at(fight.id) is not None
+
+    await backup.restore(snap.path)
+
+    assert await svc.get_member_display_names(["A", "B"]) == {"A": "A"}
+    assert fs.fight_deadlines.due_at(fight.id) is None
+    assert len(fs.fight_deadlines) == 0
+
+
+@pytest.mark.asyncio
+async def test_restore_missing_snapshot_raises(backup, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        await backup.restore(tmp_path / "nope.db")
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from superpal.cards.dataloader import DataLoader
+
+
+def _recording_loader(values: dict[str, str]):
+    calls: list[list[str]] = []
+
+    async def batch(keys: list[str]) -> dict[str, str]:
+        calls.append(keys)
+        return {k: values[k] for k in keys if k in values}
+
+    return DataLoader(batch), calls
+
+
+@pytest.mark.asyncio
+async def test_loads_in_one_turn_share_one_batch():
+    loader, calls = _recording_loader({"a": "A", "b": "B"})
+
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"))
+
+    assert results == ["A", "B", "A"]
+    assert calls == [["a", "b"]]
+    assert loader.batches == 1
+
+
+@pytest.mark.asyncio
+async def test_results_are_cached_and_missing_keys_are_none():
+    loader, calls = _recording_loader({"a": "A"})
+
+    assert await loader.load_many(["a", "zzz"]) == ["A", None]
+    assert await loader.load("a") == "A"
+    assert calls == [["a", "zzz"]]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_propagates_and_is_retried():
+    attempts = 0
+
+    async def batch(keys: list[str]) -> dict[str, str]:
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise RuntimeError("db down")
+        return {k: k.upper() for k in keys}
+
+    loader = DataLoader(batch)
+
+    with pytest.raises(RuntimeError):
+        await loader.load("a")
+    assert await loader.load("a") == "A"
+    assert loader.batches == 2
+
+
+@pytest.mark.asyncio
+async def test_member_names_batches_one_directory_lookup(db_mods, monkeypatch):
+    db_mod, svc_mod, *_ = db_mods
+    await db_mod.init_db()
+    await svc_mod.sync_members(
+        [
+            {"discord_id": "111", "display_name": "Alice", "avatar_url": None},
+            {"discord_id": "222", "display_name": "Bob", "avatar_url": None},
+        ]
+    )
+    from superpal.cards import query_stats
+    from superpal.cards.member_directory import directory
+
+    await directory.get("111")  # load the directory
+    calls: list[list[str]] = []
+    get_many = directory.get_many
+
+    async def recording_get_many(discord_ids):
+        calls.append(list(discord_ids))
+        return await get_many(discord_ids)
+
+    monkeypatch.setattr(directory, "get_many", recording_get_many)
+    names = svc_mod.member_names()
+
+    with query_stats.counting() as queries:
+        assert await names.load_many(["111", "222", "111"]) == ["Alice", "Bob", "Alice"]
+    assert calls == [["111", "222"]]
+    assert queries.statements == 0
+    assert await names.load("nobody") is None
+    assert names.batches == 2
@@ -1,3 +1,5 @@
+import asyncio
+
 import aiosqlite
 import pytest
 
@@ -29,3 +31,186 @@ async def test_init_db_creates_tables(tmp_db):
 async def test_init_db_is_idempotent(tmp_db):
     await tmp_db.init_db()
     await tmp_db.init_db()  # second call must not raise
+
+
+@pytest.mark.asyncio
+async def test_pool_reader_is_read_only(tmp_db):
+    await tmp_db.init_db()
+    async with tmp_db.reader() as db:
+        with pytest.raises(aiosqlite.OperationalError):
+            await db.execute("DELETE FROM members")
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_connections(tmp_db):
+    await tmp_db.init_db()
+    async with tmp_db.reader() as first:
+        pass
+    async with tmp_db.reader() as second:
+        pass
+    async with tmp_db.writer() as w1:
+        pass
+    async with tmp_db.writer() as w2:
+        pass
+    assert first is second
+    assert w1 is w2
+
+
+@pytest.mark.asyncio
+async def test_pool_writer_rolls_back_abandoned_transaction(tmp_db):
+    await tmp_db.init_db()
+    async with tmp_db.writer() as db:
+        await db.execute("BEGIN EXCLUSIVE")
+        await db.execute(
+            "INSERT INTO members (discord_id, display_name, synced_at) VALUES ('1', 'A', 'now')"
+        )
+        # no commit — the next borrower must not inherit this transaction
+    async with tmp_db.writer() as db:
+        assert not db.in_transaction
+    async with tmp_db.reader() as db:
+        async with db.execute("SELECT COUNT(*) FROM members") as cur:
+            row = await cur.fetchone()
+    assert row[0] == 0
+
+
+@pytest.mark.asyncio
+async def test_close_pool_reopens_on_next_use(tmp_db):
+    await tmp_db.init_db()
+    await tmp_db.close_pool()
+    async with tmp_db.reader() as db:
+        async with db.execute("SELECT 1") as cur:
+            assert (await cur.fetchone())[0] == 1
+
+
+@pytest.mark.asyncio
+async def test_init_db_records_schema_version(tmp_db):
+    applied = await tmp_db.init_db()
+    assert list(applied) == [m.name for m in tmp_db.MIGRATIONS]
+    async with aiosqlite.connect(tmp_db.DB_PATH) as db:
+        async with db.execute("SELECT MAX(version) FROM schema_version") as cur:
+            row = await cur.fetchone()
+    assert row is not None
+    assert row[0] == tmp_db.MIGRATIONS[-1].version
+
+
+@pytest.mark.asyncio
+async def test_init_db_skips_when_current(tmp_db):
+    await tmp_db.init_db()
+    assert await tmp_db.init_db() == {}
+
+
+@pytest.mark.asyncio
+async def test_init_db_upgrades_legacy_database(tmp_db):
+    """A database from before schema_version, missing later columns, is brought current."""
+    async with aiosqlite.connect(tmp_db.DB_PATH) as db:
+        await db.execute(
+            "CREATE TABLE members (discord_id TEXT PRIMARY KEY, display_name TEXT NOT NULL, "
+            "avatar_url TEXT, is_excluded BOOLEAN NOT NULL DEFAULT 0, "
+            "synced_at TIMESTAMP NOT NULL, bio TEXT)"
+        )
+        await db.execute(
+            "INSERT INTO members (discord_id, display_name, synced_at) VALUES ('1', 'A', 'now')"
+        )
+        await db.execute("CREATE TABLE pending_trades (id INTEGER PRIMARY KEY)")
+        await db.commit()
+    await tmp_db.init_db()
+    async with aiosqlite.connect(tmp_db.DB_PATH) as db:
+        async with db.execute("PRAGMA table_info(members)") as cur:
+            columns = {row[1] for row in await cur.fetchall()}
+        async with db.execute("SELECT name FROM sqlite_master WHERE type='table'") as cur:
+            tables = {row[0] for row in await cur.fetchall()}
+        async with db.execute("SELECT display_name FROM members") as cur:
+            names = [row[0] for row in await cur.fetchall()]
+    assert {"bio", "boin_balance", "forced_rarity", "is_synthetic"} <= columns
+    assert "pending_trades" not in tables
+    assert names == ["A"]
+
+
+def test_migration_versions_must_be_sequential(tmp_db):
+    with pytest.raises(ValueError):
+        tmp_db.migration(len(tmp_db.MIGRATIONS) + 2, "gap")(None)
+
+
+async def _member_names(db_mod) -> list[str]:
+    async with db_mod.reader() as db:
+        async with db.execute("SELECT display_name FROM members ORDER BY display_name") as cur:
+            return [row[0] for row in await cur.fetchall()]
+
+
+async def _insert_member(db, name: str) -> None:
+    await db.execute(
+        "INSERT INTO members (discord_id, display_name, synced_at) VALUES (?, ?, 'now')",
+        (name, name),
+    )
+
+
+@pytest.mark.asyncio
+async def test_transaction_groups_concurrent_units_into_shared_commits(tmp_db):
+    await tmp_db.init_db()
+
+    async def unit(name: str) -> str:
+        async with tmp_db.transaction() as db:
+            await _insert_member(db, name)
+        return name
+
+    names = [f"m{i:02d}" for i in range(20)]
+    assert await asyncio.gather(*(unit(n) for n in names)) == names
+    pool = tmp_db.get_pool()
+    assert pool.units_committed == 20
+    assert pool.commits < 20
+    assert await _member_names(tmp_db) == names
+
+
+@pytest.mark.asyncio
+async def test_transaction_failure_only_rolls_back_its_own_unit(tmp_db):
+    await tmp_db.init_db()
+
+    async def ok(name: str) -> None:
+        async with tmp_db.transaction() as db:
+            await _insert_member(db, name)
+
+    async def boom() -> None:
+        async with tmp_db.transaction() as db:
+            await _insert_member(db, "doomed")
+            raise RuntimeError("boom")
+
+    results = await asyncio.gather(ok("a"), boom(), ok("b"), return_exceptions=True)
+    assert results[0] is None
+    assert isinstance(results[1], RuntimeError)
+    assert results[2] is None
+    assert await _member_names(tmp_db) == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_nested_transaction_joins_outer(tmp_db):
+    await tmp_db.init_db()
+    async with tmp_db.transaction() as outer:
+        await _insert_member(outer, "outer")
+        with pytest.raises(RuntimeError):
+            async with tmp_db.transaction() as inner:
+                assert inner is outer
+                await _insert_member(inner, "inner")
+                raise RuntimeError
+    assert await _member_names(tmp_db) == ["outer"]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_shares_one_connection_and_view(tmp_db):
+    await tmp_db.init_db()
+    from superpal.cards import query_stats
+
+    async with tmp_db.transaction() as db:
+        await _insert_member(db, "before")
+    assert await _member_names(tmp_db) == ["before"]  # opens the reader outside the count
+    with query_stats.counting() as queries:
+        async with tmp_db.snapshot() as snap:
+            async with tmp_db.transaction() as db:
+                await _insert_member(db, "during")
+            async with tmp_db.reader() as db:
+                assert db is snap
+                async with db.execute("SELECT display_name FROM members") as cur:
+                    assert [r[0] for r in await cur.fetchall()] == ["before"]
+            async with tmp_db.snapshot() as nested:
+                assert nested is snap
+    assert queries.statements == 4  # BEGIN, the snapshot's first read, the insert, the select
+    assert await _member_names(tmp_db) == ["before", "during"]
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+from superpal.cards.deadlines import DeadlineScheduler
+
+
+async def _noop(key):
+    pass
+
+
+def _scheduler(on_due=_noop) -> DeadlineScheduler:
+    sched = DeadlineScheduler(on_due)
+    sched.enable()
+    return sched
+
+
+def test_pop_due_fires_in_deadline_order():
+    sched = _scheduler()
+    sched.schedule("b", 20.0)
+    sched.schedule("a", 10.0)
+    sched.schedule("c", 30.0)
+
+    assert sched.pop_due(25.0) == ["a", "b"]
+    assert len(sched) == 1
+
+
+def test_postponed_deadline_requeues_without_firing_early():
+    sched = _scheduler()
+    sched.schedule("a", 10.0)
+    sched.schedule("a", 50.0)
+
+    assert sched.pop_due(20.0) == []
+    assert sched.due_at("a") == 50.0
+    assert sched.pop_due(50.0) == ["a"]
+
+
+def test_brought_forward_deadline_fires_once():
+    sched = _scheduler()
+    sched.schedule("a", 50.0)
+    sched.schedule("a", 10.0)
+
+    assert sched.pop_due(10.0) == ["a"]
+    assert sched.pop_due(60.0) == []
+
+
+def test_cancelled_deadline_never_fires():
+    sched = _scheduler()
+    sched.schedule("a", 10.0)
+    sched.cancel("a")
+
+    assert sched.pop_due(20.0) == []
+
+
+@pytest.mark.asyncio
+async def test_run_fires_when_due_and_wakes_for_an_earlier_deadline():
+    fired: list[tuple[str, float]] = []
+
+    async def on_due(key):
+        fired.append((key, time.time()))
+
+    sched = _scheduler(on_due)
+    sched.schedule("late", time.time() + 60)
+    runner = asyncio.create_task(sched.run())
+    try:
+        await asyncio.sleep(0.01)
+        due = time.time() + 0.05
+        sched.schedule("soon", due)
+        async with asyncio.timeout(2):
+            while not fired:
+                await asyncio.sleep(0.01)
+    finally:
+        runner.cancel()
+
+    ((key, at),) = fired
+    assert key == "soon"
+    assert due <= at < due + 0.5
+    assert sched.due_at("late") is not None
+
+
+def test_a_scheduler_that_is_not_enabled_holds_nothing():
+    sched = DeadlineScheduler(_noop)
+    sched.schedule("a", 10.0)
+
+    assert len(sched) == 0
+    assert sched.pop_due(20.0) == []
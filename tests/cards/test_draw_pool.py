@@ -0,0 +1,79 @@
+import random
+from collections import Counter
+
+import aiosqlite
+import pytest
+
+from superpal.cards.draw_pool import AliasSampler
+
+
+@pytest.fixture
+async def db(db_mods):
+    db_mod, svc_mod, *_ = db_mods
+    await db_mod.init_db()
+    await svc_mod.sync_members(
+        [
+            {"discord_id": "111", "display_name": "Alice", "avatar_url": None},
+            {"discord_id": "222", "display_name": "Bob", "avatar_url": None},
+        ]
+    )
+    return db_mod, svc_mod
+
+
+def test_alias_sampler_matches_weights():
+    weights = {"common": 60, "uncommon": 25, "rare": 12, "legendary": 3}
+    sampler = AliasSampler(weights)
+    random.seed(1)
+    n = 100_000
+    counts = Counter(sampler.sample() for _ in range(n))
+    for outcome, weight in weights.items():
+        assert abs(counts[outcome] / n - weight / 100) < 0.01
+
+
+def test_alias_sampler_single_outcome():
+    assert AliasSampler({"only": 1}).sample() == "only"
+
+
+@pytest.mark.asyncio
+async def test_pool_honours_forced_rarity(db):
+    _db_mod, svc = db
+    await svc.set_forced_rarity("222", "legendary")
+    pool = svc._eligible_pool
+    assert {await pool.pick("common") for _ in range(20)} == {"111"}
+    assert {await pool.pick("legendary") for _ in range(40)} == {"111", "222"}
+
+
+@pytest.mark.asyncio
+async def test_pool_rebuilds_after_exclusion(db):
+    _db_mod, svc = db
+    await svc._eligible_pool.refresh()
+    await svc.set_excluded("111", excluded=True)
+    await svc.set_excluded("222", excluded=True)
+    assert await svc._eligible_pool.pick("common") is None
+    assert await svc.draw_card(owner_id="111", max_draws=5) is None
+
+
+@pytest.mark.asyncio
+async def test_pool_sees_changes_from_other_connections(db):
+    db_mod, svc = db
+    await svc._eligible_pool.refresh()
+    async with aiosqlite.connect(db_mod.DB_PATH) as conn:
+        await conn.execute("UPDATE members SET is_excluded = 1 WHERE discord_id = '111'")
+        await conn.commit()
+    assert {await svc._eligible_pool.pick("rare") for _ in range(20)} == {"222"}
+
+
+@pytest.mark.asyncio
+async def test_pool_token_unchanged_by_profile_sync(db):
+    _db_mod, svc = db
+    pool = svc._eligible_pool
+    await pool.refresh()
+    token = pool._token
+    await svc.sync_members(
+        [{"discord_id": "111", "display_name": "Alice Renamed", "avatar_url": "http://a/b.png"}]
+    )
+    await pool.refresh()
+    assert pool._token == token
+    await svc.add_member("333", "Synthetic")
+    await pool.refresh()
+    assert pool._token != token
@@ -1,6 +1,10 @@
 import discord
 
-from superpal.cards.embeds import build_card_embed
+from superpal.cards.embeds import (
+    build_card_embed,
+    build_draw_summary_embed,
+    build_exchange_embed,
+)
 from superpal.cards.models import RARITY_COLORS
 
 
@@ -88,3 +92,36 @@ def test_build_card_embed_default_action_label():
     )
     assert embed.footer.text is not None
     assert "drawn by Alice" in embed.footer.text
+
+
+def test_build_draw_summary_embed_ranks_and_merges():
+    embed = build_draw_summary_embed(
+        drawn_by="SomeUser",
+        draws=[
+            ("Bingus", "common", 3),
+            ("Dingus", "legendary", 9),
+            ("Bingus", "common", 3),
+        ],
+    )
+    assert embed.title == "SomeUser drew 3 cards"
+    assert embed.color is not None
+    assert embed.color.value == RARITY_COLORS["legendary"]
+    assert embed.description is not None
+    lines = embed.description.splitlines()
+    assert lines[0].startswith("**LEGENDARY** · Dingus")
+    assert lines[1] == "**COMMON** · Bingus · #3 ×2"
+
+
+def test_build_exchange_embed_lists_rarest_first():
+    embed = build_exchange_embed(
+        title="Upgrade complete",
+        summary="Spent 30 cards (30 common) for 6 (5 uncommon, 1 rare).",
+        received=[("Bingus", "uncommon", 5), ("Dingus", "rare", 1)],
+    )
+    assert embed.title == "Upgrade complete"
+    assert embed.color is not None
+    assert embed.color.value == RARITY_COLORS["rare"]
+    assert embed.description is not None
+    lines = embed.description.splitlines()
+    assert lines[0].startswith("Spent 30 cards")
+    assert lines[2:] == ["**RARE** · Dingus", "**UNCOMMON** · Bingus ×5"]
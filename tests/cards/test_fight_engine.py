@@ -0,0 +1,185 @@
+import asyncio
+from unittest.mock import patch
+
+import aiosqlite
+import pytest
+
+from superpal.cards import query_stats
+
+
+@pytest.fixture
+async def live(db_mods):
+    """An active quick fight between p1 and p2, each holding one heal potion."""
+    db_mod, svc_mod, fs_mod, ps_mod = db_mods
+    await db_mod.init_db()
+    await svc_mod.sync_members(
+        [
+            {"discord_id": "p1", "display_name": "Alice", "avatar_url": None},
+            {"discord_id": "p2", "display_name": "Bob", "avatar_url": None},
+        ]
+    )
+    await svc_mod.award_card("p1", "p2", "common", 1)
+    await svc_mod.award_card("p2", "p1", "common", 1)
+    async with aiosqlite.connect(db_mod.DB_PATH) as conn:
+        await conn.executemany(
+            "INSERT INTO player_items (player_id, item_type, quantity) "
+            "VALUES (?, 'heal_potion', 1)",
+            [("p1",), ("p2",)],
+        )
+        await conn.commit()
+    fight = await fs_mod.create_fight("p1", "p2", "quick")
+    await fs_mod.accept_fight(fight.id)
+    for pid, mid in (("p1", "p2"), ("p2", "p1")):
+        await fs_mod.set_fight_cards(
+            fight.id, pid, [{"card_member_id": mid, "rarity": "common", "slot": 1}]
+        )
+        await fs_mod.mark_player_ready(fight.id, pid)
+    fight = await fs_mod.get_fight(fight.id)
+    return db_mod, fs_mod, ps_mod, fight
+
+
+async def _attack(fs, fight_id: int, player_id: str, roll: int = 20):
+    with patch("superpal.cards.fight_service.roll_d20", return_value=roll):
+        return await fs.process_action(fight_id, player_id, "attack", {"attack_key": "vibe_check"})
+
+
+def _without_clock(state: dict) -> dict:
+    return {k: v for k, v in state.items() if k != "turn_age_seconds"}
+
+
+@pytest.mark.asyncio
+async def test_action_is_one_transaction_and_state_needs_no_reads(live):
+    db_mod, fs, _ps, fight = live
+    await fs.get_fight_state(fight.id)
+    commits = db_mod.get_pool().commits
+
+    with query_stats.counting() as queries:
+        ok, err, state = await _attack(fs, fight.id, fight.current_turn_player_id)
+
+    assert (ok, err) == (True, "")
+    assert db_mod.get_pool().commits == commits + 1
+    # The fights UPDATE, the defender's fight_cards row, and the log INSERT.
+    assert queries.statements == 3
+    assert state["log"][-1]["id"] is not None
+
+
+@pytest.mark.asyncio
+async def test_state_rebuilt_from_the_database_matches_memory(live):
+    _db_mod, fs, _ps, fight = live
+    attacker = fight.current_turn_player_id
+    defender = "p2" if attacker == "p1" else "p1"
+    await _attack(fs, fight.id, attacker)
+    _ok, _err, in_memory = await fs.process_action(
+        fight.id, defender, "item", {"item_type": "heal_potion"}
+    )
+
+    fs.engine.clear()  # as after a restart
+    rebuilt = await fs.get_fight_state(fight.id)
+
+    assert _without_clock(rebuilt) == _without_clock(in_memory)
+    side = "challenger" if defender == "p1" else "opponent"
+    assert rebuilt[side]["items"] == {}
+    assert rebuilt[side]["cards"][0]["hp_current"] == 80
+
+
+@pytest.mark.asyncio
+async def test_rejected_action_changes_nothing(live):
+    _db_mod, fs, _ps, fight = live
+    player = fight.current_turn_player_id
+    before = await fs.get_fight_state(fight.id)
+
+    ok, err, _state = await fs.process_action(
+        fight.id, player, "item", {"item_type": "smoke_screen"}
+    )
+
+    assert (ok, err) == (False, "no_item")
+    assert _without_clock(await fs.get_fight_state(fight.id)) == _without_clock(before)
+
+
+@pytest.mark.asyncio
+async def test_items_bought_mid_fight_are_usable(live):
+    db_mod, fs, ps, fight = live
+    player = fight.current_turn_player_id
+    await fs.get_fight_state(fight.id)
+    async with aiosqlite.connect(db_mod.DB_PATH) as conn:
+        await conn.execute(
+            "UPDATE members SET pringle_balance = 500 WHERE discord_id = ?", (player,)
+        )
+        await conn.commit()
+
+    assert await ps.buy_item(player, "smoke_screen") == (True, "")
+    ok, err, state = await fs.process_action(
+        fight.id, player, "item", {"item_type": "smoke_screen"}
+    )
+
+    assert (ok, err) == (True, "")
+    side = "challenger" if player == "p1" else "opponent"
+    assert state[side]["items"] == {"heal_potion": 1}
+
+
+@pytest.mark.asyncio
+async def test_fight_finished_elsewhere_rejects_the_next_action(live):
+    db_mod, fs, _ps, fight = live
+    await fs.get_fight_state(fight.id)
+    async with aiosqlite.connect(db_mod.DB_PATH) as conn:
+        await conn.execute("UPDATE fights SET status = 'expired' WHERE id = ?", (fight.id,))
+        await conn.commit()
+
+    ok, err, _state = await _attack(fs, fight.id, fight.current_turn_player_id)
+
+    assert (ok, err) == (False, "fight_not_active")
+    assert (await fs.get_fight_state(fight.id))["status"] == "expired"
+
+
+@pytest.mark.asyncio
+async def test_action_saved_by_another_process_rejects_a_stale_copy(live):
+    _db_mod, fs, _ps, fight = live
+    player = fight.current_turn_player_id
+    other_process = type(fs.engine)()
+    await other_process.get(fight.id)
+
+    ok, _err, state = await _attack(fs, fight.id, player)
+    assert ok
+    with (
+        patch("superpal.cards.fight_service.roll_d20", return_value=20),
+        pytest.raises(ValueError, match="fight_changed"),
+    ):
+        await other_process.run(
+            fight.id,
+            lambda f: fs._apply_action(f, player, "attack", {"attack_key": "vibe_check"}),
+        )
+
+    # Evicted, so its next look at the fight is the saved one.
+    reloaded = await other_process.get(fight.id)
+    assert reloaded.current_turn_player_id == state["current_turn_player_id"]
+
+
+@pytest.mark.asyncio
+async def test_actions_wait_for_their_own_fight_only(live):
+    _db_mod, fs, _ps, fight = live
+    player = fight.current_turn_player_id
+
+    async with fs.engine.exclusive(fight.id):
+        action = asyncio.create_task(_attack(fs, fight.id, player))
+        async with asyncio.timeout(1):
+            async with fs.engine.exclusive(fight.id + 1):
+                pass  # another fight's lock is free
+        await asyncio.sleep(0.05)
+        assert not action.done()
+
+    ok, _err, _state = await action
+    assert ok
+    assert fs.engine._locks == {}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_actions_on_one_fight_apply_in_arrival_order(live):
+    _db_mod, fs, _ps, fight = live
+    player = fight.current_turn_player_id
+
+    first, second = await asyncio.gather(
+        _attack(fs, fight.id, player), _attack(fs, fight.id, player)
+    )
+
+    assert first[:2] == (True, "")
+    assert second[:2] == (False, "not_your_turn")
@@ -426,6 +426,7 @@ async def test_fight_leaderboard_wins(db):
         await _insert_completed_fight(conn, "p1", "p2", "p1", now)
         await _insert_completed_fight(conn, "p2", "p1", "p2", now)
         await conn.commit()
+    await fs_mod.backfill_fight_stats()
 
     rows = await fs_mod.get_fight_leaderboard("wins")
     assert rows[0]["discord_id"] == "p1"
@@ -453,6 +454,7 @@ async def test_fight_leaderboard_fights_played(db):
         await _insert_completed_fight(conn, "p2", "p1", "p1", now)
         await _insert_completed_fight(conn, "p1", "p2", "p1", now)
         await conn.commit()
+    await fs_mod.backfill_fight_stats()
 
     rows = await fs_mod.get_fight_leaderboard("fights_played")
     totals = {r["discord_id"]: r["total"] for r in rows}
@@ -480,6 +482,7 @@ async def test_fight_leaderboard_win_rate_minimum_threshold(db):
         await _insert_completed_fight(conn, "p1", "p3", "p1", now)
         await _insert_completed_fight(conn, "p3", "p2", "p3", now)
         await conn.commit()
+    await fs_mod.backfill_fight_stats()
 
     rows = await fs_mod.get_fight_leaderboard("win_rate")
     discord_ids = [r["discord_id"] for r in rows]
@@ -524,6 +527,7 @@ async def test_fight_leaderboard_escapes(db):
                 (fid, actor),
             )
         await conn.commit()
+    await fs_mod.backfill_fight_stats()
 
     rows = await fs_mod.get_fight_leaderboard("escapes")
     assert rows[0]["discord_id"] == "p1"
@@ -545,6 +549,7 @@ async def test_fight_leaderboard_excludes_excluded_members(db):
         await conn.execute("UPDATE members SET is_excluded = 1 WHERE discord_id = 'p1'")
         await conn.execute("UPDATE members SET pringle_balance = 500 WHERE discord_id = 'p1'")
         await conn.commit()
+    await fs_mod.backfill_fight_stats()
 
     wins = await fs_mod.get_fight_leaderboard("wins")
     assert all(r["discord_id"] != "p1" for r in wins), "excluded member appeared in wins"
@@ -866,6 +871,39 @@ async def test_forfeit_awards_win_and_pringles(db):
     assert await fs.fight_ended_by_forfeit(fight.id) is True
 
 
+async def _fight_stats(db_mod) -> dict[str, tuple]:
+    async with db_mod.reader() as conn:
+        async with conn.execute(
+            "SELECT player_id, wins, losses, fights_played, escapes, forfeits FROM fight_stats"
+        ) as cur:
+            return {r[0]: tuple(r[1:]) for r in await cur.fetchall()}
+
+
+@pytest.mark.asyncio
+async def test_fight_stats_follow_finished_fights_and_match_backfill(db):
+    db_mod, _, fs, _ = db
+    escape = await _setup_active_fight(fs, mode="extended")
+    runner = escape.current_turn_player_id
+    with patch("superpal.cards.fight_service.roll_d20", return_value=16):
+        await fs.process_action(escape.id, runner, "run", {})
+    forfeit = await _setup_active_fight(fs)
+    afk = forfeit.current_turn_player_id
+    await _set_turn_age(db_mod, forfeit.id, fs.AFK_CLAIM_MINUTES + 1)
+    await fs.forfeit_fight(forfeit.id, "p2" if afk == "p1" else "p1")
+    incremental = await _fight_stats(db_mod)
+
+    await fs.backfill_fight_stats()
+
+    assert incremental == await _fight_stats(db_mod)
+    (other,) = {"p1", "p2"} - {runner}
+    if afk == runner:
+        assert incremental[runner] == (0, 2, 2, 1, 1)
+        assert incremental[other] == (2, 0, 2, 0, 0)
+    else:
+        assert incremental[runner] == (1, 1, 2, 1, 0)
+        assert incremental[other] == (1, 1, 2, 0, 1)
+
+
 @pytest.mark.asyncio
 async def test_auto_forfeit_resolves_only_long_abandoned_fights(db):
     db_mod, _, fs, _ = db
@@ -950,3 +988,117 @@ async def test_knockout_also_announces_through_the_service(db):
 
     assert (await fs.get_fight(fight.id)).status == "completed"
     announce.assert_awaited_once_with(fight.id)
+
+
+# ─── Fight deadline tests ────────────────────────────────────────────────────
+
+
+@pytest.fixture
+def scheduled(db):
+    """db, in the process that runs the deadline scheduler."""
+    db[2].fight_deadlines.enable()
+    return db
+
+
+def _due(fs, fight_id):
+    at = fs.fight_deadlines.due_at(fight_id)
+    return datetime.fromtimestamp(at, timezone.utc) if at is not None else None
+
+
+@pytest.mark.asyncio
+async def test_each_phase_schedules_its_own_deadline(scheduled):
+    _, _, fs, _ = scheduled
+    fight = await fs.create_fight("p1", "p2", "quick")
+    assert _due(fs, fight.id) == datetime.fromisoformat(fight.expires_at)
+
+    lobby = await fs.accept_fight(fight.id)
+    watched = datetime.fromisoformat(lobby.last_activity_at)
+    assert _due(fs, fight.id) == watched + timedelta(minutes=fs.INACTIVITY_EXPIRE_MINUTES)
+
+    active = await _setup_active_fight(fs)
+    started = datetime.fromisoformat((await fs.get_fight(active.id)).turn_started_at)
+    assert _due(fs, active.id) == started + timedelta(minutes=fs.AFK_AUTO_FORFEIT_MINUTES)
+
+    declined = await fs.create_fight("p1", "p2", "quick")
+    await fs.decline_fight(declined.id)
+    assert _due(fs, declined.id) is None
+
+
+@pytest.mark.asyncio
+async def test_taking_a_turn_pushes_the_afk_deadline_back(scheduled):
+    db_mod, _, fs, _ = scheduled
+    fight = await _setup_active_fight(fs)
+    await _set_turn_age(db_mod, fight.id, 10)
+    fs.engine.clear()
+    player = (await fs.get_fight(fight.id)).current_turn_player_id
+
+    with patch("superpal.cards.fight_service.roll_d20", return_value=1):
+        ok, _err, _state = await fs.process_action(
+            fight.id, player, "attack", {"attack_key": "vibe_check"}
+        )
+
+    assert ok
+    started = datetime.fromisoformat((await fs.get_fight(fight.id)).turn_started_at)
+    assert _due(fs, fight.id) == started + timedelta(minutes=fs.AFK_AUTO_FORFEIT_MINUTES)
+
+
+@pytest.mark.asyncio
+async def test_due_lobby_expires_but_a_watched_one_is_rescheduled(scheduled):
+    db_mod, _, fs, _ = scheduled
+    abandoned = await fs.create_fight("p1", "p2", "quick")
+    await fs.accept_fight(abandoned.id)
+    await _set_last_activity(db_mod, abandoned.id, fs.INACTIVITY_EXPIRE_MINUTES + 1)
+    watched = await fs.create_fight("p1", "p2", "quick")
+    await fs.accept_fight(watched.id)
+    await fs.touch_fight_activity(watched.id)
+
+    assert await fs.resolve_fight_deadline(abandoned.id)
+    assert not await fs.resolve_fight_deadline(watched.id)
+
+    assert (await fs.get_fight(abandoned.id)).status == "expired"
+    assert (await fs.get_fight(watched.id)).status == "lobby"
+    last_seen = datetime.fromisoformat((await fs.get_fight(watched.id)).last_activity_at)
+    assert _due(fs, watched.id) == last_seen + timedelta(minutes=fs.INACTIVITY_EXPIRE_MINUTES)
+
+
+@pytest.mark.asyncio
+async def test_due_afk_deadline_forfeits_the_idle_player(scheduled):
+    db_mod, _, fs, _ = scheduled
+    fight = await _setup_active_fight(fs)
+    await _set_turn_age(db_mod, fight.id, fs.AFK_AUTO_FORFEIT_MINUTES)
+
+    assert await fs.resolve_fight_deadline(fight.id)
+
+    done = await fs.get_fight(fight.id)
+    assert done.status == "completed"
+    assert done.winner_id != done.current_turn_player_id
+    assert _due(fs, fight.id) is None
+
+
+@pytest.mark.asyncio
+async def test_seeding_sweeps_overdue_fights_and_schedules_the_rest(scheduled):
+    db_mod, _, fs, _ = scheduled
+    overdue = await fs.create_fight("p1", "p2", "quick")
+    await _set_expires_at(db_mod, overdue.id, -1)
+    live = await _setup_active_fight(fs)
+    fs.fight_deadlines.cancel(overdue.id)
+    fs.fight_deadlines.cancel(live.id)  # as after a restart
+
+    assert await fs.reconcile_fight_deadlines() == 1
+
+    assert (await fs.get_fight(overdue.id)).status == "expired"
+    assert _due(fs, live.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_reconciling_picks_up_fights_started_in_another_process(scheduled):
+    _, _, fs, _ = scheduled
+    fs.fight_deadlines.enabled = False  # a webapp worker, which holds no deadlines
+    fight = await _setup_active_fight(fs)
+    fs.fight_deadlines.enable()
+    assert _due(fs, fight.id) is None
+
+    await fs.reconcile_fight_deadlines()
+
+    started = datetime.fromisoformat((await fs.get_fight(fight.id)).turn_started_at)
+    assert _due(fs, fight.id) == started + timedelta(minutes=fs.AFK_AUTO_FORFEIT_MINUTES)
@@ -0,0 +1,101 @@
+import json
+
+import aiosqlite
+import pytest
+
+from superpal.cards import query_stats
+
+
+@pytest.fixture
+async def db(db_mods):
+    db_mod, svc_mod, *_ = db_mods
+    await db_mod.init_db()
+    await svc_mod.sync_members(
+        [
+            {"discord_id": "111", "display_name": "Alice", "avatar_url": None},
+            {"discord_id": "222", "display_name": "Bob", "avatar_url": "bob.png"},
+        ]
+    )
+    await svc_mod.add_member("custom1", "Bringus")
+    return db_mod, svc_mod
+
+
+def _statements() -> int:
+    return sum(s.count for s in query_stats.get_stats())
+
+
+@pytest.mark.asyncio
+async def test_lookups_read_members_once(db):
+    _db_mod, svc = db
+    query_stats.reset()
+
+    assert await svc.get_member_display_names(["111", "222", "nobody"]) == {
+        "111": "Alice",
+        "222": "Bob",
+    }
+    loaded = _statements()
+    assert await svc.get_member_display_name("222") == "Bob"
+    context = await svc.get_member_card_context("222")
+
+    assert context is not None and context.avatar_url == "bob.png"
+    assert _statements() == loaded
+
+
+@pytest.mark.asyncio
+async def test_setters_update_held_profiles(db):
+    _db_mod, svc = db
+    from superpal.cards.member_directory import directory
+
+    await directory.get_many(["111"])
+    await svc.set_member_avatar("111", "alice.png")
+    await svc.set_member_bio_stats("111", "Lore", json.dumps({"ATK": "9"}))
+    assert await svc.toggle_excluded("111") is True
+    await svc.add_member("custom1", "Bringus Prime")
+    query_stats.reset()
+
+    alice = await directory.get("111")
+    custom = await directory.get("custom1")
+
+    assert _statements() == 0
+    assert alice is not None and custom is not None
+    assert (alice.avatar_url, alice.bio, alice.stats_pairs, alice.is_excluded) == (
+        "alice.png",
+        "Lore",
+        (("ATK", "9"),),
+        True,
+    )
+    assert (custom.display_name, custom.is_synthetic) == ("Bringus Prime", True)
+
+
+@pytest.mark.asyncio
+async def test_sync_leaves_synthetic_members_alone(db):
+    _db_mod, svc = db
+    await svc.get_member_display_names(["111", "custom1"])
+
+    await svc.sync_members(
+        [
+            {"discord_id": "111", "display_name": "Alicia", "avatar_url": None},
+            {"discord_id": "custom1", "display_name": "Hijacked", "avatar_url": None},
+        ]
+    )
+
+    assert await svc.get_member_display_names(["111", "custom1"]) == {
+        "111": "Alicia",
+        "custom1": "Bringus",
+    }
+
+
+@pytest.mark.asyncio
+async def test_rows_inserted_elsewhere_are_read_on_demand(db):
+    db_mod, svc = db
+    await svc.get_member_display_name("111")
+    async with aiosqlite.connect(db_mod.DB_PATH) as conn:
+        await conn.execute(
+            "INSERT INTO members (discord_id, display_name, synced_at) VALUES ('333', 'Cy', 'now')"
+        )
+        await conn.commit()
+
+    assert await svc.get_member_display_name("333") == "Cy"
+    query_stats.reset()
+    assert await svc.get_member_display_name("333") == "Cy"
+    assert _statements() == 0
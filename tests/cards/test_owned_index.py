@@ -0,0 +1,135 @@
+import asyncio
+from datetime import datetime, timezone
+
+import aiosqlite
+import pytest
+
+from superpal.cards.owned_index import OwnedSubjectIndex
+
+
+def _subject(discord_id: str, name: str, synthetic: bool = False) -> dict:
+    return {"discord_id": discord_id, "display_name": name, "is_synthetic": synthetic}
+
+
+class _Loader:
+    def __init__(self, subjects: list[dict]):
+        self.subjects = subjects
+        self.calls = 0
+
+    async def __call__(self, owner_id: str) -> list[dict]:
+        self.calls += 1
+        return list(self.subjects)
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_prefix_before_substring():
+    names = ["Alan", "Bob Alderman", "alba", "Cy"]
+    index = OwnedSubjectIndex(_Loader([_subject(str(i), n) for i, n in enumerate(names, 1)]))
+
+    found = await index.search("owner", "AL")
+
+    assert [i for _, i in found] == ["1", "3", "2"]
+    assert [i for _, i in await index.search("owner", "")] == ["1", "2", "3", "4"]
+    assert [i for _, i in await index.search("owner", "", limit=2)] == ["1", "2"]
+
+
+@pytest.mark.asyncio
+async def test_search_matches_custom_tag():
+    subjects = [_subject("1", "Bringus", synthetic=True), _subject("2", "Al")]
+    index = OwnedSubjectIndex(_Loader(subjects))
+
+    assert await index.search("owner", "custom") == [("Bringus (Custom)", "1")]
+
+
+@pytest.mark.asyncio
+async def test_collision_suffix_comes_from_the_whole_collection():
+    subjects = [_subject("1111", "Steve"), _subject("2222", "Steve"), _subject("3", "Stan")]
+    index = OwnedSubjectIndex(_Loader(subjects))
+
+    # Both Steves keep their suffix even when the limit leaves only one of them.
+    assert await index.search("owner", "steve", limit=1) == [("Steve (1111)", "1111")]
+    assert await index.search("owner", "2222") == [("Steve (2222)", "2222")]
+
+
+@pytest.mark.asyncio
+async def test_search_loads_once_until_invalidated():
+    loader = _Loader([_subject("1", "Alan")])
+    index = OwnedSubjectIndex(loader)
+
+    await index.search("owner", "a")
+    await index.search("owner", "al")
+    assert loader.calls == 1
+
+    index.invalidate("someone else")
+    await index.search("owner", "alan")
+    assert loader.calls == 1
+
+    index.invalidate("owner")
+    loader.subjects.append(_subject("2", "Alma"))
+    assert len(await index.search("owner", "al")) == 2
+    assert loader.calls == 2
+
+    index.clear()
+    await index.search("owner", "al")
+    assert loader.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_load_racing_an_invalidation_is_not_kept():
+    release = asyncio.Event()
+    calls = 0
+
+    async def slow_load(owner_id: str) -> list[dict]:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return [_subject("1", "Stale")]
+
+    index = OwnedSubjectIndex(slow_load)
+    search = asyncio.create_task(index.search("owner", ""))
+    await asyncio.sleep(0)
+    index.invalidate("owner")
+    release.set()
+    await search
+
+    await index.search("owner", "")
+    assert calls == 2
+
+
+@pytest.fixture
+async def db(db_mods):
+    db_mod, svc_mod, *_ = db_mods
+    await db_mod.init_db()
+    await svc_mod.sync_members(
+        [
+            {"discord_id": "111", "display_name": "Alice", "avatar_url": None},
+            {"discord_id": "222", "display_name": "Bob", "avatar_url": None},
+        ]
+    )
+    return db_mod, svc_mod
+
+
+@pytest.mark.asyncio
+async def test_service_search_skips_sqlite_and_follows_gifts(db):
+    db_mod, svc = db
+    from superpal.cards import query_stats
+
+    async with aiosqlite.connect(db_mod.DB_PATH) as conn:
+        await conn.execute(
+            "INSERT INTO user_cards"
+            " (owner_id, card_member_id, rarity, quantity, first_acquired_at) "
+            "VALUES ('111', '222', 'common', 1, ?)",
+            (datetime.now(timezone.utc).isoformat(),),
+        )
+        await conn.commit()
+
+    assert [i for _, i in await svc.search_owned_card_subjects("111", "b")] == ["222"]
+    query_stats.reset()
+    assert [i for _, i in await svc.search_owned_card_subjects("111", "o")] == ["222"]
+    assert query_stats.get_stats() == []
+
+    await svc.search_owned_card_subjects("222", "")
+    await svc.gift_card("111", "222", "222", "common")
+
+    assert await svc.search_owned_card_subjects("111", "") == []
+    assert [i for _, i in await svc.search_owned_card_subjects("222", "")] == ["222"]
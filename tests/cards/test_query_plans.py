@@ -0,0 +1,211 @@
+"""Hot-path queries must use an index.
+
+Seeds a database far larger than the test suite's usual handful of rows, runs each
+hot-path service call, and checks the EXPLAIN QUERY PLAN that query_stats captured for
+every statement it issued. A new hot query that scans fails here until it gets an index
+in db._HOT_PATH_INDEXES (or a justification for leaving it off this list).
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+import aiosqlite
+import pytest
+
+from superpal.cards import query_stats
+from superpal.cards.models import CardRef
+
+N_MEMBERS = 300
+RARITIES = ("common", "uncommon", "rare", "legendary")
+
+
+@pytest.fixture
+async def seeded(db_mods):
+    db_mod, svc, fs, ps = db_mods
+    await db_mod.init_db()
+    rng = random.Random(0)
+    now = datetime.now(timezone.utc)
+
+    def ts(days_ago: float) -> str:
+        return (now - timedelta(days=days_ago)).isoformat()
+
+    def member() -> str:
+        return str(rng.randrange(N_MEMBERS))
+
+    async with aiosqlite.connect(db_mod.DB_PATH) as db:
+        await db.executemany(
+            "INSERT INTO members (discord_id, display_name, synced_at) VALUES (?, ?, ?)",
+            [(str(i), f"member{i}", ts(0)) for i in range(N_MEMBERS)],
+        )
+        await db.executemany(
+            "INSERT OR IGNORE INTO user_cards "
+            "(owner_id, card_member_id, rarity, quantity, first_acquired_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (member(), member(), rng.choice(RARITIES), rng.randint(1, 6), ts(30))
+                for _ in range(20_000)
+            ],
+        )
+        await db.executemany(
+            "INSERT INTO fights (mode, challenger_id, opponent_id, status, winner_id, "
+            "created_at, expires_at, last_activity_at, turn_started_at) "
+            "VALUES ('quick', ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    member(),
+                    member(),
+                    rng.choice(["completed"] * 8 + ["active", "lobby", "pending"]),
+                    member(),
+                    ts(d := rng.uniform(0, 90)),
+                    ts(d - 0.01),
+                    ts(d),
+                    ts(d),
+                )
+                for _ in range(5_000)
+            ],
+        )
+        await db.executemany(
+            "INSERT INTO fight_log (fight_id, actor_id, action_type, narrative_text) "
+            "VALUES (?, ?, ?, 'x')",
+            [
+                (rng.randint(1, 5_000), member(), rng.choice(["attack", "item", "run"]))
+                for _ in range(50_000)
+            ],
+        )
+        await db.executemany(
+            "INSERT INTO sessions (token, user_id, scope, created_at, expires_at) "
+            "VALUES (?, ?, 'collection', ?, ?)",
+            [(f"tok{i}", member(), ts(2), ts(rng.uniform(-1, 1))) for i in range(5_000)],
+        )
+        await db.executemany(
+            "INSERT INTO trade_listings (owner_id, status, created_at) VALUES (?, ?, ?)",
+            [(member(), rng.choice(["active", "completed"]), ts(i / 100)) for i in range(2_000)],
+        )
+        await db.executemany(
+            "INSERT INTO trade_listing_items (listing_id, card_member_id, rarity) "
+            "VALUES (?, ?, 'common')",
+            [(rng.randint(1, 2_000), member()) for _ in range(4_000)],
+        )
+        await db.executemany(
+            "INSERT INTO trade_offers (listing_id, proposer_id, status, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (rng.randint(1, 2_000), member(), rng.choice(["pending", "declined"]), ts(1), ts(0))
+                for _ in range(4_000)
+            ],
+        )
+        await db.executemany(
+            "INSERT INTO trade_offer_items (offer_id, card_member_id, rarity) "
+            "VALUES (?, ?, 'common')",
+            [(rng.randint(1, 4_000), member()) for _ in range(8_000)],
+        )
+        await db.executemany(
+            "INSERT INTO markets (title, created_by, status, created_at) VALUES (?, '1', ?, ?)",
+            [(f"market {i}", rng.choice(["open", "resolved"]), ts(i)) for i in range(200)],
+        )
+        await db.executemany(
+            "INSERT OR IGNORE INTO market_bets (market_id, player_id, side, amount, placed_at) "
+            "VALUES (?, ?, ?, 10, ?)",
+            [
+                (rng.randint(1, 200), member(), rng.choice(["yes", "no"]), ts(rng.uniform(0, 60)))
+                for _ in range(20_000)
+            ],
+        )
+        await db.executemany(
+            "INSERT INTO market_probability_history "
+            "(market_id, yes_pct, yes_pool, no_pool, recorded_at) VALUES (?, 0.5, 10, 10, ?)",
+            [(rng.randint(1, 200), ts(rng.uniform(0, 60))) for _ in range(20_000)],
+        )
+        await db.commit()
+    query_stats.reset()
+    yield db_mod, svc, fs, ps
+    query_stats.reset()
+
+
+def _hot_path_calls(svc, fs, ps, pm, sessions):
+    """(label, zero-arg coroutine factory) for every hot-path service call."""
+    listing_items = [CardRef(member_id="1", rarity="common")]
+    return [
+        ("get_collection", lambda: svc.get_collection("1")),
+        ("get_card_quantity", lambda: svc.get_card_quantity("1", "2", "common")),
+        ("get_owned_card_subjects", lambda: svc.get_owned_card_subjects("1")),
+        ("get_active_listings", lambda: svc.get_active_listings("1")),
+        (
+            "get_active_listings filtered page",
+            lambda: svc.get_active_listings(
+                "1", card_member_id="2", rarity="common", before_id=1_500, limit=60
+            ),
+        ),
+        ("get_active_trader_counts", lambda: svc.get_active_trader_counts("1")),
+        ("get_player_listings", lambda: svc.get_player_listings("1")),
+        ("get_my_offers", lambda: svc.get_my_offers("1")),
+        ("get_offers_for_listing", lambda: svc.get_offers_for_listing(7)),
+        ("create_listing", lambda: svc.create_listing("1", listing_items, None)),
+        ("gift_card", lambda: svc.gift_card("1", "2", "3", "common")),
+        ("get_leaderboard(total)", lambda: svc.get_leaderboard("total")),
+        ("get_leaderboard(legendary)", lambda: svc.get_leaderboard("legendary")),
+        ("get_leaderboard(unique)", lambda: svc.get_leaderboard("unique")),
+        ("get_fight", lambda: fs.get_fight(42)),
+        ("get_fight_state", lambda: fs.get_fight_state(42)),
+        ("get_fight_log", lambda: fs.get_fight_log(42)),
+        ("fight_ended_by_escape", lambda: fs.fight_ended_by_escape(42)),
+        ("fight_ended_by_forfeit", lambda: fs.fight_ended_by_forfeit(42)),
+        ("get_pending_challenges", lambda: fs.get_pending_challenges("1")),
+        ("get_active_fight_between", lambda: fs.get_active_fight_between("1", "2")),
+        ("get_player_fights", lambda: fs.get_player_fights("1")),
+        ("get_fight_leaderboard(wins)", lambda: fs.get_fight_leaderboard("wins")),
+        ("get_fight_leaderboard(win_rate)", lambda: fs.get_fight_leaderboard("win_rate")),
+        ("get_fight_leaderboard(escapes)", lambda: fs.get_fight_leaderboard("escapes")),
+        ("auto_forfeit_idle_fights", fs.auto_forfeit_idle_fights),
+        ("expire_pending_challenges", fs.expire_pending_challenges),
+        ("expire_inactive_fights", fs.expire_inactive_fights),
+        ("get_player_items", lambda: ps.get_player_items("1")),
+        ("get_probability_history", lambda: pm.get_probability_history(7)),
+        ("record_probability_snapshot", lambda: pm.record_probability_snapshot(7)),
+        ("list_markets(open)", lambda: pm.list_markets("open")),
+        ("get_player_active_bets", lambda: pm.get_player_active_bets("1")),
+        ("get_player_portfolio", lambda: pm.get_player_portfolio("1")),
+        ("get_bets_for_market_with_names", lambda: pm.get_bets_for_market_with_names(7)),
+        ("get_recent_activity", pm.get_recent_activity),
+        ("get_palycoin_balance", lambda: pm.get_palycoin_balance("1")),
+        ("get_session", lambda: sessions.get_session("tok1")),
+        ("delete_expired_sessions", sessions.delete_expired_sessions),
+    ]
+
+
+# One row per guild member: pages that list every member read it whole by design.
+_SCANNABLE_TABLES = {"members"}
+
+
+def _scans(stats: query_stats.StatementStats) -> list[str]:
+    """Plan steps that read a whole table. An index-order walk cut short by LIMIT is fine,
+    and so is reading a CTE or subquery the statement built itself (a VALUES list, say).
+    """
+    limited = " LIMIT " in stats.sql
+    plan = stats.plan or []
+    derived = {step.split()[1] for step in plan if step.startswith(("CO-ROUTINE ", "MATERIALIZE "))}
+    return [
+        step
+        for step in plan
+        if step.startswith("SCAN ")
+        and step != "SCAN CONSTANT ROW"
+        and step.split()[1] not in _SCANNABLE_TABLES | derived
+        and not (limited and " USING " in step and "INDEX" in step)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_hot_path_queries_use_indexes(seeded):
+    import superpal.palymarket.service as pm
+    import superpal.sessions as sessions
+
+    _, svc, fs, ps = seeded
+    failures = []
+    for label, call in _hot_path_calls(svc, fs, ps, pm, sessions):
+        query_stats.reset()
+        await call()
+        assert query_stats.get_stats(), f"{label} issued no statements"
+        for stats in query_stats.get_stats():
+            if scans := _scans(stats):
+                failures.append(f"{label}: {stats.sql}\n    {'; '.join(scans)}")
+    assert not failures, "hot-path queries scan:\n" + "\n".join(failures)
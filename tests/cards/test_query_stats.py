@@ -0,0 +1,62 @@
+import pytest
+
+from superpal.cards import query_stats
+
+
+@pytest.fixture
+async def db(db_mods):
+    db_mod, svc_mod, *_ = db_mods
+    await db_mod.init_db()
+    query_stats.reset()
+    threshold = query_stats.snapshot()["slow_query_ms"]
+    yield db_mod, svc_mod
+    query_stats.reset()
+    query_stats.set_slow_query_threshold(threshold)
+
+
+def test_normalize_sql_collapses_literals_and_in_lists():
+    sql = """
+        SELECT * FROM user_cards
+        WHERE owner_id = '111' AND quantity > 3 AND rarity IN (?, ?, ?)
+    """
+    assert query_stats.normalize_sql(sql) == (
+        "SELECT * FROM user_cards WHERE owner_id = ? AND quantity > ? AND rarity IN (?)"
+    )
+
+
+def test_is_full_scan():
+    assert query_stats.is_full_scan(["SCAN members"])
+    assert not query_stats.is_full_scan(["SEARCH members USING INDEX sqlite_autoindex_members_1"])
+    assert not query_stats.is_full_scan(["SCAN CONSTANT ROW"])
+
+
+@pytest.mark.asyncio
+async def test_service_queries_are_recorded_with_histogram(db):
+    _, svc = db
+    await svc.get_card_quantity("111", "222", "common")
+    await svc.get_card_quantity("333", "444", "rare")
+    [stats] = [s for s in query_stats.get_stats() if s.sql.startswith("SELECT quantity")]
+    assert stats.count == 2
+    assert sum(stats.buckets) == 2
+    assert stats.plan is not None
+
+
+@pytest.mark.asyncio
+async def test_full_scan_plan_is_captured(db):
+    db_mod, _ = db
+    async with db_mod.reader() as conn:
+        async with conn.execute("SELECT * FROM members WHERE bio = 'x'") as cur:
+            await cur.fetchall()
+    [scan] = query_stats.full_scans()
+    assert scan.sql == "SELECT * FROM members WHERE bio = ?"
+    assert scan.plan is not None
+    assert any(step.startswith("SCAN members") for step in scan.plan)
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_logged_over_threshold(db):
+    _, svc = db
+    query_stats.set_slow_query_threshold(0)
+    await svc.get_card_quantity("111", "222", "common")
+    assert any(q["sql"].startswith("SELECT quantity") for q in query_stats.get_slow_queries())
+    assert query_stats.snapshot()["slow_query_ms"] == 0
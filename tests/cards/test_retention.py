@@ -0,0 +1,156 @@
+import gzip
+import importlib
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+NOW = datetime(2026, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _ago(days: float) -> str:
+    return (NOW - timedelta(days=days)).isoformat()
+
+
+@pytest.fixture
+async def retention(db_mods):
+    db_mod, *_ = db_mods
+    import superpal.cards.retention as retention_mod
+
+    importlib.reload(retention_mod)
+    await db_mod.init_db()
+    return retention_mod
+
+
+async def _count(retention, table: str, where: str = "1") -> int:
+    async with retention.reader() as db:
+        async with db.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}") as cur:
+            return (await cur.fetchone())[0]
+
+
+@pytest.mark.asyncio
+async def test_init_db_enables_incremental_auto_vacuum(retention):
+    async with retention.reader() as db:
+        async with db.execute("PRAGMA auto_vacuum") as cur:
+            assert (await cur.fetchone())[0] == 2  # INCREMENTAL
+
+
+@pytest.mark.asyncio
+async def test_run_retention_deletes_only_expired_rows(retention):
+    async with retention.transaction() as db:
+        for token, expires in (("old", _ago(1)), ("live", _ago(-1))):
+            await db.execute(
+                "INSERT INTO sessions (token, user_id, scope, created_at, expires_at) "
+                "VALUES (?, '1', 'collection', ?, ?)",
+                (token, _ago(30), expires),
+            )
+        for token, created in (("old", _ago(8)), ("new", _ago(1))):
+            await db.execute(
+                "INSERT INTO magic_links (token, user_id, link_type, created_at) "
+                "VALUES (?, '1', 'collection', ?)",
+                (token, created),
+            )
+        for token, expires in (("old", _ago(2)), ("new", _ago(0.5))):
+            await db.execute(
+                "INSERT INTO fight_tokens (token, fight_id, player_id, created_at, expires_at) "
+                "VALUES (?, 1, '1', ?, ?)",
+                (token, _ago(3), expires),
+            )
+        for week in ("2026-03-01", "2026-05-31"):
+            await db.execute(
+                "INSERT INTO draw_log (user_id, week_start, draws_used) VALUES ('1', ?, 1)",
+                (week,),
+            )
+
+    report = await retention.run_retention(now=NOW)
+
+    assert report.deleted["sessions"] == 1
+    assert report.deleted["magic_links"] == 1
+    assert report.deleted["fight_tokens"] == 1
+    assert report.deleted["draw_log"] == 1
+    assert await _count(retention, "sessions") == 1
+    assert await _count(retention, "magic_links", "token = 'new'") == 1
+    assert await _count(retention, "fight_tokens", "token = 'new'") == 1
+    assert await _count(retention, "draw_log", "week_start = '2026-05-31'") == 1
+
+
+@pytest.mark.asyncio
+async def test_fight_log_is_archived_and_escapes_are_kept(retention):
+    async with retention.transaction() as db:
+        for action, created in (("attack", _ago(100)), ("run", _ago(100)), ("attack", _ago(5))):
+            await db.execute(
+                "INSERT INTO fight_log (fight_id, action_type, narrative_text, created_at) "
+                "VALUES (1, ?, 'x', ?)",
+                (action, created),
+            )
+
+    report = await retention.run_retention(now=NOW)
+
+    assert report.archived["fight_log"] == 1
+    remaining = await _count(retention, "fight_log")
+    assert remaining == 2
+    with gzip.open(retention.ARCHIVE_DIR / "fight_log-2026-06.jsonl.gz", "rt") as f:
+        archived = [json.loads(line) for line in f]
+    assert [(r["action_type"], r["created_at"]) for r in archived] == [("attack", _ago(100))]
+
+
+@pytest.mark.asyncio
+async def test_closed_trade_offers_are_deleted_with_their_items(retention):
+    async with retention.transaction() as db:
+        for status in ("declined", "accepted", "pending"):
+            cur = await db.execute(
+                "INSERT INTO trade_offers (listing_id, proposer_id, status, created_at, "
+                "expires_at) VALUES (1, '1', ?, ?, ?)",
+                (status, _ago(60), _ago(59)),
+            )
+            await db.execute(
+                "INSERT INTO trade_offer_items (offer_id, card_member_id, rarity) "
+                "VALUES (?, '2', 'common')",
+                (cur.lastrowid,),
+            )
+
+    report = await retention.run_retention(now=NOW)
+
+    assert report.deleted["trade_offers"] == 1
+    async with retention.reader() as db:
+        async with db.execute("SELECT status FROM trade_offers ORDER BY status") as cur:
+            assert [r[0] for r in await cur.fetchall()] == ["accepted", "pending"]
+    assert await _count(retention, "trade_offer_items") == 2
+
+
+@pytest.mark.asyncio
+async def test_purge_deletes_in_chunks(retention, db_mods, monkeypatch):
+    monkeypatch.setattr(retention, "CHUNK_SIZE", 2)
+    async with retention.transaction() as db:
+        for i in range(5):
+            await db.execute(
+                "INSERT INTO magic_links (token, user_id, link_type, created_at) "
+                "VALUES (?, '1', 'collection', ?)",
+                (f"t{i}", _ago(30)),
+            )
+    pool = db_mods[0].get_pool()
+    units_before = pool.units_committed
+
+    removed = await retention.purge(retention.RetentionPolicy("magic_links", "created_at", 7), NOW)
+
+    assert removed == 5
+    assert pool.units_committed - units_before == 3
+    assert await _count(retention, "magic_links") == 0
+
+
+@pytest.mark.asyncio
+async def test_incremental_vacuum_reports_reclaimed_bytes(retention):
+    async with retention.transaction() as db:
+        await db.executemany(
+            "INSERT INTO fight_log (fight_id, action_type, narrative_text, created_at) "
+            "VALUES (1, 'attack', ?, ?)",
+            [("x" * 2000, _ago(100)) for _ in range(200)],
+        )
+
+    report = await retention.run_retention(now=NOW)
+
+    assert report.deleted["fight_log"] == 200
+    assert report.bytes_reclaimed > 200 * 1000
+    async with retention.reader() as db:
+        async with db.execute("PRAGMA freelist_count") as cur:
+            assert (await cur.fetchone())[0] == 0
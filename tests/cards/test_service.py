@@ -4,6 +4,7 @@ import aiosqlite
 import pytest
 from freezegun import freeze_time
 
+from superpal.cards.models import CardRef
 from superpal.cards.service import _get_week_start
 
 
@@ -115,6 +116,44 @@ async def test_draw_card_increments_quantity_on_duplicate(db):
     assert card.quantity == 2
 
 
+@pytest.mark.asyncio
+async def test_draw_cards_spends_remaining_draws_in_one_transaction(db):
+    db_mod, svc = db
+    await svc.sync_members(
+        [
+            {"discord_id": "111", "display_name": "Alice", "avatar_url": None},
+            {"discord_id": "222", "display_name": "Bob", "avatar_url": None},
+        ]
+    )
+    await svc.draw_card(owner_id="111", max_draws=5)
+    pool = db_mod.get_pool()
+    units_before = pool.units_committed
+
+    cards = await svc.draw_cards(owner_id="111", max_draws=5)
+
+    assert len(cards) == 4
+    assert pool.units_committed - units_before == 1
+    assert await svc.draw_cards(owner_id="111", max_draws=5) == []
+    audit = await svc.get_draw_audit("111")
+    assert audit["draws_used"] == 5
+
+
+@pytest.mark.asyncio
+async def test_draw_cards_respects_count_and_merges_duplicates(db):
+    _db_mod, svc = db
+    await svc.sync_members([{"discord_id": "111", "display_name": "Alice", "avatar_url": None}])
+    import unittest.mock as mock
+
+    import superpal.cards.service as svc_mod
+
+    with mock.patch.object(svc_mod, "_roll_rarity", return_value="common"):
+        cards = await svc.draw_cards(owner_id="111", max_draws=10, count=3)
+    assert len(cards) == 3
+    assert {c.id for c in cards} == {cards[0].id}
+    assert all(c.quantity == 3 for c in cards)
+    assert await svc.get_card_quantity("111", "111", "common") == 3
+
+
 @pytest.mark.asyncio
 async def test_trade_in_requires_three(db):
     db_mod, svc = db
@@ -222,6 +261,71 @@ async def test_upgrade_succeeds(db):
     assert remaining == 0
 
 
+async def _hold(db_mod, owner_id: str, cards: list[tuple[str, str, int]]) -> None:
+    async with aiosqlite.connect(db_mod.DB_PATH) as conn:
+        await conn.executemany(
+            "INSERT INTO user_cards"
+            " (owner_id, card_member_id, rarity, quantity, first_acquired_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (owner_id, mid, rarity, qty, datetime.now(timezone.utc).isoformat())
+                for mid, rarity, qty in cards
+            ],
+        )
+        await conn.commit()
+
+
+@pytest.mark.asyncio
+async def test_upgrade_all_cascades_in_one_commit(db):
+    db_mod, svc = db
+    await _seed_bulk_members(svc)
+    await _hold(db_mod, "111", [("111", "common", 27), ("333", "uncommon", 4)])
+    pool = db_mod.get_pool()
+    commits_before = pool.commits
+
+    exchange = await svc.upgrade_all("111")
+
+    assert pool.commits - commits_before == 1
+    assert exchange.spent == {"common": 25}
+    assert exchange.received == {("111", "rare"): 1}
+    assert exchange.summary() == "Spent 25 cards (25 common) for 1 (1 rare)."
+    assert await svc.get_card_quantity("111", "111", "common") == 2
+    assert await svc.get_card_quantity("111", "111", "uncommon") == 0
+    assert await svc.get_card_quantity("111", "111", "rare") == 1
+    assert await svc.get_card_quantity("111", "333", "uncommon") == 4
+
+
+@pytest.mark.asyncio
+async def test_upgrade_all_with_nothing_eligible(db):
+    db_mod, svc = db
+    await _seed_bulk_members(svc)
+    await _hold(db_mod, "111", [("111", "common", 4), ("333", "legendary", 9)])
+
+    exchange = await svc.upgrade_all("111")
+
+    assert exchange.received == {}
+    assert exchange.summary() == "Nothing to exchange."
+    assert await svc.get_card_quantity("111", "333", "legendary") == 9
+
+
+@pytest.mark.asyncio
+async def test_trade_in_all_keeps_one_of_each(db):
+    db_mod, svc = db
+    await _seed_bulk_members(svc)
+    await _hold(db_mod, "111", [("333", "common", 8), ("card1", "rare", 3)])
+    import unittest.mock as mock
+
+    with mock.patch("random.choice", return_value="111"):
+        exchange = await svc.trade_in_all("111", drawn_by_name="Alice")
+
+    # 8 commons: two trade-ins, two left; 3 rares: one trade-in would leave none, so none.
+    assert exchange.spent == {"common": 6}
+    assert exchange.received == {("111", "common"): 2}
+    assert await svc.get_card_quantity("111", "333", "common") == 2
+    assert await svc.get_card_quantity("111", "111", "common") == 2
+    assert await svc.get_card_quantity("111", "card1", "rare") == 3
+
+
 @pytest.mark.asyncio
 async def test_magic_link_reusable_within_24h(db):
     _db_mod, svc = db
@@ -309,6 +413,64 @@ async def test_award_card_rejects_invalid_rarity(db):
     assert result is None
 
 
+async def _seed_bulk_members(svc) -> None:
+    await svc.sync_members(
+        [
+            {"discord_id": mid, "display_name": mid, "avatar_url": None}
+            for mid in ("111", "222", "333", "card1")
+        ]
+    )
+    await svc.set_excluded("222", excluded=True)
+
+
+@pytest.mark.asyncio
+async def test_award_card_to_all_skips_excluded_in_one_commit(db):
+    db_mod, svc = db
+    await _seed_bulk_members(svc)
+    await svc.award_card("111", "card1", "rare", 1)
+    pool = db_mod.get_pool()
+    commits_before = pool.commits
+
+    result = await svc.award_card_to_all("card1", "rare", 2)
+
+    assert pool.commits - commits_before == 1
+    assert (result.members, result.rows_affected) == (3, 3)
+    assert await svc.get_card_quantity("111", "card1", "rare") == 3
+    assert await svc.get_card_quantity("333", "card1", "rare") == 2
+    assert await svc.get_card_quantity("card1", "card1", "rare") == 2
+    assert await svc.get_card_quantity("222", "card1", "rare") == 0
+
+
+@pytest.mark.asyncio
+async def test_award_card_to_all_rejects_invalid_rarity(db):
+    _db_mod, svc = db
+    await _seed_bulk_members(svc)
+    assert await svc.award_card_to_all("card1", "mythic", 1) is None
+
+
+@pytest.mark.asyncio
+async def test_add_draws_to_all_restores_used_draws_of_included_members(db):
+    _db_mod, svc = db
+    await _seed_bulk_members(svc)
+    for owner in ("111", "222"):
+        await svc.draw_cards(owner, max_draws=3)
+
+    result = await svc.add_draws_to_all(2)
+
+    assert (result.members, result.rows_affected) == (3, 1)
+    assert (await svc.get_draw_audit("111"))["draws_used"] == 1
+    assert (await svc.get_draw_audit("222"))["draws_used"] == 3
+
+
+@pytest.mark.asyncio
+async def test_toggle_excluded_flips_and_reports_state(db):
+    _db_mod, svc = db
+    await _seed_bulk_members(svc)
+    assert await svc.toggle_excluded("222") is False
+    assert await svc.toggle_excluded("111") is True
+    assert await svc.toggle_excluded("nobody") is None
+
+
 # ─── Peer trade tests ────────────────────────────────────────────────────────
 
 
@@ -579,6 +741,60 @@ async def test_get_leaderboard_result_keys(db):
     assert set(result[0].keys()) == {"owner_id", "display_name", "total"}
 
 
+async def _collection_stats(db_mod) -> list[tuple]:
+    async with db_mod.reader() as db:
+        async with db.execute(
+            "SELECT owner_id, total_cards, legendary_cards, unique_subjects "
+            "FROM collection_stats WHERE total_cards > 0 ORDER BY owner_id"
+        ) as cur:
+            return [tuple(r) for r in await cur.fetchall()]
+
+
+@pytest.mark.asyncio
+async def test_collection_stats_track_every_card_write(db):
+    db_mod, svc = db
+    await svc.sync_members(
+        [
+            {"discord_id": mid, "display_name": mid.title(), "avatar_url": None}
+            for mid in ("alice", "bob", "card1", "card2")
+        ]
+    )
+    await svc.draw_cards("alice", max_draws=5, count=5)
+    await svc.award_card("alice", "card1", "common", 6)
+    await svc.award_card("alice", "card2", "legendary", 2)
+    await svc.gift_card("alice", "bob", "card2", "legendary")
+    await svc.trade_in("alice", "card1", "common")
+    await svc.upgrade("alice", "card1", "common")
+    await svc.award_card("bob", "card1", "rare", 1)
+    listing = await svc.create_listing("alice", [CardRef("card2", "legendary")], None)
+    offer = await svc.create_offer(listing.id, "bob", [CardRef("card1", "rare")])
+    assert await svc.accept_offer(offer.id, "alice") == (True, None)
+    incremental = await _collection_stats(db_mod)
+
+    owners = await svc.rebuild_collection_stats()
+
+    assert incremental == await _collection_stats(db_mod)
+    assert owners == 2
+
+
+@pytest.mark.asyncio
+async def test_rebuild_collection_stats_repairs_drift(db):
+    db_mod, svc = db
+    await svc.sync_members(
+        [
+            {"discord_id": "alice", "display_name": "Alice", "avatar_url": None},
+            {"discord_id": "card1", "display_name": "Card1", "avatar_url": None},
+        ]
+    )
+    await svc.award_card("alice", "card1", "legendary", 3)
+    async with db_mod.transaction() as conn:
+        await conn.execute("UPDATE collection_stats SET total_cards = 99, unique_subjects = 7")
+
+    await svc.rebuild_collection_stats()
+
+    assert await _collection_stats(db_mod) == [("alice", 3, 3, 1)]
+
+
 @freeze_time("2026-05-13 15:00:00+00:00")  # Wednesday
 def test_get_week_start_midweek_returns_last_sunday():
     result = _get_week_start()
@@ -133,6 +133,62 @@ async def test_get_active_listings_excludes_own(db):
     assert len(listings_all) == 1
 
 
+async def _seed_listings(db_mod, svc, n: int) -> list[int]:
+    """Alice lists n cards, alternating common Bob and rare Alice; returns ids, oldest first."""
+    await _seed_two_players(svc)
+    ids = []
+    for i in range(n):
+        ref = CardRef("222", "common") if i % 2 == 0 else CardRef("111", "rare")
+        await _give_card(db_mod, "111", ref.member_id, ref.rarity, qty=n)
+        listing = await svc.create_listing("111", [ref], None)
+        ids.append(listing.id)
+    return ids
+
+
+@pytest.mark.asyncio
+async def test_get_active_listings_filters_by_card_and_rarity(db):
+    db_mod, svc = db
+    ids = await _seed_listings(db_mod, svc, 4)
+
+    by_member = await svc.get_active_listings(card_member_id="222")
+    by_rarity = await svc.get_active_listings(rarity="rare")
+
+    assert [lst.id for lst in by_member] == [ids[2], ids[0]]
+    assert [lst.id for lst in by_rarity] == [ids[3], ids[1]]
+    assert await svc.get_active_listings(card_member_id="222", rarity="rare") == []
+
+
+@pytest.mark.asyncio
+async def test_get_active_listings_pages_by_keyset(db):
+    db_mod, svc = db
+    ids = await _seed_listings(db_mod, svc, 5)
+
+    first = await svc.get_active_listings(limit=2)
+    second = await svc.get_active_listings(before_id=first[-1].id, limit=2)
+    third = await svc.get_active_listings(before_id=second[-1].id, limit=2)
+
+    assert [lst.id for lst in first + second + third] == ids[::-1]
+
+
+@pytest.mark.asyncio
+async def test_get_active_listings_query_count_does_not_grow_with_listings(db):
+    from superpal.cards import query_stats
+
+    db_mod, svc = db
+    await _seed_listings(db_mod, svc, 12)
+    await _give_card(db_mod, "222", "111", "common")
+    for listing in await svc.get_active_listings():
+        await svc.create_offer(listing.id, "222", [CardRef("111", "common")])
+    query_stats.reset()
+
+    listings = await svc.get_active_listings()
+
+    assert len(listings) == 12
+    assert all(lst.offer_count == 1 and len(lst.items) == 1 for lst in listings)
+    assert sum(s.count for s in query_stats.get_stats()) <= 3
+    query_stats.reset()
+
+
 @pytest.mark.asyncio
 async def test_create_offer_rejects_self_offer(db):
     db_mod, svc = db
@@ -238,6 +294,57 @@ async def test_accept_offer_fails_if_card_no_longer_held(db):
     assert err == "listing_no_card"
 
 
+@pytest.mark.asyncio
+async def test_repeated_items_need_that_many_copies(db):
+    db_mod, svc = db
+    await _seed_two_players(svc)
+    await _give_card(db_mod, "111", "222", "common", qty=2)
+    assert await svc.create_listing("111", [CardRef("222", "common")] * 3, None) == "no_card"
+    listing = await svc.create_listing("111", [CardRef("222", "common")] * 2, None)
+    await _give_card(db_mod, "222", "111", "rare", qty=1)
+    assert await svc.create_offer(listing.id, "222", [CardRef("111", "rare")] * 2) == "no_card"
+
+
+async def _multi_card_trade(db_mod, svc, n: int) -> int:
+    """Alice lists n of her Bob commons, Bob offers n of his Alice rares; returns offer id."""
+    await _give_card(db_mod, "111", "222", "common", qty=n)
+    await _give_card(db_mod, "222", "111", "rare", qty=n)
+    listing = await svc.create_listing("111", [CardRef("222", "common")] * n, None)
+    offer = await svc.create_offer(listing.id, "222", [CardRef("111", "rare")] * n)
+    return offer.id
+
+
+@pytest.mark.asyncio
+async def test_accept_offer_moves_every_copy_and_drops_emptied_rows(db):
+    db_mod, svc = db
+    await _seed_two_players(svc)
+    offer_id = await _multi_card_trade(db_mod, svc, 5)
+
+    assert await svc.accept_offer(offer_id, "111") == (True, None)
+
+    assert await svc.get_card_quantity("222", "222", "common") == 5
+    assert await svc.get_card_quantity("111", "111", "rare") == 5
+    async with db_mod.reader() as conn:
+        async with conn.execute("SELECT COUNT(*) FROM user_cards WHERE quantity <= 0") as cur:
+            assert (await cur.fetchone())[0] == 0
+
+
+@pytest.mark.asyncio
+async def test_accept_offer_statement_count_does_not_grow_with_trade_size(db):
+    from superpal.cards import query_stats
+
+    db_mod, svc = db
+    await _seed_two_players(svc)
+    counts = []
+    for n in (1, 20):
+        offer_id = await _multi_card_trade(db_mod, svc, n)
+        query_stats.reset()
+        assert await svc.accept_offer(offer_id, "111") == (True, None)
+        counts.append(sum(s.count for s in query_stats.get_stats()))
+    query_stats.reset()
+    assert counts[0] == counts[1]
+
+
 @pytest.mark.asyncio
 async def test_accept_offer_rejects_non_owner(db):
     db_mod, svc = db
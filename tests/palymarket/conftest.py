@@ -16,4 +16,5 @@ async def db(tmp_path, monkeypatch):
     importlib.reload(svc_mod)
 
     await db_mod.init_db()
-    return db_mod, svc_mod
+    yield db_mod, svc_mod
+    await db_mod.close_pool()
@@ -1,3 +1,5 @@
+import asyncio
+
 import aiosqlite
 import pytest
 
@@ -305,3 +307,29 @@ async def test_resolve_market_no_winners(db):
     assert result["winner_count"] == 0
     assert result["total_pool"] == 100
     assert result["payouts"] == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_share_a_snapshot_without_touching_its_row_factory(db):
+    """Readers gathered under one snapshot get their own row types, and leave none behind."""
+    db_mod, svc = db
+    await _insert_member(db_mod.DB_PATH, "player1", palycoin_balance=100)
+    market = await svc.propose_market("Test", None, "player1")
+    await svc.approve_market(market.id, "admin")
+    await svc.place_or_update_bet(market.id, "player1", "yes", 50)
+
+    async def member_ids() -> list[tuple]:
+        async with db_mod.reader() as conn:
+            async with conn.execute("SELECT discord_id FROM members") as cur:
+                return list(await cur.fetchall())
+
+    async with db_mod.snapshot() as snap:
+        markets, bets, ids = await asyncio.gather(
+            asyncio.gather(*(svc.get_market(market.id) for _ in range(5))),
+            asyncio.gather(*(svc.get_bets_for_market(market.id) for _ in range(5))),
+            asyncio.gather(*(member_ids() for _ in range(5))),
+        )
+        assert snap.row_factory is None
+    assert all(m is not None and m.id == market.id for m in markets)
+    assert all([b.amount for b in bet] == [50] for bet in bets)
+    assert all(rows == [("player1",)] for rows in ids)
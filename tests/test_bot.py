@@ -370,34 +370,34 @@ class TestCommandsList:
 
 
 class TestLabelCardSubjects:
-    """Tests for _label_card_subjects autocomplete label formatting."""
+    """Tests for label_card_subjects autocomplete label formatting."""
 
     def test_plain_label_for_real_member(self, mock_env):
-        from superpal.cogs.helpers import _label_card_subjects
+        from superpal.cards.owned_index import label_card_subjects
 
         subjects = [{"discord_id": "111", "display_name": "Alice", "is_synthetic": False}]
-        assert _label_card_subjects(subjects) == [("Alice", "111")]
+        assert label_card_subjects(subjects) == [("Alice", "111")]
 
     def test_custom_tag_for_synthetic_member(self, mock_env):
-        from superpal.cogs.helpers import _label_card_subjects
+        from superpal.cards.owned_index import label_card_subjects
 
         subjects = [{"discord_id": "111", "display_name": "Bringus Prime", "is_synthetic": True}]
-        assert _label_card_subjects(subjects) == [("Bringus Prime (Custom)", "111")]
+        assert label_card_subjects(subjects) == [("Bringus Prime (Custom)", "111")]
 
     def test_no_suffix_when_no_collision(self, mock_env):
-        from superpal.cogs.helpers import _label_card_subjects
+        from superpal.cards.owned_index import label_card_subjects
 
         subjects = [
             {"discord_id": "111", "display_name": "Alice", "is_synthetic": False},
             {"discord_id": "222", "display_name": "Bob", "is_synthetic": True},
         ]
-        assert _label_card_subjects(subjects) == [
+        assert label_card_subjects(subjects) == [
             ("Alice", "111"),
             ("Bob (Custom)", "222"),
         ]
 
     def test_disambiguates_colliding_real_names_with_id_suffix(self, mock_env):
-        from superpal.cogs.helpers import _label_card_subjects
+        from superpal.cards.owned_index import label_card_subjects
 
         subjects = [
             {
@@ -411,21 +411,61 @@ class TestLabelCardSubjects:
                 "is_synthetic": False,
             },
         ]
-        result = _label_card_subjects(subjects)
+        result = label_card_subjects(subjects)
         assert result == [
             ("Steve (1111)", "111111111111111111"),
             ("Steve (2222)", "222222222222222222"),
         ]
 
     def test_disambiguates_colliding_synthetic_names(self, mock_env):
-        from superpal.cogs.helpers import _label_card_subjects
+        from superpal.cards.owned_index import label_card_subjects
 
         subjects = [
             {"discord_id": "aaaa1111", "display_name": "Bringus", "is_synthetic": True},
             {"discord_id": "bbbb2222", "display_name": "Bringus", "is_synthetic": True},
         ]
-        result = _label_card_subjects(subjects)
+        result = label_card_subjects(subjects)
         assert result == [
             ("Bringus (Custom) (1111)", "aaaa1111"),
             ("Bringus (Custom) (2222)", "bbbb2222"),
         ]
+
+
+class TestFightExpiry:
+    """Tests for seeding the fight deadline heap."""
+
+    async def _run_expiry(self, monkeypatch, backplane: str) -> AsyncMock:
+        import asyncio
+
+        from superpal.cogs import fights
+
+        async def first_fails() -> int:
+            if reconcile.await_count == 1:
+                raise RuntimeError("database is locked")
+            return 3
+
+        reconcile = AsyncMock(side_effect=first_fails)
+        monkeypatch.setattr(fights, "reconcile_fight_deadlines", reconcile)
+        run = AsyncMock(side_effect=asyncio.Event().wait)
+        monkeypatch.setattr(fights.fight_deadlines, "run", run)
+        monkeypatch.setattr(fights.fight_deadlines, "enabled", False)
+        monkeypatch.setattr(fights.superpal_env, "FIGHT_BACKPLANE", backplane)
+        monkeypatch.setattr(fights, "RECONCILE_RETRY_SECONDS", 0)
+        monkeypatch.setattr(fights, "RECONCILE_INTERVAL_SECONDS", 0)
+        bot = Mock()
+        bot.wait_until_ready = AsyncMock()
+        task = asyncio.create_task(fights.FightsCog(bot)._run_fight_expiry())
+        for _ in range(20):
+            await asyncio.sleep(0)
+        task.cancel()
+        return reconcile
+
+    @pytest.mark.asyncio
+    async def test_seeds_once_retrying_until_it_succeeds(self, mock_env, monkeypatch):
+        reconcile = await self._run_expiry(monkeypatch, "local")
+        assert reconcile.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_keeps_reconciling_with_other_worker_processes(self, mock_env, monkeypatch):
+        reconcile = await self._run_expiry(monkeypatch, "unix:/tmp/fights.sock")
+        assert reconcile.await_count > 2
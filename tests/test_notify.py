@@ -124,13 +124,14 @@ async def test_announce_fight_result_sends_embed():
         patch("superpal.notify.get_fight", new=AsyncMock(return_value=_fake_fight())),
         patch("superpal.notify.fight_ended_by_escape", new=AsyncMock(return_value=False)),
         patch(
-            "superpal.notify.get_member_display_name",
-            new=AsyncMock(side_effect=lambda pid: {"p1": "Alice", "p2": "Bob"}.get(pid)),
-        ),
+            "superpal.notify.get_member_display_names",
+            new=AsyncMock(return_value={"p1": "Alice", "p2": "Bob"}),
+        ) as get_names,
     ):
         await notify.announce_fight_result(1)
 
     bot.get_channel.assert_called_once_with(555)
+    get_names.assert_awaited_once_with(["p1", "p2"])
     channel.send.assert_awaited_once()
     embed = channel.send.call_args.kwargs["embed"]
     assert "Alice" in embed.description
@@ -154,7 +155,10 @@ async def test_announce_fight_result_escape_flavor():
             new=AsyncMock(return_value=_fake_fight(mode="extended")),
         ),
         patch("superpal.notify.fight_ended_by_escape", new=AsyncMock(return_value=True)),
-        patch("superpal.notify.get_member_display_name", new=AsyncMock(return_value="Pal")),
+        patch(
+            "superpal.notify.get_member_display_names",
+            new=AsyncMock(return_value={"p1": "Pal", "p2": "Pal"}),
+        ),
     ):
         await notify.announce_fight_result(1)
 
@@ -2,7 +2,7 @@ from datetime import datetime, timezone
 
 from freezegun import freeze_time
 
-from superpal.schedule import next_sunday_noon_utc
+from superpal.schedule import next_hour_utc, next_sunday_noon_utc
 
 
 def _utc(year, month, day, hour=0, minute=0):
@@ -49,3 +49,15 @@ def test_result_is_utc_aware():
 def test_result_is_in_the_future():
     now = datetime.now(timezone.utc)
     assert next_sunday_noon_utc() > now
+
+
+# Before the hour — later today
+@freeze_time("2026-05-13 03:30:00+00:00")
+def test_next_hour_before_returns_today():
+    assert next_hour_utc(4) == _utc(2026, 5, 13, 4, 0)
+
+
+# At or past the hour — tomorrow
+@freeze_time("2026-05-13 04:00:00+00:00")
+def test_next_hour_at_hour_returns_tomorrow():
+    assert next_hour_utc(4) == _utc(2026, 5, 14, 4, 0)
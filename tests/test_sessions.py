@@ -17,7 +17,8 @@ async def sessions(tmp_path, monkeypatch):
     importlib.reload(db_mod)
     importlib.reload(sessions_mod)
     await db_mod.init_db()
-    return sessions_mod
+    yield sessions_mod
+    await db_mod.close_pool()
 
 
 @pytest.mark.asyncio
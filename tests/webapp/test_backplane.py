@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from superpal.webapp.backplane import InProcessBackplane, UnixSocketBackplane, from_config
+
+
+def _recorder():
+    received = []
+    return received, lambda fight_id, state, remote: received.append((fight_id, state, remote))
+
+
+async def _until(condition, timeout: float = 5.0) -> None:
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+def test_from_config_picks_the_backplane():
+    assert isinstance(from_config("local"), InProcessBackplane)
+    assert isinstance(from_config(""), InProcessBackplane)
+    unix = from_config("unix:/run/superpal/fights.sock")
+    assert isinstance(unix, UnixSocketBackplane)
+    assert unix.path == "/run/superpal/fights.sock"
+
+
+@pytest.mark.asyncio
+async def test_in_process_backplane_delivers_locally():
+    backplane = InProcessBackplane()
+    received, handler = _recorder()
+    backplane.subscribe(handler)
+
+    await backplane.publish(3, {"status": "active"})
+
+    assert received == [(3, {"status": "active"}, False)]
+
+
+@pytest.fixture
+async def workers(tmp_path):
+    path = str(tmp_path / "fights.sock")
+    started = []
+
+    async def start():
+        backplane = UnixSocketBackplane(path)
+        received, handler = _recorder()
+        backplane.subscribe(handler)
+        await backplane.start()
+        await _until(lambda: backplane._writer is not None)
+        started.append(backplane)
+        return backplane, received
+
+    yield start
+    for backplane in started:
+        await backplane.close()
+
+
+@pytest.mark.asyncio
+async def test_unix_backplane_relays_between_workers(workers):
+    (a, a_got), (b, b_got) = await workers(), await workers()
+
+    await a.publish(1, {"turn": 1})
+    await b.publish(2, {"turn": 2})
+    await _until(lambda: len(a_got) == len(b_got) == 2)
+
+    assert sorted(a_got) == [(1, {"turn": 1}, False), (2, {"turn": 2}, True)]
+    assert sorted(b_got) == [(1, {"turn": 1}, True), (2, {"turn": 2}, False)]
+
+
+@pytest.mark.asyncio
+async def test_a_worker_takes_over_when_the_broker_exits(workers):
+    (broker, _), (b, _), (c, c_got) = await workers(), await workers(), await workers()
+    assert broker._server is not None
+
+    await broker.close()
+    await _until(lambda: (b._server or c._server) is not None)
+    await _until(lambda: b._writer is not None and c._writer is not None)
+    await asyncio.sleep(0.1)  # let both reconnect to the new broker
+    await b.publish(5, {"turn": 9})
+    await _until(lambda: len(c_got) == 1)
+
+    assert c_got == [(5, {"turn": 9}, True)]
+
+
+@pytest.mark.asyncio
+async def test_broker_drops_a_worker_that_stops_reading(workers, monkeypatch):
+    from superpal.webapp import backplane as backplane_mod
+
+    monkeypatch.setattr(backplane_mod, "PEER_QUEUE_SIZE", 2)
+    broker, _ = await workers()
+    _stalled_reader, stalled = await asyncio.open_unix_connection(broker.path)
+    await _until(lambda: len(broker._peers) == 2)
+
+    big = {"blob": "x" * 256 * 1024}
+    for turn in range(16):
+        await broker.publish(1, {**big, "turn": turn})
+        await asyncio.sleep(0)
+    await _until(lambda: len(broker._peers) == 1)
+
+    stalled.close()
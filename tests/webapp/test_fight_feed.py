@@ -0,0 +1,65 @@
+from superpal.webapp.fight_feed import HISTORY, FightFeed, diff_state
+
+
+def _state(hp: int = 80, turn: str = "111", log: list | None = None) -> dict:
+    return {
+        "status": "active",
+        "current_turn_player_id": turn,
+        "challenger": {"items": {"heal_potion": 1}, "cards": [{"hp_current": hp}]},
+        "log": log or [],
+    }
+
+
+def test_diff_state_reports_only_changed_leaves():
+    changes = diff_state(_state(), _state(hp=50, turn="222"))
+
+    assert changes == [
+        [["current_turn_player_id"], "222"],
+        [["challenger", "cards", 0, "hp_current"], 50],
+    ]
+
+
+def test_diff_state_replaces_a_dict_whose_keys_changed():
+    new = _state()
+    new["challenger"]["items"] = {}
+
+    assert diff_state(_state(), new) == [[["challenger", "items"], {}]]
+    assert diff_state(_state(), {"error": "fight_not_found"}) is None
+
+
+def test_publish_sends_new_log_entries_only():
+    feed = FightFeed()
+    feed.snapshot(_state(log=[{"id": 1}]))
+
+    message = feed.publish(_state(hp=60, log=[{"id": 1}, {"id": 2}]))
+
+    assert (message["type"], message["seq"]) == ("delta", 1)
+    assert (message["log"], message["log_keep"]) == ([{"id": 2}], 2)
+
+
+def test_since_replays_missed_deltas_or_asks_for_a_snapshot():
+    feed = FightFeed()
+    feed.snapshot(_state())
+    for hp in range(79, 79 - HISTORY - 1, -1):
+        feed.publish(_state(hp=hp))
+
+    missed = feed.since(feed.stream, feed.seq - 2)
+    assert missed is not None
+    assert [m["seq"] for m in missed] == [
+        feed.seq - 1,
+        feed.seq,
+    ]
+    assert feed.since(feed.stream, feed.seq) == []
+    assert feed.since(feed.stream, 0) is None  # older than the history reaches
+    assert feed.since("other-stream", feed.seq) is None
+
+
+def test_snapshot_after_a_publish_carries_the_published_state():
+    feed = FightFeed()
+    feed.snapshot(_state())
+    feed.publish(_state(hp=60))
+
+    message = feed.snapshot(_state())  # read before that publish landed
+
+    assert (message["type"], message["seq"]) == ("state", 1)
+    assert message["data"] == _state(hp=60)
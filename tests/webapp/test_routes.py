@@ -1,22 +1,33 @@
+import asyncio
 import json
 import re
 from datetime import datetime, timedelta, timezone
 from html import unescape
 from html.parser import HTMLParser
-from unittest.mock import AsyncMock, MagicMock, call, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from httpx import ASGITransport, AsyncClient
 
+from superpal.cards import query_stats
 from superpal.cards.models import MagicLink, MemberCardContext
 from superpal.palymarket.models import Market
 from superpal.sessions import Session
 from superpal.webapp.app import create_app
+from superpal.webapp.unit_of_work import UnitOfWork, unit_of_work
 
 
 @pytest.fixture
 def app():
-    return create_app()
+    app = create_app()
+    # Services are patched per test; don't open a real snapshot underneath them.
+    app.dependency_overrides[unit_of_work] = _no_unit_of_work
+    return app
+
+
+async def _no_unit_of_work():
+    with query_stats.counting() as queries:
+        yield UnitOfWork(MagicMock(), queries)
 
 
 @pytest.fixture
@@ -85,7 +96,7 @@ async def test_link_redirect_on_valid_token(client):
         patch("superpal.webapp.routes.get_player_listings", new=AsyncMock(return_value=[])),
         patch("superpal.webapp.routes.get_fight_opponents", new=AsyncMock(return_value=[])),
         patch("superpal.webapp.routes.get_pending_challenges", new=AsyncMock(return_value=[])),
-        patch("superpal.webapp.routes.aiosqlite.connect", return_value=mock_conn),
+        patch("superpal.webapp.routes.reader", return_value=mock_conn),
     ):
         response = await client.get("/link/abc123", follow_redirects=False)
     assert response.status_code == 200
@@ -104,7 +115,7 @@ async def test_link_expired_returns_expired_page(client):
     mock_conn.execute = MagicMock(return_value=mock_cursor)
     with (
         patch("superpal.webapp.routes.use_magic_link", new=AsyncMock(return_value=None)),
-        patch("superpal.webapp.routes.aiosqlite.connect", return_value=mock_conn),
+        patch("superpal.webapp.routes.reader", return_value=mock_conn),
     ):
         response = await client.get("/link/deadbeef", follow_redirects=False)
     assert response.status_code == 200
@@ -137,6 +148,50 @@ async def test_admin_collection_session_cant_access_admin(client):
     assert "expired" in response.text.lower()
 
 
+@pytest.mark.asyncio
+async def test_admin_query_stats_requires_admin(client):
+    with patch(
+        "superpal.webapp.routes.get_session_from_request", new=AsyncMock(return_value=_session())
+    ):
+        response = await client.get("/admin/db/queries")
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_admin_query_stats_returns_snapshot(client):
+    snapshot = {"slow_query_ms": 100.0, "statements": [], "slow_queries": [], "full_scans": []}
+    with (
+        patch(
+            "superpal.webapp.routes.get_session_from_request",
+            new=AsyncMock(return_value=_session("admin")),
+        ),
+        patch("superpal.webapp.routes.query_stats.snapshot", return_value=snapshot),
+    ):
+        response = await client.get("/admin/db/queries")
+    assert response.status_code == 200
+    assert response.json() == snapshot
+
+
+@pytest.mark.asyncio
+async def test_admin_fight_socket_stats_requires_admin(client):
+    with patch(
+        "superpal.webapp.routes.get_session_from_request", new=AsyncMock(return_value=_session())
+    ):
+        response = await client.get("/admin/fights/sockets")
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_admin_fight_socket_stats_reports_latency(client):
+    with patch(
+        "superpal.webapp.routes.get_session_from_request",
+        new=AsyncMock(return_value=_session("admin")),
+    ):
+        response = await client.get("/admin/fights/sockets")
+    assert response.status_code == 200
+    assert set(response.json()) == {"overall", "dropped_consumers", "connections"}
+
+
 @pytest.mark.asyncio
 async def test_admin_exclude_without_session_shows_expired(client):
     with patch("superpal.webapp.routes.get_session_from_request", new=AsyncMock(return_value=None)):
@@ -231,6 +286,40 @@ async def test_trade_in_insufficient_redirects_to_collection(client):
     assert response.headers["location"] == "/collection"
 
 
+@pytest.mark.asyncio
+async def test_upgrade_all_shows_summary(client):
+    from superpal.cards.models import CardExchange
+
+    exchange = CardExchange(spent={"common": 25}, received={("222", "rare"): 1})
+    link = _session()
+    with (
+        patch("superpal.webapp.routes.get_session_from_request", new=AsyncMock(return_value=link)),
+        patch("superpal.webapp.routes.upgrade_all", new=AsyncMock(return_value=exchange)),
+        patch(
+            "superpal.webapp.routes.get_member_display_names",
+            new=AsyncMock(return_value={"222": "Florp Xennial"}),
+        ),
+    ):
+        response = await client.post("/collection/upgrade-all")
+    assert response.status_code == 200
+    assert "Spent 25 cards (25 common) for 1 (1 rare)." in response.text
+    assert "Florp Xennial" in response.text
+
+
+@pytest.mark.asyncio
+async def test_trade_in_all_with_nothing_to_trade_redirects(client):
+    from superpal.cards.models import CardExchange
+
+    link = _session()
+    with (
+        patch("superpal.webapp.routes.get_session_from_request", new=AsyncMock(return_value=link)),
+        patch("superpal.webapp.routes.trade_in_all", new=AsyncMock(return_value=CardExchange())),
+    ):
+        response = await client.post("/collection/trade-in-all", follow_redirects=False)
+    assert response.status_code == 303
+    assert response.headers["location"] == "/collection"
+
+
 @pytest.mark.asyncio
 async def test_admin_add_member_without_session_shows_expired(client):
     with patch("superpal.webapp.routes.get_session_from_request", new=AsyncMock(return_value=None)):
@@ -350,19 +439,16 @@ async def test_admin_award_card_success_redirects(client):
 
 
 @pytest.mark.asyncio
-async def test_admin_award_card_everyone_skips_excluded_members(client):
+async def test_admin_award_card_everyone_awards_in_bulk(client):
+    from superpal.cards.models import BulkResult
+
     link = _session("admin")
-    members = [
-        {"discord_id": "111", "is_excluded": False},
-        {"discord_id": "222", "is_excluded": True},
-        {"discord_id": "333", "is_excluded": False},
-    ]
-    award_card_mock = AsyncMock(return_value=None)
-    get_members_mock = AsyncMock(return_value=members)
+    award_card_mock = AsyncMock()
+    bulk_mock = AsyncMock(return_value=BulkResult(members=2, rows_affected=2))
     with (
         patch("superpal.webapp.routes.get_session_from_request", new=AsyncMock(return_value=link)),
-        patch("superpal.webapp.routes.get_all_members_for_admin", new=get_members_mock),
         patch("superpal.webapp.routes.award_card", new=award_card_mock),
+        patch("superpal.webapp.routes.award_card_to_all", new=bulk_mock),
     ):
         award_data = {
             "owner_id": "everyone",
@@ -373,26 +459,21 @@ async def test_admin_award_card_everyone_skips_excluded_members(client):
         response = await client.post("/admin/award", data=award_data, follow_redirects=False)
     assert response.status_code == 303
     assert response.headers["location"] == "/admin"
-    assert award_card_mock.await_args_list == [
-        call("111", "999", "common", 2),
-        call("333", "999", "common", 2),
-    ]
+    bulk_mock.assert_awaited_once_with("999", "common", 2)
+    award_card_mock.assert_not_awaited()
 
 
 @pytest.mark.asyncio
-async def test_admin_add_draws_everyone_skips_excluded_members(client):
+async def test_admin_add_draws_everyone_adds_in_bulk(client):
+    from superpal.cards.models import BulkResult
+
     link = _session("admin")
-    members = [
-        {"discord_id": "111", "is_excluded": False},
-        {"discord_id": "222", "is_excluded": True},
-        {"discord_id": "333", "is_excluded": False},
-    ]
-    add_draws_mock = AsyncMock(return_value=None)
-    get_members_mock = AsyncMock(return_value=members)
+    add_draws_mock = AsyncMock()
+    bulk_mock = AsyncMock(return_value=BulkResult(members=2, rows_affected=1))
     with (
         patch("superpal.webapp.routes.get_session_from_request", new=AsyncMock(return_value=link)),
-        patch("superpal.webapp.routes.get_all_members_for_admin", new=get_members_mock),
         patch("superpal.webapp.routes.add_draws", new=add_draws_mock),
+        patch("superpal.webapp.routes.add_draws_to_all", new=bulk_mock),
     ):
         response = await client.post(
             "/admin/add-draws",
@@ -401,10 +482,21 @@ async def test_admin_add_draws_everyone_skips_excluded_members(client):
         )
     assert response.status_code == 303
     assert response.headers["location"] == "/admin"
-    assert add_draws_mock.await_args_list == [
-        call("111", 3),
-        call("333", 3),
-    ]
+    bulk_mock.assert_awaited_once_with(3)
+    add_draws_mock.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_admin_exclude_toggles_one_member(client):
+    link = _session("admin")
+    toggle_mock = AsyncMock(return_value=True)
+    with (
+        patch("superpal.webapp.routes.get_session_from_request", new=AsyncMock(return_value=link)),
+        patch("superpal.webapp.routes.toggle_excluded", new=toggle_mock),
+    ):
+        response = await client.post("/admin/exclude/123", follow_redirects=False)
+    assert response.status_code == 303
+    toggle_mock.assert_awaited_once_with("123")
 
 
 @pytest.mark.asyncio
@@ -446,7 +538,7 @@ async def test_collection_shows_completion_pct(client):
         patch("superpal.webapp.routes.get_player_listings", new=AsyncMock(return_value=[])),
         patch("superpal.webapp.routes.get_fight_opponents", new=AsyncMock(return_value=[])),
         patch("superpal.webapp.routes.get_pending_challenges", new=AsyncMock(return_value=[])),
-        patch("superpal.webapp.routes.aiosqlite.connect", return_value=mock_conn),
+        patch("superpal.webapp.routes.reader", return_value=mock_conn),
     ):
         response = await client.get("/collection")
     assert response.status_code == 200
@@ -754,23 +846,41 @@ async def test_fights_page_renders_rows(client):
 
 
 class _FakeWS:
-    def __init__(self, fail=False):
+    def __init__(self, fail=False, stall=False):
         self.sent = []
         self.fail = fail
+        self.stall = stall
+        self.close_code = None
 
-    async def send_json(self, message):
+    async def send_text(self, frame):
         if self.fail:
             raise RuntimeError("socket is gone")
-        self.sent.append(message)
+        if self.stall:
+            await asyncio.Event().wait()
+        self.sent.append(json.loads(frame))
+
+    async def close(self, code=1000):
+        self.close_code = code
 
 
 @pytest.fixture
-def clean_registry():
-    from superpal.webapp import routes
+async def clean_registry():
+    from superpal.webapp import fight_feed, routes
 
     routes._fight_connections.clear()
     yield routes
+    for players in list(routes._fight_connections.values()):
+        for conns in list(players.values()):
+            for outbox in conns.values():
+                outbox.stop()
     routes._fight_connections.clear()
+    fight_feed._feeds.clear()
+
+
+async def _delivered(routes, fight_id: int) -> None:
+    for conns in list(routes._fight_connections.get(fight_id, {}).values()):
+        for outbox in list(conns.values()):
+            await outbox.drained()
 
 
 @pytest.mark.asyncio
@@ -781,9 +891,11 @@ async def test_broadcast_reaches_every_socket_of_both_players(clean_registry):
     routes._register_connection(1, "111", "conn-a2", a2)
     routes._register_connection(1, "222", "conn-b1", b1)
 
-    await routes._broadcast(1, {"type": "state"})
+    await routes._broadcast(1, {"status": "active"})
+    await _delivered(routes, 1)
 
-    assert a1.sent == a2.sent == b1.sent == [{"type": "state"}]
+    assert a1.sent == a2.sent == b1.sent
+    assert [m["data"] for m in a1.sent] == [{"status": "active"}]
 
 
 @pytest.mark.asyncio
@@ -795,9 +907,10 @@ async def test_stale_socket_cleanup_leaves_the_live_one_connected(clean_registry
     routes._register_connection(1, "111", "conn-new", live)
 
     routes._drop_connection(1, "111", "conn-old")
-    await routes._broadcast(1, {"type": "state"})
+    await routes._broadcast(1, {"status": "active"})
+    await _delivered(routes, 1)
 
-    assert live.sent == [{"type": "state"}]
+    assert [m["data"] for m in live.sent] == [{"status": "active"}]
     assert stale.sent == []
 
 
@@ -808,10 +921,35 @@ async def test_broadcast_prunes_only_the_failing_socket(clean_registry):
     routes._register_connection(1, "111", "conn-dead", dead)
     routes._register_connection(1, "222", "conn-live", live)
 
-    await routes._broadcast(1, {"type": "state"})
+    await routes._broadcast(1, {"status": "active"})
+    await _delivered(routes, 1)
+    await asyncio.sleep(0)
 
-    assert live.sent == [{"type": "state"}]
-    assert routes._fight_connections[1] == {"222": {"conn-live": live}}
+    assert [m["data"] for m in live.sent] == [{"status": "active"}]
+    assert list(routes._fight_connections[1]) == ["222"]
+    assert dead.close_code == 1013
+
+
+@pytest.mark.asyncio
+async def test_a_stalled_socket_is_dropped_without_holding_up_the_other(clean_registry):
+    from superpal.webapp.fanout import OUTBOX_SIZE
+
+    routes = clean_registry
+    stalled, live = _FakeWS(stall=True), _FakeWS()
+    routes._register_connection(1, "111", "conn-stalled", stalled)
+    live_outbox = routes._register_connection(1, "222", "conn-live", live)
+
+    # One frame is stuck in the stalled send; OUTBOX_SIZE more fill its queue.
+    for seq in range(OUTBOX_SIZE + 2):
+        await routes._broadcast(1, {"turn": seq})
+        await asyncio.sleep(0)
+    await live_outbox.drained()
+    await asyncio.sleep(0)
+
+    assert [m["seq"] for m in live.sent] == list(range(1, OUTBOX_SIZE + 3))
+    assert list(routes._fight_connections[1]) == ["222"]
+    assert stalled.close_code == 1013
+    assert live_outbox.latency.frames == OUTBOX_SIZE + 2
 
 
 @pytest.mark.asyncio
@@ -890,10 +1028,9 @@ def test_fight_ws_sends_state_on_connect_and_answers_heartbeat(app):
     ):
         client = TestClient(app, cookies={"bringus_session": "sess_abc"})
         with client.websocket_connect("/ws/fight/1") as ws:
-            assert ws.receive_json() == {
-                "type": "state",
-                "data": {"status": "active", "fight_id": 1},
-            }
+            message = ws.receive_json()
+            assert (message["type"], message["seq"]) == ("state", 0)
+            assert message["data"] == {"status": "active", "fight_id": 1}
             ws.send_json({"action": "ping"})
             assert ws.receive_json() == {"type": "pong"}
 
@@ -948,7 +1085,85 @@ def test_fight_ws_claim_win_broadcasts_and_closes(app):
         with client.websocket_connect("/ws/fight/1") as ws:
             ws.receive_json()
             ws.send_json({"action": "claim_win"})
-            assert ws.receive_json() == {"type": "state", "data": final_state}
+            message = ws.receive_json()
+            # The final state gains a winner, so it is sent whole rather than as a delta.
+            assert (message["type"], message["seq"], message["data"]) == ("state", 1, final_state)
+
+
+def test_fight_ws_resume_replays_only_missed_deltas(app):
+    from fastapi.testclient import TestClient
+
+    from superpal.webapp.fight_feed import feed_for
+
+    def state(hp: int) -> dict:
+        return {"status": "active", "log": [], "opponent": {"cards": [{"hp_current": hp}]}}
+
+    with (
+        patch(
+            "superpal.webapp.routes.get_web_session",
+            new=AsyncMock(return_value=_session("fight:1")),
+        ),
+        patch(
+            "superpal.webapp.routes.get_fight",
+            new=AsyncMock(return_value=_fight(status="active")),
+        ),
+        patch("superpal.webapp.routes.touch_fight_activity", new=AsyncMock()),
+        patch("superpal.webapp.routes.get_fight_state", new=AsyncMock(return_value=state(80))),
+    ):
+        client = TestClient(app, cookies={"bringus_session": "sess_abc"})
+        with client.websocket_connect("/ws/fight/1") as first:
+            snapshot = first.receive_json()
+            feed = feed_for(1)
+            feed.publish(state(60))
+            feed.publish(state(45))
+            # The same player reconnecting in another tab, one delta behind.
+            stream = snapshot["stream"]
+            with client.websocket_connect(f"/ws/fight/1?stream={stream}&since=1") as second:
+                message = second.receive_json()
+
+    assert (message["type"], message["seq"]) == ("delta", 2)
+    assert message["changes"] == [[["opponent", "cards", 0, "hp_current"], 45]]
+
+
+def test_fight_ws_join_is_not_overtaken_by_a_concurrent_broadcast(app):
+    """An action landing while a socket joins must not reach it ahead of its snapshot."""
+    from fastapi.testclient import TestClient
+
+    from superpal.webapp import routes
+
+    def state(hp: int) -> dict:
+        return {"status": "active", "log": [], "opponent": {"cards": [{"hp_current": hp}]}}
+
+    reads = 0
+
+    async def read_state(fight_id):
+        nonlocal reads
+        reads += 1
+        if reads == 2:  # the second socket's read, with an action landing meanwhile
+            await routes._broadcast(fight_id, state(60))
+        return state(80)
+
+    with (
+        patch(
+            "superpal.webapp.routes.get_web_session",
+            new=AsyncMock(return_value=_session("fight:1")),
+        ),
+        patch(
+            "superpal.webapp.routes.get_fight",
+            new=AsyncMock(return_value=_fight(status="active")),
+        ),
+        patch("superpal.webapp.routes.touch_fight_activity", new=AsyncMock()),
+        patch("superpal.webapp.routes.get_fight_state", new=read_state),
+    ):
+        client = TestClient(app, cookies={"bringus_session": "sess_abc"})
+        with client.websocket_connect("/ws/fight/1") as first:
+            first.receive_json()
+            with client.websocket_connect("/ws/fight/1") as second:
+                message = second.receive_json()
+            assert first.receive_json()["seq"] == 1
+
+    assert (message["type"], message["seq"]) == ("state", 1)
+    assert message["data"]["opponent"]["cards"][0]["hp_current"] == 60
 
 
 def test_fight_ws_reports_a_rejected_claim_without_closing(app):
@@ -1127,8 +1342,14 @@ async def test_marketplace_page_embeds_parseable_json(client):
         patch("superpal.webapp.routes.get_my_offers", new=AsyncMock(return_value=[])),
         patch(
             "superpal.webapp.routes.get_collection",
-            new=AsyncMock(return_value={"owned": [{"display_name": HOSTILE_NAME}]}),
+            new=AsyncMock(
+                return_value={
+                    "owned": [{"member_id": "111", "display_name": HOSTILE_NAME}],
+                    "undiscovered": [],
+                }
+            ),
         ),
+        patch("superpal.webapp.routes.get_active_trader_counts", new=AsyncMock(return_value=[])),
         patch(
             "superpal.webapp.routes.get_member_card_context",
             new=AsyncMock(return_value=_member()),
@@ -1219,7 +1440,11 @@ async def test_marketplace_listings_show_card_names_not_just_rarity(client):
             "superpal.webapp.routes.get_player_listings", new=AsyncMock(return_value=[my_listing])
         ),
         patch("superpal.webapp.routes.get_my_offers", new=AsyncMock(return_value=[offer])),
-        patch("superpal.webapp.routes.get_collection", new=AsyncMock(return_value={"owned": []})),
+        patch(
+            "superpal.webapp.routes.get_collection",
+            new=AsyncMock(return_value={"owned": [], "undiscovered": []}),
+        ),
+        patch("superpal.webapp.routes.get_active_trader_counts", new=AsyncMock(return_value=[])),
         patch(
             "superpal.webapp.routes.get_member_card_context",
             new=AsyncMock(return_value=_member()),
@@ -1278,7 +1503,7 @@ async def test_collection_page_embeds_parseable_json(client):
         patch("superpal.webapp.routes.get_player_listings", new=AsyncMock(return_value=[])),
         patch("superpal.webapp.routes.get_fight_opponents", new=AsyncMock(return_value=[])),
         patch("superpal.webapp.routes.get_pending_challenges", new=AsyncMock(return_value=[])),
-        patch("superpal.webapp.routes.aiosqlite.connect", return_value=mock_conn),
+        patch("superpal.webapp.routes.reader", return_value=mock_conn),
     ):
         response = await client.get("/collection")
 
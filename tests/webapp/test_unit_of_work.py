@@ -0,0 +1,71 @@
+"""Page handlers against a real database, rendering from one request-scoped snapshot."""
+
+import importlib
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from superpal.webapp.auth import SESSION_COOKIE_NAME
+from superpal.webapp.unit_of_work import QUERY_COUNT_HEADER
+
+
+@pytest.fixture
+async def seeded(tmp_path, monkeypatch):
+    monkeypatch.setenv("CARDS_DB_PATH", str(tmp_path / "test.db"))
+
+    import superpal.cards.db as db_mod
+    import superpal.cards.fight_engine as fe_mod
+    import superpal.cards.fight_service as fs_mod
+    import superpal.cards.member_directory as md_mod
+    import superpal.cards.service as svc_mod
+    import superpal.sessions as sessions_mod
+
+    for mod in (db_mod, md_mod, sessions_mod, svc_mod, fe_mod, fs_mod):
+        importlib.reload(mod)
+    await db_mod.init_db()
+    await svc_mod.sync_members(
+        [
+            {"discord_id": "111", "display_name": "Alice", "avatar_url": None},
+            {"discord_id": "222", "display_name": "Bob", "avatar_url": None},
+        ]
+    )
+    await svc_mod.award_card("111", "222", "rare", 2)
+    session = await sessions_mod.create_session("111", "collection")
+    yield db_mod, session.token
+    await db_mod.close_pool()
+
+
+@pytest.fixture
+async def client(seeded):
+    from superpal.webapp.app import create_app
+
+    _db_mod, token = seeded
+    async with AsyncClient(
+        transport=ASGITransport(app=create_app()),
+        base_url="http://test",
+        cookies={SESSION_COOKIE_NAME: token},
+    ) as c:
+        yield c
+
+
+@pytest.mark.asyncio
+async def test_collection_page_reports_a_stable_query_count(client):
+    await client.get("/collection")  # warms the in-memory member caches
+    first = await client.get("/collection")
+    second = await client.get("/collection")
+
+    assert first.status_code == second.status_code == 200
+    assert "Bob" in first.text
+    assert int(first.headers[QUERY_COUNT_HEADER]) > 0
+    assert first.headers[QUERY_COUNT_HEADER] == second.headers[QUERY_COUNT_HEADER]
+
+
+@pytest.mark.asyncio
+async def test_page_reads_share_one_pooled_connection(seeded, client):
+    db_mod, _token = seeded
+
+    response = await client.get("/collection")
+
+    assert response.status_code == 200
+    # Every service the page called borrowed the request's reader instead of its own.
+    assert len(db_mod.get_pool()._idle_readers) == 1